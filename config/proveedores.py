@@ -6,6 +6,11 @@ Este archivo contiene:
 - CIF_A_PROVEEDOR: diccionario inverso para detectar proveedor por CIF
 - EXTRACTOR_PDF_PROVEEDOR: método de extracción PDF por proveedor
 - PROVEEDOR_ALIAS: alias para normalización de nombres
+- ALIAS_DICCIONARIO: alias de nombre de archivo -> proveedor del diccionario
+- RETENCIONES_PROVEEDOR: porcentaje de retención IRPF por proveedor
+
+Todos estos datos, los atributos de los extractores y el Maestro de
+proveedores se unifican en nucleo.proveedores.RegistroProveedores.
 
 Actualizado: 18/12/2025 - v4.0
 """
@@ -37,6 +42,195 @@ PROVEEDOR_NOMBRE_SALIDA = {
     'ARBORES': 'CONTROLPLAGA',
 }
 
+# =============================================================================
+# ALIAS PARA NORMALIZACIÓN DE PROVEEDOR (antes en main.py)
+# =============================================================================
+
+ALIAS_DICCIONARIO = {
+    # SABORES DE PATERNA
+    'SABORES DE PATERNA': 'SABORES PATERNA',
+    'PATERNA': 'SABORES PATERNA',
+    # FELISA
+    'FELISA GOURMET': 'FELISA',
+    'FELISA GOURMET DON FELIX': 'FELISA',
+    'PESCADOS DON FELIX': 'FELISA',
+    # ZUCCA
+    'QUESERIA ZUCCA': 'ZUCCA',
+    'FORMAGGIARTE': 'ZUCCA',
+    'FORMAGGIARTE ZUCCA': 'ZUCCA',
+    'QUESOS ZUCCA': 'ZUCCA',
+    # SERRIN - incluyendo errores ortográficos
+    'SERRIN NOCHAO': 'SERRIN NO CHAO',
+    'SERRIN NO CHAN': 'SERRIN NO CHAO',
+    'SERRIN': 'SERRIN NO CHAO',
+    'SERRRIN': 'SERRIN NO CHAO',  # error ortográfico con 3 R
+    'SERRRIN NO CHAO': 'SERRIN NO CHAO',
+    'SERRRIN TF': 'SERRIN NO CHAO',
+    # DE LUIS
+    'DE LUIS': 'DE LUIS SABORES UNICOS',
+    # BERZAL
+    'BERZAL': 'BERZAL HERMANOS',
+    'BERZAL HNOS': 'BERZAL HERMANOS',
+    'BERZAL HNOS.': 'BERZAL HERMANOS',
+    # CONSERVAS TITO
+    'PORVAZ': 'CONSERVAS TITO',
+    'PORVAZ VILLAGARCIA': 'CONSERVAS TITO',
+    'PORVAZ TITO': 'CONSERVAS TITO',
+    # EMBUTIDOS BERNAL
+    'JAMONES BERNAL': 'EMBUTIDOS BERNAL',
+    'JAMONES Y EMBUTIDOS BERNAL': 'EMBUTIDOS BERNAL',
+    'BERNAL': 'EMBUTIDOS BERNAL',
+    # SILVA CORDERO
+    'QUESOS SILVA CORDERO': 'SILVA CORDERO',
+    'QUESOS DE ACEHUCHE': 'SILVA CORDERO',
+    # QUESERIA NAVAS
+    'CARLOS NAVAS': 'QUESERIA NAVAS',
+    'QUESOS NAVAS': 'QUESERIA NAVAS',
+    'QUESERIA CARLOS NAVAS': 'QUESERIA NAVAS',
+    # LA ALACENA
+    'CONSERVAS LA ALACENA': 'LA ALACENA',
+    # GADITAUN
+    'MARILINA GADITAUN': 'GADITAUN',
+    'GARDITAUN MARIA LINAREJOS': 'GADITAUN',
+    'GADITAUN MARIA LINAREJOS': 'GADITAUN',
+    'GADITAUN MARILINA': 'GADITAUN',
+    'MARILINA': 'GADITAUN',
+    # BORBOTON
+    'BODEGAS BORBOTON': 'BORBOTON',
+    # ARTESANOS DEL MOLLETE
+    'ARTESANOS DEL MOLLETE': 'MOLLETES ARTESANOS',
+    'MOLLETES ARTESANOS DE ANTEQUERA': 'MOLLETES ARTESANOS',
+    'ARTESANOS DEL MOLINO': 'MOLLETES ARTESANOS',
+    # ZUBELZU
+    'ZUBELZU PIPARRAK': 'ZUBELZU',
+    'IBARRAKO': 'ZUBELZU',
+    'IBARRAKO PIPARRAK': 'ZUBELZU',
+    # LA MOLIENDA VERDE
+    'MOLIENDA VERDE': 'LA MOLIENDA VERDE',
+    # DISTRIBUCIONES LAVAPIES
+    'LAVAPIES': 'DISTRIBUCIONES LAVAPIES',
+    # GRUPO DISBER
+    'DISBER': 'GRUPO DISBER',
+    # MRM
+    'INDUSTRIAS CARNICAS MRM': 'MRM',
+    # PILAR RODRIGUEZ
+    'EL MAJADAL': 'PILAR RODRIGUEZ',
+    'EL MAJADAL PILAR RODRIGUEZ': 'PILAR RODRIGUEZ',
+    # TERRITORIO CAMPERO
+    'GRUPO TERRITORIO CAMPERO': 'TERRITORIO CAMPERO',
+    'GRUPO CAMPERO': 'TERRITORIO CAMPERO',
+    # MARITA
+    'MARITA COSTA': 'MARITA',
+    # LA BARRA DULCE
+    'BARRA DULCE': 'LA BARRA DULCE',
+    'LA BARRA DULCE S.L.': 'LA BARRA DULCE',
+    # TIRSO PAPEL Y BOLSAS (NUEVO 01/01/2026)
+    'TIRSO': 'TIRSO PAPEL Y BOLSAS',
+    'TIRSO PAPEL': 'TIRSO PAPEL Y BOLSAS',
+    'BOLSAS TIRSO': 'TIRSO PAPEL Y BOLSAS',
+    'TIRSO PAPEL Y BOLSAS SL': 'TIRSO PAPEL Y BOLSAS',
+    'TIRSO PAPAEL Y BOLSAS': 'TIRSO PAPEL Y BOLSAS',  # typo en archivos
+    'TIRSO PAPAEL Y BOLSAS SL': 'TIRSO PAPEL Y BOLSAS',
+    # LA CONSERVERA DEL PREPIRINEO (NUEVO 01/01/2026)
+    'CONSERVERA PREPIRINEO': 'LA CONSERVERA DEL PREPIRINEO',
+    'CONSERVERA DEL PREPIRINEO': 'LA CONSERVERA DEL PREPIRINEO',
+    'LA CONSERVERA PREPIRINEO': 'LA CONSERVERA DEL PREPIRINEO',
+    # MIGUEZ CAL
+    'FORPLAN': 'MIGUEZ CAL',
+    # MARTIN ABENZA
+    'CONSERVAS EL MODESTO': 'MARTIN ABENZA',
+    'MARTIN ARBENZA': 'MARTIN ABENZA',
+    'MARTIN ARBENZA EL MODESTO': 'MARTIN ABENZA',
+    # WELLDONE
+    'RODOLFO DEL RIO': 'WELLDONE',
+    'WELLDONE LACTICOS': 'WELLDONE',
+    # MANIPULADOS ABELLAN
+    'EL LABRADOR': 'MANIPULADOS ABELLAN',
+    'ABELLAN': 'MANIPULADOS ABELLAN',
+    # LA ROSQUILLERIA  
+    'EL TORRO': 'LA ROSQUILLERIA',
+    # PANRUJE
+    'ROSQUILLAS LA ERMITA': 'PANRUJE',
+    # LICORES MADRUEÑO
+    'MADRUEÑO': 'LICORES MADRUEÑO',
+    # VINOS DE ARGANZA
+    'ARGANZA': 'VINOS DE ARGANZA',
+    # CVNE
+    'BODEGAS CVNE': 'CVNE',
+    # LA PURISIMA
+    'BODEGAS LA PURISIMA': 'LA PURISIMA',
+    'BODEGAS VIRGEN DE LA SIERRA': 'VIRGEN DE LA SIERRA',
+    # FRANCISCO GUERRA
+    'GUERRA': 'FRANCISCO GUERRA',
+    # FISHGOURMET
+    'FISH GOURMET': 'FISHGOURMET',
+    # ECOFICUS
+    'ECO FICUS': 'ECOFICUS',
+    # LOS GREDALES
+    'GREDALES': 'LOS GREDALES',
+    'LOS GREDALES DEL TOBOSO': 'LOS GREDALES',
+    
+    # ========== NUEVOS ALIAS v5.7 (01/01/2026) ==========
+    
+    # DEBORA GARCIA TOLEDANO - múltiples variantes
+    'DEBORA': 'DEBORA GARCIA TOLEDANO',
+    'DEBORAH': 'DEBORA GARCIA TOLEDANO',
+    'BEDORAH': 'DEBORA GARCIA TOLEDANO',
+    'DEBORA GARCIA': 'DEBORA GARCIA TOLEDANO',
+    'DEBORAH GARCIA': 'DEBORA GARCIA TOLEDANO',
+    'BEDORAH GARCIA': 'DEBORA GARCIA TOLEDANO',
+    'DEBORAH GARCIA TOLEDANO': 'DEBORA GARCIA TOLEDANO',
+    'BEDORAH GARCIA TOLEDANO': 'DEBORA GARCIA TOLEDANO',
+    
+    # HERNANDEZ SUMINISTROS
+    'HERNANDEZ': 'HERNANDEZ SUMINISTROS',
+    'HERNÁNDEZ': 'HERNANDEZ SUMINISTROS',
+    'HERNANDEZ SUMINISTROS HOSTELEROS': 'HERNANDEZ SUMINISTROS',
+    'HERNÁNDEZ SUMINISTROS HOSTELEROS': 'HERNANDEZ SUMINISTROS',
+    'HERNANDEZ SUM HOSTELEROS': 'HERNANDEZ SUMINISTROS',
+    
+    # ISAAC RODRIGUEZ / TRUCCO COPIAS
+    'TRUCCO COPIAS': 'ISAAC RODRIGUEZ',
+    'TRUCCO COPIAS ISAAC RODRIGUEZ': 'ISAAC RODRIGUEZ',
+    'TRUCCO ISSAC RODRIGUEZ': 'ISAAC RODRIGUEZ',
+    'TRUCCO COPIAS ISAAC HERNANDEZ': 'ISAAC RODRIGUEZ',
+    'ISAAC RODRIGUEZ TRUCCO COPIAS': 'ISAAC RODRIGUEZ',
+    
+    # LA DOLOROSA / PABLO RUIZ
+    'LA DOLOROSA': 'PABLO RUIZ',
+    'PABLO RUIZ LA DOLOROSA': 'PABLO RUIZ',
+    
+    # LUCERA / ENERGIA COLECTIVA
+    'ENERGIA COLECTIVA': 'LUCERA',
+    'ENERGIA COLECTIVA LUCERA': 'LUCERA',
+    
+    # JULIO GARCIA VIVAS
+    'GARCIA VIVAS': 'JULIO GARCIA VIVAS',
+    'GARCIA VIVAS JULIO': 'JULIO GARCIA VIVAS',
+}
+
+
+# =============================================================================
+# RETENCIONES POR PROVEEDOR (antes en main.py)
+# =============================================================================
+
+# Proveedores con retención IRPF (el importe de la factura incluye retención)
+# El descuadre esperado es = base * porcentaje_retencion
+RETENCIONES_PROVEEDOR = {
+    # Alquiler local - 19%
+    'JAIME FERNANDEZ': 0.19,
+    'BENJAMIN ORTEGA': 0.19,
+    'BENJAMIN ORTEGA ALONSO': 0.19,
+    # Otros servicios profesionales - 15%
+    'REGISTRO MERCANTIL': 0.15,
+    # Servicios - 1%
+    'DEBORA GARCIA TOLEDANO': 0.01,
+    'DEBORA': 0.01,
+    'DEBORAH': 0.01,
+    'BEDORAH': 0.01,
+}
+
+
 # =============================================================================
 # DATOS DE PROVEEDORES (CIF e IBAN)
 # =============================================================================
@@ -433,18 +627,11 @@ def obtener_datos_proveedor(nombre: str) -> dict:
     Returns:
         {'cif': '...', 'iban': '...'} o {'cif': '', 'iban': ''} si no existe
     """
-    nombre_upper = nombre.upper()
-    
-    # Buscar coincidencia exacta
-    if nombre_upper in PROVEEDORES_CONOCIDOS:
-        return PROVEEDORES_CONOCIDOS[nombre_upper]
-    
-    # Buscar coincidencia parcial
-    for clave, datos in PROVEEDORES_CONOCIDOS.items():
-        if clave in nombre_upper or nombre_upper in clave:
-            return datos
+    from nucleo.proveedores import obtener_registro
     
-    return {'cif': '', 'iban': ''}
+    # Coincidencia exacta o parcial (índice del registro de proveedores)
+    datos = obtener_registro().datos_contacto(nombre)
+    return datos if datos is not None else {'cif': '', 'iban': ''}
 
 
 def obtener_proveedor_por_cif(cif: str) -> str:
@@ -457,10 +644,11 @@ def obtener_proveedor_por_cif(cif: str) -> str:
     Returns:
         Nombre del proveedor o cadena vacía si no existe
     """
-    # Limpiar CIF
-    cif_limpio = cif.replace('-', '').replace(' ', '').upper()
+    from nucleo.proveedores import obtener_registro
     
-    return CIF_A_PROVEEDOR.get(cif_limpio, '')
+    # CIF_A_PROVEEDOR y, si no está, CIF de extractores y Maestro
+    ficha = obtener_registro().por_cif(cif)
+    return ficha.nombre if ficha else ''
 
 
 def obtener_metodo_pdf(proveedor: str) -> str:
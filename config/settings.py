@@ -19,9 +19,29 @@ CIF_PROPIO = "B87760575"  # CIF de TASCA BAREA S.L.L.
 # Ruta al diccionario de categorías (CORREGIDO: ahora apunta a datos/)
 DICCIONARIO_DEFAULT = r"C:\_ARCHIVOS\TRABAJO\Facturas\ParsearFacturas-main\datos\DiccionarioProveedoresCategoria.xlsx"
 
+# Diccionario compilado (scripts/compilar_diccionario.py) para el motor de
+# reglas de nucleo/reglas.py (--reglas). None = solo el diccionario xlsx
+REGLAS_COMPILADAS_RUTA = None
+REGLAS_VERIFICAR_SHA = True      # Rechazar el JSON si se editó después de compilarlo
+
 # Directorio base del proyecto
 BASE_DIR = Path(__file__).parent.parent
 
+# Sugerencias de categoría para líneas PENDIENTE / SIN_CATEGORIA
+# (nucleo/sugerencias.py, hoja "Sugerencias"; --sin-sugerencias)
+SUGERENCIAS_ACTIVAS = True
+SUGERENCIAS_TOP_K = 3
+SUGERENCIAS_CACHE_RUTA = BASE_DIR / 'datos' / 'sugerencias_cache.pkl'
+
+# Categorías aprendidas de Excel revisados (nucleo/aprendidos.py, --aprender);
+# se consultan antes del fuzzy de categorizar_linea
+USAR_APRENDIDOS = True
+APRENDIDOS_RUTA = BASE_DIR / 'datos' / 'aprendidos.json'
+
+# Maestro de proveedores (CIF, IBAN, forma de pago) para el registro
+# unificado de nucleo/proveedores.py
+MAESTRO_PROVEEDORES_RUTA = BASE_DIR / 'datos' / 'Maestro_Proveedores_ACTUALIZADO.xlsx'
+
 # ==============================================================================
 # CONFIGURACIÓN PDF
 # ==============================================================================
@@ -34,6 +54,54 @@ OCR_DPI = 300
 OCR_CONTRASTE = 1.5
 OCR_IDIOMA = 'spa'
 
+# Autoajuste del orden de métodos por proveedor (nucleo/estadisticas_pdf.py)
+# Se registra qué método dio texto que acabó cuadrando y cuánto tardó cada uno
+AUTOAJUSTE_METODO_PDF = True
+ESTADISTICAS_PDF_RUTA = BASE_DIR / 'datos' / 'estadisticas_pdf.json'
+MIN_MUESTRAS_METODO_PDF = 3  # Intentos mínimos antes de reordenar un método
+EXPLORACION_METODO_PDF = 20  # Cada N facturas de un proveedor se prueba antes otro método (0 = nunca)
+
+# ==============================================================================
+# LÍMITES DE PROCESO (nucleo/supervisor.py)
+# ==============================================================================
+# Cada factura se procesa en un worker supervisado; si se pasa de tiempo o
+# de memoria se mata, se registra como TIMEOUT/MEMORIA y el lote sigue.
+USAR_SUPERVISOR = True
+WORKERS_FACTURAS = 1             # Procesos worker en paralelo
+
+# Segundos máximos por factura completa (0 = sin límite)
+LIMITE_TIEMPO_FACTURA = 120
+
+# Segundos máximos por etapa de procesar_factura (etapas sin entrada: sin límite)
+LIMITES_ETAPA = {
+    'pdf': 90,              # Extracción de texto (incluye OCR)
+    'cabecera': 15,         # Fecha, CIF, IBAN, referencia, total
+    'lineas': 30,           # extractor.extraer_lineas()
+    'categorizacion': 30,   # Prorrateo y categorización
+    'validacion': 10,       # Cuadre y validaciones
+}
+
+# Memoria residente (RSS) máxima por worker en MB (0 = sin límite). La
+# vigila el supervisor con psutil (requirements.txt); sin psutil no se
+# aplica y el supervisor lo avisa al arrancar.
+LIMITE_MEMORIA_MB = 2048
+
+# Tope de memoria virtual (RLIMIT_AS, solo POSIX) por worker en MB (0 = sin
+# tope). La memoria virtual cuenta bibliotecas y reservas que no se llegan
+# a usar (numpy, pdfplumber...): si se activa, muy por encima de la residente.
+LIMITE_MEMORIA_VIRTUAL_MB = 0
+
+# Cola de trabajo compartida entre varias máquinas (nucleo/cola.py)
+COLA_RUTA = BASE_DIR / 'datos' / 'cola.sqlite'
+COLA_LEASE_SEGUNDOS = 300        # Sin heartbeat en este tiempo, otro worker retoma la tarea
+COLA_HEARTBEAT_SEGUNDOS = 60     # Cada cuánto renueva el worker sus leases
+COLA_MAX_INTENTOS = 3            # Intentos por factura antes de marcarla FALLIDA
+COLA_ESPERA_SEGUNDOS = 15        # Espera del worker cuando otros tienen todo reclamado
+
+# Shards (nucleo/shards.py): un .lock sin renovar en este tiempo se da por
+# abandonado (el proceso lo renueva con cada factura terminada)
+SHARD_BLOQUEO_CADUCIDAD_SEGUNDOS = 1800
+
 # ==============================================================================
 # CONFIGURACIÓN DE VALIDACIÓN
 # ==============================================================================
@@ -56,3 +124,7 @@ EXCEL_HOJA_DEFAULT = 'Facturas'
 
 # Formato de fecha para logs
 FORMATO_FECHA_LOG = '%Y-%m-%d %H:%M:%S'
+
+# Almacén de resultados entre trimestres (--almacen): SQLite y, si hay
+# pyarrow, dataset Parquet en datos/resultados_parquet/
+ALMACEN_RUTA = BASE_DIR / 'datos' / 'resultados.sqlite'
@@ -8,11 +8,20 @@ Actualizado: 02/01/2026 (v5.10 - CARGA AUTOMATICA)
 
 Este __init__.py carga AUTOMATICAMENTE todos los archivos .py
 de la carpeta extractores (excepto los de legacy/).
+
+Cada clase se instancia UNA vez por proceso (instancia_extractor):
+obtener_extractor() devuelve siempre la misma instancia, ya inicializada.
 """
 
 # Registro global de extractores
 _EXTRACTORES = {}
 
+# Instancia única por clase de extractor
+_INSTANCIAS = {}
+
+# Memo de búsquedas: proveedor (mayúsculas) -> clase o None
+_RESOLUCIONES = {}
+
 
 def registrar(*nombres):
     """
@@ -21,29 +30,55 @@ def registrar(*nombres):
     def decorator(cls):
         for nombre in nombres:
             _EXTRACTORES[nombre.upper()] = cls
+        _RESOLUCIONES.clear()
         return cls
     return decorator
 
 
-def obtener_extractor(proveedor: str):
-    """Obtiene el extractor adecuado para un proveedor."""
-    if not proveedor:
-        return None
-    
-    proveedor_upper = proveedor.upper().strip()
+def instancia_extractor(clase):
+    """
+    Devuelve la instancia única de una clase de extractor.
     
+    La primera vez la crea y llama a inicializar(); después la reutiliza.
+    """
+    instancia = _INSTANCIAS.get(clase)
+    if instancia is None:
+        instancia = clase()
+        instancia.inicializar()
+        _INSTANCIAS[clase] = instancia
+    return instancia
+
+
+def _resolver_clase(proveedor_upper: str):
+    """Busca la clase de extractor para un proveedor (exacta y luego parcial)."""
     # Busqueda exacta
     if proveedor_upper in _EXTRACTORES:
-        return _EXTRACTORES[proveedor_upper]()
+        return _EXTRACTORES[proveedor_upper]
     
     # Busqueda parcial
     for nombre, clase in _EXTRACTORES.items():
         if nombre in proveedor_upper or proveedor_upper in nombre:
-            return clase()
+            return clase
     
     return None
 
 
+def obtener_extractor(proveedor: str):
+    """Obtiene el extractor adecuado para un proveedor (instancia compartida)."""
+    if not proveedor:
+        return None
+    
+    proveedor_upper = proveedor.upper().strip()
+    
+    if proveedor_upper in _RESOLUCIONES:
+        clase = _RESOLUCIONES[proveedor_upper]
+    else:
+        clase = _resolver_clase(proveedor_upper)
+        _RESOLUCIONES[proveedor_upper] = clase
+    
+    return instancia_extractor(clase) if clase is not None else None
+
+
 def listar_extractores() -> dict:
     """Lista todos los extractores registrados."""
     return _EXTRACTORES.copy()
@@ -59,14 +94,14 @@ EXTRACTORES = _EXTRACTORES
 
 
 # Importar la clase base
-from extractores.base import ExtractorBase
+from extractores.base import ExtractorBase, ContextoFactura
 
 
 # ============================================================
 # CARGA AUTOMATICA DE EXTRACTORES
 # ============================================================
 # Carga todos los archivos .py de la carpeta extractores/
-# Ignora: base.py, generico.py, _plantilla.py, __init__.py
+# Ignora: base.py, patrones.py, generico.py, _plantilla.py, __init__.py
 # Ignora: carpeta legacy/
 
 import importlib
@@ -77,7 +112,7 @@ from pathlib import Path
 _extractores_dir = Path(__file__).parent
 
 # Archivos a ignorar
-_ignorar = {'base.py', 'generico.py', '_plantilla.py', '__init__.py', '__init__Antiguo.py'}
+_ignorar = {'base.py', 'patrones.py', 'generico.py', '_plantilla.py', '__init__.py', '__init__Antiguo.py'}
 
 # Cargar cada archivo .py
 _errores = []
@@ -110,6 +145,8 @@ __all__ = [
     'ExtractorBase',
     'registrar',
     'obtener_extractor',
+    'instancia_extractor',
+    'ContextoFactura',
     'listar_extractores',
     'tiene_extractor',
     'EXTRACTORES'
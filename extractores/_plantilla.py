@@ -37,6 +37,12 @@ class ExtractorPlantilla(ExtractorBase):
     iban = 'ES00 0000 0000 00'   # ← CAMBIAR: IBAN real (vacío '' si pago tarjeta)
     metodo_pdf = 'pypdf'         # ← CAMBIAR si necesario: 'pypdf', 'pdfplumber', 'ocr'
     
+    # Regex del extractor: se compilan una vez al crear la clase.
+    # Usar con self.patron('linea').finditer(texto) en vez de re.compile() en cada llamada.
+    patrones = {
+        # 'linea': (r'^(.+?)\s+(\d+,\d{2})$', re.MULTILINE),
+    }
+    
     # === EXTRACCIÓN DE LÍNEAS (OBLIGATORIO) ===
     
     def extraer_lineas(self, texto: str) -> List[Dict]:
@@ -113,6 +119,28 @@ class ExtractorPlantilla(ExtractorBase):
     #         return self._convertir_importe(match.group(1))
     #     return None
     
+    # --- Tablas con columnas: usar el layout en vez de regex de línea ---
+    # usa_layout = True
+    #
+    # def extraer_lineas_layout(self, layout, texto: str) -> List[Dict]:
+    #     """
+    #     Reconstruye las columnas por posición (el PDF ya se leyó una vez).
+    #     """
+    #     if layout is None:  # PDF escaneado: sin capa de texto
+    #         return self.extraer_lineas(texto)
+    #     lineas = []
+    #     for fila in self._filas_por_columnas(
+    #             layout, ['DESCRIPCION', 'CANTIDAD', 'PRECIO', 'IMPORTE'],
+    #             fin=r'BASE IMPONIBLE'):
+    #         if not re.match(r'\d+,\d{2}$', fila['IMPORTE']):
+    #             continue
+    #         lineas.append({
+    #             'articulo': fila['DESCRIPCION'],
+    #             'base': self._convertir_importe(fila['IMPORTE']),
+    #             'iva': 21,
+    #         })
+    #     return lineas
+    
     # def extraer_fecha(self, texto: str) -> Optional[str]:
     #     """
     #     Sobrescribe si el formato de fecha es especial.
@@ -18,11 +18,58 @@ Ejemplo:
             lineas = []
             # ... lógica de extracción
             return lineas
+
+Extractores de tablas (layout):
+    Con usa_layout = True, main.py pasa también el layout (palabras con
+    posición, extraído una sola vez junto al texto) y se llama a
+    extraer_lineas_layout() en vez de extraer_lineas(). Las columnas se
+    reconstruyen con _filas_por_columnas() sin reabrir el PDF.
+
+Instancias:
+    obtener_extractor() devuelve una instancia única por clase (se crea una
+    vez por proceso y se llama a inicializar() en ese momento). Por eso un
+    extractor NO debe guardar en self datos de la factura en curso: para
+    eso está ContextoFactura, que recibe extraer_lineas_contexto().
+
+Patrones precompilados:
+    Declarar las regex en el atributo de clase 'patrones' ({nombre: regex}
+    o {nombre: (regex, flags)}) y usarlas con self.patron('nombre').
+    Se compilan una sola vez al crear la clase (ver extractores/patrones.py).
 """
 from abc import ABC, abstractmethod
-from typing import List, Dict, Optional
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import List, Dict, Optional, Sequence
 import re
 
+from nucleo.layout import (
+    LayoutFactura, LineaLayout, detectar_cortes_columnas, partir_en_columnas
+)
+from extractores.patrones import compilar_patrones, obtener_patron
+
+# Importe con separador de miles opcional: 1.234,56 / 1,234.56 / 123,45
+_IMPORTE = r'(\d{1,3}(?:[.,]\d{3})*[.,]\d{2})'
+
+
+@dataclass
+class ContextoFactura:
+    """
+    Estado de la factura en curso que necesita un extractor.
+    
+    Atributos:
+        ruta: Ruta al PDF (para extractores que hacen OCR propio)
+        proveedor: Proveedor detectado en el nombre de archivo
+        texto: Texto extraído del PDF
+        layout: Palabras con posición (solo si usa_layout = True)
+        avisos: Avisos del extractor sobre esta factura (main.py los pasa a
+                factura.avisos; salen en el log, no en ERRORES)
+    """
+    ruta: Optional[Path] = None
+    proveedor: str = ''
+    texto: str = ''
+    layout: Optional[LayoutFactura] = None
+    avisos: List[str] = field(default_factory=list)
+
 
 class ExtractorBase(ABC):
     """
@@ -33,6 +80,9 @@ class ExtractorBase(ABC):
         cif: CIF del proveedor
         iban: IBAN del proveedor (vacío si pago tarjeta/efectivo)
         metodo_pdf: Método de extracción ('pypdf', 'pdfplumber', 'ocr')
+        usa_layout: Si True, recibe el layout en extraer_lineas_layout()
+        patrones: Regex del extractor {nombre: regex | (regex, flags)},
+                  compiladas al crear la clase y usadas con self.patron()
     """
     
     # === ATRIBUTOS DE CLASE (sobrescribir en subclases) ===
@@ -40,6 +90,57 @@ class ExtractorBase(ABC):
     cif: str = ''
     iban: str = ''
     metodo_pdf: str = 'pypdf'  # 'pypdf', 'pdfplumber', 'ocr'
+    usa_layout: bool = False   # True: extraer_lineas_layout() con palabras y posiciones
+    
+    # === PATRONES (se añaden/sobrescriben a los de la clase padre) ===
+    patrones: Dict = {
+        # extraer_total(): de más específico a más genérico
+        # TOTAL €: 890,08 / TOTAL FACTURA: 123,45 / TOTAL A PAGAR: 123,45
+        # TOTAL: 123,45 € / TOTAL 123,45
+        'total_euro': (r'TOTAL\s*€[:\s]*' + _IMPORTE, re.IGNORECASE | re.MULTILINE),
+        'total_factura': (r'TOTAL\s*FACTURA[:\s]*' + _IMPORTE, re.IGNORECASE | re.MULTILINE),
+        'total_a_pagar': (r'TOTAL\s*A\s*PAGAR[:\s]*' + _IMPORTE, re.IGNORECASE | re.MULTILINE),
+        'total_con_simbolo': (r'\bTOTAL[:\s]+' + _IMPORTE + r'\s*€', re.IGNORECASE | re.MULTILINE),
+        'total_simple': (r'\bTOTAL[:\s]+' + _IMPORTE, re.IGNORECASE | re.MULTILINE),
+        # extraer_fecha(): DD/MM/YYYY
+        'fecha': r'(\d{1,2})[/\-](\d{1,2})[/\-](\d{4})',
+        # extraer_referencia()
+        'referencia': (r'(?:Factura|Fra|Nº|Número)[:\s]*([A-Z]?\d{4,10})', re.IGNORECASE),
+        'referencia_mayusculas': (r'(?:FACTURA|FRA|Nº)[:\s]*([A-Z]?\d{4,10})', re.IGNORECASE),
+    }
+    _patrones_compilados: Dict = {}
+    
+    _PATRONES_TOTAL = ('total_euro', 'total_factura', 'total_a_pagar',
+                       'total_con_simbolo', 'total_simple')
+    _PATRONES_REFERENCIA = ('referencia', 'referencia_mayusculas')
+    
+    def __init_subclass__(cls, **kwargs):
+        """Compila los patrones propios de la subclase sobre los heredados."""
+        super().__init_subclass__(**kwargs)
+        propios = cls.__dict__.get('patrones')
+        if propios:
+            cls._patrones_compilados = compilar_patrones(propios, cls._patrones_compilados)
+    
+    def patron(self, nombre: str):
+        """
+        Devuelve el patrón precompilado 'nombre' (instrumentado si el perfil está activo).
+        
+        Args:
+            nombre: Clave en el diccionario 'patrones' de la clase o sus padres
+            
+        Returns:
+            re.Pattern (o envoltorio con la misma interfaz)
+        """
+        return obtener_patron(self._patrones_compilados, self.nombre or type(self).__name__, nombre)
+    
+    def inicializar(self) -> None:
+        """
+        Preparación costosa del extractor (diccionarios, modelos...).
+        
+        Se llama una sola vez por proceso, al crear la instancia única
+        desde obtener_extractor(). Por defecto no hace nada.
+        """
+        pass
     
     # === MÉTODO ABSTRACTO (obligatorio implementar) ===
     
@@ -69,6 +170,41 @@ class ExtractorBase(ABC):
     
     # === MÉTODOS OPCIONALES (pueden sobrescribirse) ===
     
+    def extraer_lineas_contexto(self, contexto: ContextoFactura) -> List[Dict]:
+        """
+        Punto de entrada de main.py para extraer las líneas de una factura.
+        
+        Por defecto llama a extraer_lineas_layout() si usa_layout = True
+        o a extraer_lineas() en caso contrario. Sobrescribir si el extractor
+        necesita la ruta del PDF o devolver avisos (contexto.avisos).
+        
+        Args:
+            contexto: Datos de la factura en curso
+            
+        Returns:
+            Lista de diccionarios con las líneas
+        """
+        if self.usa_layout:
+            return self.extraer_lineas_layout(contexto.layout, contexto.texto)
+        return self.extraer_lineas(contexto.texto)
+    
+    def extraer_lineas_layout(self, layout: Optional[LayoutFactura], texto: str) -> List[Dict]:
+        """
+        Extrae las líneas de producto usando el layout de la factura.
+        
+        Solo se llama si usa_layout = True. Por defecto delega en
+        extraer_lineas(texto), que es también lo que se debe hacer si el
+        layout es None (PDF escaneado, sin capa de texto).
+        
+        Args:
+            layout: Palabras con posición agrupadas por página y línea
+            texto: Texto extraído del PDF
+            
+        Returns:
+            Lista de diccionarios con las líneas (mismo formato que extraer_lineas)
+        """
+        return self.extraer_lineas(texto)
+    
     def extraer_total(self, texto: str) -> Optional[float]:
         """
         Extrae el total de la factura.
@@ -83,21 +219,8 @@ class ExtractorBase(ABC):
             Total de la factura o None si no se encuentra
         """
         # Patrones ordenados de más específico a más genérico
-        patrones = [
-            # TOTAL €: 890,08
-            r'TOTAL\s*€[:\s]*(\d{1,3}(?:[.,]\d{3})*[.,]\d{2})',
-            # TOTAL FACTURA: 123,45
-            r'TOTAL\s*FACTURA[:\s]*(\d{1,3}(?:[.,]\d{3})*[.,]\d{2})',
-            # TOTAL A PAGAR: 123,45
-            r'TOTAL\s*A\s*PAGAR[:\s]*(\d{1,3}(?:[.,]\d{3})*[.,]\d{2})',
-            # TOTAL: 123,45 €
-            r'\bTOTAL[:\s]+(\d{1,3}(?:[.,]\d{3})*[.,]\d{2})\s*€',
-            # TOTAL 123,45
-            r'\bTOTAL[:\s]+(\d{1,3}(?:[.,]\d{3})*[.,]\d{2})',
-        ]
-        
-        for patron in patrones:
-            match = re.search(patron, texto, re.IGNORECASE | re.MULTILINE)
+        for nombre in self._PATRONES_TOTAL:
+            match = self.patron(nombre).search(texto)
             if match:
                 total_str = match.group(1)
                 return self._convertir_importe(total_str)
@@ -118,8 +241,7 @@ class ExtractorBase(ABC):
             Fecha en formato DD/MM/YYYY o None si no se encuentra
         """
         # Patrón estándar DD/MM/YYYY
-        patron = r'(\d{1,2})[/\-](\d{1,2})[/\-](\d{4})'
-        match = re.search(patron, texto)
+        match = self.patron('fecha').search(texto)
         
         if match:
             dia = match.group(1).zfill(2)
@@ -153,13 +275,8 @@ class ExtractorBase(ABC):
                 return resultado
         
         # Fallback: patrones genéricos
-        patrones = [
-            r'(?:Factura|Fra|Nº|Número)[:\s]*([A-Z]?\d{4,10})',
-            r'(?:FACTURA|FRA|Nº)[:\s]*([A-Z]?\d{4,10})',
-        ]
-        
-        for patron in patrones:
-            match = re.search(patron, texto, re.IGNORECASE)
+        for nombre in self._PATRONES_REFERENCIA:
+            match = self.patron(nombre).search(texto)
             if match:
                 return match.group(1)
         
@@ -167,6 +284,59 @@ class ExtractorBase(ABC):
     
     # === MÉTODOS DE UTILIDAD ===
     
+    def _filas_por_columnas(
+        self,
+        layout: LayoutFactura,
+        columnas: Sequence[str],
+        cabecera: Optional[str] = None,
+        fin: Optional[str] = None,
+        cortes: Optional[Sequence[float]] = None,
+    ) -> List[Dict[str, str]]:
+        """
+        Reconstruye las filas de una tabla a partir de la posición de las palabras.
+        
+        Los cortes entre columnas se calculan a partir de la línea de cabecera
+        (la primera que cumple el patrón 'cabecera') buscando en ella cada
+        nombre de 'columnas'. Se recorren las líneas hasta la que cumple 'fin'.
+        Si el documento repite la cabecera en cada página, se salta.
+        
+        Args:
+            layout: Layout de la factura
+            columnas: Nombres de columna tal como aparecen en la cabecera
+            cabecera: Regex de la línea de cabecera (por defecto, la primera columna)
+            fin: Regex de la línea que cierra la tabla (ej: r'BASE IMPONIBLE')
+            cortes: Cortes x fijos; si se indican no se usa la cabecera para calcularlos
+            
+        Returns:
+            Lista de diccionarios {columna: texto} (una entrada por línea visual)
+        """
+        if layout is None:
+            return []
+        
+        patron_cabecera = cabecera or re.escape(columnas[0])
+        linea_cabecera = layout.buscar_linea(patron_cabecera)
+        if cortes is None:
+            if linea_cabecera is None:
+                return []
+            cortes = detectar_cortes_columnas(linea_cabecera, columnas)
+            if not cortes:
+                return []
+        
+        linea_fin = layout.buscar_linea(fin, desde=linea_cabecera) if fin else None
+        regex_cabecera = re.compile(patron_cabecera, re.IGNORECASE)
+        
+        filas = []
+        for linea in layout.lineas_entre(linea_cabecera, linea_fin):
+            if regex_cabecera.search(linea.texto):
+                continue
+            celdas = partir_en_columnas(linea, cortes)
+            filas.append(dict(zip(columnas, celdas)))
+        return filas
+    
+    def _celdas(self, linea: LineaLayout, cortes: Sequence[float]) -> List[str]:
+        """Parte una línea del layout en celdas según cortes x."""
+        return partir_en_columnas(linea, cortes)
+    
     def _convertir_importe(self, importe_str: str) -> float:
         """
         Convierte un string de importe a float.
@@ -256,3 +426,7 @@ def registrar(*nombres_proveedor):
     """
     from extractores import registrar as _registrar
     return _registrar(*nombres_proveedor)
+
+
+# Patrones de la propia clase base (__init_subclass__ solo actúa en subclases)
+ExtractorBase._patrones_compilados = compilar_patrones(ExtractorBase.patrones)
@@ -45,9 +45,8 @@ class ExtractorBM(ExtractorBase):
     # Diccionario de productos (se carga una vez)
     _diccionario = None
     
-    def __init__(self):
-        """Inicializa el extractor y carga el diccionario."""
-        super().__init__()
+    def inicializar(self):
+        """Carga el diccionario (una vez por proceso)."""
         self._cargar_diccionario()
     
     def _cargar_diccionario(self):
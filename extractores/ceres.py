@@ -36,14 +36,76 @@ class ExtractorCeres(ExtractorBase):
     iban = ''  # Adeudo
     metodo_pdf = 'pdfplumber'
     
+    # Regex compiladas una vez al crear la clase (ver ExtractorBase.patron)
+    patrones = {
+        # Codigo + Desc + Uds + Precio + Dto + IVA + Importe
+        'con_dto': (
+            r'^([A-Z0-9]{3,8})\.?\s+'       # Codigo (3-8 chars) + punto opcional
+            r'(.+?)\s+'                      # Descripcion
+            r'(-?\d+)\s+'                    # Unidades
+            r'(\d+[,\.]?\d*)\s+'             # Precio/Ud (entero o decimal)
+            r'(\d+[,\.]?\d*)\s+'             # Descuento %
+            r'(21|10)\s+'                    # IVA
+            r'(-?\d+[,\.]\d+)',              # Importe
+            re.MULTILINE
+        ),
+        # Codigo + Desc + Uds + Precio + IVA + Importe (SOUSAS, URG...)
+        'sin_dto': (
+            r'^([A-Z0-9]{3,8})\.?\s+'       # Codigo (3-8 chars) + punto opcional
+            r'(.+?)\s+'                      # Descripcion
+            r'(-?\d+)\s+'                    # Unidades
+            r'(\d+[,\.]?\d*)\s+'             # Precio/Ud (entero o decimal)
+            r'(21|10)\s+'                    # IVA (sin dto antes)
+            r'(-?\d+[,\.]\d+)',              # Importe
+            re.MULTILINE
+        ),
+        # CE99xxxx ENVASE X lit.
+        'envase': (
+            r'^(CE99\d{4})\.?\s+'            # Codigo CE99xxxx + punto opcional
+            r'(ENVASE\s+\d+\s*lit\.?)\s+'    # Descripcion
+            r'(-?\d+)\s+'                    # Unidades
+            r'(\d+[,\.]?\d*)\s+'             # Precio (entero o decimal)
+            r'(21|10)\s+'                    # IVA
+            r'(-?\d+[,\.]\d+)',              # Importe
+            re.MULTILINE
+        ),
+        # CE99xxxx ENVASE 1/5 ALH
+        'envase_alh': (
+            r'^(CE99\d{4})\.?\s+'            # Codigo CE99xxxx + punto opcional
+            r'(ENVASE\s+\d/\d\s+ALH)\s+'     # ENVASE 1/5 ALH
+            r'(-?\d+)\s+'                    # Unidades
+            r'(\d+[,\.]?\d*)\s+'             # Precio (entero o decimal)
+            r'(21|10)\s+'                    # IVA
+            r'(-?\d+[,\.]\d+)',              # Importe
+            re.MULTILINE
+        ),
+        # CE99 generico
+        'ce99_generico': (
+            r'^(CE99\d{4})\.?\s+'            # Codigo CE99xxxx + punto opcional
+            r'(.+?)\s+'                      # Descripcion
+            r'(-?\d+)\s+'                    # Unidades
+            r'(\d+[,\.]?\d*)\s+'             # Precio (entero o decimal)
+            r'(21|10)\s+'                    # IVA
+            r'(-?\d+[,\.]\d+)',              # Importe
+            re.MULTILINE
+        ),
+        'cla': r'CLA:\s*(\d+)',
+        'total': r'Importe\s+TOTAL\s*\.+\s*([\d.,]+)',
+        'total_ocr': r'Vencimientos:\s*([\d.,]+)',
+        'fecha_ceres': r'(\d{2}/\d{2}/\d{4})',
+        'numero': (
+            r'Numero\s+Fecha\s+CIF/DNI.*?\n'
+            r'(\d{7})\s+\d{2}/\d{2}/\d{4}',
+            re.IGNORECASE
+        ),
+        'numero_directo': r'\n(\d{7})\s+\d{2}/\d{2}/\d{4}\s+B\d+',
+    }
+    
     def extraer(self, pdf_path: str) -> Dict:
         """
         Extrae datos de factura CERES.
         Override para manejar OCR en PDFs escaneados.
         """
-        # Guardar path para OCR
-        self._pdf_path = pdf_path
-        
         # Intentar extraccion normal con pdfplumber
         with pdfplumber.open(pdf_path) as pdf:
             texto = ''
@@ -54,7 +116,7 @@ class ExtractorCeres(ExtractorBase):
         
         # Si no hay texto, intentar OCR
         if not texto or len(texto.strip()) < 100:
-            texto_ocr = self._extraer_con_ocr()
+            texto_ocr = self._extraer_con_ocr(pdf_path)
             if texto_ocr:
                 texto = texto_ocr
         
@@ -71,19 +133,22 @@ class ExtractorCeres(ExtractorBase):
             'lineas': lineas
         }
     
-    def _extraer_con_ocr(self) -> Optional[str]:
+    def _extraer_con_ocr(self, pdf_path: str) -> Optional[str]:
         """
         Extrae texto usando OCR para PDFs escaneados.
+        
+        La ruta se recibe como argumento (no se guarda en self): la
+        instancia del extractor se comparte entre facturas.
         """
         try:
             from pdf2image import convert_from_path
             import pytesseract
             
-            if not hasattr(self, '_pdf_path') or not self._pdf_path:
+            if not pdf_path:
                 return None
             
             # Convertir PDF a imagenes (300 DPI para buena calidad)
-            images = convert_from_path(self._pdf_path, dpi=300)
+            images = convert_from_path(pdf_path, dpi=300)
             
             # OCR en cada pagina
             textos = []
@@ -122,18 +187,7 @@ class ExtractorCeres(ExtractorBase):
         # - Tolera punto despues del codigo (OCR: CE1393.)
         # - Acepta precios enteros o decimales
         # =====================================================
-        patron_con_dto = re.compile(
-            r'^([A-Z0-9]{3,8})\.?\s+'       # Codigo (3-8 chars) + punto opcional
-            r'(.+?)\s+'                      # Descripcion
-            r'(-?\d+)\s+'                    # Unidades
-            r'(\d+[,\.]?\d*)\s+'             # Precio/Ud (entero o decimal)
-            r'(\d+[,\.]?\d*)\s+'             # Descuento %
-            r'(21|10)\s+'                    # IVA
-            r'(-?\d+[,\.]\d+)',              # Importe
-            re.MULTILINE
-        )
-        
-        for m in patron_con_dto.finditer(texto):
+        for m in self.patron('con_dto').finditer(texto):
             codigo, desc, uds, precio, dto, iva, importe = m.groups()
             desc_limpia = desc.strip()
             
@@ -162,17 +216,7 @@ class ExtractorCeres(ExtractorBase):
         # PATRON SIN DESCUENTO: Codigo + Desc + Uds + Precio + IVA + Importe
         # Para productos como SOUSAS y URG SERVICIO URGENTE
         # =====================================================
-        patron_sin_dto = re.compile(
-            r'^([A-Z0-9]{3,8})\.?\s+'       # Codigo (3-8 chars) + punto opcional
-            r'(.+?)\s+'                      # Descripcion
-            r'(-?\d+)\s+'                    # Unidades
-            r'(\d+[,\.]?\d*)\s+'             # Precio/Ud (entero o decimal)
-            r'(21|10)\s+'                    # IVA (sin dto antes)
-            r'(-?\d+[,\.]\d+)',              # Importe
-            re.MULTILINE
-        )
-        
-        for m in patron_sin_dto.finditer(texto):
+        for m in self.patron('sin_dto').finditer(texto):
             codigo, desc, uds, precio, iva, importe = m.groups()
             desc_limpia = desc.strip()
             
@@ -204,17 +248,7 @@ class ExtractorCeres(ExtractorBase):
         # =====================================================
         # PATRON ENVASES LITROS: CE99xxxx ENVASE X lit.
         # =====================================================
-        patron_envase = re.compile(
-            r'^(CE99\d{4})\.?\s+'            # Codigo CE99xxxx + punto opcional
-            r'(ENVASE\s+\d+\s*lit\.?)\s+'    # Descripcion
-            r'(-?\d+)\s+'                    # Unidades
-            r'(\d+[,\.]?\d*)\s+'             # Precio (entero o decimal)
-            r'(21|10)\s+'                    # IVA
-            r'(-?\d+[,\.]\d+)',              # Importe
-            re.MULTILINE
-        )
-        
-        for m in patron_envase.finditer(texto):
+        for m in self.patron('envase').finditer(texto):
             codigo, desc, uds, precio, iva, importe = m.groups()
             importe_val = self._convertir_importe(importe)
             
@@ -235,17 +269,7 @@ class ExtractorCeres(ExtractorBase):
         # =====================================================
         # PATRON ENVASES ALH: CE99xxxx ENVASE 1/5 ALH
         # =====================================================
-        patron_envase_alh = re.compile(
-            r'^(CE99\d{4})\.?\s+'            # Codigo CE99xxxx + punto opcional
-            r'(ENVASE\s+\d/\d\s+ALH)\s+'     # ENVASE 1/5 ALH
-            r'(-?\d+)\s+'                    # Unidades
-            r'(\d+[,\.]?\d*)\s+'             # Precio (entero o decimal)
-            r'(21|10)\s+'                    # IVA
-            r'(-?\d+[,\.]\d+)',              # Importe
-            re.MULTILINE
-        )
-        
-        for m in patron_envase_alh.finditer(texto):
+        for m in self.patron('envase_alh').finditer(texto):
             codigo, desc, uds, precio, iva, importe = m.groups()
             importe_val = self._convertir_importe(importe)
             
@@ -266,17 +290,7 @@ class ExtractorCeres(ExtractorBase):
         # =====================================================
         # PATRON CE99 GENERICO
         # =====================================================
-        patron_ce99_generico = re.compile(
-            r'^(CE99\d{4})\.?\s+'            # Codigo CE99xxxx + punto opcional
-            r'(.+?)\s+'                      # Descripcion
-            r'(-?\d+)\s+'                    # Unidades
-            r'(\d+[,\.]?\d*)\s+'             # Precio (entero o decimal)
-            r'(21|10)\s+'                    # IVA
-            r'(-?\d+[,\.]\d+)',              # Importe
-            re.MULTILINE
-        )
-        
-        for m in patron_ce99_generico.finditer(texto):
+        for m in self.patron('ce99_generico').finditer(texto):
             codigo, desc, uds, precio, iva, importe = m.groups()
             desc_limpia = desc.strip()
             
@@ -301,7 +315,7 @@ class ExtractorCeres(ExtractorBase):
         # =====================================================
         # CLA (caja retornable): CLA: X €
         # =====================================================
-        cla_match = re.search(r'CLA:\s*(\d+)', texto)
+        cla_match = self.patron('cla').search(texto)
         if cla_match:
             cla_cantidad = int(cla_match.group(1))
             if cla_cantidad > 0:
@@ -325,12 +339,12 @@ class ExtractorCeres(ExtractorBase):
             return None
             
         # Patron principal: Importe TOTAL ........ XXX,XX
-        m = re.search(r'Importe\s+TOTAL\s*\.+\s*([\d.,]+)', texto)
+        m = self.patron('total').search(texto)
         if m:
             return self._convertir_importe(m.group(1))
         
         # Patron alternativo (OCR): Vencimientos: XXX,XX
-        m = re.search(r'Vencimientos:\s*([\d.,]+)', texto)
+        m = self.patron('total_ocr').search(texto)
         if m:
             return self._convertir_importe(m.group(1))
         
@@ -342,7 +356,7 @@ class ExtractorCeres(ExtractorBase):
             return None
             
         # Formato: DD/MM/YYYY
-        m = re.search(r'(\d{2}/\d{2}/\d{4})', texto)
+        m = self.patron('fecha_ceres').search(texto)
         if m:
             return m.group(1)
         return None
@@ -357,16 +371,12 @@ class ExtractorCeres(ExtractorBase):
             return None
         
         # Buscar línea con formato: NUMERO FECHA CIF FORMA_PAGO
-        patron = re.search(
-            r'Numero\s+Fecha\s+CIF/DNI.*?\n'
-            r'(\d{7})\s+\d{2}/\d{2}/\d{4}',
-            texto, re.IGNORECASE
-        )
+        patron = self.patron('numero').search(texto)
         if patron:
             return patron.group(1)
         
         # Alternativa: buscar directamente el patrón
-        patron2 = re.search(r'\n(\d{7})\s+\d{2}/\d{2}/\d{4}\s+B\d+', texto)
+        patron2 = self.patron('numero_directo').search(texto)
         if patron2:
             return patron2.group(1)
         
@@ -6,7 +6,7 @@ Intenta extraer líneas usando patrones comunes.
 Actualizado: 18/12/2025 - pdfplumber + limpieza encoding
 """
 from extractores.base import ExtractorBase
-from extractores import registrar
+from extractores import instancia_extractor
 from typing import List, Dict
 import re
 
@@ -22,6 +22,15 @@ class ExtractorGenerico(ExtractorBase):
     iban = ''
     metodo_pdf = 'pdfplumber'
     
+    patrones = {
+        # Desglose fiscal: IVA% BASE CUOTA
+        'desglose_iva': r'(\d{1,2})[,\.]?(?:\d{2})?%\s+([\d,\.]+)\s+([\d,\.]+)',
+        'base_imponible': (r'Base\s*Imponible[:\s]*([\d,\.]+)', re.IGNORECASE),
+        'iva_porcentaje': (r'IVA\s*(\d{1,2})%', re.IGNORECASE),
+        # DESCRIPCION CANTIDAD PRECIO IMPORTE
+        'linea_generica': (r'^(.{5,50}?)\s+(\d+)\s+([\d,]+)\s+([\d,]+)$', re.MULTILINE),
+    }
+    
     def extraer_lineas(self, texto: str) -> List[Dict]:
         lineas = []
         
@@ -44,9 +53,7 @@ class ExtractorGenerico(ExtractorBase):
         """Extrae líneas del desglose fiscal (IVA% BASE CUOTA)."""
         lineas = []
         
-        patron = re.compile(r'(\d{1,2})[,\.]?(?:\d{2})?%\s+([\d,\.]+)\s+([\d,\.]+)')
-        
-        for match in patron.finditer(texto):
+        for match in self.patron('desglose_iva').finditer(texto):
             iva = int(match.group(1))
             base = self._convertir_importe(match.group(2))
             
@@ -64,12 +71,12 @@ class ExtractorGenerico(ExtractorBase):
         """Extrae línea única de Base Imponible."""
         lineas = []
         
-        patron = re.search(r'Base\s*Imponible[:\s]*([\d,\.]+)', texto, re.IGNORECASE)
+        patron = self.patron('base_imponible').search(texto)
         if patron:
             base = self._convertir_importe(patron.group(1))
             if base > 0:
                 # Detectar IVA
-                patron_iva = re.search(r'IVA\s*(\d{1,2})%', texto, re.IGNORECASE)
+                patron_iva = self.patron('iva_porcentaje').search(texto)
                 iva = int(patron_iva.group(1)) if patron_iva else 21
                 
                 lineas.append({
@@ -86,12 +93,7 @@ class ExtractorGenerico(ExtractorBase):
         lineas = []
         
         # Patrón: DESCRIPCION CANTIDAD PRECIO IMPORTE
-        patron = re.compile(
-            r'^(.{5,50}?)\s+(\d+)\s+([\d,]+)\s+([\d,]+)$',
-            re.MULTILINE
-        )
-        
-        for match in patron.finditer(texto):
+        for match in self.patron('linea_generica').finditer(texto):
             desc, cantidad, precio, importe = match.groups()
             desc_limpia = desc.strip()
             
@@ -118,5 +120,5 @@ class ExtractorGenerico(ExtractorBase):
 
 # Función de utilidad para obtener el extractor genérico
 def obtener_extractor_generico():
-    """Devuelve una instancia del extractor genérico."""
-    return ExtractorGenerico()
+    """Devuelve la instancia compartida del extractor genérico."""
+    return instancia_extractor(ExtractorGenerico)
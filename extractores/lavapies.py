@@ -26,7 +26,7 @@ Creado: 30/12/2025
 """
 from extractores.base import ExtractorBase
 from extractores import registrar
-from typing import List, Dict, Optional, Set, Tuple
+from typing import List, Dict, Optional, Set
 import re
 from itertools import combinations
 
@@ -75,6 +75,8 @@ class ExtractorLavapies(ExtractorBase):
         usando un algoritmo de subset-sum para determinar qué productos
         corresponden a cada base imponible.
         """
+        self._avisos_iva = []
+        
         # Extraer productos
         patron = re.compile(
             r'(\d+/\d+)\s+'      # Nº Albarán
@@ -136,9 +138,8 @@ class ExtractorLavapies(ExtractorBase):
                 'albaran': p['albaran'],
             })
         
-        # Guardar avisos para logging
-        if avisos:
-            self._avisos_iva = avisos
+        # Guardar avisos de esta extracción (get_avisos_iva / contexto.avisos)
+        self._avisos_iva = avisos
         
         return lineas
     
@@ -224,6 +225,12 @@ class ExtractorLavapies(ExtractorBase):
     
     extraer_referencia = extraer_numero_factura
     
+    def extraer_lineas_contexto(self, contexto) -> List[Dict]:
+        """Extrae las líneas y deja los avisos de IVA en el contexto de la factura."""
+        lineas = self.extraer_lineas(contexto.texto)
+        contexto.avisos.extend(self.get_avisos_iva())
+        return lineas
+    
     def get_avisos_iva(self) -> List[str]:
         """Devuelve avisos de discrepancia de IVA de la última extracción."""
         return getattr(self, '_avisos_iva', [])
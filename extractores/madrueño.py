@@ -16,6 +16,9 @@ IVA: Siempre 21% (licores)
 
 Creado: 19/12/2025
 Actualizado: Migrado a pdfplumber, extrae líneas individuales con precio_ud
+Actualizado: 19/10/2026 - líneas desde el layout (columnas por posición):
+    las líneas con DTO % toman el importe de su columna y las devoluciones
+    (unidades negativas) restan; el texto queda para PDFs sin capa de texto
 """
 from extractores.base import ExtractorBase
 from extractores import registrar
@@ -31,6 +34,55 @@ class ExtractorMadrueño(ExtractorBase):
     cif = 'B86705126'
     iban = 'ES21 2100 2865 5113 0088 6738'
     metodo_pdf = 'pdfplumber'  # SIEMPRE pdfplumber
+    usa_layout = True
+    
+    # Columnas de la tabla y cortes x entre ellas
+    COLUMNAS = ('CODIGO', 'DESCRIPCION', 'UNIDADES', 'PRECIO', 'DTO', 'IMPORTE')
+    CORTES = (95, 320, 400, 460, 510)
+    CABECERA = r'C[ÓO]DIGO\s+DESCRIPCI'
+    FIN = r'BASE\s+IMP'
+    
+    patrones = {
+        'codigo': r'^\d{2,5}$',
+        'unidades': r'^-?\d{1,3}$',
+        'precio': r'^\d{1,3},\d{2}$',
+        'importe': r'^-?\d{1,3}(?:\.\d{3})*,\d{2}$',
+    }
+    
+    def extraer_lineas_layout(self, layout, texto: str) -> List[Dict]:
+        """
+        Líneas de la tabla por posición de las palabras.
+        
+        A diferencia de extraer_lineas, el importe es siempre el de su
+        columna (también con DTO %) y las devoluciones se incluyen en
+        negativo: la suma es el TOTAL BRUTO de la factura. Sin layout o sin
+        cabecera se usa extraer_lineas(texto).
+        """
+        if layout is None or layout.buscar_linea(self.CABECERA) is None:
+            return self.extraer_lineas(texto)
+        lineas = []
+        for fila in self._filas_por_columnas(layout, self.COLUMNAS, cabecera=self.CABECERA,
+                                             fin=self.FIN, cortes=self.CORTES):
+            if not (self.patron('codigo').match(fila['CODIGO'])
+                    and self.patron('unidades').match(fila['UNIDADES'])
+                    and self.patron('precio').match(fila['PRECIO'])
+                    and self.patron('importe').match(fila['IMPORTE'])
+                    and fila['DESCRIPCION']):
+                continue
+            importe = self._convertir_europeo(fila['IMPORTE'].replace('-', ''))
+            if importe < 0.50:
+                continue
+            if fila['IMPORTE'].startswith('-'):
+                importe = -importe
+            lineas.append({
+                'codigo': fila['CODIGO'],
+                'articulo': fila['DESCRIPCION'][:50],
+                'cantidad': int(fila['UNIDADES']),
+                'precio_ud': round(self._convertir_europeo(fila['PRECIO']), 2),
+                'iva': 21,  # Licores siempre 21%
+                'base': round(importe, 2)
+            })
+        return lineas
     
     def extraer_lineas(self, texto: str) -> List[Dict]:
         """
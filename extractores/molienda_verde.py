@@ -4,6 +4,8 @@ Mermeladas y conservas artesanales.
 CIF: B06936140 | IBAN: ES41 3023 0407 1669 9576 7701
 
 Actualizado: 18/12/2025 - limpieza encoding
+Actualizado: 19/10/2026 - líneas desde el layout (columnas por posición);
+    el texto queda para PDFs sin capa de texto
 """
 from extractores.base import ExtractorBase
 from extractores import registrar
@@ -17,6 +19,64 @@ class ExtractorMoliendaVerde(ExtractorBase):
     cif = 'B06936140'
     iban = 'ES41 3023 0407 1669 9576 7701'
     metodo_pdf = 'pdfplumber'
+    usa_layout = True
+    
+    # Columnas de la tabla y cortes x entre ellas (la descripción llega
+    # hasta casi "Cant.", así que los cortes son fijos y no los de la cabecera)
+    COLUMNAS = ('CODIGO', 'DESCRIPCION', 'CANT', 'PRECIO', 'DTO', 'IVA', 'IMPORTE')
+    CORTES = (80, 380, 425, 475, 497, 520)
+    CABECERA = r'C[óo]digo\s+Descripci'
+    FIN = r'Base\s+Imponible'
+    
+    patrones = {
+        'codigo': r'^\d{3}$',
+        'entero': r'^\d+$',
+        'importe': r'^\d+[.,]\d{2}$',
+    }
+    
+    def _numeros(self, fila: Dict[str, str]) -> bool:
+        """True si la fila trae cantidad, precio, dto, IVA e importe."""
+        return all(self.patron(nombre).match(fila[columna]) for columna, nombre in (
+            ('CANT', 'entero'), ('PRECIO', 'importe'), ('DTO', 'entero'),
+            ('IVA', 'entero'), ('IMPORTE', 'importe')))
+    
+    def extraer_lineas_layout(self, layout, texto: str) -> List[Dict]:
+        """
+        Líneas de la tabla por posición de las palabras.
+        
+        Una descripción partida en dos líneas visuales (la segunda sin
+        código, con los importes) se une. Sin layout o sin cabecera se usa
+        extraer_lineas(texto).
+        """
+        if layout is None or layout.buscar_linea(self.CABECERA) is None:
+            return self.extraer_lineas(texto)
+        filas = self._filas_por_columnas(layout, self.COLUMNAS, cabecera=self.CABECERA,
+                                         fin=self.FIN, cortes=self.CORTES)
+        lineas = []
+        pendiente = None  # (código, descripción) de una fila sin importes
+        for fila in filas:
+            codigo, descripcion = fila['CODIGO'], fila['DESCRIPCION']
+            if self.patron('codigo').match(codigo):
+                pendiente = None
+            elif pendiente is not None:
+                codigo, descripcion = pendiente[0], f'{pendiente[1]} {descripcion}'
+            elif 'PORTES' in descripcion.upper():
+                codigo, descripcion = 'PORTES', 'PORTES'
+            else:
+                continue
+            if not self._numeros(fila):
+                pendiente = (codigo, descripcion) if self.patron('codigo').match(codigo) else None
+                continue
+            pendiente = None
+            lineas.append({
+                'codigo': codigo,
+                'articulo': descripcion.strip(),
+                'cantidad': int(fila['CANT']),
+                'precio_ud': self._convertir_importe(fila['PRECIO']),
+                'iva': int(fila['IVA']),
+                'base': self._convertir_importe(fila['IMPORTE'])
+            })
+        return lineas
     
     def extraer_lineas(self, texto: str) -> List[Dict]:
         lineas = []
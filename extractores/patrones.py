@@ -0,0 +1,241 @@
+"""
+Registro de patrones regex precompilados para extractores.
+
+Los extractores declaran sus patrones UNA vez como atributo de clase:
+
+    class ExtractorCeres(ExtractorBase):
+        patrones = {
+            'total': r'Importe\\s+TOTAL\\s*\\.+\\s*([\\d.,]+)',
+            'linea': (r'^([A-Z0-9]{3,8})\\s+(.+?)\\s+(\\d+,\\d{2})$', re.MULTILINE),
+        }
+
+        def extraer_total(self, texto):
+            m = self.patron('total').search(texto)
+
+ExtractorBase compila el diccionario al crear la clase (__init_subclass__),
+hereda los patrones del padre y los comparte entre todas las instancias
+(y entre workers, que los heredan al arrancar).
+
+Instrumentación:
+    Con activar_instrumentacion() (o --perfil-regex en main.py) cada
+    llamada search/match/finditer/... acumula llamadas y tiempo por
+    patrón ('CLASE.nombre'). Los contadores son por factura
+    (reiniciar_estadisticas al empezar, volcar_estadisticas al terminar);
+    el proceso principal suma cada factura a los totales de la ejecución
+    con acumular_estadisticas y los muestra con informe_patrones(). Desactivada no añade coste: patron()
+    devuelve el re.Pattern compilado directamente.
+
+Creado: 19/10/2026
+"""
+from typing import Dict, Iterator, List, Tuple, Union
+import os
+import re
+import time
+
+
+# Variable de entorno para que los workers (spawn) hereden la instrumentación
+VARIABLE_ENTORNO = 'PARSEAR_PERFIL_REGEX'
+
+_INSTRUMENTACION = os.environ.get(VARIABLE_ENTORNO) == '1'
+
+# {'CLASE.nombre': [llamadas, segundos]} de la factura en curso
+ESTADISTICAS_PATRONES: Dict[str, List] = {}
+
+# Mismo formato, totales de la ejecución (solo en el proceso principal)
+TOTALES_PATRONES: Dict[str, List] = {}
+
+DefinicionPatron = Union[str, Tuple[str, int], 're.Pattern']
+
+
+# =============================================================================
+# COMPILACIÓN
+# =============================================================================
+
+def compilar_patron(definicion: DefinicionPatron) -> 're.Pattern':
+    """
+    Compila la definición de un patrón.
+
+    Args:
+        definicion: regex (str), (regex, flags) o re.Pattern ya compilado
+
+    Returns:
+        re.Pattern compilado
+    """
+    if isinstance(definicion, re.Pattern):
+        return definicion
+    if isinstance(definicion, tuple):
+        regex, flags = definicion
+        return re.compile(regex, flags)
+    return re.compile(definicion)
+
+
+def compilar_patrones(definiciones: Dict[str, DefinicionPatron],
+                      heredados: Dict[str, 're.Pattern'] = None) -> Dict[str, 're.Pattern']:
+    """
+    Compila un diccionario de patrones sobre los heredados del padre.
+
+    Args:
+        definiciones: {nombre: definición}
+        heredados: Patrones ya compilados de la clase padre
+
+    Returns:
+        Nuevo diccionario {nombre: re.Pattern}
+    """
+    compilados = dict(heredados or {})
+    for nombre, definicion in (definiciones or {}).items():
+        try:
+            compilados[nombre] = compilar_patron(definicion)
+        except re.error as e:
+            raise ValueError(f"Patrón '{nombre}' inválido: {e}") from e
+    return compilados
+
+
+# =============================================================================
+# INSTRUMENTACIÓN
+# =============================================================================
+
+def activar_instrumentacion(activo: bool = True) -> None:
+    """Activa/desactiva el conteo de tiempo por patrón (también en workers)."""
+    global _INSTRUMENTACION
+    _INSTRUMENTACION = activo
+    if activo:
+        os.environ[VARIABLE_ENTORNO] = '1'
+    else:
+        os.environ.pop(VARIABLE_ENTORNO, None)
+
+
+def instrumentacion_activa() -> bool:
+    return _INSTRUMENTACION
+
+
+def _anotar(clave: str, segundos: float) -> None:
+    entrada = ESTADISTICAS_PATRONES.get(clave)
+    if entrada is None:
+        ESTADISTICAS_PATRONES[clave] = [1, segundos]
+    else:
+        entrada[0] += 1
+        entrada[1] += segundos
+
+
+class PatronInstrumentado:
+    """Envoltorio de re.Pattern que mide cada llamada."""
+
+    __slots__ = ('_patron', '_clave')
+
+    def __init__(self, patron: 're.Pattern', clave: str):
+        self._patron = patron
+        self._clave = clave
+
+    @property
+    def pattern(self) -> str:
+        return self._patron.pattern
+
+    @property
+    def flags(self) -> int:
+        return self._patron.flags
+
+    def _medir(self, metodo: str, *args, **kwargs):
+        inicio = time.perf_counter()
+        try:
+            return getattr(self._patron, metodo)(*args, **kwargs)
+        finally:
+            _anotar(self._clave, time.perf_counter() - inicio)
+
+    def search(self, *args, **kwargs):
+        return self._medir('search', *args, **kwargs)
+
+    def match(self, *args, **kwargs):
+        return self._medir('match', *args, **kwargs)
+
+    def fullmatch(self, *args, **kwargs):
+        return self._medir('fullmatch', *args, **kwargs)
+
+    def findall(self, *args, **kwargs):
+        return self._medir('findall', *args, **kwargs)
+
+    def sub(self, *args, **kwargs):
+        return self._medir('sub', *args, **kwargs)
+
+    def split(self, *args, **kwargs):
+        return self._medir('split', *args, **kwargs)
+
+    def finditer(self, *args, **kwargs) -> Iterator['re.Match']:
+        # El coste de finditer está en cada next(): se mide la iteración completa
+        iterador = self._patron.finditer(*args, **kwargs)
+        segundos = 0.0
+        try:
+            while True:
+                inicio = time.perf_counter()
+                try:
+                    m = next(iterador)
+                except StopIteration:
+                    segundos += time.perf_counter() - inicio
+                    return
+                segundos += time.perf_counter() - inicio
+                yield m
+        finally:
+            _anotar(self._clave, segundos)
+
+
+def obtener_patron(compilados: Dict[str, 're.Pattern'], clase: str, nombre: str):
+    """
+    Devuelve el patrón compilado (o su envoltorio instrumentado).
+
+    Raises:
+        KeyError: Si el patrón no está declarado
+    """
+    patron = compilados[nombre]
+    if _INSTRUMENTACION:
+        return PatronInstrumentado(patron, f'{clase}.{nombre}')
+    return patron
+
+
+# =============================================================================
+# ESTADÍSTICAS
+# =============================================================================
+
+def reiniciar_estadisticas() -> None:
+    """Pone a cero los contadores de la factura en curso.
+
+    Se llama al empezar cada factura: lo que dejara a medias una factura
+    anterior (excepción, corte del supervisor) no se atribuye a esta.
+    """
+    ESTADISTICAS_PATRONES.clear()
+
+
+def volcar_estadisticas() -> Dict[str, List]:
+    """Devuelve las estadísticas de la factura en curso y las pone a cero."""
+    datos = {clave: list(valor) for clave, valor in ESTADISTICAS_PATRONES.items()}
+    ESTADISTICAS_PATRONES.clear()
+    return datos
+
+
+def acumular_estadisticas(datos: Dict[str, List]) -> None:
+    """Suma las estadísticas de una factura (ej: de un worker) a los totales."""
+    for clave, (llamadas, segundos) in (datos or {}).items():
+        entrada = TOTALES_PATRONES.setdefault(clave, [0, 0.0])
+        entrada[0] += llamadas
+        entrada[1] += segundos
+
+
+def informe_patrones(top: int = 20) -> str:
+    """
+    Genera un informe de los patrones más costosos.
+
+    Args:
+        top: Número de patrones a mostrar
+
+    Returns:
+        Texto con una línea por patrón (tiempo total, llamadas, media)
+    """
+    if not TOTALES_PATRONES:
+        return "Sin estadísticas de patrones (¿instrumentación desactivada?)"
+
+    ordenados = sorted(TOTALES_PATRONES.items(), key=lambda kv: -kv[1][1])
+    total = sum(segundos for _, segundos in TOTALES_PATRONES.values())
+    lineas = [f"{'PATRÓN':<45} {'TOTAL ms':>10} {'LLAMADAS':>9} {'MEDIA µs':>10}"]
+    for clave, (llamadas, segundos) in ordenados[:top]:
+        media = segundos / llamadas * 1e6 if llamadas else 0
+        lineas.append(f"{clave[:45]:<45} {segundos * 1000:>10.2f} {llamadas:>9d} {media:>10.1f}")
+    lineas.append(f"{'TOTAL':<45} {total * 1000:>10.2f}")
+    return '\n'.join(lineas)
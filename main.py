@@ -1,9 +1,52 @@
 #!/usr/bin/env python3
 """
-PARSEAR FACTURAS v5.10
+PARSEAR FACTURAS v5.11
 ======================
 Sistema modular para extraccion y procesamiento de facturas.
 
+CAMBIOS v5.11 (19/10/2026):
+- Layout de palabras con posición extraído una sola vez por factura
+  para extractores con usa_layout = True (ContextoFactura.layout; no se
+  guarda en la Factura)
+- Orden de métodos PDF autoajustado por proveedor con estadísticas
+  persistentes (datos/estadisticas_pdf.json, --sin-autoajuste-pdf)
+- Facturas procesadas en workers supervisados con límites de tiempo por
+  factura/etapa y de memoria (TIMEOUT en errores, el lote continúa)
+- Patrones regex de extractores precompilados por clase; --perfil-regex
+  muestra el tiempo acumulado por patrón
+- Extractores instanciados una vez por proceso (obtener_extractor devuelve
+  la instancia compartida); datos por factura en ContextoFactura
+- --almacen guarda líneas y cabeceras en un almacén SQLite (Parquet si
+  hay pyarrow) particionado por trimestre/proveedor
+- Log y resumen generados desde EstadisticasEjecucion, acumulado al
+  terminar cada factura (una sola pasada)
+- --actualizar sustituye en el Excel existente solo las facturas
+  reprocesadas (conserva el resto de filas y las columnas manuales)
+- --jsonl escribe cada factura en JSONL en cuanto termina
+- Procesado por shards (--plan-shards, --procesar-shard, --fusionar-shards;
+  --liberar-shard para un .lock abandonado)
+  con fusión determinista en los Excel por trimestre y anual
+- Cola de trabajo SQLite en carpeta compartida (--encolar, --worker,
+  --fusionar-cola) con leases, heartbeats y reintentos
+- --reglas categoriza con el diccionario compilado (nucleo/reglas.py:
+  EXACT por hash, SUBSTR con autómata, REGEX combinada por proveedor)
+  antes de recurrir al diccionario xlsx
+- Categorización según la fecha de la factura: reglas y artículos con
+  ValidaDesde/ValidaHasta se resuelven con VersionesPorFecha (bisect)
+- Hoja "Sugerencias": para las líneas PENDIENTE / SIN_CATEGORIA, las
+  categorías más parecidas del diccionario (TF-IDF de n-gramas de
+  caracteres, nucleo/sugerencias.py); --sin-sugerencias la desactiva
+- --aprender EXCEL importa las categorías corregidas en la hoja "Lineas"
+  de un Excel revisado (columna CATEGORIA_REVISADA, o cambios respecto a
+  --original EXCEL) a datos/aprendidos.json; categorizar_linea las
+  consulta tras el match exacto (match APRENDIDO). --sin-aprendidos no
+  las usa
+- normalizar_proveedor() con patrones precompilados, alias parciales por
+  autómata y memoria de resultados (nucleo/normalizacion.py)
+- ALIAS_DICCIONARIO y RETENCIONES_PROVEEDOR pasan a config/proveedores.py;
+  registro unificado de proveedores (nucleo/proveedores.py) con índices
+  por nombre/alias, CIF e IBAN para retenciones y alias
+
 CAMBIOS v5.10 (04/01/2026):
 - Mensaje SIN_PROVEEDOR reemplazado por mensajes más específicos:
   - SIN_EXTRACTOR: No hay extractor para este proveedor
@@ -80,17 +123,40 @@ limpiar_pycache()
 sys.dont_write_bytecode = True  # Evita generar nuevos __pycache__
 
 import argparse
+import time
 from datetime import datetime
 import re
 from difflib import SequenceMatcher
 
+import pandas as pd
+
 # Anadir el directorio del script al path
 sys.path.insert(0, str(Path(__file__).parent))
 
 # Importar modulos del proyecto (DESPUÉS de limpiar caché)
-from config.settings import VERSION, CIF_PROPIO, DICCIONARIO_DEFAULT
+from config.settings import DICCIONARIO_DEFAULT
+from config.settings import AUTOAJUSTE_METODO_PDF, ESTADISTICAS_PDF_RUTA
+from config.settings import USAR_SUPERVISOR, WORKERS_FACTURAS
+from config.settings import ALMACEN_RUTA
+from config.settings import REGLAS_COMPILADAS_RUTA, REGLAS_VERIFICAR_SHA
+from config.settings import SUGERENCIAS_ACTIVAS, SUGERENCIAS_TOP_K, SUGERENCIAS_CACHE_RUTA
+from config.settings import USAR_APRENDIDOS, APRENDIDOS_RUTA
+from config.proveedores import ALIAS_DICCIONARIO, RETENCIONES_PROVEEDOR
+from config.settings import (
+    COLA_RUTA, COLA_LEASE_SEGUNDOS, COLA_HEARTBEAT_SEGUNDOS,
+    COLA_MAX_INTENTOS, COLA_ESPERA_SEGUNDOS,
+)
 from nucleo.factura import Factura, LineaFactura
-from nucleo.pdf import extraer_texto_pdf
+from nucleo.pdf import extraer_texto_detallado, orden_metodos
+from nucleo.estadisticas_pdf import EstadisticasPDF, clave_proveedor, clave_extractor
+from nucleo.supervisor import SupervisorFacturas, factura_fallida
+from nucleo import shards
+from nucleo.cola import ColaTrabajo, Heartbeat, identificador_trabajador
+from nucleo.reglas import MotorReglas, IndiceCategorias, VersionesPorFecha, convertir_fecha
+from nucleo.sugerencias import cargar_indice_sugerencias, sugerencias_pendientes
+from nucleo.aprendidos import AprendidosCategorias, importar_revisado
+from nucleo.normalizacion import NormalizadorProveedores
+from nucleo.proveedores import obtener_registro, instalar_registro
 from nucleo.parser import (
     parsear_nombre_archivo,
     extraer_fecha,
@@ -100,9 +166,14 @@ from nucleo.parser import (
     extraer_referencia
 )
 from nucleo.validacion import validar_cuadre, validar_factura
-from extractores import obtener_extractor, listar_extractores, EXTRACTORES
-from extractores.generico import ExtractorGenerico
-from salidas import generar_excel, generar_log, imprimir_resumen
+from extractores import obtener_extractor, listar_extractores, EXTRACTORES, ContextoFactura
+from extractores.generico import obtener_extractor_generico
+from extractores.patrones import (
+    activar_instrumentacion, instrumentacion_activa, reiniciar_estadisticas,
+    volcar_estadisticas, acumular_estadisticas, informe_patrones
+)
+from salidas import generar_excel, actualizar_excel, generar_log, imprimir_resumen, EstadisticasEjecucion
+from salidas import EscritorJSONL, registro_factura
 
 
 # ============================================================================
@@ -132,192 +203,11 @@ KEYWORDS_EXCLUIR_PRORRATEO = [
 
 
 # ============================================================================
-# MAPEO DE ALIAS PARA NORMALIZACIÓN (v5.7 - AMPLIADO)
+# ALIAS Y RETENCIONES POR PROVEEDOR
 # ============================================================================
-
-ALIAS_DICCIONARIO = {
-    # SABORES DE PATERNA
-    'SABORES DE PATERNA': 'SABORES PATERNA',
-    'PATERNA': 'SABORES PATERNA',
-    # FELISA
-    'FELISA GOURMET': 'FELISA',
-    'FELISA GOURMET DON FELIX': 'FELISA',
-    'PESCADOS DON FELIX': 'FELISA',
-    # ZUCCA
-    'QUESERIA ZUCCA': 'ZUCCA',
-    'FORMAGGIARTE': 'ZUCCA',
-    'FORMAGGIARTE ZUCCA': 'ZUCCA',
-    'QUESOS ZUCCA': 'ZUCCA',
-    # SERRIN - incluyendo errores ortográficos
-    'SERRIN NOCHAO': 'SERRIN NO CHAO',
-    'SERRIN NO CHAN': 'SERRIN NO CHAO',
-    'SERRIN': 'SERRIN NO CHAO',
-    'SERRRIN': 'SERRIN NO CHAO',  # error ortográfico con 3 R
-    'SERRRIN NO CHAO': 'SERRIN NO CHAO',
-    'SERRRIN TF': 'SERRIN NO CHAO',
-    # DE LUIS
-    'DE LUIS': 'DE LUIS SABORES UNICOS',
-    # BERZAL
-    'BERZAL': 'BERZAL HERMANOS',
-    'BERZAL HNOS': 'BERZAL HERMANOS',
-    'BERZAL HNOS.': 'BERZAL HERMANOS',
-    # CONSERVAS TITO
-    'PORVAZ': 'CONSERVAS TITO',
-    'PORVAZ VILLAGARCIA': 'CONSERVAS TITO',
-    'PORVAZ TITO': 'CONSERVAS TITO',
-    # EMBUTIDOS BERNAL
-    'JAMONES BERNAL': 'EMBUTIDOS BERNAL',
-    'JAMONES Y EMBUTIDOS BERNAL': 'EMBUTIDOS BERNAL',
-    'BERNAL': 'EMBUTIDOS BERNAL',
-    # SILVA CORDERO
-    'QUESOS SILVA CORDERO': 'SILVA CORDERO',
-    'QUESOS DE ACEHUCHE': 'SILVA CORDERO',
-    # QUESERIA NAVAS
-    'CARLOS NAVAS': 'QUESERIA NAVAS',
-    'QUESOS NAVAS': 'QUESERIA NAVAS',
-    'QUESERIA CARLOS NAVAS': 'QUESERIA NAVAS',
-    # LA ALACENA
-    'CONSERVAS LA ALACENA': 'LA ALACENA',
-    # GADITAUN
-    'MARILINA GADITAUN': 'GADITAUN',
-    'GARDITAUN MARIA LINAREJOS': 'GADITAUN',
-    'GADITAUN MARIA LINAREJOS': 'GADITAUN',
-    'GADITAUN MARILINA': 'GADITAUN',
-    'MARILINA': 'GADITAUN',
-    # BORBOTON
-    'BODEGAS BORBOTON': 'BORBOTON',
-    # ARTESANOS DEL MOLLETE
-    'ARTESANOS DEL MOLLETE': 'MOLLETES ARTESANOS',
-    'MOLLETES ARTESANOS DE ANTEQUERA': 'MOLLETES ARTESANOS',
-    'ARTESANOS DEL MOLINO': 'MOLLETES ARTESANOS',
-    # ZUBELZU
-    'ZUBELZU PIPARRAK': 'ZUBELZU',
-    'IBARRAKO': 'ZUBELZU',
-    'IBARRAKO PIPARRAK': 'ZUBELZU',
-    # LA MOLIENDA VERDE
-    'MOLIENDA VERDE': 'LA MOLIENDA VERDE',
-    # DISTRIBUCIONES LAVAPIES
-    'LAVAPIES': 'DISTRIBUCIONES LAVAPIES',
-    # GRUPO DISBER
-    'DISBER': 'GRUPO DISBER',
-    # MRM
-    'INDUSTRIAS CARNICAS MRM': 'MRM',
-    # PILAR RODRIGUEZ
-    'EL MAJADAL': 'PILAR RODRIGUEZ',
-    'EL MAJADAL PILAR RODRIGUEZ': 'PILAR RODRIGUEZ',
-    # TERRITORIO CAMPERO
-    'GRUPO TERRITORIO CAMPERO': 'TERRITORIO CAMPERO',
-    'GRUPO CAMPERO': 'TERRITORIO CAMPERO',
-    # MARITA
-    'MARITA COSTA': 'MARITA',
-    # LA BARRA DULCE
-    'BARRA DULCE': 'LA BARRA DULCE',
-    'LA BARRA DULCE S.L.': 'LA BARRA DULCE',
-    # TIRSO PAPEL Y BOLSAS (NUEVO 01/01/2026)
-    'TIRSO': 'TIRSO PAPEL Y BOLSAS',
-    'TIRSO PAPEL': 'TIRSO PAPEL Y BOLSAS',
-    'BOLSAS TIRSO': 'TIRSO PAPEL Y BOLSAS',
-    'TIRSO PAPEL Y BOLSAS SL': 'TIRSO PAPEL Y BOLSAS',
-    'TIRSO PAPAEL Y BOLSAS': 'TIRSO PAPEL Y BOLSAS',  # typo en archivos
-    'TIRSO PAPAEL Y BOLSAS SL': 'TIRSO PAPEL Y BOLSAS',
-    # LA CONSERVERA DEL PREPIRINEO (NUEVO 01/01/2026)
-    'CONSERVERA PREPIRINEO': 'LA CONSERVERA DEL PREPIRINEO',
-    'CONSERVERA DEL PREPIRINEO': 'LA CONSERVERA DEL PREPIRINEO',
-    'LA CONSERVERA PREPIRINEO': 'LA CONSERVERA DEL PREPIRINEO',
-    # MIGUEZ CAL
-    'FORPLAN': 'MIGUEZ CAL',
-    # MARTIN ABENZA
-    'CONSERVAS EL MODESTO': 'MARTIN ABENZA',
-    'MARTIN ARBENZA': 'MARTIN ABENZA',
-    'MARTIN ARBENZA EL MODESTO': 'MARTIN ABENZA',
-    # WELLDONE
-    'RODOLFO DEL RIO': 'WELLDONE',
-    'WELLDONE LACTICOS': 'WELLDONE',
-    # MANIPULADOS ABELLAN
-    'EL LABRADOR': 'MANIPULADOS ABELLAN',
-    'ABELLAN': 'MANIPULADOS ABELLAN',
-    # LA ROSQUILLERIA  
-    'EL TORRO': 'LA ROSQUILLERIA',
-    # PANRUJE
-    'ROSQUILLAS LA ERMITA': 'PANRUJE',
-    # LICORES MADRUEÑO
-    'MADRUEÑO': 'LICORES MADRUEÑO',
-    # VINOS DE ARGANZA
-    'ARGANZA': 'VINOS DE ARGANZA',
-    # CVNE
-    'BODEGAS CVNE': 'CVNE',
-    # LA PURISIMA
-    'BODEGAS LA PURISIMA': 'LA PURISIMA',
-    'BODEGAS VIRGEN DE LA SIERRA': 'VIRGEN DE LA SIERRA',
-    # FRANCISCO GUERRA
-    'GUERRA': 'FRANCISCO GUERRA',
-    # FISHGOURMET
-    'FISH GOURMET': 'FISHGOURMET',
-    # ECOFICUS
-    'ECO FICUS': 'ECOFICUS',
-    # LOS GREDALES
-    'GREDALES': 'LOS GREDALES',
-    'LOS GREDALES DEL TOBOSO': 'LOS GREDALES',
-    
-    # ========== NUEVOS ALIAS v5.7 (01/01/2026) ==========
-    
-    # DEBORA GARCIA TOLEDANO - múltiples variantes
-    'DEBORA': 'DEBORA GARCIA TOLEDANO',
-    'DEBORAH': 'DEBORA GARCIA TOLEDANO',
-    'BEDORAH': 'DEBORA GARCIA TOLEDANO',
-    'DEBORA GARCIA': 'DEBORA GARCIA TOLEDANO',
-    'DEBORAH GARCIA': 'DEBORA GARCIA TOLEDANO',
-    'BEDORAH GARCIA': 'DEBORA GARCIA TOLEDANO',
-    'DEBORAH GARCIA TOLEDANO': 'DEBORA GARCIA TOLEDANO',
-    'BEDORAH GARCIA TOLEDANO': 'DEBORA GARCIA TOLEDANO',
-    
-    # HERNANDEZ SUMINISTROS
-    'HERNANDEZ': 'HERNANDEZ SUMINISTROS',
-    'HERNÁNDEZ': 'HERNANDEZ SUMINISTROS',
-    'HERNANDEZ SUMINISTROS HOSTELEROS': 'HERNANDEZ SUMINISTROS',
-    'HERNÁNDEZ SUMINISTROS HOSTELEROS': 'HERNANDEZ SUMINISTROS',
-    'HERNANDEZ SUM HOSTELEROS': 'HERNANDEZ SUMINISTROS',
-    
-    # ISAAC RODRIGUEZ / TRUCCO COPIAS
-    'TRUCCO COPIAS': 'ISAAC RODRIGUEZ',
-    'TRUCCO COPIAS ISAAC RODRIGUEZ': 'ISAAC RODRIGUEZ',
-    'TRUCCO ISSAC RODRIGUEZ': 'ISAAC RODRIGUEZ',
-    'TRUCCO COPIAS ISAAC HERNANDEZ': 'ISAAC RODRIGUEZ',
-    'ISAAC RODRIGUEZ TRUCCO COPIAS': 'ISAAC RODRIGUEZ',
-    
-    # LA DOLOROSA / PABLO RUIZ
-    'LA DOLOROSA': 'PABLO RUIZ',
-    'PABLO RUIZ LA DOLOROSA': 'PABLO RUIZ',
-    
-    # LUCERA / ENERGIA COLECTIVA
-    'ENERGIA COLECTIVA': 'LUCERA',
-    'ENERGIA COLECTIVA LUCERA': 'LUCERA',
-    
-    # JULIO GARCIA VIVAS
-    'GARCIA VIVAS': 'JULIO GARCIA VIVAS',
-    'GARCIA VIVAS JULIO': 'JULIO GARCIA VIVAS',
-}
-
-
-# ============================================================================
-# RETENCIONES POR PROVEEDOR (NUEVO v5.7)
-# ============================================================================
-
-# Proveedores con retención IRPF (el importe de la factura incluye retención)
-# El descuadre esperado es = base * porcentaje_retencion
-RETENCIONES_PROVEEDOR = {
-    # Alquiler local - 19%
-    'JAIME FERNANDEZ': 0.19,
-    'BENJAMIN ORTEGA': 0.19,
-    'BENJAMIN ORTEGA ALONSO': 0.19,
-    # Otros servicios profesionales - 15%
-    'REGISTRO MERCANTIL': 0.15,
-    # Servicios - 1%
-    'DEBORA GARCIA TOLEDANO': 0.01,
-    'DEBORA': 0.01,
-    'DEBORAH': 0.01,
-    'BEDORAH': 0.01,
-}
+# v5.11: ALIAS_DICCIONARIO y RETENCIONES_PROVEEDOR están en config/proveedores.py
+# (importados arriba; siguen disponibles como main.ALIAS_DICCIONARIO). Las
+# búsquedas se hacen con los índices de nucleo.proveedores.obtener_registro()
 
 # Tolerancia para descuadre por retención (€)
 TOLERANCIA_RETENCION = 0.50
@@ -327,6 +217,9 @@ TOLERANCIA_RETENCION = 0.50
 # FUNCIÓN: Normalizar nombre de proveedor (MEJORADA v5.7)
 # ============================================================================
 
+_NORMALIZADOR_PROVEEDORES = NormalizadorProveedores(ALIAS_DICCIONARIO)
+
+
 def normalizar_proveedor(nombre: str) -> str:
     """
     Normaliza nombre de proveedor:
@@ -334,49 +227,11 @@ def normalizar_proveedor(nombre: str) -> str:
     2. Quita sufijos numéricos (ej: " 2")
     3. Quita sufijos de tipo factura (TF, TR, TJ, EF, RC)
     4. Aplica mapeo de alias conocidos
-    """
-    if not nombre:
-        return ""
-    
-    nombre_original = nombre
-    
-    # Paso 1: Quitar prefijos tipo "4T25 1031 " o "1T25 0331 "
-    nombre = re.sub(r'^\d[TQ]\d{2}\s+\d{3,4}\s+', '', nombre)
     
-    # Paso 1b: Quitar prefijo "ATRASADA" o "ATRASADA 3T25" etc.
-    nombre = re.sub(r'^ATRASADA\s*(\d[TQ]\d{2})?\s*\d*\s*', '', nombre, flags=re.IGNORECASE)
-    
-    # Paso 1c: Quitar prefijo solo trimestre "4T25 " sin número
-    nombre = re.sub(r'^\d[TQ]\d{2}\s+', '', nombre)
-    
-    # Paso 1d: Quitar prefijo número solo "442 "
-    nombre = re.sub(r'^\d{3,4}\s+', '', nombre)
-    
-    # Paso 2: Quitar sufijos tipo factura: TF, TR, TJ, EF, RC (con o sin punto)
-    nombre = re.sub(r'\s+(TF|TR|TJ|EF|RC|EG)\.?$', '', nombre, flags=re.IGNORECASE)
-    
-    # Paso 3: Quitar sufijos numéricos tipo " 2" o " 3"
-    nombre = re.sub(r'\s+\d+$', '', nombre)
-    
-    # Paso 4: Quitar extensión .pdf si quedó
-    nombre = re.sub(r'\.pdf$', '', nombre, flags=re.IGNORECASE)
-    
-    nombre = nombre.strip().upper()
-    
-    # Paso 5: Aplicar mapeo de alias
-    if nombre in ALIAS_DICCIONARIO:
-        return ALIAS_DICCIONARIO[nombre]
-    
-    # Paso 6: Buscar coincidencia parcial en alias (para nombres con errores)
-    for alias, normalizado in ALIAS_DICCIONARIO.items():
-        # Si el nombre contiene el alias completo
-        if alias in nombre:
-            return normalizado
-        # Si el alias contiene el nombre (nombre es substring)
-        if len(nombre) >= 5 and nombre in alias:
-            return normalizado
-    
-    return nombre
+    v5.11: patrones precompilados, alias parciales con autómata y
+    resultados memorizados (nucleo.normalizacion); mismo resultado.
+    """
+    return _NORMALIZADOR_PROVEEDORES.normalizar(nombre)
 
 
 # ============================================================================
@@ -423,18 +278,8 @@ def calcular_descuadre_con_retencion(total_lineas: float, total_factura: float,
     Returns:
         (descuadre_real, tiene_retencion, porcentaje_retencion)
     """
-    proveedor_upper = proveedor.upper().strip()
-    
-    # Buscar por nombre exacto o normalizado
-    porcentaje = None
-    if proveedor_upper in RETENCIONES_PROVEEDOR:
-        porcentaje = RETENCIONES_PROVEEDOR[proveedor_upper]
-    else:
-        # Buscar por nombre parcial
-        for nombre_ret, porc in RETENCIONES_PROVEEDOR.items():
-            if nombre_ret in proveedor_upper or proveedor_upper in nombre_ret:
-                porcentaje = porc
-                break
+    # Por nombre exacto o parcial (índice de RETENCIONES_PROVEEDOR)
+    porcentaje = obtener_registro().retencion(proveedor)
     
     if porcentaje is not None:
         # La factura tiene retención: total_pagado = total_bruto - retencion
@@ -476,11 +321,11 @@ def buscar_en_diccionario(proveedor: str, indice: dict) -> str:
         if nombre_dic in prov_upper or prov_upper in nombre_dic:
             return nombre_dic
     
-    # 4. Búsqueda parcial en alias
-    for alias_from, alias_to in ALIAS_DICCIONARIO.items():
-        if alias_from in prov_upper or prov_upper in alias_from:
-            if alias_to in indice:
-                return alias_to
+    # 4. Búsqueda parcial en alias (índice de ALIAS_DICCIONARIO)
+    for alias_from in obtener_registro().alias_relacionados(prov_upper):
+        alias_to = ALIAS_DICCIONARIO[alias_from]
+        if alias_to in indice:
+            return alias_to
     
     return prov_upper
 
@@ -562,6 +407,11 @@ def cargar_diccionario(ruta_excel: Path):
     """
     Carga el diccionario de proveedores y categorías.
     Hoja: 'Articulos' con columnas: PROVEEDOR, ARTICULO, CATEGORIA, TIPO_IVA, COD LOYVERSE
+    
+    v5.11: Si hay columnas VALIDA_DESDE/VALIDA_HASTA, las filas repetidas de
+    un mismo proveedor+artículo son versiones con vigencia. El índice guarda
+    la vigente hoy (vacía si todas caducaron) y, en 'versiones', un
+    VersionesPorFecha para elegir la vigente en la fecha de la factura.
     """
     import pandas as pd
     
@@ -571,6 +421,14 @@ def cargar_diccionario(ruta_excel: Path):
     except ValueError:
         df = pd.read_excel(ruta_excel, sheet_name='COMPRAS')
     
+    col_desde = next((c for c in ('VALIDA_DESDE', 'ValidaDesde') if c in df.columns), None)
+    col_hasta = next((c for c in ('VALIDA_HASTA', 'ValidaHasta') if c in df.columns), None)
+    
+    def fecha_columna(row, col):
+        if col is None or pd.isna(row.get(col)):
+            return None
+        return convertir_fecha(row.get(col))
+    
     articulos = {}
     proveedores = {}
     indice = {}
@@ -589,11 +447,24 @@ def cargar_diccionario(ruta_excel: Path):
         if proveedor not in indice:
             indice[proveedor] = {}
         
-        indice[proveedor][articulo] = {
+        datos = {
             'categoria': categoria,
             'id_categoria': id_cat,
             'iva': int(iva) if pd.notna(iva) else 21
         }
+        desde = fecha_columna(row, col_desde)
+        hasta = fecha_columna(row, col_hasta)
+        anterior = indice[proveedor].get(articulo)
+        if desde or hasta or (anterior and 'versiones' in anterior):
+            versiones = anterior.get('versiones') if anterior else None
+            if versiones is None:
+                versiones = VersionesPorFecha()
+                if anterior:
+                    versiones.agregar(anterior)
+            versiones.agregar(datos, desde, hasta)
+            indice[proveedor][articulo] = dict(versiones.en() or {}, versiones=versiones)
+        else:
+            indice[proveedor][articulo] = datos
         
         articulos[articulo] = {
             'proveedor': proveedor,
@@ -613,27 +484,76 @@ def cargar_diccionario(ruta_excel: Path):
 # FUNCIÓN: categorizar_linea
 # ============================================================================
 
-def categorizar_linea(linea, proveedor: str, indice: dict, tiene_extractor: bool = True):
+def _datos_vigentes(data: dict, fecha):
+    """Versión de un artículo del diccionario vigente en la fecha (None si ninguna)."""
+    versiones = data.get('versiones')
+    if versiones is None:
+        return data
+    return versiones.en(fecha)
+
+
+def _aplicar_aprendido(linea, proveedor: str, aprendidos) -> bool:
+    """Aplica la categoría aprendida del artículo si la hay (True si se aplicó)."""
+    if aprendidos is None:
+        return False
+    data = aprendidos.buscar(proveedor, linea.articulo)
+    if data is None:
+        return False
+    linea.categoria = data['categoria']
+    linea.id_categoria = data['id_categoria']
+    linea.match_info = 'APRENDIDO'
+    return True
+
+
+def categorizar_linea(linea, proveedor: str, indice: dict, tiene_extractor: bool = True,
+                      fecha=None):
     """
     Categoriza una línea buscando en el diccionario.
     
     Args:
         linea: LineaFactura a categorizar
         proveedor: Nombre del proveedor
-        indice: Diccionario de categorías
+        indice: Diccionario de categorías (con motor de reglas si se cargó --reglas)
         tiene_extractor: True si hay extractor específico, False si usa genérico
+        fecha: Fecha de la factura (date o 'DD/MM/YYYY'); elige la versión
+            vigente de reglas y artículos con ValidaDesde/ValidaHasta
     """
     import pandas as pd
     
-    # Respetar categoría ya asignada por el extractor (hardcodeada)
+    # Las correcciones aprendidas se guardan por proveedor normalizado
+    prov_normalizado = normalizar_proveedor(proveedor)
+    aprendidos = getattr(indice, 'aprendidos', None)
+    
+    # Respetar categoría ya asignada por el extractor (hardcodeada), salvo
+    # que se haya corregido en un Excel revisado
     if linea.categoria and linea.categoria not in ('', 'PENDIENTE', None):
-        linea.match_info = 'EXTRACTOR'
+        if not _aplicar_aprendido(linea, prov_normalizado, aprendidos):
+            linea.match_info = 'EXTRACTOR'
         return
     
-    prov_normalizado = normalizar_proveedor(proveedor)
+    fecha = convertir_fecha(fecha)
     prov_diccionario = buscar_en_diccionario(prov_normalizado, indice)
     
+    # v5.11: Reglas del diccionario compilado; si ninguna casa, sigue el xlsx
+    motor = getattr(indice, 'motor', None)
+    if motor is not None:
+        regla = motor.buscar(prov_diccionario, linea.articulo, fecha)
+        if regla is None and prov_diccionario != proveedor:
+            regla = motor.buscar(proveedor, linea.articulo, fecha)
+        if regla is not None:
+            # Las correcciones aprendidas mandan sobre todo salvo el exacto
+            if regla.tipo_match != 'EXACT' and _aplicar_aprendido(linea, prov_normalizado, aprendidos):
+                return
+            linea.categoria = regla.categoria
+            linea.id_categoria = regla.id_categoria
+            linea.match_info = f'REGLA_{regla.tipo_match}'
+            return
+    
+    # v5.11: Categorías aprendidas de Excel revisados (también para
+    # proveedores que no están en el diccionario)
     if prov_diccionario not in indice:
+        if _aplicar_aprendido(linea, prov_normalizado, aprendidos):
+            return
         # v5.10: Distinguir entre SIN_EXTRACTOR y SIN_CATEGORIA
         if tiene_extractor:
             linea.categoria = 'SIN_CATEGORIA'
@@ -647,22 +567,30 @@ def categorizar_linea(linea, proveedor: str, indice: dict, tiene_extractor: bool
     articulo_upper = linea.articulo.upper().strip()
     
     # 1. Match exacto
-    if articulo_upper in articulos_prov:
-        data = articulos_prov[articulo_upper]
+    data = _datos_vigentes(articulos_prov[articulo_upper], fecha) if articulo_upper in articulos_prov else None
+    if data:
         linea.categoria = data['categoria']
         linea.id_categoria = data['id_categoria']
         linea.match_info = 'EXACTO'
         return
     
-    # 2. Match parcial (substring)
+    # 2. Aprendido de un Excel revisado (una corrección manual manda sobre
+    # el parcial y el fuzzy)
+    if _aplicar_aprendido(linea, prov_normalizado, aprendidos):
+        return
+    
+    # 3. Match parcial (substring)
     for art_dic, data in articulos_prov.items():
         if art_dic in articulo_upper or articulo_upper in art_dic:
+            data = _datos_vigentes(data, fecha)
+            if data is None:
+                continue
             linea.categoria = data['categoria']
             linea.id_categoria = data['id_categoria']
             linea.match_info = 'PARCIAL'
             return
     
-    # 3. Fuzzy matching (80% similitud)
+    # 4. Fuzzy matching (80% similitud)
     mejor_ratio = 0
     mejor_match = None
     mejor_tipo = 'FUZZY'
@@ -670,6 +598,9 @@ def categorizar_linea(linea, proveedor: str, indice: dict, tiene_extractor: bool
     for art_dic, data in articulos_prov.items():
         ratio = SequenceMatcher(None, articulo_upper, art_dic).ratio()
         if ratio > mejor_ratio and ratio >= 0.8:
+            data = _datos_vigentes(data, fecha)
+            if data is None:
+                continue
             mejor_ratio = ratio
             mejor_match = data
             mejor_tipo = f'FUZZY_{int(ratio*100)}%'
@@ -689,10 +620,65 @@ def categorizar_linea(linea, proveedor: str, indice: dict, tiene_extractor: bool
 # FUNCIÓN: procesar_factura (MEJORADA v5.7)
 # ============================================================================
 
-def procesar_factura(ruta_pdf: Path, indice: dict) -> Factura:
+def resolver_extractor(nombre_archivo: str, proveedor: str):
+    """
+    Extractor de una factura: el del proveedor, el de un proveedor que
+    aparezca en el nombre del archivo (v5.7) o el genérico.
+    
+    Returns:
+        (proveedor, extractor, tiene_extractor_especifico)
+    """
+    extractor = obtener_extractor(proveedor)
+    if extractor is None:
+        proveedor_alternativo = buscar_proveedor_en_nombre(nombre_archivo, EXTRACTORES)
+        if proveedor_alternativo:
+            proveedor = proveedor_alternativo
+            extractor = obtener_extractor(proveedor_alternativo)
+    if extractor is None:
+        return proveedor, obtener_extractor_generico(), False
+    return proveedor, extractor, True
+
+
+def procesar_factura(ruta_pdf: Path, indice: dict,
+                     estadisticas: EstadisticasPDF = None,
+                     notificar_etapa=None) -> Factura:
     """
     Procesa una factura PDF.
+    
+    Si se pasan estadísticas, el orden de métodos PDF se ajusta al
+    historial del proveedor (el registro lo hace main() al terminar).
+    
+    notificar_etapa(nombre) se llama al empezar cada etapa ('extractor',
+    'pdf', 'cabecera', 'lineas', 'categorizacion', 'validacion') y cada
+    método PDF ('pdf:pypdf', ...); lo usa el supervisor para aplicar
+    LIMITES_ETAPA y saber qué método se colgó.
+    
+    La duración de cada etapa queda en factura.tiempos como 'etapa:<nombre>'
+    (junto a los 'pdf:<metodo>' de cada método probado).
     """
+    notificar = notificar_etapa or (lambda nombre: None)
+    duraciones = {}
+    en_curso, inicio_etapa = '', 0.0
+    
+    def etapa(nombre: str) -> None:
+        nonlocal en_curso, inicio_etapa
+        notificar(nombre)
+        if ':' in nombre:
+            return  # Subetapas 'pdf:x': las mide extraer_texto_detallado
+        ahora = time.perf_counter()
+        if en_curso:
+            duraciones[f'etapa:{en_curso}'] = round(ahora - inicio_etapa, 4)
+        en_curso, inicio_etapa = nombre, ahora
+    
+    def terminar(factura: Factura) -> Factura:
+        if en_curso:
+            duraciones[f'etapa:{en_curso}'] = round(time.perf_counter() - inicio_etapa, 4)
+        factura.tiempos.update(duraciones)
+        return factura
+    
+    etapa('extractor')
+    if instrumentacion_activa():
+        reiniciar_estadisticas()
     info = parsear_nombre_archivo(ruta_pdf.name)
     
     factura = Factura(
@@ -702,31 +688,34 @@ def procesar_factura(ruta_pdf: Path, indice: dict) -> Factura:
         proveedor=info.get('proveedor', 'DESCONOCIDO')
     )
     
-    extractor = obtener_extractor(factura.proveedor)
-    
-    # v5.7: Si no encontró extractor, buscar proveedor en el nombre del archivo
-    if extractor is None:
-        proveedor_alternativo = buscar_proveedor_en_nombre(ruta_pdf.name, EXTRACTORES)
-        if proveedor_alternativo:
-            factura.proveedor = proveedor_alternativo
-            extractor = obtener_extractor(proveedor_alternativo)
-    
     # v5.10: Guardar si hay extractor específico (no genérico)
-    tiene_extractor_especifico = extractor is not None
-    
-    if extractor is None:
-        extractor = ExtractorGenerico()
+    factura.proveedor, extractor, tiene_extractor_especifico = resolver_extractor(
+        ruta_pdf.name, factura.proveedor)
     
     metodo = extractor.metodo_pdf if extractor else 'pypdf'
-    texto = extraer_texto_pdf(ruta_pdf, metodo=metodo, fallback=True)
+    factura.extractor = extractor.nombre
+    orden = orden_metodos(metodo)
+    if estadisticas is not None:
+        orden = estadisticas.ordenar(clave_proveedor(factura), orden)
+    
+    # usa_layout: texto y palabras con posición en una sola pasada por el PDF.
+    # El layout solo llega al extractor (no vuelve de los workers con la factura)
+    etapa('pdf')
+    usa_layout = getattr(extractor, 'usa_layout', False)
+    resultado = extraer_texto_detallado(ruta_pdf, metodo=metodo, fallback=True,
+                                        con_layout=usa_layout, orden=orden,
+                                        al_probar=lambda m: etapa(f'pdf:{m}'))
+    texto = resultado.texto
     factura.texto_raw = texto
-    factura.metodo_pdf = metodo
+    factura.metodo_pdf = resultado.metodo
+    factura.tiempos.update(resultado.tiempos)
     
     if not texto:
         factura.agregar_error('PDF_VACIO')
         factura.cuadre = 'SIN_TEXTO'
-        return factura
+        return terminar(factura)
     
+    etapa('cabecera')
     if extractor and hasattr(extractor, 'extraer_fecha'):
         factura.fecha = extractor.extraer_fecha(texto)
     if not factura.fecha:
@@ -745,11 +734,16 @@ def procesar_factura(ruta_pdf: Path, indice: dict) -> Factura:
     if factura.total is None:
         factura.total = extraer_total(texto, factura.proveedor)
     
+    etapa('lineas')
+    contexto = ContextoFactura(ruta=ruta_pdf, proveedor=factura.proveedor,
+                               texto=texto, layout=resultado.layout)
     try:
-        lineas_raw = extractor.extraer_lineas(texto) if extractor else []
+        lineas_raw = extractor.extraer_lineas_contexto(contexto)
     except Exception as e:
         factura.agregar_error(f'EXTRACTOR_ERROR: {str(e)[:50]}')
         lineas_raw = []
+    # Avisos aparte de los errores: no cambian ERRORES ni el cuadre
+    factura.avisos.extend(contexto.avisos)
     
     lineas_convertidas = []
     for linea_raw in lineas_raw:
@@ -783,21 +777,28 @@ def procesar_factura(ruta_pdf: Path, indice: dict) -> Factura:
         lineas_convertidas.append(linea)
     
     # Prorratear portes
+    etapa('categorizacion')
     lineas_prorrateadas = prorratear_portes(lineas_convertidas)
     
-    # Categorizar cada línea
+    # Categorizar cada línea (v5.11: con la fecha de la factura para las vigencias)
+    fecha_factura = convertir_fecha(factura.fecha)
     for linea in lineas_prorrateadas:
-        categorizar_linea(linea, factura.proveedor, indice, tiene_extractor_especifico)
+        categorizar_linea(linea, factura.proveedor, indice, tiene_extractor_especifico,
+                          fecha=fecha_factura)
         factura.agregar_linea(linea)
     
     # v5.7: Validar cuadre considerando retenciones
+    etapa('validacion')
     factura.cuadre = validar_cuadre_con_retencion(factura.lineas, factura.total, factura.proveedor)
     
     errores = validar_factura(factura)
     for error in errores:
         factura.agregar_error(error)
     
-    return factura
+    if instrumentacion_activa():
+        factura.perfil_regex = volcar_estadisticas()
+    
+    return terminar(factura)
 
 
 # ============================================================================
@@ -856,16 +857,412 @@ def detectar_trimestre(carpeta_nombre: str) -> str:
 # FUNCIÓN: main
 # ============================================================================
 
+def _imprimir_progreso(i: int, total: int, archivo: Path, factura: Factura) -> None:
+    """Imprime la línea de progreso de una factura terminada."""
+    nombre_corto = archivo.name[:45] + '...' if len(archivo.name) > 48 else archivo.name
+    print(f"   [{i:3d}/{total}] {nombre_corto}", end=" ")
+    
+    if factura.proveedor == 'ERROR' and factura.errores:
+        print(f"ERROR: {factura.errores[0][:40]}")
+    elif factura.errores:
+        print(f"AVISO: {factura.errores[0][:30]}")
+    elif factura.lineas:
+        print(f"OK: {len(factura.lineas)} lineas, {factura.cuadre}")
+    else:
+        print("AVISO: SIN_LINEAS")
+
+
+def procesar_archivos(archivos: list, indice: dict, estadisticas=None,
+                      usar_supervisor: bool = True, workers: int = WORKERS_FACTURAS,
+                      estadisticas_ejecucion=None, al_terminar=None) -> list:
+    """
+    Procesa una lista de PDFs (supervisados o en el proceso principal).
+    
+    Args:
+        archivos: Rutas de los PDFs, en el orden del resultado
+        indice: Índice del diccionario
+        estadisticas: EstadisticasPDF (o None)
+        usar_supervisor: Procesar en workers con límites de tiempo/memoria
+        workers: Número de workers
+        estadisticas_ejecucion: EstadisticasEjecucion a alimentar en orden de archivo
+        al_terminar: Función (factura, posicion) llamada en cuanto termina cada factura
+        
+    Returns:
+        Lista de facturas en el orden de archivos
+    """
+    def terminada(n: int, posicion: int, archivo: Path, factura: Factura) -> None:
+        _imprimir_progreso(n, len(archivos), archivo, factura)
+        if al_terminar is not None:
+            al_terminar(factura, posicion)
+        acumular_estadisticas(factura.perfil_regex)
+        if estadisticas is not None:
+            clave = None
+            if not factura.extractor and factura.tiempos:
+                # Cortada por el supervisor: la clave del extractor que se estaba usando
+                proveedor, extractor, _ = resolver_extractor(archivo.name, factura.proveedor)
+                clave = clave_extractor(extractor.nombre, proveedor)
+            estadisticas.registrar_factura(factura, clave)
+    
+    if not usar_supervisor:
+        facturas = []
+        for i, archivo in enumerate(archivos, 1):
+            try:
+                factura = procesar_factura(archivo, indice, estadisticas)
+            except Exception as e:
+                factura = factura_fallida(archivo, f'EXCEPCION: {str(e)[:50]}')
+            facturas.append(factura)
+            if estadisticas_ejecucion is not None:
+                estadisticas_ejecucion.registrar(factura)
+            terminada(i, i - 1, archivo, factura)
+        return facturas
+    
+    resultados = {}
+    siguiente = 0  # Se registran en orden de archivo para que el log sea estable
+    with SupervisorFacturas(procesar_factura, args=(indice, estadisticas), workers=workers,
+                            inicializador=instalar_registro,
+                            args_inicializador=(obtener_registro(),)) as supervisor:
+        for n, (posicion, archivo, factura) in enumerate(supervisor.procesar(archivos), 1):
+            resultados[posicion] = factura
+            while siguiente in resultados and estadisticas_ejecucion is not None:
+                estadisticas_ejecucion.registrar(resultados[siguiente])
+                siguiente += 1
+            terminada(n, posicion, archivo, factura)
+    return [resultados[posicion] for posicion in sorted(resultados)]
+
+
+def _cargar_indice(diccionario: str, reglas: str = None, aprendidos: bool = USAR_APRENDIDOS) -> dict:
+    """
+    Carga el índice del diccionario (vacío si no existe).
+    
+    Args:
+        diccionario: Ruta del diccionario xlsx
+        reglas: Ruta del diccionario compilado (JSON) para el motor de reglas
+        aprendidos: Usar las categorías aprendidas (APRENDIDOS_RUTA) si las hay
+        
+    Returns:
+        Índice {proveedor: {artículo: datos}}; con reglas o aprendidos, un
+        IndiceCategorias que lleva además el MotorReglas y/o el almacén
+    """
+    diccionario_path = Path(diccionario)
+    if not diccionario_path.exists():
+        print(f"Aviso: Diccionario no encontrado: {diccionario_path}")
+        print("   Continuando sin categorizacion...")
+        indice = {}
+    else:
+        print(f"\nCargando diccionario...")
+        _, _, indice = cargar_diccionario(diccionario_path)
+        print(f"   {len(indice)} proveedores indexados")
+    if reglas:
+        try:
+            motor = MotorReglas.desde_json(Path(reglas), verificar_sha=REGLAS_VERIFICAR_SHA)
+        except (OSError, ValueError) as e:
+            print(f"ERROR: No se pudo cargar el diccionario compilado: {e}")
+            sys.exit(1)
+        print(f"   Reglas compiladas v{motor.version}: {motor.total_reglas} reglas, {len(motor)} proveedores")
+        indice = IndiceCategorias(indice, motor)
+    if aprendidos:
+        almacen = AprendidosCategorias.cargar(APRENDIDOS_RUTA)
+        if len(almacen):
+            print(f"   Categorías aprendidas: {len(almacen)} artículos")
+            if not isinstance(indice, IndiceCategorias):
+                indice = IndiceCategorias(indice)
+            indice.aprendidos = almacen
+    # El registro de proveedores lee el Maestro: una vez aquí y no en la
+    # etapa 'validacion' de la primera factura (a los workers se les envía)
+    print(f"   {len(obtener_registro())} proveedores en el registro")
+    return indice
+
+
+def aprender_de_excel(ruta_excel: str, ruta_original: str = None) -> None:
+    """
+    Importa las categorías corregidas de un Excel revisado al almacén de aprendidos.
+    
+    Args:
+        ruta_excel: Excel de salida con la hoja "Lineas" ya corregida
+        ruta_original: Excel tal como lo generó main.py (si la hoja no
+            tiene la columna CATEGORIA_REVISADA)
+    """
+    ruta = Path(ruta_excel)
+    original = Path(ruta_original) if ruta_original else None
+    for r in filter(None, (ruta, original)):
+        if not r.exists():
+            print(f"ERROR: No existe el Excel: {r}")
+            sys.exit(1)
+    almacen = AprendidosCategorias.cargar(APRENDIDOS_RUTA)
+    try:
+        resumen = importar_revisado(ruta, almacen, original=original,
+                                    normalizar_proveedor=normalizar_proveedor)
+    except (OSError, ValueError) as e:
+        print(f"ERROR: No se pudo leer {ruta}: {e}")
+        sys.exit(1)
+    almacen.guardar()
+    print(f"\nAprendido de {ruta.name}: {resumen['corregidas']} filas corregidas; "
+          f"{resumen['aprendidas']} nuevas/cambiadas, {resumen['sin_cambios']} sin cambios, "
+          f"{resumen['ignoradas']} ignoradas ({len(almacen)} artículos en {APRENDIDOS_RUTA})")
+
+
+def calcular_sugerencias(facturas: list, diccionario: str, indice: dict):
+    """
+    Sugerencias de categoría para las líneas pendientes de las facturas.
+    
+    Args:
+        facturas: Facturas procesadas
+        diccionario: Ruta del diccionario xlsx (clave de la caché del índice)
+        indice: Índice del diccionario ya cargado
+        
+    Returns:
+        DataFrame para la hoja "Sugerencias", o None si no hay diccionario
+    """
+    indice_sugerencias = cargar_indice_sugerencias(Path(diccionario), indice, SUGERENCIAS_CACHE_RUTA)
+    if indice_sugerencias is None:
+        return None
+    sugerencias = sugerencias_pendientes(facturas, indice_sugerencias, SUGERENCIAS_TOP_K)
+    print(f"   Sugerencias: {len(sugerencias)} líneas pendientes")
+    return sugerencias
+
+
+def planificar_shards(carpetas: list, num_shards: int, directorio: Path) -> dict:
+    """
+    Crea el plan de shards para varias carpetas de trimestre.
+    
+    Args:
+        carpetas: Carpetas de facturas, en el orden de fusión
+        num_shards: Número de shards
+        directorio: Carpeta de trabajo compartida
+        
+    Returns:
+        Plan creado
+    """
+    carpetas_plan = [(Path(c), detectar_trimestre(Path(c).name.upper())) for c in carpetas]
+    plan = shards.crear_plan(carpetas_plan, num_shards, directorio)
+    print(f"\nPlan: {len(plan['archivos'])} archivos en {plan['num_shards']} shards")
+    for carpeta in plan['carpetas']:
+        print(f"   {carpeta['trimestre']}: {carpeta['ruta']}")
+    print(f"   {Path(directorio) / shards.NOMBRE_PLAN}")
+    return plan
+
+
+def procesar_shard(plan: dict, directorio: Path, shard: int, indice: dict,
+                   estadisticas=None, usar_supervisor: bool = True,
+                   workers: int = WORKERS_FACTURAS) -> int:
+    """
+    Procesa un shard ya reclamado y escribe su JSONL de resultados.
+    
+    Los registros llevan la posición global del plan. El archivo se
+    escribe como .tmp y se renombra al terminar, de modo que un shard
+    interrumpido nunca aparece como terminado. El .lock se renueva con
+    cada factura terminada (ver shards.bloqueo_abandonado).
+    
+    Args:
+        plan: Plan cargado
+        directorio: Carpeta de trabajo
+        shard: Índice del shard
+        indice: Índice del diccionario
+        estadisticas: EstadisticasPDF (o None)
+        usar_supervisor: Procesar en workers supervisados
+        workers: Número de workers
+        
+    Returns:
+        Número de facturas procesadas
+    """
+    posiciones = shards.archivos_del_shard(plan, shard)
+    archivos = [ruta for _, ruta in posiciones]
+    print(f"\nShard {shard}: {len(archivos)} archivos")
+    
+    destino = shards.ruta_resultado(directorio, shard)
+    temporal = destino.with_suffix('.jsonl.tmp')
+    try:
+        with EscritorJSONL(temporal) as salida:
+            def terminada(factura, i):
+                salida.escribir(factura, posiciones[i][0])
+                shards.renovar_bloqueo(directorio, shard)
+            
+            procesar_archivos(
+                archivos, indice, estadisticas,
+                usar_supervisor=usar_supervisor, workers=workers,
+                al_terminar=terminada,
+            )
+        temporal.replace(destino)
+    finally:
+        shards.liberar_shard(directorio, shard)
+    print(f"   {destino}")
+    return len(archivos)
+
+
+def generar_excels_fusion(facturas_trimestre: list, outputs_dir: Path,
+                          ruta_anual: Path = None, ruta_almacen: Path = None,
+                          diccionario: str = None, indice: dict = None):
+    """
+    Genera los Excel por trimestre y el anual a partir de facturas ya ordenadas.
+    
+    Args:
+        facturas_trimestre: [(trimestre, factura)] en el orden final
+        outputs_dir: Carpeta de salida de los Excel por trimestre
+        ruta_anual: Excel con todas las facturas (default: Facturas_Anual.xlsx)
+        ruta_almacen: Almacén SQLite/Parquet (opcional)
+        diccionario: Ruta del diccionario xlsx; con indice, calcula la hoja
+            "Sugerencias" de cada Excel (como en una ejecución normal)
+        indice: Índice del diccionario ya cargado
+        
+    Returns:
+        EstadisticasEjecucion de todas las facturas
+    """
+    por_trimestre = {}
+    todas = []
+    estadisticas_ejecucion = EstadisticasEjecucion()
+    for trimestre, factura in facturas_trimestre:
+        por_trimestre.setdefault(trimestre, []).append(factura)
+        todas.append(factura)
+        estadisticas_ejecucion.registrar(factura)
+    
+    print(f"\nGenerando Excel...")
+    sugerencias_trimestre = {}
+    for trimestre, facturas in por_trimestre.items():
+        sugerencias = None
+        if diccionario and indice is not None:
+            sugerencias = calcular_sugerencias(facturas, diccionario, indice)
+        sugerencias_trimestre[trimestre] = sugerencias
+        ruta_excel = outputs_dir / f'Facturas_{trimestre}.xlsx'
+        total_filas = generar_excel(facturas, ruta_excel, ruta_almacen=ruta_almacen,
+                                    trimestre=trimestre, sugerencias=sugerencias)
+        print(f"   {ruta_excel}: {total_filas} filas")
+    
+    # Anual: las sugerencias de los trimestres, en el mismo orden
+    sugerencias_anual = None
+    tablas = [tabla for tabla in sugerencias_trimestre.values() if tabla is not None]
+    if tablas:
+        sugerencias_anual = pd.concat(tablas, ignore_index=True)
+    ruta_anual = ruta_anual or outputs_dir / 'Facturas_Anual.xlsx'
+    total_filas = generar_excel(todas, ruta_anual, sugerencias=sugerencias_anual)
+    print(f"   {ruta_anual}: {total_filas} filas ({len(por_trimestre)} trimestres)")
+    if ruta_almacen:
+        print(f"   {ruta_almacen} (trimestres {', '.join(por_trimestre)})")
+    return estadisticas_ejecucion
+
+
+def fusionar_shards(plan: dict, directorio: Path, outputs_dir: Path,
+                    ruta_anual: Path = None, ruta_almacen: Path = None,
+                    diccionario: str = None, indice: dict = None):
+    """
+    Fusiona los resultados de los shards en los Excel por trimestre y anual.
+    
+    El orden es siempre el del plan (carpetas y nombre de archivo), así que
+    el resultado y la numeración TMP son los mismos que en una ejecución
+    normal, con independencia de cuántos shards hubo o del orden en que
+    terminaron. Con diccionario e indice se añade la hoja "Sugerencias".
+    
+    Returns:
+        EstadisticasEjecucion de todas las facturas
+    """
+    carpeta_de = shards.carpeta_de_posicion(plan)
+    facturas_trimestre = [
+        (plan['carpetas'][carpeta_de[registro['posicion']]]['trimestre'],
+         Factura.from_dict(registro))
+        for registro in shards.leer_resultados(plan, directorio)
+    ]
+    return generar_excels_fusion(facturas_trimestre, outputs_dir, ruta_anual, ruta_almacen,
+                                 diccionario=diccionario, indice=indice)
+
+
+def trabajar_cola(cola: ColaTrabajo, indice: dict, estadisticas=None,
+                  usar_supervisor: bool = True, workers: int = WORKERS_FACTURAS,
+                  esperar: bool = True) -> int:
+    """
+    Bucle de worker: reclama tareas de la cola, las procesa y guarda el resultado.
+    
+    Mientras procesa, un hilo renueva los leases (heartbeat). Las facturas
+    que terminan en TIMEOUT/MEMORIA vuelven a la cola mientras les queden
+    intentos. Si otros workers tienen todo reclamado, espera por si algún
+    lease caduca (salvo esperar=False).
+    
+    Args:
+        cola: Cola de trabajo
+        indice: Índice del diccionario
+        estadisticas: EstadisticasPDF (o None)
+        usar_supervisor: Procesar en workers supervisados
+        workers: Número de workers (y tareas reclamadas por tanda)
+        esperar: Esperar a las tareas en curso de otros workers
+        
+    Returns:
+        Número de facturas guardadas por este worker
+    """
+    trabajador = identificador_trabajador()
+    guardadas = 0
+    print(f"\nWorker {trabajador}: {cola.ruta}")
+    
+    def terminada(factura: Factura, i: int) -> None:
+        nonlocal guardadas
+        posicion = tanda[i][0]
+        if factura.cuadre in ('TIMEOUT', 'MEMORIA'):
+            error = factura.errores[0] if factura.errores else factura.cuadre
+            if cola.reintentar(posicion, trabajador, error):
+                return
+        if cola.completar(posicion, trabajador, registro_factura(factura, posicion)):
+            guardadas += 1
+    
+    try:
+        with Heartbeat(cola, trabajador, COLA_HEARTBEAT_SEGUNDOS):
+            while True:
+                tanda = cola.reclamar(trabajador, cantidad=max(1, workers))
+                if not tanda:
+                    if not esperar or cola.terminada():
+                        break
+                    time.sleep(COLA_ESPERA_SEGUNDOS)
+                    continue
+                procesar_archivos(
+                    [ruta for _, ruta in tanda], indice, estadisticas,
+                    usar_supervisor=usar_supervisor, workers=workers,
+                    al_terminar=terminada,
+                )
+                if estadisticas is not None:
+                    estadisticas.guardar()
+    finally:
+        cola.liberar(trabajador)
+    return guardadas
+
+
+def fusionar_cola(cola: ColaTrabajo, outputs_dir: Path,
+                  ruta_anual: Path = None, ruta_almacen: Path = None,
+                  diccionario: str = None, indice: dict = None):
+    """
+    Fusiona los resultados de la cola en los Excel por trimestre y anual.
+    
+    Las tareas FALLIDAS entran como factura con error, para que el Excel
+    siga teniendo una fila por PDF. Con diccionario e indice se añade la
+    hoja "Sugerencias".
+    
+    Returns:
+        EstadisticasEjecucion de todas las facturas
+    """
+    facturas_trimestre = []
+    for tarea in cola.resultados():
+        if tarea['registro'] is not None:
+            factura = Factura.from_dict(tarea['registro'])
+        else:
+            factura = factura_fallida(tarea['ruta'], tarea['error'] or 'COLA: sin resultado')
+        facturas_trimestre.append((tarea['trimestre'], factura))
+    return generar_excels_fusion(facturas_trimestre, outputs_dir, ruta_anual, ruta_almacen,
+                                 diccionario=diccionario, indice=indice)
+
+
 def main():
     """Funcion principal."""
     parser = argparse.ArgumentParser(
-        description='ParsearFacturas v5.10',
+        description='ParsearFacturas v5.11',
         formatter_class=argparse.RawDescriptionHelpFormatter,
         epilog="""
 Ejemplos:
   python main.py -i "C:\\Facturas\\4 TRI 2025"
   python main.py -i facturas/ -o resultado.xlsx
   python main.py --listar-extractores
+  python main.py --aprender outputs/Facturas_3T25_revisado.xlsx --original outputs/Facturas_3T25.xlsx
+  python main.py --plan-shards 8 --carpetas "1 TRI 2025" "2 TRI 2025" --dir-shards trabajo/
+  python main.py --procesar-shard auto --dir-shards trabajo/
+  python main.py --fusionar-shards --dir-shards trabajo/
+  python main.py --liberar-shard 3 --dir-shards trabajo/
+  python main.py --encolar -i "1 TRI 2025" --cola Z:\\facturas\\cola.sqlite
+  python main.py --worker --cola Z:\\facturas\\cola.sqlite
+  python main.py --fusionar-cola --cola Z:\\facturas\\cola.sqlite
         """
     )
     
@@ -874,9 +1271,59 @@ Ejemplos:
                         help='Archivo Excel de salida')
     parser.add_argument('--diccionario', '-d', default=DICCIONARIO_DEFAULT,
                         help='DiccionarioProveedoresCategoria.xlsx')
+    parser.add_argument('--reglas', default=REGLAS_COMPILADAS_RUTA, metavar='JSON',
+                        help='Diccionario compilado (scripts/compilar_diccionario.py) para categorizar por reglas')
     parser.add_argument('--listar-extractores', action='store_true',
                         help='Listar extractores disponibles y salir')
-    parser.add_argument('--version', '-v', action='version', version='v5.10')
+    parser.add_argument('--sin-autoajuste-pdf', action='store_true',
+                        help='Usar el orden fijo de métodos PDF (sin estadísticas por proveedor)')
+    parser.add_argument('--workers', type=int, default=WORKERS_FACTURAS,
+                        help=f'Procesos worker supervisados (default: {WORKERS_FACTURAS})')
+    parser.add_argument('--sin-supervisor', action='store_true',
+                        help='Procesar en el proceso principal, sin límites de tiempo/memoria')
+    parser.add_argument('--perfil-regex', action='store_true',
+                        help='Medir tiempo por patrón regex de los extractores y mostrar ranking')
+    parser.add_argument('--actualizar', action='store_true',
+                        help='Actualizar el Excel existente: solo se sustituyen las facturas reprocesadas')
+    parser.add_argument('--jsonl', default=None, metavar='RUTA',
+                        help='Escribir cada factura en JSONL según termina (una línea por factura)')
+    parser.add_argument('--almacen', nargs='?', const=str(ALMACEN_RUTA), default=None,
+                        metavar='RUTA',
+                        help=f'Guardar también en el almacén SQLite/Parquet (default: {ALMACEN_RUTA})')
+    parser.add_argument('--plan-shards', type=int, default=None, metavar='N',
+                        help='Repartir las carpetas de --carpetas en N shards (requiere --dir-shards)')
+    parser.add_argument('--carpetas', nargs='+', default=None, metavar='CARPETA',
+                        help='Carpetas de trimestre para --plan-shards, en orden')
+    parser.add_argument('--procesar-shard', default=None, metavar='K|auto',
+                        help='Procesar el shard K, o "auto" para ir reclamando shards libres')
+    parser.add_argument('--fusionar-shards', action='store_true',
+                        help='Fusionar los shards terminados en los Excel por trimestre y anual')
+    parser.add_argument('--liberar-shard', type=int, default=None, metavar='K',
+                        help='Borrar el .lock del shard K (proceso caído en otra máquina) para volver a procesarlo')
+    parser.add_argument('--dir-shards', default=None, metavar='DIR',
+                        help='Carpeta de trabajo compartida de los shards')
+    parser.add_argument('--encolar', '--enqueue', action='store_true',
+                        help='Registrar los PDFs de -i/--carpetas en la cola compartida (--cola)')
+    parser.add_argument('--worker', action='store_true',
+                        help='Procesar facturas de la cola compartida hasta vaciarla')
+    parser.add_argument('--fusionar-cola', action='store_true',
+                        help='Fusionar los resultados de la cola en los Excel por trimestre y anual')
+    parser.add_argument('--estado-cola', action='store_true',
+                        help='Mostrar cuántas tareas hay en cada estado y salir')
+    parser.add_argument('--cola', default=str(COLA_RUTA), metavar='RUTA',
+                        help=f'Archivo SQLite de la cola, en una carpeta compartida (default: {COLA_RUTA})')
+    parser.add_argument('--sin-esperar', action='store_true',
+                        help='El worker termina al no quedar tareas libres (no espera leases de otros)')
+    parser.add_argument('--aprender', default=None, metavar='EXCEL',
+                        help='Importar las categorías corregidas de la hoja "Lineas" de un Excel revisado '
+                             '(columna CATEGORIA_REVISADA o cambios respecto a --original)')
+    parser.add_argument('--original', default=None, metavar='EXCEL',
+                        help='Excel generado antes de la revisión, para --aprender')
+    parser.add_argument('--sin-aprendidos', action='store_true',
+                        help='No usar las categorías aprendidas de Excel revisados')
+    parser.add_argument('--sin-sugerencias', action='store_true',
+                        help='No añadir la hoja "Sugerencias" para las líneas sin categoría')
+    parser.add_argument('--version', '-v', action='version', version='v5.11')
     
     args = parser.parse_args()
     
@@ -888,6 +1335,19 @@ Ejemplos:
         print()
         return
     
+    if args.aprender:
+        aprender_de_excel(args.aprender, args.original)
+        if not args.input:
+            return
+    
+    if args.plan_shards or args.procesar_shard or args.fusionar_shards or args.liberar_shard is not None:
+        _main_shards(args, parser)
+        return
+    
+    if args.encolar or args.worker or args.fusionar_cola or args.estado_cola:
+        _main_cola(args, parser)
+        return
+    
     if not args.input:
         parser.print_help()
         print("\nERROR: Debes especificar una carpeta con -i")
@@ -898,24 +1358,18 @@ Ejemplos:
         print(f"ERROR: No existe la carpeta: {carpeta}")
         sys.exit(1)
     
-    diccionario_path = Path(args.diccionario)
-    if not diccionario_path.exists():
-        print(f"Aviso: Diccionario no encontrado: {diccionario_path}")
-        print("   Continuando sin categorizacion...")
-        indice = {}
-    else:
-        print(f"\nCargando diccionario...")
-        _, _, indice = cargar_diccionario(diccionario_path)
-        print(f"   {len(indice)} proveedores indexados")
+    indice = _cargar_indice(args.diccionario, args.reglas,
+                            USAR_APRENDIDOS and not args.sin_aprendidos)
     
     print("\n" + "="*60)
-    print("PARSEAR FACTURAS v5.10")
+    print("PARSEAR FACTURAS v5.11")
     print("="*60)
     
     script_dir = Path(__file__).parent
     outputs_dir = script_dir / 'outputs'
     outputs_dir.mkdir(exist_ok=True)
     
+    trimestre = detectar_trimestre(carpeta.name.upper())
     if args.output:
         output_path = Path(args.output)
         if not output_path.is_absolute() and output_path.parent == Path('.'):
@@ -923,8 +1377,6 @@ Ejemplos:
         else:
             ruta_excel = output_path
     else:
-        carpeta_nombre = carpeta.name.upper()
-        trimestre = detectar_trimestre(carpeta_nombre)
         ruta_excel = outputs_dir / f'Facturas_{trimestre}.xlsx'
     
     archivos = list(carpeta.glob('*.pdf'))
@@ -935,40 +1387,240 @@ Ejemplos:
         print("ERROR: No se encontraron archivos PDF")
         sys.exit(1)
     
-    facturas = []
-    for i, archivo in enumerate(sorted(archivos), 1):
-        nombre_corto = archivo.name[:45] + '...' if len(archivo.name) > 48 else archivo.name
-        print(f"   [{i:3d}/{len(archivos)}] {nombre_corto}", end=" ")
-        
-        try:
-            factura = procesar_factura(archivo, indice)
-            facturas.append(factura)
-            
-            if factura.errores:
-                print(f"AVISO: {factura.errores[0][:30]}")
-            elif factura.lineas:
-                print(f"OK: {len(factura.lineas)} lineas, {factura.cuadre}")
-            else:
-                print("AVISO: SIN_LINEAS")
-                
-        except Exception as e:
-            print(f"ERROR: {str(e)[:40]}")
-            factura = Factura(archivo=archivo.name, numero='', ruta=archivo, proveedor='ERROR')
-            factura.agregar_error(f'EXCEPCION: {str(e)[:50]}')
-            facturas.append(factura)
+    if args.perfil_regex:
+        activar_instrumentacion()
+    
+    estadisticas = None
+    if AUTOAJUSTE_METODO_PDF and not args.sin_autoajuste_pdf:
+        estadisticas = EstadisticasPDF.cargar(ESTADISTICAS_PDF_RUTA)
+    
+    archivos = sorted(archivos)
+    estadisticas_ejecucion = EstadisticasEjecucion()
+    salida_jsonl = EscritorJSONL(Path(args.jsonl)) if args.jsonl else None
+    if salida_jsonl is not None:
+        salida_jsonl.abrir()
+    facturas = procesar_archivos(
+        archivos, indice, estadisticas,
+        usar_supervisor=USAR_SUPERVISOR and not args.sin_supervisor,
+        workers=args.workers,
+        estadisticas_ejecucion=estadisticas_ejecucion,
+        al_terminar=salida_jsonl.escribir if salida_jsonl is not None else None,
+    )
+    
+    if salida_jsonl is not None:
+        salida_jsonl.cerrar()
+        print(f"\n   {salida_jsonl.ruta}: {salida_jsonl.escritas} facturas (JSONL)")
+    
+    if estadisticas is not None:
+        estadisticas.guardar()
     
     print(f"\nGenerando Excel...")
-    total_filas = generar_excel(facturas, ruta_excel)
-    print(f"   {ruta_excel}: {total_filas} filas")
+    ruta_almacen = Path(args.almacen) if args.almacen else None
+    sugerencias = None
+    if SUGERENCIAS_ACTIVAS and not args.sin_sugerencias:
+        sugerencias = calcular_sugerencias(facturas, args.diccionario, indice)
+    if args.actualizar and ruta_excel.exists():
+        reemplazadas, nuevas = actualizar_excel(facturas, ruta_excel, ruta_almacen=ruta_almacen,
+                                                trimestre=trimestre, sugerencias=sugerencias)
+        print(f"   {ruta_excel}: {reemplazadas} facturas actualizadas, {nuevas} nuevas")
+    else:
+        total_filas = generar_excel(facturas, ruta_excel, ruta_almacen=ruta_almacen,
+                                    trimestre=trimestre, sugerencias=sugerencias)
+        print(f"   {ruta_excel}: {total_filas} filas")
+    if ruta_almacen:
+        print(f"   {ruta_almacen} (trimestre {trimestre})")
     
     ruta_log = outputs_dir / f"log_{datetime.now().strftime('%Y%m%d_%H%M')}.txt"
-    generar_log(facturas, ruta_log)
+    generar_log(estadisticas_ejecucion, ruta_log)
     print(f"   {ruta_log}")
     
-    imprimir_resumen(facturas)
+    imprimir_resumen(estadisticas_ejecucion)
+    
+    if args.perfil_regex:
+        print("\nPATRONES REGEX MÁS COSTOSOS:")
+        print(informe_patrones())
+        print()
+    
+    print("Proceso completado\n")
+
+
+def _main_shards(args, parser) -> None:
+    """Modo shards: --plan-shards, --procesar-shard, --fusionar-shards, --liberar-shard."""
+    if not args.dir_shards:
+        parser.print_help()
+        print("\nERROR: Los modos de shards necesitan --dir-shards")
+        sys.exit(1)
+    directorio = Path(args.dir_shards)
+    
+    if args.plan_shards:
+        if not args.carpetas:
+            print("ERROR: --plan-shards necesita --carpetas")
+            sys.exit(1)
+        faltan = [c for c in args.carpetas if not Path(c).is_dir()]
+        if faltan:
+            print(f"ERROR: No existe la carpeta: {faltan[0]}")
+            sys.exit(1)
+        try:
+            planificar_shards(args.carpetas, args.plan_shards, directorio)
+        except FileExistsError as e:
+            print(f"ERROR: {e}")
+            sys.exit(1)
+        return
+    
+    try:
+        plan = shards.cargar_plan(directorio)
+    except (FileNotFoundError, ValueError) as e:
+        print(f"ERROR: Plan de shards no válido: {e}")
+        sys.exit(1)
     
+    script_dir = Path(__file__).parent
+    outputs_dir = script_dir / 'outputs'
+    outputs_dir.mkdir(exist_ok=True)
+    
+    if args.liberar_shard is not None:
+        shard = args.liberar_shard
+        if not 0 <= shard < plan['num_shards']:
+            print(f"ERROR: Shard fuera de rango (0-{plan['num_shards'] - 1})")
+            sys.exit(1)
+        bloqueo = shards.leer_bloqueo(directorio, shard)
+        if bloqueo is None:
+            print(f"El shard {shard} no está reclamado")
+        else:
+            shards.liberar_shard(directorio, shard)
+            print(f"Shard {shard} liberado (era de {bloqueo})")
+        return
+    
+    if args.procesar_shard:
+        if args.procesar_shard == 'auto':
+            pendientes = shards.siguientes_shards(plan, directorio)
+        else:
+            shard = int(args.procesar_shard)
+            if not 0 <= shard < plan['num_shards']:
+                print(f"ERROR: Shard fuera de rango (0-{plan['num_shards'] - 1})")
+                sys.exit(1)
+            if not shards.reclamar_shard(directorio, shard):
+                bloqueo = shards.leer_bloqueo(directorio, shard)
+                if bloqueo:
+                    print(f"ERROR: El shard {shard} está reclamado por {bloqueo}")
+                    print(f"       Si ese proceso ya no existe: --liberar-shard {shard}")
+                else:
+                    print(f"ERROR: El shard {shard} ya está terminado")
+                sys.exit(1)
+            pendientes = [shard]
+        
+        indice = _cargar_indice(args.diccionario, args.reglas,
+                                USAR_APRENDIDOS and not args.sin_aprendidos)
+        if args.perfil_regex:
+            activar_instrumentacion()
+        estadisticas = None
+        if AUTOAJUSTE_METODO_PDF and not args.sin_autoajuste_pdf:
+            estadisticas = EstadisticasPDF.cargar(ESTADISTICAS_PDF_RUTA)
+        
+        procesados = 0
+        for shard in pendientes:
+            procesar_shard(plan, directorio, shard, indice, estadisticas,
+                           usar_supervisor=USAR_SUPERVISOR and not args.sin_supervisor,
+                           workers=args.workers)
+            procesados += 1
+        if estadisticas is not None:
+            estadisticas.guardar()
+        
+        restantes = shards.shards_pendientes(plan, directorio)
+        print(f"\n{procesados} shards procesados; pendientes: {len(restantes)}")
+        if args.perfil_regex:
+            print("\nPATRONES REGEX MÁS COSTOSOS:")
+            print(informe_patrones())
+            print()
+        return
+    
+    ruta_anual = Path(args.output) if args.output else None
+    if ruta_anual and not ruta_anual.is_absolute() and ruta_anual.parent == Path('.'):
+        ruta_anual = outputs_dir / ruta_anual.name
+    indice = None
+    if SUGERENCIAS_ACTIVAS and not args.sin_sugerencias:
+        indice = _cargar_indice(args.diccionario, aprendidos=False)
+    try:
+        estadisticas_ejecucion = fusionar_shards(
+            plan, directorio, outputs_dir, ruta_anual=ruta_anual,
+            ruta_almacen=Path(args.almacen) if args.almacen else None,
+            diccionario=args.diccionario, indice=indice)
+    except ValueError as e:
+        print(f"ERROR: {e}")
+        sys.exit(1)
+    
+    ruta_log = outputs_dir / f"log_{datetime.now().strftime('%Y%m%d_%H%M')}.txt"
+    generar_log(estadisticas_ejecucion, ruta_log)
+    print(f"   {ruta_log}")
+    imprimir_resumen(estadisticas_ejecucion)
     print("Proceso completado\n")
 
 
+def _imprimir_estado_cola(cola: ColaTrabajo) -> None:
+    resumen = cola.resumen()
+    print("\nCola: " + ', '.join(f"{estado} {n}" for estado, n in resumen.items()))
+
+
+def _main_cola(args, parser) -> None:
+    """Modo cola: --encolar, --worker, --fusionar-cola, --estado-cola."""
+    cola = ColaTrabajo(Path(args.cola), lease_segundos=COLA_LEASE_SEGUNDOS,
+                       max_intentos=COLA_MAX_INTENTOS)
+    
+    if args.encolar:
+        carpetas = args.carpetas or ([args.input] if args.input else [])
+        if not carpetas:
+            parser.print_help()
+            print("\nERROR: --encolar necesita -i o --carpetas")
+            sys.exit(1)
+        faltan = [c for c in carpetas if not Path(c).is_dir()]
+        if faltan:
+            print(f"ERROR: No existe la carpeta: {faltan[0]}")
+            sys.exit(1)
+        nuevas = cola.encolar([(Path(c), detectar_trimestre(Path(c).name.upper()))
+                               for c in carpetas])
+        print(f"\n{nuevas} facturas encoladas en {cola.ruta}")
+    
+    if args.worker:
+        indice = _cargar_indice(args.diccionario, args.reglas,
+                                USAR_APRENDIDOS and not args.sin_aprendidos)
+        if args.perfil_regex:
+            activar_instrumentacion()
+        estadisticas = None
+        if AUTOAJUSTE_METODO_PDF and not args.sin_autoajuste_pdf:
+            estadisticas = EstadisticasPDF.cargar(ESTADISTICAS_PDF_RUTA)
+        guardadas = trabajar_cola(cola, indice, estadisticas,
+                                  usar_supervisor=USAR_SUPERVISOR and not args.sin_supervisor,
+                                  workers=args.workers, esperar=not args.sin_esperar)
+        print(f"\n{guardadas} facturas procesadas por este worker")
+        if args.perfil_regex:
+            print("\nPATRONES REGEX MÁS COSTOSOS:")
+            print(informe_patrones())
+            print()
+    
+    _imprimir_estado_cola(cola)
+    
+    if args.fusionar_cola:
+        outputs_dir = Path(__file__).parent / 'outputs'
+        outputs_dir.mkdir(exist_ok=True)
+        ruta_anual = Path(args.output) if args.output else None
+        if ruta_anual and not ruta_anual.is_absolute() and ruta_anual.parent == Path('.'):
+            ruta_anual = outputs_dir / ruta_anual.name
+        indice = None
+        if SUGERENCIAS_ACTIVAS and not args.sin_sugerencias:
+            indice = _cargar_indice(args.diccionario, aprendidos=False)
+        try:
+            estadisticas_ejecucion = fusionar_cola(
+                cola, outputs_dir, ruta_anual=ruta_anual,
+                ruta_almacen=Path(args.almacen) if args.almacen else None,
+                diccionario=args.diccionario, indice=indice)
+        except ValueError as e:
+            print(f"ERROR: {e}")
+            sys.exit(1)
+        ruta_log = outputs_dir / f"log_{datetime.now().strftime('%Y%m%d_%H%M')}.txt"
+        generar_log(estadisticas_ejecucion, ruta_log)
+        print(f"   {ruta_log}")
+        imprimir_resumen(estadisticas_ejecucion)
+        print("Proceso completado\n")
+
+
 if __name__ == '__main__':
     main()
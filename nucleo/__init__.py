@@ -4,12 +4,21 @@ Módulo núcleo del sistema ParsearFacturas.
 Contiene las funciones principales de procesamiento:
 - factura: Clases Factura y LineaFactura
 - pdf: Extracción de texto de PDFs
+- layout: Palabras con posición (columnas de tablas)
+- estadisticas_pdf: Orden de métodos PDF autoajustado por proveedor
 - parser: Parseo de fecha, CIF, IBAN, total, referencia
 - validacion: Cuadre y detección de duplicados
+- shards: Plan, reclamación y fusión del procesado por shards
+- cola: Cola de trabajo SQLite compartida (leases, heartbeats, reintentos)
+- reglas: Motor de reglas sobre el diccionario compilado (categorización)
+- sugerencias: Categorías sugeridas (TF-IDF) para líneas pendientes
+- aprendidos: Categorías aprendidas de Excel revisados (--aprender)
+- normalizacion: Normalización de proveedores y textos (precompilada, memorizada)
+- proveedores: Registro unificado de proveedores (nombre/alias, CIF, IBAN)
 
 Uso:
     from nucleo import Factura, LineaFactura
-    from nucleo import extraer_texto_pdf
+    from nucleo import extraer_texto_pdf, extraer_texto_y_layout
     from nucleo import extraer_fecha, extraer_cif, extraer_total
     from nucleo import validar_cuadre, detectar_duplicado
 """
@@ -17,9 +26,24 @@ Uso:
 # Clases de datos
 from .factura import Factura, LineaFactura
 
+# Layout (palabras con posición)
+from .layout import (
+    Palabra,
+    LineaLayout,
+    PaginaLayout,
+    LayoutFactura,
+    extraer_layout_pdf,
+    detectar_cortes_columnas,
+    partir_en_columnas,
+)
+
 # Extracción de texto
 from .pdf import (
     extraer_texto_pdf,
+    extraer_texto_y_layout,
+    extraer_texto_detallado,
+    ResultadoExtraccion,
+    orden_metodos,
     extraer_texto_pypdf,
     extraer_texto_pdfplumber,
     extraer_texto_ocr,
@@ -27,6 +51,9 @@ from .pdf import (
     obtener_metodo_recomendado,
 )
 
+# Estadísticas de métodos PDF (autoajuste por proveedor)
+from .estadisticas_pdf import EstadisticasPDF
+
 # Parseo
 from .parser import (
     parsear_nombre_archivo,
@@ -58,13 +85,27 @@ __all__ = [
     # Clases
     'Factura',
     'LineaFactura',
+    # Layout
+    'Palabra',
+    'LineaLayout',
+    'PaginaLayout',
+    'LayoutFactura',
+    'extraer_layout_pdf',
+    'detectar_cortes_columnas',
+    'partir_en_columnas',
     # PDF
     'extraer_texto_pdf',
+    'extraer_texto_y_layout',
+    'extraer_texto_detallado',
+    'ResultadoExtraccion',
+    'orden_metodos',
     'extraer_texto_pypdf',
     'extraer_texto_pdfplumber',
     'extraer_texto_ocr',
     'verificar_disponibilidad',
     'obtener_metodo_recomendado',
+    # Estadísticas PDF
+    'EstadisticasPDF',
     # Parser
     'parsear_nombre_archivo',
     'extraer_fecha',
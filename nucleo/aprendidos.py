@@ -0,0 +1,288 @@
+"""
+Categorías aprendidas de los Excel revisados.
+
+Cada trimestre se corrigen a mano en la hoja "Lineas" las mismas líneas que
+quedaron PENDIENTE o con un fuzzy equivocado. importar_revisado() lee esas
+filas de un Excel ya revisado y las guarda en un almacén local con clave
+(proveedor, artículo normalizado); categorizar_linea lo consulta tras el
+match exacto y antes del parcial y el fuzzy (match 'APRENDIDO') con una
+búsqueda en diccionario, de modo que la cascada se acorta cada trimestre.
+También manda sobre la categoría fija de un extractor, si se corrigió.
+
+El proveedor se guarda y se busca normalizado con main.normalizar_proveedor
+(sin prefijos de trimestre ni sufijos TF/TJ, con los alias resueltos), de
+modo que '4T25 CERES TF' y 'CERES' comparten las correcciones.
+
+Solo se aprenden las filas corregidas, no lo que el programa ya había
+puesto (un fuzzy que nadie miró, la categoría fija de un extractor):
+- Con columna CATEGORIA_REVISADA en la hoja, las filas que la tienen
+  rellena (y ID_CAT_REVISADO si existe).
+- Si no, comparando con el Excel tal como lo generó main.py (original):
+  las filas cuya CATEGORIA cambió. Las filas se emparejan por ARCHIVO y
+  ARTICULO (en orden si se repiten), aunque se haya reordenado la hoja.
+Nunca se aprenden PENDIENTE, SIN_CATEGORIA, SIN_EXTRACTOR ni 'VER
+FACTURA'. Si un artículo aparece con categorías distintas gana la última
+fila. El match exacto del diccionario sigue teniendo prioridad.
+
+El almacén se guarda en JSON entre ejecuciones (config.settings.APRENDIDOS_RUTA).
+
+Uso:
+    from nucleo.aprendidos import AprendidosCategorias, importar_revisado
+
+    aprendidos = AprendidosCategorias.cargar(ruta)
+    importar_revisado('Facturas_3T25_revisado.xlsx', aprendidos,
+                      normalizar_proveedor=normalizar_proveedor)
+    aprendidos.guardar()
+    importar_revisado('Facturas_3T25_revisado.xlsx', aprendidos, original='Facturas_3T25.xlsx')
+    aprendidos.buscar('CERES', 'CERVEZA ALHAMBRA 1/3')  # {'categoria': ...} o None
+
+Creado: 19/10/2026
+"""
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple
+from datetime import datetime
+import json
+
+from nucleo.reglas import normalizar_proveedor_regla, normalizar_articulo_regla
+
+VERSION_APRENDIDOS = 1
+
+# Categorías que no se aprenden (la línea sigue sin categorizar)
+CATEGORIAS_NO_DEFINITIVAS = ('', 'PENDIENTE', 'SIN_CATEGORIA', 'SIN_EXTRACTOR', 'NAN')
+ARTICULOS_IGNORADOS = ('', 'VER FACTURA', 'NAN')
+
+# Columnas opcionales donde el revisor escribe la corrección
+COLUMNA_REVISADA = 'CATEGORIA_REVISADA'
+COLUMNA_ID_REVISADO = 'ID_CAT_REVISADO'
+
+
+def clave_aprendido(proveedor: str, articulo: str) -> Tuple[str, str]:
+    """Clave del almacén: proveedor y artículo normalizados."""
+    return normalizar_proveedor_regla(proveedor), normalizar_articulo_regla(articulo)
+
+
+class AprendidosCategorias:
+    """
+    Almacén persistente (proveedor, artículo) -> categoría.
+
+    Estructura interna:
+        {(proveedor, articulo): {'categoria': str, 'id_categoria': str,
+                                 'origen': str, 'fecha': str}}
+    """
+
+    def __init__(self, ruta: Optional[Path] = None):
+        self.ruta = Path(ruta) if ruta else None
+        self.datos: Dict[Tuple[str, str], Dict[str, str]] = {}
+        self._modificado = False
+
+    def __len__(self) -> int:
+        return len(self.datos)
+
+    # =========================================================================
+    # PERSISTENCIA
+    # =========================================================================
+
+    @classmethod
+    def cargar(cls, ruta: Path) -> 'AprendidosCategorias':
+        """
+        Carga el almacén desde JSON (vacío si no existe o está corrupto).
+
+        Args:
+            ruta: Ruta del archivo JSON
+
+        Returns:
+            Instancia de AprendidosCategorias
+        """
+        aprendidos = cls(ruta)
+        ruta = Path(ruta)
+        if ruta.exists():
+            try:
+                with open(ruta, 'r', encoding='utf-8') as f:
+                    contenido = json.load(f)
+                if contenido.get('version') == VERSION_APRENDIDOS:
+                    for entrada in contenido.get('entradas', []):
+                        clave = (entrada.pop('proveedor'), entrada.pop('articulo'))
+                        aprendidos.datos[clave] = entrada
+            except (OSError, ValueError, KeyError, AttributeError):
+                aprendidos.datos = {}
+        return aprendidos
+
+    def guardar(self, ruta: Optional[Path] = None) -> None:
+        """Guarda el almacén en JSON (solo si hubo cambios)."""
+        ruta = Path(ruta) if ruta else self.ruta
+        if ruta is None or not self._modificado:
+            return
+        ruta.parent.mkdir(parents=True, exist_ok=True)
+        contenido = {
+            'version': VERSION_APRENDIDOS,
+            'actualizado': datetime.now().isoformat(timespec='seconds'),
+            'entradas': [
+                dict(proveedor=proveedor, articulo=articulo, **datos)
+                for (proveedor, articulo), datos in sorted(self.datos.items())
+            ],
+        }
+        temporal = ruta.with_suffix(ruta.suffix + '.tmp')
+        with open(temporal, 'w', encoding='utf-8') as f:
+            json.dump(contenido, f, ensure_ascii=False, indent=1)
+        temporal.replace(ruta)
+        self._modificado = False
+
+    # =========================================================================
+    # CONSULTA Y REGISTRO
+    # =========================================================================
+
+    def buscar(self, proveedor: str, articulo: str) -> Optional[Dict[str, str]]:
+        """
+        Categoría aprendida para el artículo del proveedor.
+
+        Returns:
+            {'categoria', 'id_categoria', ...} o None si no se ha aprendido
+        """
+        if not self.datos:
+            return None
+        return self.datos.get(clave_aprendido(proveedor, articulo))
+
+    def aprender(self, proveedor: str, articulo: str, categoria: str,
+                 id_categoria: str = '', origen: str = '') -> bool:
+        """
+        Registra la categoría de un artículo.
+
+        Returns:
+            True si la entrada es nueva o cambió de categoría
+        """
+        clave = clave_aprendido(proveedor, articulo)
+        if not clave[0] or not clave[1]:
+            return False
+        anterior = self.datos.get(clave)
+        if anterior and anterior['categoria'] == categoria and anterior['id_categoria'] == id_categoria:
+            return False
+        self.datos[clave] = {
+            'categoria': categoria,
+            'id_categoria': id_categoria,
+            'origen': origen,
+            'fecha': datetime.now().strftime('%Y-%m-%d'),
+        }
+        self._modificado = True
+        return True
+
+
+# =============================================================================
+# IMPORTACIÓN DESDE UN EXCEL REVISADO
+# =============================================================================
+
+def _texto_celda(valor) -> str:
+    """Celda como texto ('' si vacía; 12.0 -> '12')."""
+    if valor is None:
+        return ''
+    if isinstance(valor, float):
+        if valor != valor:  # NaN
+            return ''
+        if valor.is_integer():
+            return str(int(valor))
+    return str(valor).strip()
+
+
+def _leer_lineas(ruta_excel: Path, hoja: str):
+    import pandas as pd
+
+    df = pd.read_excel(ruta_excel, sheet_name=hoja, dtype=object)
+    faltan = [c for c in ('PROVEEDOR', 'ARTICULO', 'CATEGORIA') if c not in df.columns]
+    if faltan:
+        raise ValueError(f"La hoja '{hoja}' de {Path(ruta_excel).name} no tiene las columnas {', '.join(faltan)}")
+    return df
+
+
+def _columna(df, nombre: str) -> list:
+    return [_texto_celda(v) for v in df[nombre]] if nombre in df.columns else [''] * len(df)
+
+
+def _correcciones_columna(df) -> list:
+    """[(proveedor, articulo, categoria, id_categoria)] de las filas con CATEGORIA_REVISADA."""
+    return [
+        (proveedor, articulo, categoria, id_categoria)
+        for proveedor, articulo, categoria, id_categoria in zip(
+            _columna(df, 'PROVEEDOR'), _columna(df, 'ARTICULO'),
+            _columna(df, COLUMNA_REVISADA), _columna(df, COLUMNA_ID_REVISADO))
+        if categoria
+    ]
+
+
+def _correcciones_original(df, original) -> Tuple[list, int]:
+    """
+    Filas cuya CATEGORIA cambió respecto al Excel original.
+
+    Returns:
+        ([(proveedor, articulo, categoria, id_categoria)], filas sin pareja)
+    """
+    if 'ARCHIVO' not in df.columns or 'ARCHIVO' not in original.columns:
+        raise ValueError("Para comparar con el original las dos hojas necesitan la columna ARCHIVO")
+    previas: Dict[Tuple[str, str], list] = {}
+    for archivo, articulo, categoria, id_categoria in zip(
+            _columna(original, 'ARCHIVO'), _columna(original, 'ARTICULO'),
+            _columna(original, 'CATEGORIA'), _columna(original, 'ID_CAT')):
+        previas.setdefault((archivo, articulo), []).append((categoria, id_categoria))
+
+    correcciones, sin_pareja = [], 0
+    vistas: Dict[Tuple[str, str], int] = {}
+    for archivo, proveedor, articulo, categoria, id_categoria in zip(
+            _columna(df, 'ARCHIVO'), _columna(df, 'PROVEEDOR'), _columna(df, 'ARTICULO'),
+            _columna(df, 'CATEGORIA'), _columna(df, 'ID_CAT')):
+        k = vistas[(archivo, articulo)] = vistas.get((archivo, articulo), -1) + 1
+        filas = previas.get((archivo, articulo), [])
+        if k >= len(filas):
+            sin_pareja += 1
+            continue
+        categoria_previa, id_previo = filas[k]
+        if categoria.upper() != categoria_previa.upper():
+            # Un ID_CAT que no se tocó es el de la categoría anterior
+            correcciones.append((proveedor, articulo, categoria,
+                                 id_categoria if id_categoria != id_previo else ''))
+    return correcciones, sin_pareja
+
+
+def importar_revisado(ruta_excel: Path, aprendidos: AprendidosCategorias,
+                      hoja: str = 'Lineas', original: Optional[Path] = None,
+                      normalizar_proveedor: Optional[Callable[[str], str]] = None) -> Dict[str, int]:
+    """
+    Importa las categorías corregidas en la hoja "Lineas" de un Excel revisado.
+
+    Args:
+        ruta_excel: Excel generado por main.py y corregido a mano
+        aprendidos: Almacén donde registrar las categorías
+        hoja: Hoja con las líneas
+        original: Excel tal como lo generó main.py (no hace falta si la
+            hoja tiene la columna CATEGORIA_REVISADA)
+        normalizar_proveedor: Función nombre -> proveedor normalizado; la
+            misma con la que se buscará luego (main.normalizar_proveedor)
+
+    Returns:
+        Contadores {'filas', 'corregidas', 'aprendidas', 'sin_cambios', 'ignoradas'}
+
+    Raises:
+        ValueError: Si faltan columnas, o no hay columna CATEGORIA_REVISADA
+            ni Excel original con el que comparar
+    """
+    df = _leer_lineas(ruta_excel, hoja)
+    sin_pareja = 0
+    if COLUMNA_REVISADA in df.columns:
+        correcciones = _correcciones_columna(df)
+    elif original is not None:
+        correcciones, sin_pareja = _correcciones_original(df, _leer_lineas(original, hoja))
+    else:
+        raise ValueError(f"La hoja '{hoja}' no tiene la columna {COLUMNA_REVISADA}: "
+                         "indica el Excel original para aprender solo las filas corregidas")
+
+    origen = Path(ruta_excel).name
+    resumen = {'filas': len(df), 'corregidas': len(correcciones), 'aprendidas': 0,
+               'sin_cambios': 0, 'ignoradas': sin_pareja}
+    for proveedor, articulo, categoria, id_categoria in correcciones:
+        if normalizar_proveedor is not None:
+            proveedor = normalizar_proveedor(proveedor)
+        if (articulo.upper() in ARTICULOS_IGNORADOS or not proveedor
+                or categoria.upper() in CATEGORIAS_NO_DEFINITIVAS):
+            resumen['ignoradas'] += 1
+        elif aprendidos.aprender(proveedor, articulo, categoria, id_categoria, origen):
+            resumen['aprendidas'] += 1
+        else:
+            resumen['sin_cambios'] += 1
+    return resumen
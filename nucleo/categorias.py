@@ -14,6 +14,8 @@ from pathlib import Path
 from typing import Dict, List, Tuple, Optional
 import re
 
+from nucleo.normalizacion import normalizar_compacto
+
 
 class CategorizadorArticulos:
     """
@@ -66,19 +68,7 @@ class CategorizadorArticulos:
         if pd.isna(texto) or texto is None:
             return ""
         
-        texto = str(texto).upper().strip()
-        
-        # Quitar caracteres especiales
-        texto = texto.replace('-', '').replace(' ', '').replace('.', '').replace(',', '')
-        texto = texto.replace('/', '').replace('\\', '').replace('(', '').replace(')', '')
-        texto = texto.replace('"', '').replace("'", '').replace('´', '').replace('`', '')
-        
-        # Quitar acentos
-        texto = texto.replace('Á', 'A').replace('É', 'E').replace('Í', 'I')
-        texto = texto.replace('Ó', 'O').replace('Ú', 'U').replace('Ü', 'U')
-        texto = texto.replace('Ñ', 'N')
-        
-        return texto
+        return normalizar_compacto(str(texto))
     
     def _normalizar_proveedor(self, proveedor: str) -> str:
         """
@@ -0,0 +1,361 @@
+"""
+Cola de trabajo en SQLite para repartir el procesado entre varias máquinas.
+
+La cola es un archivo SQLite en una carpeta compartida; no hace falta
+ningún servidor:
+
+    1. Encolar:  main.py --encolar -i "1 TRI 2025" --cola //servidor/facturas/cola.sqlite
+    2. Workers:  main.py --worker --cola //servidor/facturas/cola.sqlite   (en cada PC)
+    3. Fusionar: main.py --fusionar-cola --cola //servidor/facturas/cola.sqlite
+
+Cada tarea (un PDF) pasa por PENDIENTE -> EN_CURSO -> HECHA:
+
+- Un worker reclama tareas con un lease (COLA_LEASE_SEGUNDOS) y lo renueva
+  con un heartbeat mientras las procesa.
+- Si el worker muere, el lease caduca y otro worker vuelve a reclamar la
+  tarea. Tras COLA_MAX_INTENTOS la tarea queda FALLIDA.
+- Las facturas que terminan en TIMEOUT/MEMORIA se devuelven a la cola para
+  reintentarlas (quizá en un PC con más memoria); en el último intento se
+  guardan tal cual.
+- El resultado de cada tarea es el registro JSONL de la factura
+  (salidas.jsonl.registro_factura), que la fusión convierte de nuevo en
+  Factura con Factura.from_dict().
+
+La fusión ordena por carpeta (orden en que se encolaron) y ruta, igual que
+una ejecución normal, así que el Excel no depende de qué worker procesó
+cada factura.
+
+Nota: el bloqueo de SQLite sobre carpetas de red depende del sistema de
+archivos; por eso se usa el journal clásico (no WAL) y transacciones
+cortas con BEGIN IMMEDIATE.
+
+Creado: 19/10/2026
+"""
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from datetime import datetime
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+
+VERSION_COLA = 1
+
+PENDIENTE = 'PENDIENTE'
+EN_CURSO = 'EN_CURSO'
+HECHA = 'HECHA'
+FALLIDA = 'FALLIDA'
+
+
+def identificador_trabajador() -> str:
+    """Identificador de este proceso worker (máquina:pid)."""
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def _ahora() -> str:
+    return datetime.now().isoformat(timespec='seconds')
+
+
+class ColaTrabajo:
+    """
+    Cola de facturas en un archivo SQLite compartido.
+
+    Cada operación abre su propia conexión, de modo que la cola se puede
+    usar a la vez desde el hilo de heartbeat y desde el bucle del worker.
+
+    Args:
+        ruta: Archivo SQLite de la cola
+        lease_segundos: Duración del lease de una tarea reclamada
+        max_intentos: Intentos antes de marcar una tarea como FALLIDA
+    """
+
+    def __init__(self, ruta: Path, lease_segundos: float = 300, max_intentos: int = 3):
+        self.ruta = Path(ruta)
+        self.lease_segundos = lease_segundos
+        self.max_intentos = max_intentos
+        self._crear_tablas()
+
+    # -------------------------------------------------------------------------
+    # Conexión
+    # -------------------------------------------------------------------------
+
+    def _conectar(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(str(self.ruta), timeout=60, isolation_level=None)
+        conn.execute('PRAGMA journal_mode=DELETE')
+        return conn
+
+    def _crear_tablas(self) -> None:
+        self.ruta.parent.mkdir(parents=True, exist_ok=True)
+        conn = self._conectar()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            conn.execute('CREATE TABLE IF NOT EXISTS meta (clave TEXT PRIMARY KEY, valor TEXT)')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS carpetas ('
+                'indice INTEGER PRIMARY KEY, ruta TEXT UNIQUE, trimestre TEXT)'
+            )
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS tareas ('
+                'posicion INTEGER PRIMARY KEY, ruta TEXT UNIQUE, carpeta INTEGER, '
+                'estado TEXT, intentos INTEGER DEFAULT 0, trabajador TEXT, '
+                'lease_hasta REAL, registro TEXT, error TEXT, actualizado TEXT)'
+            )
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_tareas_estado ON tareas (estado)')
+            conn.execute(
+                'INSERT OR REPLACE INTO meta (clave, valor) VALUES (?, ?)',
+                ('version_cola', str(VERSION_COLA))
+            )
+            conn.execute('COMMIT')
+        finally:
+            conn.close()
+
+    # -------------------------------------------------------------------------
+    # Encolar
+    # -------------------------------------------------------------------------
+
+    def encolar(self, carpetas: Sequence[Tuple[Path, str]]) -> int:
+        """
+        Registra los PDFs de varias carpetas.
+
+        Los PDFs ya encolados se ignoran, salvo los FALLIDOS, que vuelven a
+        PENDIENTE con los intentos a cero.
+
+        Args:
+            carpetas: [(carpeta, trimestre)]
+
+        Returns:
+            Número de tareas nuevas o reactivadas
+        """
+        conn = self._conectar()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            nuevas = 0
+            for carpeta, trimestre in carpetas:
+                ruta_carpeta = str(Path(carpeta).resolve())
+                conn.execute(
+                    'INSERT OR IGNORE INTO carpetas (ruta, trimestre) VALUES (?, ?)',
+                    (ruta_carpeta, trimestre)
+                )
+                indice = conn.execute(
+                    'SELECT indice FROM carpetas WHERE ruta = ?', (ruta_carpeta,)
+                ).fetchone()[0]
+                for ruta in sorted(Path(carpeta).glob('*.pdf')):
+                    cursor = conn.execute(
+                        'INSERT OR IGNORE INTO tareas (ruta, carpeta, estado, actualizado) '
+                        'VALUES (?, ?, ?, ?)',
+                        (str(ruta.resolve()), indice, PENDIENTE, _ahora())
+                    )
+                    nuevas += cursor.rowcount
+                nuevas += conn.execute(
+                    'UPDATE tareas SET estado = ?, intentos = 0, trabajador = NULL, '
+                    'lease_hasta = NULL, actualizado = ? WHERE carpeta = ? AND estado = ?',
+                    (PENDIENTE, _ahora(), indice, FALLIDA)
+                ).rowcount
+            conn.execute('COMMIT')
+            return nuevas
+        finally:
+            conn.close()
+
+    # -------------------------------------------------------------------------
+    # Worker
+    # -------------------------------------------------------------------------
+
+    def reclamar(self, trabajador: str, cantidad: int = 1) -> List[Tuple[int, Path]]:
+        """
+        Reclama hasta `cantidad` tareas pendientes o con el lease caducado.
+
+        Las tareas con el lease caducado que ya agotaron los intentos se
+        marcan como FALLIDA.
+
+        Args:
+            trabajador: Identificador del worker
+            cantidad: Máximo de tareas a reclamar
+
+        Returns:
+            [(posicion, ruta)] reclamadas (vacía si no hay trabajo libre)
+        """
+        ahora = time.time()
+        conn = self._conectar()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            conn.execute(
+                'UPDATE tareas SET estado = ?, error = ?, trabajador = NULL, actualizado = ? '
+                'WHERE estado = ? AND lease_hasta < ? AND intentos >= ?',
+                (FALLIDA, 'COLA: lease caducado en todos los intentos', _ahora(),
+                 EN_CURSO, ahora, self.max_intentos)
+            )
+            filas = conn.execute(
+                'SELECT posicion, ruta FROM tareas '
+                'WHERE estado = ? OR (estado = ? AND lease_hasta < ?) '
+                'ORDER BY carpeta, ruta LIMIT ?',
+                (PENDIENTE, EN_CURSO, ahora, cantidad)
+            ).fetchall()
+            conn.executemany(
+                'UPDATE tareas SET estado = ?, intentos = intentos + 1, trabajador = ?, '
+                'lease_hasta = ?, actualizado = ? WHERE posicion = ?',
+                [(EN_CURSO, trabajador, ahora + self.lease_segundos, _ahora(), posicion)
+                 for posicion, _ in filas]
+            )
+            conn.execute('COMMIT')
+            return [(posicion, Path(ruta)) for posicion, ruta in filas]
+        finally:
+            conn.close()
+
+    def renovar(self, trabajador: str) -> int:
+        """
+        Heartbeat: alarga el lease de todas las tareas en curso del worker.
+
+        Returns:
+            Número de tareas renovadas
+        """
+        conn = self._conectar()
+        try:
+            return conn.execute(
+                'UPDATE tareas SET lease_hasta = ? WHERE trabajador = ? AND estado = ?',
+                (time.time() + self.lease_segundos, trabajador, EN_CURSO)
+            ).rowcount
+        finally:
+            conn.close()
+
+    def completar(self, posicion: int, trabajador: str, registro: Dict[str, Any]) -> bool:
+        """
+        Guarda el resultado de una tarea.
+
+        Si el lease caducó y otro worker reclamó la tarea, el resultado se
+        descarta (gana el worker que la tiene reclamada).
+
+        Returns:
+            True si se guardó
+        """
+        conn = self._conectar()
+        try:
+            return conn.execute(
+                'UPDATE tareas SET estado = ?, registro = ?, error = NULL, lease_hasta = NULL, '
+                'actualizado = ? WHERE posicion = ? AND trabajador = ? AND estado = ?',
+                (HECHA, json.dumps(registro, ensure_ascii=False, default=str), _ahora(),
+                 posicion, trabajador, EN_CURSO)
+            ).rowcount == 1
+        finally:
+            conn.close()
+
+    def reintentar(self, posicion: int, trabajador: str, error: str) -> bool:
+        """
+        Devuelve una tarea a PENDIENTE si le quedan intentos.
+
+        Returns:
+            True si se devolvió a la cola; False si ya agotó los intentos
+            (o si ya no es de este worker)
+        """
+        conn = self._conectar()
+        try:
+            return conn.execute(
+                'UPDATE tareas SET estado = ?, error = ?, trabajador = NULL, lease_hasta = NULL, '
+                'actualizado = ? WHERE posicion = ? AND trabajador = ? AND estado = ? '
+                'AND intentos < ?',
+                (PENDIENTE, error, _ahora(), posicion, trabajador, EN_CURSO, self.max_intentos)
+            ).rowcount == 1
+        finally:
+            conn.close()
+
+    def liberar(self, trabajador: str) -> int:
+        """Devuelve a PENDIENTE las tareas en curso del worker (al interrumpirlo)."""
+        conn = self._conectar()
+        try:
+            return conn.execute(
+                'UPDATE tareas SET estado = ?, intentos = MAX(intentos - 1, 0), trabajador = NULL, '
+                'lease_hasta = NULL, actualizado = ? WHERE trabajador = ? AND estado = ?',
+                (PENDIENTE, _ahora(), trabajador, EN_CURSO)
+            ).rowcount
+        finally:
+            conn.close()
+
+    # -------------------------------------------------------------------------
+    # Estado y resultados
+    # -------------------------------------------------------------------------
+
+    def resumen(self) -> Dict[str, int]:
+        """{estado: número de tareas}"""
+        conn = self._conectar()
+        try:
+            conteo = dict(conn.execute('SELECT estado, COUNT(*) FROM tareas GROUP BY estado'))
+        finally:
+            conn.close()
+        return {estado: conteo.get(estado, 0) for estado in (PENDIENTE, EN_CURSO, HECHA, FALLIDA)}
+
+    def terminada(self) -> bool:
+        """True si no quedan tareas pendientes ni en curso."""
+        resumen = self.resumen()
+        return resumen[PENDIENTE] == 0 and resumen[EN_CURSO] == 0
+
+    def resultados(self) -> List[Dict[str, Any]]:
+        """
+        Tareas en orden de fusión (carpeta, ruta).
+
+        Returns:
+            [{'ruta', 'trimestre', 'estado', 'error', 'registro'}]; registro es
+            None si la tarea no está HECHA
+
+        Raises:
+            ValueError: Si quedan tareas pendientes o en curso
+        """
+        if not self.terminada():
+            resumen = self.resumen()
+            raise ValueError(
+                f"La cola no ha terminado: {resumen[PENDIENTE]} pendientes, "
+                f"{resumen[EN_CURSO]} en curso"
+            )
+        conn = self._conectar()
+        try:
+            filas = conn.execute(
+                'SELECT t.ruta, c.trimestre, t.estado, t.error, t.registro '
+                'FROM tareas t JOIN carpetas c ON c.indice = t.carpeta '
+                'ORDER BY t.carpeta, t.ruta'
+            ).fetchall()
+        finally:
+            conn.close()
+        return [
+            {
+                'ruta': Path(ruta),
+                'trimestre': trimestre,
+                'estado': estado,
+                'error': error,
+                'registro': json.loads(registro) if registro else None,
+            }
+            for ruta, trimestre, estado, error, registro in filas
+        ]
+
+
+class Heartbeat:
+    """
+    Hilo que renueva los leases de un worker cada `intervalo` segundos.
+
+    Uso:
+        with Heartbeat(cola, trabajador, intervalo=60):
+            ... procesar tareas reclamadas ...
+    """
+
+    def __init__(self, cola: ColaTrabajo, trabajador: str, intervalo: float):
+        self.cola = cola
+        self.trabajador = trabajador
+        self.intervalo = intervalo
+        self._parar = threading.Event()
+        self._hilo: Optional[threading.Thread] = None
+
+    def __enter__(self) -> 'Heartbeat':
+        self._hilo = threading.Thread(target=self._bucle, name='heartbeat-cola', daemon=True)
+        self._hilo.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._parar.set()
+        if self._hilo is not None:
+            self._hilo.join()
+
+    def _bucle(self) -> None:
+        while not self._parar.wait(self.intervalo):
+            try:
+                self.cola.renovar(self.trabajador)
+            except sqlite3.OperationalError:
+                pass  # Cola bloqueada: se reintenta en el siguiente latido
@@ -0,0 +1,250 @@
+"""
+Estadísticas de métodos de extracción PDF por proveedor.
+
+Registra, para cada proveedor (extractor) y método ('pypdf', 'pdfplumber',
+'ocr'), cuántas veces se intentó, cuántas veces el texto obtenido acabó
+en una factura cuadrada y cuánto tiempo costó. Con esos datos se reordena
+la cadena de fallback de extraer_texto_pdf(): un proveedor cuyos PDFs son
+siempre escaneados deja de probar pypdf primero.
+
+Los métodos que van detrás del primero solo se prueban si este falla, así
+que sus muestras dejarían de crecer y el orden se quedaría fijo. Para
+evitarlo, cada EXPLORACION_METODO_PDF facturas de un proveedor se prueba
+primero el método de texto con menos intentos (OCR no se explora: ya se
+prueba cuando los de texto fallan). Las facturas cortadas por el
+supervisor en la etapa PDF cuentan como intento fallido del método en
+curso (factura.tiempos['pdf:<metodo>'], ver nucleo.supervisor).
+
+Las estadísticas se guardan en JSON entre ejecuciones
+(config.settings.ESTADISTICAS_PDF_RUTA).
+
+Uso:
+    from nucleo.estadisticas_pdf import EstadisticasPDF
+
+    stats = EstadisticasPDF.cargar(ruta)
+    orden = stats.ordenar('CERES', ['pypdf', 'pdfplumber', 'ocr'])
+    ...
+    stats.registrar_factura(factura)
+    stats.guardar()
+
+Creado: 19/10/2026
+"""
+from pathlib import Path
+from typing import Dict, List, Optional
+from datetime import datetime
+import json
+
+try:
+    from config.settings import MIN_MUESTRAS_METODO_PDF, EXPLORACION_METODO_PDF
+except ImportError:
+    MIN_MUESTRAS_METODO_PDF = 3
+    EXPLORACION_METODO_PDF = 0
+
+VERSION_ESTADISTICAS = 1
+
+# Estados de cuadre que cuentan como éxito del método
+ESTADOS_OK = ('OK',)
+PREFIJO_OK_RETENCION = 'OK_RETENCION'
+
+# Métodos que no se adelantan al explorar (lentos; ya se prueban de fallback)
+METODOS_SIN_EXPLORACION = ('ocr',)
+
+
+def clave_proveedor(factura) -> str:
+    """
+    Clave de estadísticas de una factura: el extractor específico o,
+    si se usó el genérico, el proveedor del nombre de archivo.
+    """
+    return clave_extractor(getattr(factura, 'extractor', ''), factura.proveedor)
+
+
+def clave_extractor(extractor: str, proveedor: str) -> str:
+    """Clave de estadísticas a partir del nombre del extractor y el proveedor."""
+    if extractor and extractor != 'GENERICO':
+        return extractor
+    return proveedor
+
+
+def es_cuadre_ok(cuadre: str) -> bool:
+    """True si el estado de cuadre es OK u OK_RETENCION_x%."""
+    return cuadre in ESTADOS_OK or (cuadre or '').startswith(PREFIJO_OK_RETENCION)
+
+
+class EstadisticasPDF:
+    """
+    Acumulador persistente de intentos/éxitos/tiempos por proveedor y método.
+
+    Estructura interna:
+        {proveedor: {metodo: {'intentos': int, 'ok': int, 'segundos': float}}}
+    """
+
+    def __init__(self, ruta: Optional[Path] = None,
+                 min_muestras: int = MIN_MUESTRAS_METODO_PDF,
+                 exploracion: int = EXPLORACION_METODO_PDF):
+        self.ruta = Path(ruta) if ruta else None
+        self.min_muestras = min_muestras
+        self.exploracion = exploracion
+        self.datos: Dict[str, Dict[str, Dict[str, float]]] = {}
+        self._consultas: Dict[str, int] = {}  # ordenar() por proveedor en esta ejecución
+        self._modificado = False
+
+    # =========================================================================
+    # PERSISTENCIA
+    # =========================================================================
+
+    @classmethod
+    def cargar(cls, ruta: Path, min_muestras: int = MIN_MUESTRAS_METODO_PDF) -> 'EstadisticasPDF':
+        """
+        Carga las estadísticas desde JSON (vacías si no existe o está corrupto).
+
+        Args:
+            ruta: Ruta del archivo JSON
+            min_muestras: Intentos mínimos de un método antes de reordenarlo
+
+        Returns:
+            Instancia de EstadisticasPDF
+        """
+        stats = cls(ruta, min_muestras)
+        ruta = Path(ruta)
+        if ruta.exists():
+            try:
+                with open(ruta, 'r', encoding='utf-8') as f:
+                    contenido = json.load(f)
+                if contenido.get('version') == VERSION_ESTADISTICAS:
+                    stats.datos = contenido.get('proveedores', {})
+            except (OSError, ValueError):
+                stats.datos = {}
+        return stats
+
+    def guardar(self, ruta: Optional[Path] = None) -> None:
+        """Guarda las estadísticas en JSON (solo si hubo cambios)."""
+        ruta = Path(ruta) if ruta else self.ruta
+        if ruta is None or not self._modificado:
+            return
+        ruta.parent.mkdir(parents=True, exist_ok=True)
+        contenido = {
+            'version': VERSION_ESTADISTICAS,
+            'actualizado': datetime.now().isoformat(timespec='seconds'),
+            'proveedores': self.datos,
+        }
+        temporal = ruta.with_suffix(ruta.suffix + '.tmp')
+        with open(temporal, 'w', encoding='utf-8') as f:
+            json.dump(contenido, f, ensure_ascii=False, indent=1, sort_keys=True)
+        temporal.replace(ruta)
+        self._modificado = False
+
+    # =========================================================================
+    # REGISTRO
+    # =========================================================================
+
+    def registrar(self, proveedor: str, metodo: str, ok: bool, segundos: float) -> None:
+        """
+        Registra un intento de extracción.
+
+        Args:
+            proveedor: Clave del proveedor (nombre del extractor)
+            metodo: Método usado ('pypdf', 'pdfplumber', 'ocr')
+            ok: True si el texto del método acabó en cuadre OK
+            segundos: Tiempo que tardó el método
+        """
+        if not proveedor or not metodo:
+            return
+        entrada = self.datos.setdefault(proveedor, {}).setdefault(
+            metodo, {'intentos': 0, 'ok': 0, 'segundos': 0.0}
+        )
+        entrada['intentos'] += 1
+        entrada['ok'] += 1 if ok else 0
+        entrada['segundos'] = round(entrada['segundos'] + segundos, 4)
+        self._modificado = True
+
+    def registrar_factura(self, factura, clave: Optional[str] = None) -> None:
+        """
+        Registra los intentos de extracción de una factura procesada.
+
+        Usa factura.tiempos (claves 'pdf:<metodo>'): todos los métodos
+        probados cuentan como intento; solo el que produjo el texto
+        (factura.metodo_pdf) puede contar como éxito, y solo si cuadra.
+
+        Args:
+            factura: Factura procesada
+            clave: Clave del proveedor (None = clave_proveedor(factura))
+        """
+        proveedor = clave or clave_proveedor(factura)
+        ok = es_cuadre_ok(factura.cuadre)
+        for clave, segundos in (getattr(factura, 'tiempos', None) or {}).items():
+            if not clave.startswith('pdf:'):
+                continue
+            metodo = clave[4:]
+            self.registrar(proveedor, metodo, ok and metodo == factura.metodo_pdf, segundos)
+
+    # =========================================================================
+    # ORDEN DE MÉTODOS
+    # =========================================================================
+
+    def puntuacion(self, proveedor: str, metodo: str) -> Optional[tuple]:
+        """
+        Devuelve (tasa_exito_suavizada, tiempo_medio) o None si hay pocas muestras.
+
+        La tasa usa suavizado de Laplace: (ok + 1) / (intentos + 2).
+        """
+        entrada = self.datos.get(proveedor, {}).get(metodo)
+        if not entrada or entrada['intentos'] < self.min_muestras:
+            return None
+        intentos = entrada['intentos']
+        return (entrada['ok'] + 1) / (intentos + 2), entrada['segundos'] / intentos
+
+    def ordenar(self, proveedor: str, orden_base: List[str]) -> List[str]:
+        """
+        Reordena la cadena de métodos según las estadísticas del proveedor.
+
+        Solo se mueven entre sí los métodos con suficientes muestras
+        (mayor tasa de éxito primero y, a igualdad, el más rápido); los
+        demás conservan su posición en orden_base. Cada `exploracion`
+        llamadas para el mismo proveedor se adelanta además el método con
+        menos intentos (ver _explorar).
+
+        Args:
+            proveedor: Clave del proveedor
+            orden_base: Orden por defecto (según metodo_pdf del extractor)
+
+        Returns:
+            Nueva lista de métodos
+        """
+        puntuados = [
+            (m, self.puntuacion(proveedor, m)) for m in orden_base
+        ]
+        posiciones = [i for i, (_, p) in enumerate(puntuados) if p is not None]
+        resultado = list(orden_base)
+        if len(posiciones) >= 2:
+            ordenados = sorted(
+                (puntuados[i] for i in posiciones),
+                key=lambda mp: (-mp[1][0], mp[1][1])
+            )
+            for posicion, (metodo, _) in zip(posiciones, ordenados):
+                resultado[posicion] = metodo
+
+        if self.exploracion:
+            consultas = self._consultas[proveedor] = self._consultas.get(proveedor, 0) + 1
+            if consultas % self.exploracion == 0:
+                resultado = self._explorar(proveedor, resultado)
+        return resultado
+
+    def _explorar(self, proveedor: str, orden: List[str]) -> List[str]:
+        """
+        Adelanta al primer puesto el método de texto con menos intentos.
+
+        Solo si el primero ya tiene min_muestras (antes no hay orden que
+        se pueda quedar fijo); a igualdad de intentos, el que va antes.
+        """
+        datos = self.datos.get(proveedor, {})
+
+        def intentos(metodo: str) -> int:
+            return datos.get(metodo, {}).get('intentos', 0)
+
+        if not orden or intentos(orden[0]) < self.min_muestras:
+            return orden
+        candidatos = [m for m in orden[1:] if m not in METODOS_SIN_EXPLORACION]
+        if not candidatos:
+            return orden
+        elegido = min(candidatos, key=intentos)
+        return [elegido] + [m for m in orden if m != elegido]
@@ -1,13 +1,25 @@
 """
 Clases de datos para facturas y líneas.
+
+CAMBIOS v5.11 (19/10/2026):
+- LineaFactura con __slots__ (sin __dict__ por línea) y total/cuota_iva
+  calculados una vez; se recalculan si cambia base o iva (ej: prorrateo
+  de portes).
+- Factura cachea total_calculado/base_total/iva_total. La caché se
+  invalida al modificar la lista de líneas (ListaLineas) o el importe de
+  cualquier línea.
 """
 from dataclasses import dataclass, field
-from typing import List, Optional, Dict, Any
+from typing import ClassVar, List, Optional, Dict, Any, Tuple
 from pathlib import Path
 from datetime import datetime
 
 
-@dataclass
+# Campos de LineaFactura de los que dependen total y cuota_iva
+_CAMPOS_IMPORTE = frozenset(('base', 'iva'))
+
+
+@dataclass(slots=True)
 class LineaFactura:
     """Representa una línea de factura."""
     articulo: str = ''
@@ -18,16 +30,38 @@ class LineaFactura:
     precio_ud: Optional[float] = None
     categoria: str = 'PENDIENTE'
     id_categoria: str = ''
+    match_info: str = field(default='', repr=False, compare=False)  # Tipo de match al categorizar
+    _total: Optional[float] = field(default=None, init=False, repr=False, compare=False)
+    _cuota_iva: Optional[float] = field(default=None, init=False, repr=False, compare=False)
+    
+    # Se incrementa con cada cambio de base/iva de cualquier línea; las
+    # facturas lo comparan para saber si sus sumas cacheadas siguen valiendo
+    version_importes: ClassVar[int] = 0
+    
+    def __setattr__(self, nombre: str, valor: Any) -> None:
+        object.__setattr__(self, nombre, valor)
+        if nombre in _CAMPOS_IMPORTE:
+            object.__setattr__(self, '_total', None)
+            object.__setattr__(self, '_cuota_iva', None)
+            LineaFactura.version_importes += 1
     
     @property
     def total(self) -> float:
         """Calcula el total con IVA."""
-        return round(self.base * (1 + self.iva / 100), 2)
+        total = self._total
+        if total is None:
+            total = round(self.base * (1 + self.iva / 100), 2)
+            object.__setattr__(self, '_total', total)
+        return total
     
     @property
     def cuota_iva(self) -> float:
         """Calcula la cuota de IVA."""
-        return round(self.base * self.iva / 100, 2)
+        cuota = self._cuota_iva
+        if cuota is None:
+            cuota = round(self.base * self.iva / 100, 2)
+            object.__setattr__(self, '_cuota_iva', cuota)
+        return cuota
     
     def to_dict(self) -> Dict[str, Any]:
         """Convierte a diccionario."""
@@ -43,6 +77,85 @@ class LineaFactura:
             'categoria': self.categoria,
             'id_categoria': self.id_categoria
         }
+    
+    @classmethod
+    def from_dict(cls, datos: Dict[str, Any]) -> 'LineaFactura':
+        """Reconstruye una línea desde to_dict() (total y cuota_iva se recalculan)."""
+        return cls(
+            articulo=datos.get('articulo', ''),
+            base=datos.get('base', 0.0),
+            iva=datos.get('iva', 21),
+            codigo=datos.get('codigo', ''),
+            cantidad=datos.get('cantidad'),
+            precio_ud=datos.get('precio_ud'),
+            categoria=datos.get('categoria', 'PENDIENTE'),
+            id_categoria=datos.get('id_categoria', '')
+        )
+
+
+class ListaLineas(list):
+    """
+    Lista de líneas que lleva la cuenta de sus modificaciones.
+    
+    Factura usa 'version' para saber si sus sumas cacheadas siguen
+    valiendo tras append, extend, asignaciones, borrados, etc.
+    """
+    
+    version = 0
+    
+    def _modificada(self) -> None:
+        self.version += 1
+    
+    def append(self, linea):
+        super().append(linea)
+        self._modificada()
+    
+    def extend(self, lineas):
+        super().extend(lineas)
+        self._modificada()
+    
+    def insert(self, posicion, linea):
+        super().insert(posicion, linea)
+        self._modificada()
+    
+    def pop(self, *args):
+        linea = super().pop(*args)
+        self._modificada()
+        return linea
+    
+    def remove(self, linea):
+        super().remove(linea)
+        self._modificada()
+    
+    def clear(self):
+        super().clear()
+        self._modificada()
+    
+    def sort(self, *args, **kwargs):
+        super().sort(*args, **kwargs)
+        self._modificada()
+    
+    def reverse(self):
+        super().reverse()
+        self._modificada()
+    
+    def __setitem__(self, posicion, valor):
+        super().__setitem__(posicion, valor)
+        self._modificada()
+    
+    def __delitem__(self, posicion):
+        super().__delitem__(posicion)
+        self._modificada()
+    
+    def __iadd__(self, lineas):
+        resultado = super().__iadd__(lineas)
+        self._modificada()
+        return resultado
+    
+    def __imul__(self, veces):
+        resultado = super().__imul__(veces)
+        self._modificada()
+        return resultado
 
 
 @dataclass
@@ -57,12 +170,38 @@ class Factura:
     fecha: str = ''
     referencia: str = ''
     total: Optional[float] = None
-    lineas: List[LineaFactura] = field(default_factory=list)
+    lineas: List[LineaFactura] = field(default_factory=ListaLineas)
     cuadre: str = ''
     errores: List[str] = field(default_factory=list)
+    avisos: List[str] = field(default_factory=list)
     metodo_pdf: str = ''
+    extractor: str = ''
+    tiempos: Dict[str, float] = field(default_factory=dict)
+    perfil_regex: Dict[str, list] = field(default_factory=dict, repr=False)
     texto_raw: str = ''
     procesado_at: str = field(default_factory=lambda: datetime.now().isoformat())
+    _agregados: Optional[Tuple] = field(default=None, init=False, repr=False, compare=False)
+    
+    def __setattr__(self, nombre: str, valor: Any) -> None:
+        if nombre == 'lineas':
+            if not isinstance(valor, ListaLineas):
+                valor = ListaLineas(valor)
+            object.__setattr__(self, '_agregados', None)
+        object.__setattr__(self, nombre, valor)
+    
+    def _sumas(self) -> Tuple[float, float]:
+        """(suma de bases, suma de cuotas IVA), recalculadas solo si algo cambió."""
+        lineas = self.lineas
+        clave = (LineaFactura.version_importes, id(lineas), lineas.version)
+        agregados = self._agregados
+        if agregados is None or agregados[0] != clave:
+            agregados = (
+                clave,
+                sum(linea.base for linea in lineas),
+                sum(linea.cuota_iva for linea in lineas),
+            )
+            self._agregados = agregados
+        return agregados[1], agregados[2]
     
     @property
     def num_lineas(self) -> int:
@@ -75,7 +214,7 @@ class Factura:
     @property
     def total_calculado(self) -> float:
         """Suma de bases de todas las líneas."""
-        return sum(linea.base for linea in self.lineas)
+        return self._sumas()[0]
     
     @property
     def base_total(self) -> float:
@@ -85,7 +224,7 @@ class Factura:
     @property
     def iva_total(self) -> float:
         """Suma de cuotas IVA."""
-        return sum(linea.cuota_iva for linea in self.lineas)
+        return self._sumas()[1]
     
     @property
     def es_ok(self) -> bool:
@@ -136,6 +275,37 @@ class Factura:
             'lineas': [l.to_dict() for l in self.lineas]
         }
     
+    @classmethod
+    def from_dict(cls, datos: Dict[str, Any]) -> 'Factura':
+        """
+        Reconstruye una factura desde to_dict() o un registro JSONL.
+        
+        Los campos calculados (total_calculado, num_lineas) se ignoran;
+        ruta, avisos, metodo_pdf, extractor, tiempos y procesado_at se usan
+        si vienen.
+        """
+        factura = cls(
+            archivo=datos['archivo'],
+            numero=datos.get('numero', ''),
+            ruta=Path(datos['ruta']) if datos.get('ruta') else None,
+            proveedor=datos.get('proveedor', ''),
+            cif=datos.get('cif', ''),
+            iban=datos.get('iban', ''),
+            fecha=datos.get('fecha', ''),
+            referencia=datos.get('referencia', ''),
+            total=datos.get('total'),
+            lineas=[LineaFactura.from_dict(l) for l in datos.get('lineas', [])],
+            cuadre=datos.get('cuadre', ''),
+            errores=list(datos.get('errores', [])),
+            avisos=list(datos.get('avisos', [])),
+            metodo_pdf=datos.get('metodo_pdf', ''),
+            extractor=datos.get('extractor', ''),
+            tiempos=dict(datos.get('tiempos', {})),
+        )
+        if datos.get('procesado_at'):
+            factura.procesado_at = datos['procesado_at']
+        return factura
+    
     def to_filas_excel(self) -> List[Dict[str, Any]]:
         """Genera filas para Excel."""
         filas = []
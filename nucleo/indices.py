@@ -0,0 +1,312 @@
+"""
+Índices de búsqueda de texto reutilizables.
+
+Estructuras para sustituir los bucles lineales del tipo
+"para cada alias: si alias in texto o texto in alias" y
+"para cada clave: SequenceMatcher(...).ratio()" por búsquedas
+indexadas, conservando la misma prioridad (orden de inserción).
+
+- AutomataSubcadenas: Aho-Corasick. Qué claves aparecen DENTRO de un texto.
+- IndiceContenedores: en qué claves aparece un texto (texto in clave).
+- TablaNombres: tabla {nombre: valor} con búsqueda exacta y, si no, la
+  primera clave relacionada (los dos anteriores), memorizada.
+- IndiceSimilitud: clave más parecida según SequenceMatcher.ratio(),
+  con filtro por longitud, lista corta por trigramas y cotas
+  quick_ratio() para no calcular ratio() contra todas las claves.
+
+Todas identifican las claves por su posición en la lista original, de
+modo que "la primera que cumple" equivale a "la de menor posición".
+
+Creado: 19/10/2026
+"""
+from bisect import bisect_left, bisect_right
+from collections import deque
+from difflib import SequenceMatcher
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+
+# =============================================================================
+# AHO-CORASICK: CLAVES CONTENIDAS EN EL TEXTO
+# =============================================================================
+
+class AutomataSubcadenas:
+    """
+    Autómata Aho-Corasick sobre una lista de claves.
+
+    Uso:
+        automata = AutomataSubcadenas(['CERES', 'BM'])
+        automata.buscar('4T25 CERES TF')   # {0}
+        automata.primera('4T25 CERES TF')  # 0
+    """
+
+    def __init__(self, claves: Sequence[str]):
+        self.claves = list(claves)
+        self._transiciones: List[Dict[str, int]] = [{}]
+        self._fallo: List[int] = [0]
+        self._salida: List[List[int]] = [[]]
+        self._vacias: List[int] = []  # La clave '' está contenida en cualquier texto
+        self._construir()
+
+    def _construir(self) -> None:
+        for posicion, clave in enumerate(self.claves):
+            if not clave:
+                self._vacias.append(posicion)
+                continue
+            nodo = 0
+            for caracter in clave:
+                siguiente = self._transiciones[nodo].get(caracter)
+                if siguiente is None:
+                    siguiente = len(self._transiciones)
+                    self._transiciones[nodo][caracter] = siguiente
+                    self._transiciones.append({})
+                    self._fallo.append(0)
+                    self._salida.append([])
+                nodo = siguiente
+            self._salida[nodo].append(posicion)
+
+        # Enlaces de fallo por anchura
+        cola = deque(self._transiciones[0].values())
+        while cola:
+            nodo = cola.popleft()
+            for caracter, hijo in self._transiciones[nodo].items():
+                cola.append(hijo)
+                fallo = self._fallo[nodo]
+                while fallo and caracter not in self._transiciones[fallo]:
+                    fallo = self._fallo[fallo]
+                destino = self._transiciones[fallo].get(caracter, 0)
+                self._fallo[hijo] = destino if destino != hijo else 0
+                self._salida[hijo] = self._salida[hijo] + self._salida[self._fallo[hijo]]
+
+    def buscar(self, texto: str) -> Set[int]:
+        """Posiciones de todas las claves que aparecen en el texto."""
+        encontradas: Set[int] = set(self._vacias)
+        nodo = 0
+        transiciones, fallo, salida = self._transiciones, self._fallo, self._salida
+        for caracter in texto:
+            while nodo and caracter not in transiciones[nodo]:
+                nodo = fallo[nodo]
+            nodo = transiciones[nodo].get(caracter, 0)
+            if salida[nodo]:
+                encontradas.update(salida[nodo])
+        return encontradas
+
+    def primera(self, texto: str) -> Optional[int]:
+        """Menor posición de clave contenida en el texto (o None)."""
+        encontradas = self.buscar(texto)
+        return min(encontradas) if encontradas else None
+
+
+# =============================================================================
+# CONTENCIÓN INVERSA: TEXTO CONTENIDO EN LAS CLAVES
+# =============================================================================
+
+class IndiceContenedores:
+    """
+    Busca en qué claves aparece un texto, con una sola cadena concatenada.
+
+    Las claves se unen con un separador que no aparece en ellas; cada
+    aparición del texto en la cadena se traduce a su clave con bisect.
+    Como la concatenación respeta el orden, la primera aparición es
+    también la clave de menor posición.
+    """
+
+    SEPARADOR = '\x00'
+
+    def __init__(self, claves: Sequence[str]):
+        self.claves = list(claves)
+        self._inicios: List[int] = []
+        partes = []
+        desplazamiento = 0
+        for clave in self.claves:
+            self._inicios.append(desplazamiento)
+            partes.append(clave)
+            desplazamiento += len(clave) + 1
+        self._cadena = self.SEPARADOR.join(partes)
+
+    def _clave_en(self, offset: int) -> int:
+        return bisect_right(self._inicios, offset) - 1
+
+    def primera(self, texto: str) -> Optional[int]:
+        """Menor posición de clave que contiene al texto (o None)."""
+        if not self.claves:
+            return None
+        if not texto:
+            return 0
+        offset = self._cadena.find(texto)
+        return self._clave_en(offset) if offset >= 0 else None
+
+    def buscar(self, texto: str) -> Set[int]:
+        """Posiciones de todas las claves que contienen al texto."""
+        if not texto:
+            return set(range(len(self.claves)))
+        encontradas: Set[int] = set()
+        offset = self._cadena.find(texto)
+        while offset >= 0:
+            posicion = self._clave_en(offset)
+            encontradas.add(posicion)
+            # Saltar al inicio de la siguiente clave
+            siguiente = posicion + 1
+            if siguiente >= len(self._inicios):
+                break
+            offset = self._cadena.find(texto, self._inicios[siguiente])
+        return encontradas
+
+
+def primera_relacionada(automata: AutomataSubcadenas,
+                        contenedores: IndiceContenedores,
+                        texto: str) -> Optional[int]:
+    """
+    Menor posición de clave tal que 'clave in texto' o 'texto in clave'.
+
+    Equivale al bucle:
+        for i, clave in enumerate(claves):
+            if clave in texto or texto in clave:
+                return i
+    """
+    candidatas = [p for p in (automata.primera(texto), contenedores.primera(texto))
+                  if p is not None]
+    return min(candidatas) if candidatas else None
+
+
+class TablaNombres:
+    """
+    Búsqueda en una tabla {nombre: valor} como el bucle habitual:
+
+        if nombre in tabla: return tabla[nombre]
+        for clave, valor in tabla.items():
+            if clave in nombre or nombre in clave: return valor
+
+    con autómata + índice de contenedores y resultados memorizados.
+    'nombre in clave' solo cuenta si el nombre tiene al menos
+    min_contenido caracteres (0 = siempre).
+
+    Uso:
+        tabla = TablaNombres({'DEBORA': 0.01, 'JAIME FERNANDEZ': 0.19})
+        tabla.buscar('4T25 JAIME FERNANDEZ')      # 0.19
+        tabla.relacionadas('DEBORAH GARCIA')      # ('DEBORA',)
+    """
+
+    TAMANO_CACHE = 8192
+
+    def __init__(self, tabla: Dict[str, object], min_contenido: int = 0):
+        self.tabla = dict(tabla)
+        self.claves = list(self.tabla)
+        self.min_contenido = min_contenido
+        self._automata = AutomataSubcadenas(self.claves)
+        self._contenedores = IndiceContenedores(self.claves)
+        self.buscar = lru_cache(maxsize=self.TAMANO_CACHE)(self._buscar)
+        self.relacionadas = lru_cache(maxsize=self.TAMANO_CACHE)(self._relacionadas)
+
+    def __getstate__(self) -> Dict[str, object]:
+        # Las cachés (lru_cache sobre métodos) no se serializan: se rehacen vacías
+        estado = dict(self.__dict__)
+        del estado['buscar'], estado['relacionadas']
+        return estado
+
+    def __setstate__(self, estado: Dict[str, object]) -> None:
+        self.__dict__.update(estado)
+        self.buscar = lru_cache(maxsize=self.TAMANO_CACHE)(self._buscar)
+        self.relacionadas = lru_cache(maxsize=self.TAMANO_CACHE)(self._relacionadas)
+
+    def _buscar(self, nombre: str) -> Optional[object]:
+        """Valor de la clave exacta o de la primera clave relacionada (o None)."""
+        if nombre in self.tabla:
+            return self.tabla[nombre]
+        candidatas = [self._automata.primera(nombre)]
+        if len(nombre) >= self.min_contenido:
+            candidatas.append(self._contenedores.primera(nombre))
+        candidatas = [p for p in candidatas if p is not None]
+        return self.tabla[self.claves[min(candidatas)]] if candidatas else None
+
+    def _relacionadas(self, nombre: str) -> Tuple[str, ...]:
+        """Todas las claves relacionadas con el nombre, en el orden de la tabla."""
+        posiciones = set(self._automata.buscar(nombre))
+        if len(nombre) >= self.min_contenido:
+            posiciones |= self._contenedores.buscar(nombre)
+        return tuple(self.claves[p] for p in sorted(posiciones))
+
+
+# =============================================================================
+# SIMILITUD (SequenceMatcher) CON PODA
+# =============================================================================
+
+def trigramas(texto: str) -> Set[str]:
+    """Trigramas del texto (con relleno para textos cortos)."""
+    texto = f'  {texto} '
+    return {texto[i:i + 3] for i in range(len(texto) - 2)}
+
+
+class IndiceSimilitud:
+    """
+    Busca la clave con mayor SequenceMatcher(None, consulta, clave).ratio().
+
+    Resultado idéntico al bucle lineal con '>' estricto (a igualdad de
+    ratio gana la clave de menor posición), pero:
+    1. solo se miran claves cuya longitud permite superar el umbral
+       (ratio <= 2*min(la, lb) / (la + lb)),
+    2. se evalúan primero las que comparten más trigramas, para fijar
+       pronto un buen mínimo,
+    3. las demás se descartan con real_quick_ratio()/quick_ratio(), que
+       son cotas superiores de ratio().
+    """
+
+    def __init__(self, claves: Sequence[str]):
+        self.claves = list(claves)
+        orden = sorted(range(len(self.claves)), key=lambda i: len(self.claves[i]))
+        self._por_longitud = orden
+        self._longitudes = [len(self.claves[i]) for i in orden]
+        self._trigramas: Dict[str, List[int]] = {}
+        for posicion, clave in enumerate(self.claves):
+            for trigrama in trigramas(clave):
+                self._trigramas.setdefault(trigrama, []).append(posicion)
+
+    def _candidatas_por_longitud(self, longitud: int, umbral: float) -> List[int]:
+        # Con longitud 0 solo quedan las claves vacías (ratio('', '') = 1.0)
+        # 2*lb/(la+lb) > u  ->  lb > u*la/(2-u);   2*la/(la+lb) > u  ->  lb < la*(2-u)/u
+        minimo = umbral * longitud / (2 - umbral)
+        maximo = longitud * (2 - umbral) / umbral if umbral > 0 else float('inf')
+        desde = bisect_left(self._longitudes, minimo)
+        hasta = bisect_right(self._longitudes, maximo)
+        return self._por_longitud[desde:hasta]
+
+    def mejor(self, consulta: str, umbral: float) -> Optional[int]:
+        """
+        Posición de la clave más parecida con ratio > umbral (o None).
+
+        Args:
+            consulta: Texto a buscar (primer argumento de SequenceMatcher)
+            umbral: Ratio mínimo exclusivo (ej: 0.6)
+        """
+        candidatas = self._candidatas_por_longitud(len(consulta), umbral)
+        if not candidatas:
+            return None
+
+        comunes: Dict[int, int] = {}
+        for trigrama in trigramas(consulta):
+            for posicion in self._trigramas.get(trigrama, ()):
+                comunes[posicion] = comunes.get(posicion, 0) + 1
+        candidatas.sort(key=lambda p: (-comunes.get(p, 0), p))
+
+        mejor_posicion: Optional[int] = None
+        mejor_ratio = umbral
+        matcher = SequenceMatcher(None, consulta, '')
+        for posicion in candidatas:
+            matcher.set_seq2(self.claves[posicion])
+            if not self._puede_ganar(matcher.real_quick_ratio(), posicion,
+                                     mejor_ratio, mejor_posicion):
+                continue
+            if not self._puede_ganar(matcher.quick_ratio(), posicion,
+                                     mejor_ratio, mejor_posicion):
+                continue
+            ratio = matcher.ratio()
+            if self._puede_ganar(ratio, posicion, mejor_ratio, mejor_posicion):
+                mejor_ratio, mejor_posicion = ratio, posicion
+        return mejor_posicion
+
+    @staticmethod
+    def _puede_ganar(valor: float, posicion: int, mejor_ratio: float,
+                     mejor_posicion: Optional[int]) -> bool:
+        if mejor_posicion is None:
+            return valor > mejor_ratio
+        return valor > mejor_ratio or (valor == mejor_ratio and posicion < mejor_posicion)
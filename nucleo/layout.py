@@ -0,0 +1,276 @@
+"""
+Módulo de layout (capa de texto con posiciones) de PDFs.
+
+Extrae la capa de texto UNA sola vez como palabras con su caja
+(x0, x1, top, bottom), agrupadas por página y por línea visual.
+El resultado (LayoutFactura) no se guarda en la Factura: viaja al
+extractor en ContextoFactura.layout (solo si declara usa_layout), de
+forma que los extractores de tablas puedan reconstruir columnas por
+posición en vez de reabrir el PDF o probar varias regex.
+
+Uso:
+    from nucleo.layout import extraer_layout_pdf
+
+    layout = extraer_layout_pdf('factura.pdf')
+    for linea in layout.lineas():
+        print(linea.pagina, linea.texto)
+
+Creado: 19/10/2026
+"""
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import List, Optional, Iterator, Sequence
+import re
+
+try:
+    import pdfplumber
+    PDFPLUMBER_DISPONIBLE = True
+except ImportError:
+    PDFPLUMBER_DISPONIBLE = False
+
+
+# Tolerancia vertical (en puntos) para considerar dos palabras en la misma línea
+TOLERANCIA_LINEA = 3.0
+
+
+# =============================================================================
+# CLASES DE DATOS
+# =============================================================================
+
+@dataclass(frozen=True)
+class Palabra:
+    """Palabra del PDF con su caja delimitadora."""
+    texto: str
+    x0: float
+    x1: float
+    top: float
+    bottom: float
+
+    @property
+    def centro_x(self) -> float:
+        return (self.x0 + self.x1) / 2
+
+
+@dataclass
+class LineaLayout:
+    """Línea visual: palabras de una página con la misma altura."""
+    pagina: int
+    top: float
+    bottom: float
+    palabras: List[Palabra] = field(default_factory=list)
+
+    @property
+    def texto(self) -> str:
+        """Texto de la línea con las palabras separadas por un espacio."""
+        return ' '.join(p.texto for p in self.palabras)
+
+    @property
+    def x0(self) -> float:
+        return self.palabras[0].x0 if self.palabras else 0.0
+
+    @property
+    def x1(self) -> float:
+        return self.palabras[-1].x1 if self.palabras else 0.0
+
+
+@dataclass
+class PaginaLayout:
+    """Página del PDF con sus líneas ordenadas de arriba a abajo."""
+    numero: int
+    ancho: float = 0.0
+    alto: float = 0.0
+    lineas: List[LineaLayout] = field(default_factory=list)
+
+
+@dataclass
+class LayoutFactura:
+    """Layout completo de una factura (todas las páginas)."""
+    paginas: List[PaginaLayout] = field(default_factory=list)
+
+    def lineas(self) -> Iterator[LineaLayout]:
+        """Itera todas las líneas de todas las páginas en orden de lectura."""
+        for pagina in self.paginas:
+            yield from pagina.lineas
+
+    @property
+    def num_lineas(self) -> int:
+        return sum(len(p.lineas) for p in self.paginas)
+
+    def texto(self) -> str:
+        """Reconstruye el texto plano (una línea visual por línea)."""
+        return '\n'.join(linea.texto for linea in self.lineas())
+
+    def buscar_linea(self, patron: str, flags: int = re.IGNORECASE,
+                     desde: Optional[LineaLayout] = None) -> Optional[LineaLayout]:
+        """
+        Devuelve la primera línea cuyo texto cumple el patrón.
+
+        Args:
+            patron: Expresión regular a buscar
+            flags: Flags de re (por defecto IGNORECASE)
+            desde: Si se indica, empieza a buscar DESPUÉS de esa línea
+
+        Returns:
+            LineaLayout o None si no hay coincidencia
+        """
+        regex = re.compile(patron, flags)
+        activo = desde is None
+        for linea in self.lineas():
+            if not activo:
+                activo = linea is desde
+                continue
+            if regex.search(linea.texto):
+                return linea
+        return None
+
+    def lineas_entre(self, inicio: Optional[LineaLayout],
+                     fin: Optional[LineaLayout]) -> List[LineaLayout]:
+        """
+        Devuelve las líneas comprendidas entre dos líneas (ambas excluidas).
+
+        Si inicio es None se empieza por la primera línea; si fin es None
+        se llega hasta la última.
+        """
+        resultado = []
+        activo = inicio is None
+        for linea in self.lineas():
+            if fin is not None and linea is fin:
+                break
+            if activo:
+                resultado.append(linea)
+            elif linea is inicio:
+                activo = True
+        return resultado
+
+
+# =============================================================================
+# CONSTRUCCIÓN DEL LAYOUT
+# =============================================================================
+
+def agrupar_en_lineas(palabras: Sequence[Palabra], pagina: int = 1,
+                      tolerancia: float = TOLERANCIA_LINEA) -> List[LineaLayout]:
+    """
+    Agrupa palabras en líneas visuales según su posición vertical.
+
+    Args:
+        palabras: Palabras de una página
+        pagina: Número de página (1-based)
+        tolerancia: Diferencia máxima de 'top' dentro de una línea
+
+    Returns:
+        Lista de LineaLayout ordenadas por 'top', palabras ordenadas por x0
+    """
+    lineas: List[LineaLayout] = []
+    for palabra in sorted(palabras, key=lambda p: (p.top, p.x0)):
+        if lineas and abs(palabra.top - lineas[-1].top) <= tolerancia:
+            actual = lineas[-1]
+            actual.palabras.append(palabra)
+            actual.bottom = max(actual.bottom, palabra.bottom)
+        else:
+            lineas.append(LineaLayout(pagina=pagina, top=palabra.top,
+                                      bottom=palabra.bottom, palabras=[palabra]))
+    for linea in lineas:
+        linea.palabras.sort(key=lambda p: p.x0)
+    return lineas
+
+
+def layout_desde_pagina(page, numero: int) -> PaginaLayout:
+    """
+    Construye el layout de una página de pdfplumber ya abierta.
+
+    Se usa desde nucleo.pdf para aprovechar la misma apertura del PDF
+    con la que se extrae el texto.
+    """
+    palabras = [
+        Palabra(
+            texto=w['text'],
+            x0=round(float(w['x0']), 2),
+            x1=round(float(w['x1']), 2),
+            top=round(float(w['top']), 2),
+            bottom=round(float(w['bottom']), 2),
+        )
+        for w in (page.extract_words(keep_blank_chars=False, use_text_flow=False) or [])
+    ]
+    return PaginaLayout(
+        numero=numero,
+        ancho=float(page.width or 0),
+        alto=float(page.height or 0),
+        lineas=agrupar_en_lineas(palabras, pagina=numero),
+    )
+
+
+def extraer_layout_pdf(ruta: Path) -> Optional[LayoutFactura]:
+    """
+    Extrae el layout de un PDF con pdfplumber.
+
+    Args:
+        ruta: Ruta al archivo PDF
+
+    Returns:
+        LayoutFactura o None si pdfplumber no está disponible o falla
+    """
+    if not PDFPLUMBER_DISPONIBLE:
+        return None
+    try:
+        with pdfplumber.open(str(ruta)) as pdf:
+            return LayoutFactura(paginas=[
+                layout_desde_pagina(page, i)
+                for i, page in enumerate(pdf.pages, 1)
+            ])
+    except Exception:
+        return None
+
+
+# =============================================================================
+# RECONSTRUCCIÓN POR COLUMNAS
+# =============================================================================
+
+def detectar_cortes_columnas(cabecera: LineaLayout,
+                             nombres: Sequence[str]) -> List[float]:
+    """
+    Calcula los cortes horizontales entre columnas a partir de la cabecera.
+
+    Para cada nombre de columna busca la palabra de la cabecera que
+    empieza por él; el corte entre dos columnas consecutivas es el punto
+    medio entre el final de una y el inicio de la siguiente.
+
+    Args:
+        cabecera: Línea de cabecera de la tabla
+        nombres: Nombres de columna en orden (ej: ['CODIGO', 'DESCRIPCION', 'IMPORTE'])
+
+    Returns:
+        Lista de len(nombres) - 1 cortes (coordenada x). Vacía si falta alguna columna.
+    """
+    posiciones = []
+    for nombre in nombres:
+        nombre_upper = nombre.upper()
+        palabra = next(
+            (p for p in cabecera.palabras if p.texto.upper().startswith(nombre_upper)),
+            None
+        )
+        if palabra is None:
+            return []
+        posiciones.append(palabra)
+
+    return [
+        (izq.x1 + der.x0) / 2
+        for izq, der in zip(posiciones, posiciones[1:])
+    ]
+
+
+def partir_en_columnas(linea: LineaLayout, cortes: Sequence[float]) -> List[str]:
+    """
+    Reparte las palabras de una línea en columnas según los cortes.
+
+    Cada palabra se asigna por su centro horizontal.
+
+    Returns:
+        Lista de len(cortes) + 1 textos (vacío si la columna no tiene palabras)
+    """
+    columnas: List[List[str]] = [[] for _ in range(len(cortes) + 1)]
+    for palabra in linea.palabras:
+        indice = 0
+        while indice < len(cortes) and palabra.centro_x > cortes[indice]:
+            indice += 1
+        columnas[indice].append(palabra.texto)
+    return [' '.join(c) for c in columnas]
@@ -0,0 +1,134 @@
+"""
+Normalización de nombres de proveedor y de textos de búsqueda.
+
+Funciones compartidas por main.py (normalizar_proveedor, por cada línea
+desde categorizar_linea), salidas.excel (normalizar_para_busqueda) y
+nucleo.categorias (CategorizadorArticulos._normalizar):
+
+- Patrones regex precompilados a nivel de módulo.
+- Una sola tabla str.translate para quitar signos y acentos.
+- Alias de proveedor resueltos con nucleo.indices.TablaNombres (dict para
+  el exacto; autómata Aho-Corasick + índice de contenedores para las
+  coincidencias parciales) en lugar de recorrer todos los alias.
+- Resultados memorizados con lru_cache (los nombres se repiten mucho).
+
+Mismos resultados que las versiones anteriores, paso a paso.
+
+Uso:
+    from nucleo.normalizacion import NormalizadorProveedores, normalizar_para_busqueda
+
+    normalizador = NormalizadorProveedores(ALIAS_DICCIONARIO)
+    normalizador.normalizar('4T25 1031 CERES TF')   # 'CERES' (o su alias)
+
+Creado: 19/10/2026
+"""
+from functools import lru_cache
+from typing import Dict
+import re
+
+from nucleo.indices import TablaNombres
+
+TAMANO_CACHE = 8192
+
+
+# =============================================================================
+# NOMBRE DE PROVEEDOR (nombre de archivo -> proveedor)
+# =============================================================================
+
+# Pasos de main.normalizar_proveedor, en orden
+_RE_PREFIJO_TRIMESTRE_NUMERO = re.compile(r'^\d[TQ]\d{2}\s+\d{3,4}\s+')          # "4T25 1031 "
+_RE_PREFIJO_ATRASADA = re.compile(r'^ATRASADA\s*(\d[TQ]\d{2})?\s*\d*\s*', re.IGNORECASE)
+_RE_PREFIJO_TRIMESTRE = re.compile(r'^\d[TQ]\d{2}\s+')                           # "4T25 "
+_RE_PREFIJO_NUMERO = re.compile(r'^\d{3,4}\s+')                                  # "442 "
+_RE_SUFIJO_TIPO = re.compile(r'\s+(TF|TR|TJ|EF|RC|EG)\.?$', re.IGNORECASE)
+_RE_SUFIJO_NUMERO = re.compile(r'\s+\d+$')                                       # " 2"
+_RE_EXTENSION_PDF = re.compile(r'\.pdf$', re.IGNORECASE)
+
+# Longitud mínima del nombre para aceptar que esté contenido en un alias
+MIN_LONGITUD_NOMBRE_EN_ALIAS = 5
+
+
+@lru_cache(maxsize=TAMANO_CACHE)
+def limpiar_nombre_proveedor(nombre: str) -> str:
+    """
+    Quita prefijos de fecha/referencia, sufijos de tipo de factura,
+    sufijos numéricos y la extensión; devuelve el nombre en mayúsculas.
+    """
+    nombre = _RE_PREFIJO_TRIMESTRE_NUMERO.sub('', nombre)
+    nombre = _RE_PREFIJO_ATRASADA.sub('', nombre)
+    nombre = _RE_PREFIJO_TRIMESTRE.sub('', nombre)
+    nombre = _RE_PREFIJO_NUMERO.sub('', nombre)
+    nombre = _RE_SUFIJO_TIPO.sub('', nombre)
+    nombre = _RE_SUFIJO_NUMERO.sub('', nombre)
+    nombre = _RE_EXTENSION_PDF.sub('', nombre)
+    return nombre.strip().upper()
+
+
+class NormalizadorProveedores:
+    """
+    Normalizador de nombres de proveedor con su tabla de alias.
+
+    El primer alias (en orden del dict) que está contenido en el nombre, o
+    que contiene al nombre si este tiene al menos 5 caracteres, decide el
+    proveedor; igual que el bucle sobre ALIAS_DICCIONARIO.
+    """
+
+    def __init__(self, alias: Dict[str, str]):
+        self.alias = TablaNombres(alias, min_contenido=MIN_LONGITUD_NOMBRE_EN_ALIAS)
+        self.normalizar = lru_cache(maxsize=TAMANO_CACHE)(self._normalizar)
+
+    def _normalizar(self, nombre: str) -> str:
+        if not nombre:
+            return ""
+        nombre = limpiar_nombre_proveedor(nombre)
+        return self.alias.buscar(nombre) or nombre
+
+
+# =============================================================================
+# TEXTO DE BÚSQUEDA (salidas.excel: proveedor -> CUENTA/TITULO)
+# =============================================================================
+
+_RE_BUSQUEDA_PREFIJO = re.compile(r'^\d+T\d*\s+\d+\s+')          # "4T25 1001 "
+_RE_BUSQUEDA_ATRASADA = re.compile(r'^ATRASADA\s+')
+_RE_BUSQUEDA_SUFIJO_PDF = re.compile(r'\s+(TF|TJ|RC)\.?PDF$', re.IGNORECASE)
+_RE_BUSQUEDA_SUFIJO = re.compile(r'\s+(TF|TJ|RC)$', re.IGNORECASE)
+
+
+@lru_cache(maxsize=TAMANO_CACHE)
+def _normalizar_busqueda(texto: str) -> str:
+    texto = texto.upper().strip()
+    if texto == 'NAN':
+        return ''
+    texto = _RE_BUSQUEDA_PREFIJO.sub('', texto)
+    texto = _RE_BUSQUEDA_ATRASADA.sub('', texto)
+    texto = _RE_BUSQUEDA_SUFIJO_PDF.sub('', texto)
+    texto = _RE_BUSQUEDA_SUFIJO.sub('', texto)
+    return ' '.join(texto.split())
+
+
+def normalizar_para_busqueda(texto) -> str:
+    """
+    Normaliza un texto para búsqueda flexible.
+    """
+    if texto is None or (isinstance(texto, float) and texto != texto):
+        return ''
+    return _normalizar_busqueda(str(texto))
+
+
+# =============================================================================
+# TEXTO COMPACTO (nucleo.categorias: sin signos, espacios ni acentos)
+# =============================================================================
+
+_TABLA_COMPACTO = str.maketrans(
+    {'Á': 'A', 'É': 'E', 'Í': 'I', 'Ó': 'O', 'Ú': 'U', 'Ü': 'U', 'Ñ': 'N',
+     **{c: None for c in '- .,/\\()"\'´`'}}
+)
+
+
+@lru_cache(maxsize=TAMANO_CACHE)
+def normalizar_compacto(texto: str) -> str:
+    """
+    Mayúsculas sin espacios, guiones, puntos, comas, barras, paréntesis,
+    comillas ni acentos ('Licores Madrueño' -> 'LICORESMADRUENO').
+    """
+    return texto.upper().strip().translate(_TABLA_COMPACTO)
@@ -10,10 +10,15 @@ Uso:
     from nucleo.pdf import extraer_texto_pdf
     
     texto = extraer_texto_pdf('factura.pdf', metodo='pypdf')
+
+    # Texto + layout (palabras con posición) en una sola apertura
+    texto, layout = extraer_texto_y_layout('factura.pdf', metodo='pdfplumber')
 """
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Optional
+from typing import Callable, Dict, List, Optional, Tuple
 import re
+import time
 
 # Importar configuración
 import sys
@@ -62,6 +67,8 @@ except ImportError:
     OCR_DISPONIBLE = False
     print("⚠️ OCR no disponible. Instalar con: pip install pytesseract pdf2image pillow")
 
+from nucleo.layout import LayoutFactura, layout_desde_pagina, extraer_layout_pdf
+
 
 # =============================================================================
 # FUNCIONES DE EXTRACCIÓN
@@ -117,6 +124,33 @@ def extraer_texto_pdfplumber(ruta: Path) -> str:
         raise RuntimeError(f"Error extrayendo texto con pdfplumber: {e}")
 
 
+def extraer_texto_pdfplumber_con_layout(ruta: Path) -> Tuple[str, LayoutFactura]:
+    """
+    Extrae texto y layout (palabras con posición) con una sola apertura.
+
+    El texto es idéntico al de extraer_texto_pdfplumber().
+
+    Args:
+        ruta: Ruta al archivo PDF
+
+    Returns:
+        Tupla (texto, layout)
+    """
+    if not PDFPLUMBER_DISPONIBLE:
+        raise RuntimeError("pdfplumber no está disponible")
+
+    try:
+        texto = ""
+        paginas = []
+        with pdfplumber.open(str(ruta)) as pdf:
+            for i, page in enumerate(pdf.pages, 1):
+                texto += (page.extract_text() or "") + "\n"
+                paginas.append(layout_desde_pagina(page, i))
+        return texto, LayoutFactura(paginas=paginas)
+    except Exception as e:
+        raise RuntimeError(f"Error extrayendo texto con pdfplumber: {e}")
+
+
 def extraer_texto_ocr(ruta: Path) -> str:
     """
     Extrae texto usando OCR (Tesseract).
@@ -195,6 +229,94 @@ def extraer_texto_pdf(
     Returns:
         Texto extraído del PDF
         
+    Raises:
+        FileNotFoundError: Si el archivo no existe
+        RuntimeError: Si no se puede extraer el texto
+    """
+    return extraer_texto_detallado(ruta, metodo, fallback).texto
+
+
+def extraer_texto_y_layout(
+    ruta: Path,
+    metodo: str = 'pypdf',
+    fallback: bool = True
+) -> Tuple[str, Optional[LayoutFactura]]:
+    """
+    Extrae texto y layout de un PDF.
+    
+    Mismo orden de métodos que extraer_texto_pdf(). Si el texto sale de
+    pdfplumber, el layout se construye en la misma apertura del PDF; si
+    sale de pypdf se abre una sola vez más con pdfplumber; con OCR no
+    hay capa de texto y el layout es None.
+    
+    Args:
+        ruta: Ruta al archivo PDF
+        metodo: Método de extracción ('pypdf', 'pdfplumber', 'ocr')
+        fallback: Si True, intenta otros métodos si el principal falla
+        
+    Returns:
+        Tupla (texto, layout o None)
+        
+    Raises:
+        FileNotFoundError: Si el archivo no existe
+        RuntimeError: Si no se puede extraer el texto
+    """
+    resultado = extraer_texto_detallado(ruta, metodo, fallback, con_layout=True)
+    return resultado.texto, resultado.layout
+
+
+@dataclass
+class ResultadoExtraccion:
+    """Resultado de extraer_texto_detallado()."""
+    texto: str
+    metodo: str
+    layout: Optional[LayoutFactura] = None
+    tiempos: Dict[str, float] = field(default_factory=dict)  # {'pdf:pypdf': seg}
+
+
+def orden_metodos(metodo: str) -> List[str]:
+    """
+    Orden de fallback por defecto según el método declarado.
+    
+    Args:
+        metodo: Método preferido ('pypdf', 'pdfplumber', 'ocr')
+        
+    Returns:
+        Lista de métodos en el orden en que se prueban
+    """
+    metodo = metodo.lower()
+    if metodo == 'ocr':
+        return ['ocr', 'pdfplumber', 'pypdf']
+    elif metodo == 'pdfplumber':
+        return ['pdfplumber', 'pypdf', 'ocr']
+    else:  # pypdf por defecto
+        return ['pypdf', 'pdfplumber', 'ocr']
+
+
+def extraer_texto_detallado(
+    ruta: Path,
+    metodo: str = 'pypdf',
+    fallback: bool = True,
+    con_layout: bool = False,
+    orden: Optional[List[str]] = None,
+    al_probar: Optional[Callable[[str], None]] = None
+) -> ResultadoExtraccion:
+    """
+    Extrae texto indicando qué método lo produjo y cuánto tardó cada intento.
+    
+    Args:
+        ruta: Ruta al archivo PDF
+        metodo: Método de extracción ('pypdf', 'pdfplumber', 'ocr')
+        fallback: Si True, intenta otros métodos si el principal falla
+        con_layout: Si True, devuelve también el layout (ver extraer_texto_y_layout)
+        orden: Orden de métodos a probar (por defecto orden_metodos(metodo)).
+               Lo usa el autoajuste por proveedor (nucleo.estadisticas_pdf).
+        al_probar: Función llamada con el nombre de cada método antes de
+               probarlo (el supervisor sabe así qué método estaba en curso)
+        
+    Returns:
+        ResultadoExtraccion con texto, método usado, layout y tiempos
+        
     Raises:
         FileNotFoundError: Si el archivo no existe
         RuntimeError: Si no se puede extraer el texto
@@ -208,33 +330,41 @@ def extraer_texto_pdf(
     texto = ""
     
     # Orden de métodos a intentar
-    if metodo == 'ocr':
-        metodos = ['ocr', 'pdfplumber', 'pypdf']
-    elif metodo == 'pdfplumber':
-        metodos = ['pdfplumber', 'pypdf', 'ocr']
-    else:  # pypdf por defecto
-        metodos = ['pypdf', 'pdfplumber', 'ocr']
+    metodos = list(orden) if orden else orden_metodos(metodo)
     
     if not fallback:
         metodos = [metodo]
     
     errores = []
+    tiempos = {}
     for m in metodos:
+        layout = None
+        if al_probar is not None:
+            al_probar(m)
+        inicio = time.perf_counter()
         try:
             if m == 'pypdf' and PYPDF_DISPONIBLE:
                 texto = extraer_texto_pypdf(ruta)
             elif m == 'pdfplumber' and PDFPLUMBER_DISPONIBLE:
-                texto = extraer_texto_pdfplumber(ruta)
+                if con_layout:
+                    texto, layout = extraer_texto_pdfplumber_con_layout(ruta)
+                else:
+                    texto = extraer_texto_pdfplumber(ruta)
             elif m == 'ocr' and OCR_DISPONIBLE:
                 texto = extraer_texto_ocr(ruta)
             else:
                 continue
             
+            tiempos[f'pdf:{m}'] = round(time.perf_counter() - inicio, 4)
+            
             # Verificar que se extrajo algo
             if texto and len(texto.strip()) > 50:
-                return _limpiar_texto(texto)
+                if con_layout and layout is None and m == 'pypdf':
+                    layout = extraer_layout_pdf(ruta)
+                return ResultadoExtraccion(_limpiar_texto(texto), m, layout, tiempos)
                 
         except Exception as e:
+            tiempos[f'pdf:{m}'] = round(time.perf_counter() - inicio, 4)
             errores.append(f"{m}: {e}")
             continue
     
@@ -0,0 +1,266 @@
+"""
+Registro unificado de proveedores.
+
+Los datos de cada proveedor estaban repartidos en varias tablas, cada una
+con su propio bucle de coincidencia parcial:
+
+- config.proveedores: CIF_A_PROVEEDOR, PROVEEDORES_CONOCIDOS (CIF/IBAN),
+  EXTRACTOR_PDF_PROVEEDOR, ALIAS_DICCIONARIO, RETENCIONES_PROVEEDOR
+- Atributos de los extractores (nombre, cif, iban, metodo_pdf)
+- datos/Maestro_Proveedores_ACTUALIZADO.xlsx (PROVEEDOR, CIF, IBAN, FORMA_PAGO)
+
+RegistroProveedores las junta una sola vez en fichas (FichaProveedor) con
+índices por nombre/alias, CIF e IBAN (búsquedas O(1) en dict). Las fichas
+se unen por CIF, IBAN o nombre; si dos fuentes dan un dato distinto se
+queda el primero en este orden: CIF_A_PROVEEDOR, extractores,
+PROVEEDORES_CONOCIDOS, Maestro, ALIAS_DICCIONARIO, RETENCIONES_PROVEEDOR,
+EXTRACTOR_PDF_PROVEEDOR (el metodo_pdf de la tabla antes que el del
+extractor).
+
+Las búsquedas "exacta y si no la primera clave relacionada" de cada tabla
+(calcular_descuadre_con_retencion, buscar_en_diccionario,
+obtener_datos_proveedor) usan nucleo.indices.TablaNombres, con el mismo
+orden de prioridad que el bucle original y resultados memorizados.
+
+El registro lee el Maestro xlsx, así que main.py lo construye una vez al
+cargar el diccionario y lo envía a los workers del supervisor con
+instalar_registro (no se lee dentro de una factura, con su límite de tiempo).
+
+Uso:
+    from nucleo.proveedores import obtener_registro, instalar_registro
+
+    registro = obtener_registro()
+    registro.por_cif('B83478669').nombre     # 'CERES'
+    registro.retencion('4T25 JAIME FERNANDEZ')  # 0.19
+    instalar_registro(registro)              # en el worker, ya construido
+
+Creado: 19/10/2026
+"""
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set
+
+from nucleo.indices import TablaNombres
+from nucleo.reglas import normalizar_proveedor_regla
+
+try:
+    from config.settings import MAESTRO_PROVEEDORES_RUTA
+except ImportError:
+    MAESTRO_PROVEEDORES_RUTA = None
+
+
+def limpiar_cif(cif: str) -> str:
+    """CIF sin guiones ni espacios, en mayúsculas."""
+    return str(cif or '').replace('-', '').replace(' ', '').upper()
+
+
+def limpiar_iban(iban: str) -> str:
+    """IBAN sin espacios, en mayúsculas."""
+    return ''.join(str(iban or '').split()).upper()
+
+
+# =============================================================================
+# FICHAS E ÍNDICES
+# =============================================================================
+
+@dataclass
+class FichaProveedor:
+    """Datos unificados de un proveedor."""
+    nombre: str
+    alias: Set[str] = field(default_factory=set)
+    cif: str = ''
+    iban: str = ''
+    metodo_pdf: str = ''
+    retencion: Optional[float] = None
+    forma_pago: str = ''
+    extractor: str = ''          # Nombre de la clase del extractor específico
+    fuentes: List[str] = field(default_factory=list)
+
+
+class RegistroProveedores:
+    """
+    Proveedores con índices por nombre/alias, CIF e IBAN.
+
+    Se construye con construir() (o obtener_registro() para la instancia
+    compartida del proceso).
+    """
+
+    def __init__(self):
+        self.fichas: List[FichaProveedor] = []
+        self._por_nombre: Dict[str, FichaProveedor] = {}
+        self._por_cif: Dict[str, FichaProveedor] = {}
+        self._por_iban: Dict[str, FichaProveedor] = {}
+        # Tablas de config.proveedores con su semántica de búsqueda
+        self.retenciones = TablaNombres({})
+        self.datos_conocidos = TablaNombres({})
+        self.alias_diccionario = TablaNombres({})
+
+    def __len__(self) -> int:
+        return len(self.fichas)
+
+    # =========================================================================
+    # CONSTRUCCIÓN
+    # =========================================================================
+
+    @classmethod
+    def construir(cls, extractores: Optional[Dict[str, type]] = None,
+                  ruta_maestro: Optional[Path] = MAESTRO_PROVEEDORES_RUTA) -> 'RegistroProveedores':
+        """
+        Construye el registro desde config.proveedores, extractores y Maestro.
+
+        Args:
+            extractores: {nombre registrado: clase} (None = extractores.EXTRACTORES)
+            ruta_maestro: Maestro de proveedores xlsx (None o inexistente = sin él)
+
+        Returns:
+            RegistroProveedores con los índices construidos
+        """
+        from config.proveedores import (
+            CIF_A_PROVEEDOR, PROVEEDORES_CONOCIDOS, EXTRACTOR_PDF_PROVEEDOR,
+            ALIAS_DICCIONARIO, RETENCIONES_PROVEEDOR,
+        )
+        registro = cls()
+        registro.retenciones = TablaNombres(RETENCIONES_PROVEEDOR)
+        registro.datos_conocidos = TablaNombres(PROVEEDORES_CONOCIDOS)
+        registro.alias_diccionario = TablaNombres(ALIAS_DICCIONARIO)
+
+        for cif, nombre in CIF_A_PROVEEDOR.items():
+            registro._agregar(nombre, 'CIF_A_PROVEEDOR', cif=cif)
+
+        if extractores is None:
+            try:
+                from extractores import EXTRACTORES as extractores
+            except ImportError:
+                extractores = {}
+        for nombre_registrado, clase in extractores.items():
+            registro._agregar(
+                getattr(clase, 'nombre', '') or nombre_registrado, 'extractor',
+                alias=[nombre_registrado], cif=getattr(clase, 'cif', ''),
+                iban=getattr(clase, 'iban', ''), extractor=clase.__name__,
+            )
+
+        for nombre, datos in PROVEEDORES_CONOCIDOS.items():
+            registro._agregar(nombre, 'PROVEEDORES_CONOCIDOS',
+                              cif=datos.get('cif', ''), iban=datos.get('iban', ''))
+
+        for fila in registro._filas_maestro(ruta_maestro):
+            registro._agregar(fila['PROVEEDOR'], 'maestro', cif=fila['CIF'],
+                              iban=fila['IBAN'], forma_pago=fila['FORMA_PAGO'])
+
+        for alias, nombre in ALIAS_DICCIONARIO.items():
+            ficha = registro._buscar_nombre(nombre) or registro._buscar_nombre(alias)
+            registro._agregar(ficha.nombre if ficha else nombre, 'ALIAS_DICCIONARIO', alias=[alias, nombre])
+
+        for nombre, porcentaje in RETENCIONES_PROVEEDOR.items():
+            registro._agregar(nombre, 'RETENCIONES_PROVEEDOR', retencion=porcentaje)
+
+        for nombre, metodo in EXTRACTOR_PDF_PROVEEDOR.items():
+            registro._agregar(nombre, 'EXTRACTOR_PDF_PROVEEDOR', metodo_pdf=metodo)
+        for nombre_registrado, clase in extractores.items():
+            registro._agregar(getattr(clase, 'nombre', '') or nombre_registrado, 'extractor',
+                              metodo_pdf=getattr(clase, 'metodo_pdf', ''))
+        return registro
+
+    @staticmethod
+    def _filas_maestro(ruta_maestro: Optional[Path]) -> Iterable[Dict[str, str]]:
+        """Filas del Maestro de proveedores (ninguna si no existe o no se puede leer)."""
+        if not ruta_maestro or not Path(ruta_maestro).exists():
+            return []
+        try:
+            import pandas as pd
+            df = pd.read_excel(ruta_maestro, dtype=str).fillna('')
+        except (ImportError, OSError, ValueError):
+            return []
+        if 'PROVEEDOR' not in df.columns:
+            return []
+        for columna in ('CIF', 'IBAN', 'FORMA_PAGO'):
+            if columna not in df.columns:
+                df[columna] = ''
+        return [fila for fila in df.to_dict('records') if fila['PROVEEDOR'].strip()]
+
+    def _buscar_nombre(self, nombre: str) -> Optional[FichaProveedor]:
+        return self._por_nombre.get(normalizar_proveedor_regla(nombre))
+
+    def _agregar(self, nombre: str, fuente: str, alias: Iterable[str] = (),
+                 cif: str = '', iban: str = '', **datos) -> FichaProveedor:
+        """
+        Añade los datos a la ficha del proveedor (por CIF, IBAN o nombre) o crea una.
+
+        Los datos que la ficha ya tiene no se sobrescriben.
+        """
+        nombre = str(nombre).strip().upper()
+        cif, iban = limpiar_cif(cif), limpiar_iban(iban)
+        nombres = [nombre] + [str(a).strip().upper() for a in alias if a]
+        ficha = (self._por_cif.get(cif) if cif else None) \
+            or (self._por_iban.get(iban) if iban and not cif else None) \
+            or next((f for f in map(self._buscar_nombre, nombres) if f is not None), None)
+        if ficha is None:
+            ficha = FichaProveedor(nombre=nombre)
+            self.fichas.append(ficha)
+        if fuente not in ficha.fuentes:
+            ficha.fuentes.append(fuente)
+
+        for n in nombres:
+            ficha.alias.add(n)
+            self._por_nombre.setdefault(normalizar_proveedor_regla(n), ficha)
+        if cif:
+            ficha.cif = ficha.cif or cif
+            self._por_cif.setdefault(cif, ficha)
+        if iban:
+            ficha.iban = ficha.iban or iban
+            self._por_iban.setdefault(iban, ficha)
+        for clave, valor in datos.items():
+            if valor not in (None, '') and getattr(ficha, clave) in (None, ''):
+                setattr(ficha, clave, valor)
+        return ficha
+
+    # =========================================================================
+    # BÚSQUEDAS
+    # =========================================================================
+
+    def por_cif(self, cif: str) -> Optional[FichaProveedor]:
+        """Ficha por CIF (admite guiones y espacios)."""
+        return self._por_cif.get(limpiar_cif(cif)) if cif else None
+
+    def retencion(self, proveedor: str) -> Optional[float]:
+        """
+        Porcentaje de retención IRPF del proveedor (o None).
+
+        Misma búsqueda que RETENCIONES_PROVEEDOR: exacta y, si no, el primer
+        nombre contenido en el proveedor o que lo contiene.
+        """
+        return self.retenciones.buscar(proveedor.upper().strip())
+
+    def datos_contacto(self, nombre: str) -> Optional[Dict[str, str]]:
+        """{'cif', 'iban'} de PROVEEDORES_CONOCIDOS (exacto y luego parcial) o None."""
+        return self.datos_conocidos.buscar(nombre.upper())
+
+    def alias_relacionados(self, nombre: str) -> tuple:
+        """Alias de ALIAS_DICCIONARIO relacionados con el nombre, en orden de la tabla."""
+        return self.alias_diccionario.relacionadas(nombre)
+
+
+# =============================================================================
+# INSTANCIA COMPARTIDA
+# =============================================================================
+
+_REGISTRO: Optional[RegistroProveedores] = None
+
+
+def obtener_registro() -> RegistroProveedores:
+    """Registro de proveedores del proceso (se construye la primera vez)."""
+    global _REGISTRO
+    if _REGISTRO is None:
+        _REGISTRO = RegistroProveedores.construir()
+    return _REGISTRO
+
+
+def instalar_registro(registro: RegistroProveedores) -> None:
+    """
+    Usa un registro ya construido como el del proceso.
+
+    Inicializador de los workers del supervisor: reciben el registro del
+    proceso principal en lugar de volver a leer el Maestro.
+    """
+    global _REGISTRO
+    _REGISTRO = registro
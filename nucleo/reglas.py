@@ -0,0 +1,452 @@
+"""
+Motor de reglas de categorización sobre el diccionario compilado.
+
+scripts/compilar_diccionario.py genera un JSON con las reglas ya ordenadas
+(Proveedor, Prioridad, EXACT -> SUBSTR -> REGEX, patrón) y su SHA256. Este
+módulo lo carga una vez y lo evalúa sin recorrer todas las reglas por línea:
+
+- EXACT: diccionario artículo -> reglas.
+- SUBSTR: autómata Aho-Corasick con todos los patrones del proveedor; una
+  pasada por el artículo encuentra todos los patrones que contiene.
+- REGEX: una regex combinada por proveedor con las ramas en orden de
+  prioridad; la primera rama que casa es la regla de más prioridad.
+- Vigencia (ValidaDesde/ValidaHasta): las filas con fechas y el mismo tipo
+  y patrón son versiones de una regla, ordenadas por fecha de inicio (con
+  el mismo inicio, la primera del JSON); la versión vigente en la fecha de
+  la factura se busca con bisect (O(log n)); sin fecha, la vigente hoy
+  (nunca una caducada). Las filas sin fechas son reglas independientes,
+  aunque repitan tipo y patrón.
+
+Gana la primera regla vigente en el orden del JSON, igual que si se
+recorrieran una a una. VersionesPorFecha sirve también para el diccionario
+xlsx (main.cargar_diccionario) cuando trae columnas de vigencia.
+
+Los patrones EXACT/SUBSTR y el artículo se comparan normalizados
+(mayúsculas, sin acentos, espacios colapsados). Las REGEX se aplican al
+artículo con los espacios colapsados e IGNORECASE.
+
+Uso:
+    motor = MotorReglas.desde_json('datos/diccionario_compilado.json')
+    regla = motor.buscar('CERES', 'CERVEZA ALHAMBRA 1/3', fecha=date(2025, 3, 1))
+    if regla:
+        regla.categoria, regla.id_categoria, regla.tipo_match
+
+Creado: 19/10/2026
+"""
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+import hashlib
+import json
+import re
+import unicodedata
+
+from nucleo.indices import AutomataSubcadenas
+
+
+ORDEN_TIPO_MATCH = {'EXACT': 0, 'SUBSTR': 1, 'REGEX': 2}
+
+
+# =============================================================================
+# NORMALIZACIÓN (misma que scripts/compilar_diccionario.py)
+# =============================================================================
+
+def _sin_acentos(texto: str) -> str:
+    return ''.join(c for c in unicodedata.normalize('NFD', str(texto)) if unicodedata.category(c) != 'Mn')
+
+
+def normalizar_proveedor_regla(proveedor: str) -> str:
+    """Proveedor como lo guarda el compilador (mayúsculas, sin acentos ni signos)."""
+    texto = _sin_acentos(proveedor or '').upper()
+    texto = re.sub(r'[^A-Z0-9 ]+', ' ', texto)
+    return re.sub(r'\s+', ' ', texto).strip()
+
+
+def normalizar_articulo_regla(articulo: str) -> str:
+    """Artículo/patrón para EXACT y SUBSTR (mayúsculas, sin acentos, espacios colapsados)."""
+    return ' '.join(_sin_acentos(articulo or '').upper().split())
+
+
+def convertir_fecha(valor: Any) -> Optional[date]:
+    """Fecha de la factura o de ValidaDesde/ValidaHasta (date, 'DD/MM/YYYY', ISO...) o None."""
+    if valor is None or valor == '':
+        return None
+    if isinstance(valor, datetime):
+        return valor.date()
+    if isinstance(valor, date):
+        return valor
+    for formato in ('%Y-%m-%d', '%d/%m/%Y', '%d-%m-%Y', '%d-%m-%y'):
+        try:
+            return datetime.strptime(str(valor).split(' ')[0].split('T')[0], formato).date()
+        except ValueError:
+            pass
+    return None
+
+
+# =============================================================================
+# REGLA
+# =============================================================================
+
+@dataclass(frozen=True)
+class Regla:
+    """Una fila de REGLAS del diccionario compilado."""
+    proveedor: str
+    patron: str
+    categoria: str
+    tipo_match: str = 'SUBSTR'
+    prioridad: int = 10
+    id_categoria: str = ''
+    tipo_iva: Optional[int] = None
+    desde: Optional[date] = None
+    hasta: Optional[date] = None
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'Regla':
+        """Crea la regla desde un registro de 'rules' del JSON compilado."""
+        iva = data.get('TipoIVA')
+        try:
+            iva = int(float(iva)) if iva not in (None, '') else None
+        except (TypeError, ValueError):
+            iva = None
+        id_cat = data.get('IdCategoria', data.get('COD LOYVERSE', data.get('ID_CATEGORIA')))
+        if isinstance(id_cat, float):
+            id_cat = str(int(id_cat)) if id_cat.is_integer() else str(id_cat)
+        return cls(
+            proveedor=normalizar_proveedor_regla(data.get('Proveedor', '')),
+            patron=str(data.get('ArticuloPattern', '')).strip(),
+            categoria=str(data.get('Categoria', '')).strip(),
+            tipo_match=str(data.get('TipoMatch') or 'SUBSTR').upper().strip(),
+            prioridad=int(data.get('Prioridad') or 10),
+            id_categoria=str(id_cat).strip() if id_cat not in (None, '') else '',
+            tipo_iva=iva,
+            desde=convertir_fecha(data.get('ValidaDesde')),
+            hasta=convertir_fecha(data.get('ValidaHasta')),
+        )
+
+    def vigente_en(self, fecha: Optional[date]) -> bool:
+        if fecha is None:
+            fecha = date.today()
+        return (self.desde is None or self.desde <= fecha) and (self.hasta is None or fecha <= self.hasta)
+
+
+# =============================================================================
+# ÍNDICE DE VIGENCIA
+# =============================================================================
+
+class VersionesPorFecha:
+    """
+    Versiones de un mismo elemento (proveedor+artículo, o patrón de regla)
+    con su vigencia.
+
+    en(fecha) devuelve la versión más reciente (por fecha de inicio) que ya
+    ha empezado y no ha terminado; sin fecha, la vigente hoy o, si no hay
+    ninguna, la abierta más reciente (nunca una ya caducada). Sin desde
+    cuenta como vigente desde siempre; con el mismo inicio gana la última
+    añadida, igual que al sobrescribir (o la primera con gana_primera,
+    como en las reglas del JSON).
+
+    Las versiones cerradas (con hasta) y las abiertas se guardan en dos
+    listas ordenadas por inicio, y las cerradas con el máximo acumulado de
+    sus hasta. La abierta es un bisect; la cerrada, un bisect y una vuelta
+    atrás que se corta en cuanto ninguna anterior llega a la fecha (máximo
+    acumulado) o empieza antes que la abierta. Sin solapes entre cerradas
+    (una fila por periodo) la vuelta atrás mira una sola versión: O(log n).
+    Con solapes, además, las cerradas terminadas entre medias.
+    """
+
+    __slots__ = ('_inicios_cerradas', '_cerradas', '_max_hasta', '_inicios_abiertas', '_abiertas', '_n',
+                 '_gana_primera')
+
+    def __init__(self, gana_primera: bool = False):
+        self._gana_primera = gana_primera
+        self._inicios_cerradas: List[date] = []
+        self._cerradas: List[Tuple[date, int, Any]] = []   # (hasta, orden, valor)
+        self._max_hasta: List[date] = []                   # máximo de hasta en _cerradas[:k+1]
+        self._inicios_abiertas: List[date] = []
+        self._abiertas: List[Tuple[int, Any]] = []         # (orden, valor)
+        self._n = 0
+
+    def __len__(self) -> int:
+        return self._n
+
+    def agregar(self, valor: Any, desde: Optional[date] = None, hasta: Optional[date] = None) -> None:
+        inicio = desde or date.min
+        # Entre versiones con el mismo inicio, la que gana queda la última
+        insertar = bisect_left if self._gana_primera else bisect_right
+        if hasta is None:
+            k = insertar(self._inicios_abiertas, inicio)
+            self._inicios_abiertas.insert(k, inicio)
+            self._abiertas.insert(k, (self._n, valor))
+        else:
+            k = insertar(self._inicios_cerradas, inicio)
+            self._inicios_cerradas.insert(k, inicio)
+            self._cerradas.insert(k, (hasta, self._n, valor))
+            maximo = self._max_hasta[k - 1] if k else date.min
+            del self._max_hasta[k:]
+            for hasta_k, _, _ in self._cerradas[k:]:
+                maximo = max(maximo, hasta_k)
+                self._max_hasta.append(maximo)
+        self._n += 1
+
+    def en(self, fecha: Optional[date] = None) -> Any:
+        """
+        Versión vigente en la fecha.
+
+        Args:
+            fecha: Fecha de la factura (None = vigente hoy o, si no hay,
+                la abierta más reciente)
+
+        Returns:
+            Valor de la versión o None si ninguna está vigente
+        """
+        if fecha is None:
+            valor = self.en(date.today())
+            if valor is None and self._abiertas:
+                valor = self._abiertas[-1][1]
+            return valor
+
+        candidatos = []
+        k = bisect_right(self._inicios_abiertas, fecha) - 1
+        if k >= 0:
+            candidatos.append((self._inicios_abiertas[k], self._abiertas[k][0], self._abiertas[k][1]))
+        k = bisect_right(self._inicios_cerradas, fecha) - 1
+        while k >= 0 and self._max_hasta[k] >= fecha:
+            if candidatos and self._inicios_cerradas[k] < candidatos[0][0]:
+                break  # las anteriores empiezan antes que la abierta: no pueden ganar
+            hasta, orden, valor = self._cerradas[k]
+            if fecha <= hasta:
+                candidatos.append((self._inicios_cerradas[k], orden, valor))
+                break
+            k -= 1
+        if not candidatos:
+            return None
+        signo = -1 if self._gana_primera else 1
+        return max(candidatos, key=lambda c: (c[0], signo * c[1]))[2]
+
+
+# =============================================================================
+# REGLAS DE UN PROVEEDOR
+# =============================================================================
+
+def _con_flags_locales(fuente: str) -> str:
+    # "(?i)ABC" -> "(?i:ABC)": los flags globales no pueden ir en mitad de la combinada
+    m = re.match(r'^\(\?([aiLmsux]+)\)', fuente)
+    if m:
+        return f'(?{m.group(1)}:{fuente[m.end():]})'
+    return fuente
+
+
+class ReglasProveedor:
+    """
+    Reglas de un proveedor indexadas por tipo de match.
+
+    Las filas con ValidaDesde/ValidaHasta y el mismo tipo y patrón son
+    versiones de una misma regla (VersionesPorFecha); la regla ocupa el
+    puesto de su primera fila con fechas en el orden de prioridad y la fecha
+    de la factura elige la versión. Cada fila sin fechas es una regla
+    aparte, en su puesto.
+    """
+
+    def __init__(self, reglas: Sequence[Regla]):
+        # Los ids de grupo siguen el orden del JSON (= prioridad de evaluación)
+        self._grupos: List[VersionesPorFecha] = []
+        self._exactas: Dict[str, List[int]] = {}
+        subcadenas: List[str] = []
+        self._grupos_subcadena: List[int] = []  # posición en el autómata -> grupo
+        self._ids_regex: List[int] = []
+        self._regex: List[re.Pattern] = []
+        claves: Dict[Tuple[str, str], int] = {}
+        for regla in reglas:
+            tipo = regla.tipo_match if regla.tipo_match in ORDEN_TIPO_MATCH else 'SUBSTR'
+            patron = regla.patron if tipo == 'REGEX' else normalizar_articulo_regla(regla.patron)
+            if not patron:
+                continue
+            con_fechas = regla.desde is not None or regla.hasta is not None
+            g = claves.get((tipo, patron)) if con_fechas else None
+            if g is None:
+                if tipo == 'REGEX':
+                    try:
+                        compilada = re.compile(patron, re.IGNORECASE)
+                    except re.error:
+                        continue  # el validador ya avisa de las regex inválidas
+                g = len(self._grupos)
+                if con_fechas:
+                    claves[(tipo, patron)] = g
+                self._grupos.append(VersionesPorFecha(gana_primera=True))
+                if tipo == 'EXACT':
+                    self._exactas.setdefault(patron, []).append(g)
+                elif tipo == 'REGEX':
+                    self._ids_regex.append(g)
+                    self._regex.append(compilada)
+                else:
+                    subcadenas.append(patron)
+                    self._grupos_subcadena.append(g)
+            self._grupos[g].agregar(regla, regla.desde, regla.hasta)
+        self._automata = AutomataSubcadenas(subcadenas) if subcadenas else None
+        self._combinada = self._combinar()
+
+    def __len__(self) -> int:
+        return len(self._grupos)
+
+    def _combinar(self) -> Optional[re.Pattern]:
+        # Rama k: (?=.*?(?:patrón_k))(?P<r_k>) -- con match() en la posición 0 las ramas
+        # se prueban en orden, así que gana la primera regla cuyo patrón aparece
+        if len(self._regex) < 2:
+            return None
+        fuentes = [r.pattern for r in self._regex]
+        if any(re.search(r'\\\d|\(\?P[=<]', f) for f in fuentes):
+            return None  # grupos con nombre o referencias: se evalúan una a una
+        ramas = [f'(?=.*?(?:{_con_flags_locales(f)}))(?P<r{k}>)' for k, f in enumerate(fuentes)]
+        try:
+            return re.compile('|'.join(ramas), re.IGNORECASE | re.DOTALL)
+        except re.error:
+            return None
+
+    def _primera_regex(self, texto: str, limite: int, fecha: Optional[date]) -> Tuple[int, Optional[Regla]]:
+        inicio = 0
+        if self._combinada is not None:
+            m = self._combinada.match(texto)
+            if m is None:
+                return limite, None
+            inicio = int(m.lastgroup[1:])
+            g = self._ids_regex[inicio]
+            if g >= limite:
+                return limite, None
+            regla = self._grupos[g].en(fecha)
+            if regla is not None:
+                return g, regla
+            inicio += 1
+        for k in range(inicio, len(self._ids_regex)):
+            g = self._ids_regex[k]
+            if g >= limite:
+                break
+            if self._regex[k].search(texto):
+                regla = self._grupos[g].en(fecha)
+                if regla is not None:
+                    return g, regla
+        return limite, None
+
+    def buscar(self, articulo: str, fecha: Optional[date] = None) -> Optional[Regla]:
+        """
+        Primera regla (en orden de prioridad) que casa con el artículo y está vigente.
+
+        Args:
+            articulo: Descripción del artículo
+            fecha: Fecha de la factura (None = ver VersionesPorFecha.en)
+
+        Returns:
+            Regla o None
+        """
+        normalizado = normalizar_articulo_regla(articulo)
+        mejor, elegida = len(self._grupos), None
+        for g in self._exactas.get(normalizado, ()):
+            regla = self._grupos[g].en(fecha)
+            if regla is not None:
+                mejor, elegida = g, regla
+                break
+        if self._automata is not None:
+            for posicion in sorted(self._automata.buscar(normalizado)):
+                g = self._grupos_subcadena[posicion]
+                if g >= mejor:
+                    break
+                regla = self._grupos[g].en(fecha)
+                if regla is not None:
+                    mejor, elegida = g, regla
+                    break
+        if self._ids_regex and self._ids_regex[0] < mejor:
+            g, regla = self._primera_regex(' '.join((articulo or '').split()), mejor, fecha)
+            if regla is not None:
+                mejor, elegida = g, regla
+        return elegida
+
+
+# =============================================================================
+# MOTOR
+# =============================================================================
+
+def _sha_contenido(data: Dict[str, Any]) -> str:
+    # Mismo JSON canónico que scripts/compilar_diccionario.py (sin la clave sha256)
+    contenido = {k: v for k, v in data.items() if k != 'sha256'}
+    canonico = json.dumps(contenido, ensure_ascii=False, separators=(',', ':'), sort_keys=True)
+    return hashlib.sha256(canonico.encode('utf-8')).hexdigest()
+
+
+class MotorReglas:
+    """Reglas del diccionario compilado indexadas por proveedor."""
+
+    def __init__(self, reglas: Iterable[Regla], version: str = '', sha256: str = ''):
+        self.version = version
+        self.sha256 = sha256
+        por_proveedor: Dict[str, List[Regla]] = {}
+        for regla in reglas:
+            if regla.proveedor and regla.patron and regla.categoria:
+                por_proveedor.setdefault(regla.proveedor, []).append(regla)
+        for lista in por_proveedor.values():
+            # El JSON ya viene ordenado; se reordena (estable) por si se editó a mano
+            lista.sort(key=lambda r: (r.prioridad, ORDEN_TIPO_MATCH.get(r.tipo_match, 1)))
+        self._proveedores = {p: ReglasProveedor(lista) for p, lista in por_proveedor.items()}
+        self.total_reglas = sum(len(lista) for lista in por_proveedor.values())
+
+    @classmethod
+    def desde_json(cls, ruta: Path, verificar_sha: bool = True) -> 'MotorReglas':
+        """
+        Carga el JSON de scripts/compilar_diccionario.py.
+
+        Args:
+            ruta: Ruta del JSON compilado
+            verificar_sha: Comprobar que el contenido coincide con su sha256
+
+        Returns:
+            MotorReglas
+
+        Raises:
+            ValueError: Si el SHA no coincide (el JSON se editó tras compilarlo)
+        """
+        with open(ruta, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        sha = data.get('sha256', '')
+        if verificar_sha and sha and _sha_contenido(data) != sha:
+            raise ValueError(f'{ruta}: el contenido no coincide con su sha256 (recompilar el diccionario)')
+        reglas = [Regla.from_dict(r) for r in data.get('rules') or []]
+        return cls(reglas, version=str(data.get('version', '')), sha256=sha)
+
+    def __len__(self) -> int:
+        return len(self._proveedores)
+
+    def __contains__(self, proveedor: str) -> bool:
+        return normalizar_proveedor_regla(proveedor) in self._proveedores
+
+    def buscar(self, proveedor: str, articulo: str, fecha: Optional[date] = None) -> Optional[Regla]:
+        """
+        Regla que categoriza un artículo de un proveedor.
+
+        Args:
+            proveedor: Nombre del proveedor (se normaliza)
+            articulo: Descripción del artículo
+            fecha: Fecha de la factura (None = ver VersionesPorFecha.en)
+
+        Returns:
+            Regla o None si el proveedor no tiene reglas o ninguna casa
+        """
+        reglas = self._proveedores.get(normalizar_proveedor_regla(proveedor))
+        if reglas is None:
+            return None
+        return reglas.buscar(articulo, fecha)
+
+
+class IndiceCategorias(dict):
+    """
+    Índice del diccionario xlsx ({proveedor: {artículo: datos}}) con el motor
+    de reglas compiladas opcional en `motor` y las categorías aprendidas de
+    Excel revisados (nucleo.aprendidos) en `aprendidos`.
+
+    Viaja como el índice normal (también a los workers del supervisor).
+    """
+
+    def __init__(self, indice: Optional[Dict[str, Any]] = None, motor: Optional[MotorReglas] = None,
+                 aprendidos=None):
+        super().__init__(indice or {})
+        self.motor = motor
+        self.aprendidos = aprendidos
@@ -0,0 +1,324 @@
+"""
+Procesado por shards (trozos) con fusión determinista.
+
+Para reprocesar un año completo (varias carpetas de trimestre) el lote
+se reparte en shards que se procesan de forma independiente, incluso en
+máquinas distintas que comparten la carpeta de trabajo:
+
+    1. Plan:     main.py --plan-shards 8 --carpetas "1 TRI" "2 TRI" ... --dir-shards trabajo/
+    2. Procesar: main.py --procesar-shard auto --dir-shards trabajo/   (en cada máquina)
+    3. Fusionar: main.py --fusionar-shards --dir-shards trabajo/
+
+Carpeta de trabajo:
+    plan.json             archivos con su posición global y su carpeta
+    shard_003.lock        shard reclamado por un proceso (O_EXCL): máquina,
+                          pid y fecha; se renueva con cada factura terminada
+    shard_003.jsonl       resultados del shard (registro_factura por línea);
+                          se escribe como .tmp y se renombra al terminar
+
+La posición global de cada archivo (orden de carpetas del plan y nombre
+de archivo) fija el orden en la fusión: el resultado no depende de qué
+shard terminó antes ni de cuántos shards hubo.
+
+Bloqueos abandonados: si un proceso muere sin borrar su .lock (corte de
+luz, kill -9), el shard se puede volver a reclamar cuando
+- el .lock es de esta máquina y su pid ya no existe, o
+- lleva más de SHARD_BLOQUEO_CADUCIDAD_SEGUNDOS sin renovarse.
+--procesar-shard lo retoma solo; para no esperar a la caducidad (.lock de
+otra máquina que ya no está procesando): main.py --liberar-shard K
+--dir-shards trabajo/ y volver a procesarlo. --fusionar-shards indica qué
+shards siguen bloqueados y por quién.
+
+Creado: 19/10/2026
+"""
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+from datetime import datetime
+import json
+import os
+import socket
+import time
+
+try:
+    from config.settings import SHARD_BLOQUEO_CADUCIDAD_SEGUNDOS
+except ImportError:
+    SHARD_BLOQUEO_CADUCIDAD_SEGUNDOS = 1800
+
+try:
+    import psutil
+    PSUTIL_DISPONIBLE = True
+except ImportError:
+    PSUTIL_DISPONIBLE = False
+
+VERSION_PLAN = 1
+NOMBRE_PLAN = 'plan.json'
+
+
+# =============================================================================
+# PLAN
+# =============================================================================
+
+def crear_plan(carpetas: Sequence[Tuple[Path, str]], num_shards: int,
+               directorio: Path) -> Dict:
+    """
+    Crea el plan de shards y lo guarda en directorio/plan.json.
+
+    Los archivos se reparten por turnos (posición % num_shards) para que
+    cada shard tenga facturas de todas las carpetas y tamaños parecidos.
+
+    Args:
+        carpetas: [(carpeta, trimestre)] en el orden en que se fusionarán
+        num_shards: Número de shards
+        directorio: Carpeta de trabajo compartida
+
+    Returns:
+        Plan (diccionario guardado en plan.json)
+
+    Raises:
+        FileExistsError: Si ya hay un plan en el directorio
+    """
+    directorio = Path(directorio)
+    ruta_plan = directorio / NOMBRE_PLAN
+    if ruta_plan.exists():
+        raise FileExistsError(f"Ya existe un plan en {ruta_plan}")
+
+    num_shards = max(1, int(num_shards))
+    archivos = []
+    for indice_carpeta, (carpeta, _) in enumerate(carpetas):
+        for ruta in sorted(Path(carpeta).glob('*.pdf')):
+            posicion = len(archivos)
+            archivos.append({
+                'posicion': posicion,
+                'carpeta': indice_carpeta,
+                'ruta': str(ruta.resolve()),
+                'shard': posicion % num_shards,
+            })
+
+    plan = {
+        'version': VERSION_PLAN,
+        'creado': datetime.now().isoformat(timespec='seconds'),
+        'num_shards': num_shards,
+        'carpetas': [
+            {'ruta': str(Path(carpeta).resolve()), 'trimestre': trimestre}
+            for carpeta, trimestre in carpetas
+        ],
+        'archivos': archivos,
+    }
+    directorio.mkdir(parents=True, exist_ok=True)
+    temporal = ruta_plan.with_suffix('.tmp')
+    with open(temporal, 'w', encoding='utf-8') as f:
+        json.dump(plan, f, ensure_ascii=False, indent=1)
+    temporal.replace(ruta_plan)
+    return plan
+
+
+def cargar_plan(directorio: Path) -> Dict:
+    """
+    Carga directorio/plan.json.
+
+    Raises:
+        FileNotFoundError: Si no hay plan
+        ValueError: Si la versión del plan no es compatible
+    """
+    ruta_plan = Path(directorio) / NOMBRE_PLAN
+    with open(ruta_plan, 'r', encoding='utf-8') as f:
+        plan = json.load(f)
+    if plan.get('version') != VERSION_PLAN:
+        raise ValueError(f"Versión de plan no soportada: {plan.get('version')}")
+    return plan
+
+
+def archivos_del_shard(plan: Dict, shard: int) -> List[Tuple[int, Path]]:
+    """[(posición global, ruta)] de un shard, en orden de posición."""
+    return [
+        (a['posicion'], Path(a['ruta']))
+        for a in plan['archivos'] if a['shard'] == shard
+    ]
+
+
+# =============================================================================
+# ESTADO DE LOS SHARDS
+# =============================================================================
+
+def ruta_resultado(directorio: Path, shard: int) -> Path:
+    return Path(directorio) / f'shard_{shard:03d}.jsonl'
+
+
+def ruta_bloqueo(directorio: Path, shard: int) -> Path:
+    return Path(directorio) / f'shard_{shard:03d}.lock'
+
+
+def shard_terminado(directorio: Path, shard: int) -> bool:
+    return ruta_resultado(directorio, shard).exists()
+
+
+def leer_bloqueo(directorio: Path, shard: int) -> Optional[str]:
+    """Contenido del .lock ('máquina pid=N fecha') o None si no está reclamado."""
+    try:
+        with open(ruta_bloqueo(directorio, shard), 'r', encoding='utf-8') as f:
+            return f.read().strip()
+    except FileNotFoundError:
+        return None
+
+
+def _proceso_vivo(pid: int) -> Optional[bool]:
+    """True/False si se puede saber si el proceso existe; None si no."""
+    if PSUTIL_DISPONIBLE:
+        return psutil.pid_exists(pid)
+    if os.name != 'posix':
+        return None  # os.kill(pid, 0) en Windows terminaría el proceso
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def bloqueo_abandonado(directorio: Path, shard: int,
+                       caducidad: float = SHARD_BLOQUEO_CADUCIDAD_SEGUNDOS) -> bool:
+    """
+    Indica si el .lock del shard es de un proceso que ya no lo procesa.
+
+    Es abandonado si es de esta máquina y su pid no existe, o si no se ha
+    renovado en `caducidad` segundos.
+
+    Args:
+        directorio: Carpeta de trabajo
+        shard: Índice del shard
+        caducidad: Segundos sin renovar (0 = solo la comprobación del pid)
+
+    Returns:
+        True si el shard se puede volver a reclamar
+    """
+    ruta = ruta_bloqueo(directorio, shard)
+    try:
+        antiguedad = time.time() - ruta.stat().st_mtime
+        contenido = leer_bloqueo(directorio, shard) or ''
+    except FileNotFoundError:
+        return False
+    partes = contenido.split()
+    if len(partes) >= 2 and partes[0] == socket.gethostname() and partes[1].startswith('pid='):
+        try:
+            vivo = _proceso_vivo(int(partes[1][4:]))
+        except ValueError:
+            vivo = None
+        if vivo is False:
+            return True
+    return bool(caducidad) and antiguedad > caducidad
+
+
+def reclamar_shard(directorio: Path, shard: int) -> bool:
+    """
+    Reclama un shard creando su .lock de forma atómica.
+
+    Un .lock abandonado (ver bloqueo_abandonado) se retira antes de
+    reclamarlo: se renombra, así que de dos procesos que lo vean a la vez
+    solo uno lo retira.
+
+    Returns:
+        True si este proceso lo ha reclamado; False si ya estaba
+        reclamado o terminado
+    """
+    if shard_terminado(directorio, shard):
+        return False
+    ruta = ruta_bloqueo(directorio, shard)
+    if ruta.exists() and bloqueo_abandonado(directorio, shard):
+        retirado = ruta.with_name(f'{ruta.name}.abandonado.{socket.gethostname()}.{os.getpid()}')
+        try:
+            ruta.rename(retirado)
+            retirado.unlink()
+        except OSError:
+            return False  # Otro proceso lo retiró antes
+    try:
+        descriptor = os.open(ruta, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+    except FileExistsError:
+        return False
+    with os.fdopen(descriptor, 'w', encoding='utf-8') as f:
+        f.write(f"{socket.gethostname()} pid={os.getpid()} "
+                f"{datetime.now().isoformat(timespec='seconds')}\n")
+    return True
+
+
+def renovar_bloqueo(directorio: Path, shard: int) -> None:
+    """Actualiza la fecha del .lock para que no se dé por abandonado."""
+    try:
+        os.utime(ruta_bloqueo(directorio, shard))
+    except OSError:
+        pass
+
+
+def liberar_shard(directorio: Path, shard: int) -> None:
+    """Borra el .lock de un shard (al terminar o para reintentarlo)."""
+    try:
+        ruta_bloqueo(directorio, shard).unlink()
+    except FileNotFoundError:
+        pass
+
+
+def shards_pendientes(plan: Dict, directorio: Path) -> List[int]:
+    """Shards sin resultado (reclamados o no)."""
+    return [k for k in range(plan['num_shards']) if not shard_terminado(directorio, k)]
+
+
+def siguientes_shards(plan: Dict, directorio: Path) -> Iterator[int]:
+    """Reclama y devuelve shards libres hasta que no quede ninguno."""
+    for shard in range(plan['num_shards']):
+        if reclamar_shard(directorio, shard):
+            yield shard
+
+
+# =============================================================================
+# RESULTADOS
+# =============================================================================
+
+def leer_resultados(plan: Dict, directorio: Path) -> List[Dict]:
+    """
+    Lee los resultados de todos los shards, ordenados por posición global.
+
+    Args:
+        plan: Plan cargado
+        directorio: Carpeta de trabajo
+
+    Returns:
+        Registros (registro_factura) en el orden del plan
+
+    Raises:
+        ValueError: Si faltan shards o posiciones, o hay duplicadas
+    """
+    pendientes = shards_pendientes(plan, directorio)
+    if pendientes:
+        detalle = []
+        for k in pendientes:
+            bloqueo = leer_bloqueo(directorio, k)
+            if bloqueo is None:
+                detalle.append(str(k))
+            elif bloqueo_abandonado(directorio, k):
+                detalle.append(f"{k} (bloqueo abandonado de {bloqueo}: --procesar-shard {k})")
+            else:
+                detalle.append(f"{k} (en curso: {bloqueo}; si ya no lo está, --liberar-shard {k})")
+        raise ValueError(f"Shards sin terminar: {', '.join(detalle)}")
+
+    registros: Dict[int, Dict] = {}
+    for shard in range(plan['num_shards']):
+        with open(ruta_resultado(directorio, shard), 'r', encoding='utf-8') as f:
+            for linea in f:
+                if not linea.strip():
+                    continue
+                registro = json.loads(linea)
+                posicion = registro['posicion']
+                if posicion in registros:
+                    raise ValueError(f"Posición {posicion} duplicada (shard {shard})")
+                registros[posicion] = registro
+
+    esperadas = {a['posicion'] for a in plan['archivos']}
+    faltan = esperadas - set(registros)
+    if faltan:
+        raise ValueError(f"Faltan {len(faltan)} facturas en los resultados (ej: posición {min(faltan)})")
+    return [registros[posicion] for posicion in sorted(esperadas)]
+
+
+def carpeta_de_posicion(plan: Dict) -> Dict[int, int]:
+    """{posición global: índice de carpeta en plan['carpetas']}"""
+    return {a['posicion']: a['carpeta'] for a in plan['archivos']}
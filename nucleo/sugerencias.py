@@ -0,0 +1,324 @@
+"""
+Sugerencias de categoría para las líneas que quedan sin categorizar.
+
+Las líneas que categorizar_linea deja en PENDIENTE / SIN_CATEGORIA se
+categorizan a mano buscando en el diccionario. Este módulo vectoriza todos
+los artículos del diccionario con TF-IDF de n-gramas de caracteres y, para
+todas las líneas pendientes a la vez, calcula la similitud coseno con una
+sola multiplicación de matrices dispersas; devuelve las k categorías más
+parecidas con su puntuación y el artículo del diccionario que las aporta.
+
+- Con scipy: matrices CSR (consultas @ artículos.T).
+- Sin scipy: la misma multiplicación con NumPy sobre un índice invertido
+  (n-grama -> artículos con su peso) acumulando con np.add.at.
+
+Los artículos del mismo proveedor que la línea puntúan un poco más al
+ordenar (BONUS_PROVEEDOR); la puntuación mostrada es la similitud coseno.
+
+El índice se construye una vez por diccionario y se guarda en disco
+(SUGERENCIAS_CACHE_RUTA), invalidado por la fecha y el tamaño del xlsx.
+
+Uso:
+    indice = cargar_indice_sugerencias(ruta_diccionario, indice_diccionario)
+    df = sugerencias_pendientes(facturas, indice, k=3)   # hoja "Sugerencias"
+
+Creado: 19/10/2026
+"""
+from collections import Counter
+from datetime import date
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+import pickle
+import re
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+try:
+    from scipy import sparse
+    SCIPY_DISPONIBLE = True
+except ImportError:
+    SCIPY_DISPONIBLE = False
+
+
+VERSION_SUGERENCIAS = 1          # Subir al cambiar la vectorización (invalida la caché)
+N_GRAMAS = (2, 3, 4)
+BONUS_PROVEEDOR = 0.1
+CATEGORIAS_PENDIENTES = ('PENDIENTE', 'SIN_CATEGORIA', '')
+
+_RE_NO_ALFANUM = re.compile(r'[^A-Z0-9 ]+')
+_RE_DIGITOS = re.compile(r'\d+')
+
+
+def normalizar_articulo(texto: str) -> str:
+    """Mayúsculas, sin acentos ni signos, números como '#' y espacios colapsados."""
+    texto = ''.join(c for c in unicodedata.normalize('NFD', str(texto or ''))
+                    if unicodedata.category(c) != 'Mn').upper()
+    texto = _RE_DIGITOS.sub('#', _RE_NO_ALFANUM.sub(' ', texto))
+    return ' '.join(texto.split())
+
+
+def ngramas(texto: str) -> Counter:
+    """N-gramas de caracteres del artículo normalizado (con un espacio a cada lado)."""
+    t = f' {normalizar_articulo(texto)} '
+    return Counter(t[i:i + n] for n in N_GRAMAS for i in range(len(t) - n + 1))
+
+
+# =============================================================================
+# ÍNDICE TF-IDF
+# =============================================================================
+
+class IndiceSugerencias:
+    """
+    Artículos del diccionario como matriz TF-IDF normalizada (L2).
+
+    Se guarda en formato CSR (indptr/indices/datos) y en CSC (por n-grama)
+    como arrays de NumPy, así que se puede serializar sin scipy.
+    """
+
+    def __init__(self, articulos: Sequence[str], categorias: Sequence[str],
+                 proveedores: Sequence[str]):
+        self.articulos = list(articulos)
+        self.categorias = list(categorias)
+        self.proveedores = list(proveedores)
+        codigos: Dict[str, int] = {}
+        self._proveedor_doc = np.array([codigos.setdefault(p, len(codigos)) for p in self.proveedores],
+                                       dtype=np.int32)
+        self._codigos_proveedor = codigos
+
+        self.vocabulario: Dict[str, int] = {}
+        indptr, indices, tf = [0], [], []
+        for articulo in self.articulos:
+            for gram, n in ngramas(articulo).items():
+                indices.append(self.vocabulario.setdefault(gram, len(self.vocabulario)))
+                tf.append(n)
+            indptr.append(len(indices))
+        self._indptr = np.array(indptr, dtype=np.int64)
+        self._indices = np.array(indices, dtype=np.int32)
+        n_docs = len(self.articulos)
+        df = np.bincount(self._indices, minlength=len(self.vocabulario))
+        self.idf = (np.log((1 + n_docs) / (1 + df)) + 1.0).astype(np.float32)
+        self._datos = self._normalizar_filas(np.array(tf, dtype=np.float32) * self.idf[self._indices],
+                                             self._indptr)
+
+        # Índice invertido (CSC) para la multiplicación sin scipy
+        orden = np.argsort(self._indices, kind='stable')
+        self._col_ptr = np.concatenate(([0], np.cumsum(np.bincount(self._indices, minlength=len(self.vocabulario)))))
+        self._col_docs = np.repeat(np.arange(n_docs, dtype=np.int32), np.diff(self._indptr))[orden]
+        self._col_pesos = self._datos[orden]
+
+    def __len__(self) -> int:
+        return len(self.articulos)
+
+    @staticmethod
+    def _normalizar_filas(pesos: np.ndarray, indptr: np.ndarray) -> np.ndarray:
+        filas = np.repeat(np.arange(len(indptr) - 1), np.diff(indptr))
+        normas = np.sqrt(np.bincount(filas, weights=pesos.astype(np.float64) ** 2, minlength=len(indptr) - 1))
+        normas[normas == 0] = 1.0
+        return (pesos / normas[filas]).astype(np.float32)
+
+    def _vectorizar(self, textos: Sequence[str]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Consultas en CSR; los n-gramas que no están en el diccionario se ignoran."""
+        indptr, indices, tf = [0], [], []
+        vocabulario = self.vocabulario
+        for texto in textos:
+            for gram, n in ngramas(texto).items():
+                col = vocabulario.get(gram)
+                if col is not None:
+                    indices.append(col)
+                    tf.append(n)
+            indptr.append(len(indices))
+        indptr = np.array(indptr, dtype=np.int64)
+        indices = np.array(indices, dtype=np.int32)
+        datos = self._normalizar_filas(np.array(tf, dtype=np.float32) * self.idf[indices], indptr)
+        return indptr, indices, datos
+
+    def similitudes(self, textos: Sequence[str]) -> np.ndarray:
+        """
+        Similitud coseno de cada texto con cada artículo del diccionario.
+
+        Args:
+            textos: Artículos a comparar
+
+        Returns:
+            Matriz (len(textos) x len(self)) de float32
+        """
+        indptr, indices, datos = self._vectorizar(textos)
+        m, n_docs = len(textos), len(self.articulos)
+        if SCIPY_DISPONIBLE:
+            forma = (len(self.vocabulario),)
+            consultas = sparse.csr_matrix((datos, indices, indptr), shape=(m,) + forma)
+            documentos = sparse.csr_matrix((self._datos, self._indices, self._indptr), shape=(n_docs,) + forma)
+            return (consultas @ documentos.T).toarray().astype(np.float32)
+        # Producto disperso con NumPy: cada n-grama de la consulta suma su peso
+        # por el de todos los artículos que lo contienen
+        resultado = np.zeros((m, n_docs), dtype=np.float32)
+        filas = np.repeat(np.arange(m), np.diff(indptr))
+        cuantos = self._col_ptr[indices + 1] - self._col_ptr[indices]
+        total = int(cuantos.sum())
+        if total:
+            inicio_bloque = np.repeat(np.cumsum(cuantos) - cuantos, cuantos)
+            posiciones = np.repeat(self._col_ptr[indices], cuantos) + (np.arange(total) - inicio_bloque)
+            np.add.at(resultado,
+                      (np.repeat(filas, cuantos), self._col_docs[posiciones]),
+                      np.repeat(datos, cuantos) * self._col_pesos[posiciones])
+        return resultado
+
+    def sugerir(self, textos: Sequence[str], k: int = 3,
+                proveedores: Optional[Sequence[str]] = None) -> List[List[Tuple[str, float, str]]]:
+        """
+        Las k categorías más parecidas para cada texto (en una sola operación matricial).
+
+        Args:
+            textos: Artículos pendientes
+            k: Categorías distintas por texto
+            proveedores: Proveedor de cada texto (los artículos del mismo proveedor
+                suben BONUS_PROVEEDOR al ordenar)
+
+        Returns:
+            Por texto, lista de (categoría, similitud, artículo del diccionario)
+        """
+        if not textos or not self.articulos:
+            return [[] for _ in textos]
+        similitud = self.similitudes(textos)
+        orden = similitud
+        if proveedores is not None:
+            codigos = np.array([self._codigos_proveedor.get(p, -1) for p in proveedores], dtype=np.int32)
+            orden = similitud + BONUS_PROVEEDOR * (self._proveedor_doc[None, :] == codigos[:, None])
+        # Candidatos: los mejores artículos (varios por categoría posible)
+        candidatos = min(len(self.articulos), max(k * 10, 20))
+        mejores = np.argpartition(-orden, candidatos - 1, axis=1)[:, :candidatos]
+        resultado = []
+        for i, fila in enumerate(mejores):
+            fila = fila[np.argsort(-orden[i, fila], kind='stable')]
+            vistas, sugerencias = set(), []
+            for doc in fila:
+                if similitud[i, doc] <= 0:
+                    break
+                categoria = self.categorias[doc]
+                if categoria in vistas:
+                    continue
+                vistas.add(categoria)
+                sugerencias.append((categoria, round(float(similitud[i, doc]), 3), self.articulos[doc]))
+                if len(sugerencias) == k:
+                    break
+            resultado.append(sugerencias)
+        return resultado
+
+
+# =============================================================================
+# CARGA CON CACHÉ
+# =============================================================================
+
+_MEMO: Dict[tuple, IndiceSugerencias] = {}
+
+
+def construir_indice_sugerencias(indice: dict) -> Optional[IndiceSugerencias]:
+    """
+    Índice de sugerencias desde el índice del diccionario ({proveedor: {artículo: datos}}).
+
+    Returns:
+        IndiceSugerencias o None si el diccionario no tiene artículos categorizados
+    """
+    articulos, categorias, proveedores = [], [], []
+    for proveedor, articulos_prov in indice.items():
+        for articulo, datos in articulos_prov.items():
+            categoria = str(datos.get('categoria', '') or '').strip()
+            if categoria and categoria.lower() != 'nan':
+                articulos.append(articulo)
+                categorias.append(categoria)
+                proveedores.append(proveedor)
+    return IndiceSugerencias(articulos, categorias, proveedores) if articulos else None
+
+
+def cargar_indice_sugerencias(ruta_diccionario: Path, indice: dict,
+                              ruta_cache: Optional[Path] = None) -> Optional[IndiceSugerencias]:
+    """
+    Índice de sugerencias del diccionario, de la caché si el xlsx no ha cambiado ese día.
+
+    Args:
+        ruta_diccionario: Ruta del diccionario xlsx (clave de la caché)
+        indice: Índice ya cargado del diccionario (para construirlo si hace falta)
+        ruta_cache: Archivo de caché (None = sin caché en disco)
+
+    Returns:
+        IndiceSugerencias o None si el diccionario está vacío
+    """
+    try:
+        estado = Path(ruta_diccionario).stat()
+        # Con la fecha: los artículos con vigencia entran con su versión de hoy
+        clave = (str(Path(ruta_diccionario).resolve()), estado.st_mtime_ns, estado.st_size,
+                 date.today().isoformat(), VERSION_SUGERENCIAS)
+    except OSError:
+        clave = None
+    if clave is not None and clave in _MEMO:
+        return _MEMO[clave]
+
+    indice_sugerencias = None
+    if clave is not None and ruta_cache is not None and Path(ruta_cache).exists():
+        try:
+            with open(ruta_cache, 'rb') as f:
+                guardado = pickle.load(f)
+            if guardado.get('clave') == clave:
+                indice_sugerencias = guardado['indice']
+        except Exception:
+            indice_sugerencias = None  # Caché corrupta o de otra versión: se reconstruye
+
+    if indice_sugerencias is None:
+        indice_sugerencias = construir_indice_sugerencias(indice)
+        if indice_sugerencias is not None and clave is not None and ruta_cache is not None:
+            try:
+                Path(ruta_cache).parent.mkdir(parents=True, exist_ok=True)
+                with open(ruta_cache, 'wb') as f:
+                    pickle.dump({'clave': clave, 'indice': indice_sugerencias}, f, protocol=pickle.HIGHEST_PROTOCOL)
+            except OSError:
+                pass
+    if clave is not None and indice_sugerencias is not None:
+        _MEMO[clave] = indice_sugerencias
+    return indice_sugerencias
+
+
+# =============================================================================
+# HOJA "SUGERENCIAS"
+# =============================================================================
+
+def sugerencias_pendientes(facturas: list, indice_sugerencias: IndiceSugerencias,
+                           k: int = 3) -> pd.DataFrame:
+    """
+    Tabla de sugerencias para todas las líneas PENDIENTE / SIN_CATEGORIA.
+
+    Args:
+        facturas: Facturas procesadas
+        indice_sugerencias: Índice TF-IDF del diccionario
+        k: Sugerencias por línea
+
+    Returns:
+        DataFrame con '#', PROVEEDOR, ARTICULO, CATEGORIA, SUGERENCIA_i,
+        SCORE_i, SIMILAR_i (i = 1..k) y ARCHIVO
+    """
+    pendientes = [(f, linea) for f in facturas for linea in f.lineas
+                  if (linea.categoria or '') in CATEGORIAS_PENDIENTES and (linea.articulo or '').strip()]
+    columnas = ['#', 'PROVEEDOR', 'ARTICULO', 'CATEGORIA']
+    for i in range(1, k + 1):
+        columnas += [f'SUGERENCIA_{i}', f'SCORE_{i}', f'SIMILAR_{i}']
+    columnas.append('ARCHIVO')
+    if not pendientes:
+        return pd.DataFrame(columns=columnas)
+
+    sugerencias = indice_sugerencias.sugerir(
+        [linea.articulo for _, linea in pendientes], k=k,
+        proveedores=[f.proveedor.upper().strip() for f, _ in pendientes],
+    )
+    filas = []
+    for (f, linea), candidatas in zip(pendientes, sugerencias):
+        fila = {'#': f.numero, 'PROVEEDOR': f.proveedor, 'ARTICULO': linea.articulo,
+                'CATEGORIA': linea.categoria or 'PENDIENTE'}
+        for i in range(1, k + 1):
+            categoria, score, similar = candidatas[i - 1] if i <= len(candidatas) else ('', '', '')
+            fila[f'SUGERENCIA_{i}'] = categoria
+            fila[f'SCORE_{i}'] = score
+            fila[f'SIMILAR_{i}'] = similar
+        fila['ARCHIVO'] = f.archivo
+        filas.append(fila)
+    return pd.DataFrame(filas, columns=columnas)
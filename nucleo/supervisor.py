@@ -0,0 +1,377 @@
+"""
+Supervisor de procesos para procesar facturas con límites de tiempo y memoria.
+
+Un PDF malformado o una regex con backtracking catastrófico en un
+extractor pueden bloquear el bucle secuencial de main.py: el try/except
+solo captura excepciones, no cuelgues. Aquí cada factura se procesa en
+un proceso worker persistente (el diccionario se envía una sola vez al
+arrancarlo) que informa de la etapa en curso. El supervisor:
+
+- mata el worker si la factura supera LIMITE_TIEMPO_FACTURA o si una
+  etapa supera su límite en LIMITES_ETAPA,
+- vigila la memoria residente del worker desde el supervisor (con
+  psutil) y, si se configura, limita su memoria virtual (RLIMIT_AS en
+  POSIX; desactivado por defecto),
+- registra la factura como 'TIMEOUT: ...', 'MEMORIA: ...' o
+  'EXCEPCION: ...' en sus errores y en cuadre,
+- guarda en factura.tiempos lo que llevaban las subetapas ('pdf:ocr')
+  hasta el corte, para que el método que se colgó cuente como intento,
+- arranca un worker nuevo y sigue con el lote.
+
+Uso:
+    from nucleo.supervisor import SupervisorFacturas
+
+    with SupervisorFacturas(procesar_factura, args=(indice,), workers=2) as sup:
+        for posicion, ruta, factura in sup.procesar(archivos):
+            ...
+
+    # Preparar cada worker antes de su primera factura (como Pool(initializer))
+    SupervisorFacturas(procesar_factura, args=(indice,),
+                       inicializador=instalar_registro, args_inicializador=(registro,))
+
+La función a ejecutar debe ser importable (nivel de módulo) y aceptar
+el argumento con nombre notificar_etapa. Una etapa 'pdf:ocr' es una
+subetapa de 'pdf': el límite y el tiempo de etapa siguen siendo los de 'pdf'.
+
+Creado: 19/10/2026
+"""
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+import multiprocessing
+from multiprocessing.connection import wait
+import time
+
+from .factura import Factura
+from .parser import parsear_nombre_archivo
+
+try:
+    from config.settings import (
+        LIMITE_TIEMPO_FACTURA, LIMITES_ETAPA, LIMITE_MEMORIA_MB,
+        LIMITE_MEMORIA_VIRTUAL_MB, WORKERS_FACTURAS,
+    )
+except ImportError:
+    LIMITE_TIEMPO_FACTURA = 120
+    LIMITES_ETAPA = {}
+    LIMITE_MEMORIA_MB = 0
+    LIMITE_MEMORIA_VIRTUAL_MB = 0
+    WORKERS_FACTURAS = 1
+
+try:
+    import resource
+    RESOURCE_DISPONIBLE = True
+except ImportError:  # Windows
+    RESOURCE_DISPONIBLE = False
+
+try:
+    import psutil
+    PSUTIL_DISPONIBLE = True
+except ImportError:
+    PSUTIL_DISPONIBLE = False
+
+
+# Intervalo de sondeo del supervisor (segundos)
+INTERVALO_SONDEO = 0.2
+
+
+# =============================================================================
+# LADO WORKER
+# =============================================================================
+
+def _aplicar_limite_memoria(limite_mb: int) -> None:
+    """Limita la memoria virtual del proceso actual (RLIMIT_AS, solo POSIX)."""
+    if not limite_mb or not RESOURCE_DISPONIBLE:
+        return
+    limite = int(limite_mb) * 1024 * 1024
+    try:
+        _, maximo = resource.getrlimit(resource.RLIMIT_AS)
+        if maximo != resource.RLIM_INFINITY:
+            limite = min(limite, maximo)
+        resource.setrlimit(resource.RLIMIT_AS, (limite, maximo))
+    except (ValueError, OSError):
+        pass
+
+
+def _bucle_worker(conn, funcion: Callable, args: tuple, limite_virtual_mb: int,
+                  inicializador: Optional[Callable] = None, args_inicializador: tuple = ()) -> None:
+    """
+    Bucle del proceso worker: recibe rutas, devuelve facturas.
+
+    El inicializador (si lo hay) se ejecuta una vez al arrancar, antes de
+    la primera factura.
+
+    Mensajes enviados al supervisor:
+        ('etapa', nombre)      al empezar cada etapa
+        ('ok', factura)        al terminar
+        ('error', mensaje)     si la función lanza una excepción
+    """
+    _aplicar_limite_memoria(limite_virtual_mb)
+    if inicializador is not None:
+        inicializador(*args_inicializador)
+
+    def notificar_etapa(etapa: str) -> None:
+        conn.send(('etapa', etapa))
+
+    while True:
+        try:
+            ruta = conn.recv()
+        except (EOFError, KeyboardInterrupt):
+            break
+        if ruta is None:
+            break
+        try:
+            factura = funcion(ruta, *args, notificar_etapa=notificar_etapa)
+            conn.send(('ok', factura))
+        except MemoryError:
+            conn.send(('error', 'MEMORIA: MemoryError en el worker'))
+        except KeyboardInterrupt:
+            break
+        except Exception as e:
+            conn.send(('error', f'EXCEPCION: {str(e)[:50]}'))
+
+
+# =============================================================================
+# LADO SUPERVISOR
+# =============================================================================
+
+class _Worker:
+    """Proceso worker con su tubería y el trabajo en curso."""
+
+    def __init__(self, contexto, funcion: Callable, args: tuple, limite_virtual_mb: int,
+                 inicializador: Optional[Callable] = None, args_inicializador: tuple = ()):
+        self.conn, conn_hijo = contexto.Pipe()
+        self.proceso = contexto.Process(
+            target=_bucle_worker,
+            args=(conn_hijo, funcion, args, limite_virtual_mb, inicializador, args_inicializador),
+            daemon=True,
+        )
+        self.proceso.start()
+        conn_hijo.close()
+        self.posicion: Optional[int] = None
+        self.ruta: Optional[Path] = None
+        self.inicio = 0.0
+        self.etapa = ''
+        self.inicio_etapa = 0.0
+        self.inicio_subetapa = 0.0
+        self.tiempos: Dict[str, float] = {}
+
+    @property
+    def ocupado(self) -> bool:
+        return self.ruta is not None
+
+    def enviar(self, posicion: int, ruta: Path) -> None:
+        self.posicion, self.ruta = posicion, ruta
+        self.inicio = self.inicio_etapa = self.inicio_subetapa = time.monotonic()
+        self.etapa = 'inicio'
+        self.tiempos = {}
+        self.conn.send(ruta)
+
+    def cambiar_etapa(self, etapa: str) -> None:
+        """Anota la etapa en curso (las subetapas 'pdf:x' no reinician la de 'pdf')."""
+        ahora = time.monotonic()
+        if ':' in self.etapa:
+            self.tiempos[self.etapa] = round(ahora - self.inicio_subetapa, 4)
+        if etapa.split(':', 1)[0] != self.etapa.split(':', 1)[0]:
+            self.inicio_etapa = ahora
+        self.etapa = etapa
+        self.inicio_subetapa = ahora
+
+    def tiempos_hasta(self, ahora: float) -> Dict[str, float]:
+        """Tiempos de las subetapas terminadas y de la que está en curso."""
+        tiempos = dict(self.tiempos)
+        if ':' in self.etapa:
+            tiempos[self.etapa] = round(ahora - self.inicio_subetapa, 4)
+        return tiempos
+
+    def liberar(self) -> Tuple[int, Path]:
+        trabajo = (self.posicion, self.ruta)
+        self.posicion, self.ruta, self.etapa = None, None, ''
+        return trabajo
+
+    def memoria_mb(self) -> float:
+        """Memoria residente del worker (0 si psutil no está disponible)."""
+        if not PSUTIL_DISPONIBLE:
+            return 0.0
+        try:
+            return psutil.Process(self.proceso.pid).memory_info().rss / (1024 * 1024)
+        except (psutil.Error, OSError):
+            return 0.0
+
+    def matar(self) -> None:
+        if self.proceso.is_alive():
+            self.proceso.terminate()
+            self.proceso.join(2)
+            if self.proceso.is_alive():
+                self.proceso.kill()
+                self.proceso.join(2)
+        self.conn.close()
+
+    def cerrar(self) -> None:
+        try:
+            self.conn.send(None)
+        except (OSError, ValueError):
+            pass
+        self.proceso.join(2)
+        self.matar()
+
+
+def factura_fallida(ruta: Path, error: str, proveedor: str = 'ERROR') -> Factura:
+    """
+    Crea la Factura que representa un trabajo que no terminó.
+
+    El cuadre es el tipo de error ('TIMEOUT', 'MEMORIA' o 'EXCEPCION'),
+    tanto si lo informa el worker como si el supervisor lo mató.
+
+    Args:
+        ruta: Ruta del PDF
+        error: Mensaje de error ('TIMEOUT: ...', 'MEMORIA: ...', 'EXCEPCION: ...')
+        proveedor: Proveedor a mostrar
+
+    Returns:
+        Factura sin líneas con el error registrado
+    """
+    ruta = Path(ruta)
+    factura = Factura(archivo=ruta.name, numero='', ruta=ruta, proveedor=proveedor)
+    factura.agregar_error(error)
+    factura.cuadre = error.split(':', 1)[0]
+    return factura
+
+
+class SupervisorFacturas:
+    """
+    Reparte facturas entre workers persistentes y vigila sus límites.
+
+    Args:
+        funcion: Función de procesado (ej: main.procesar_factura)
+        args: Argumentos extra tras la ruta (se envían una vez por worker)
+        workers: Número de procesos
+        limite_factura: Segundos máximos por factura (0 = sin límite)
+        limites_etapa: {etapa: segundos} (ver procesar_factura)
+        limite_memoria_mb: Memoria residente máxima por worker (0 = sin límite; requiere psutil)
+        limite_virtual_mb: Tope de memoria virtual por worker (0 = sin tope; solo POSIX)
+        inicializador: Función a ejecutar en cada worker al arrancar (importable)
+        args_inicializador: Argumentos del inicializador
+    """
+
+    def __init__(
+        self,
+        funcion: Callable,
+        args: tuple = (),
+        workers: int = WORKERS_FACTURAS,
+        limite_factura: float = LIMITE_TIEMPO_FACTURA,
+        limites_etapa: Optional[Dict[str, float]] = None,
+        limite_memoria_mb: int = LIMITE_MEMORIA_MB,
+        limite_virtual_mb: int = LIMITE_MEMORIA_VIRTUAL_MB,
+        inicializador: Optional[Callable] = None,
+        args_inicializador: tuple = (),
+    ):
+        self.funcion = funcion
+        self.args = args
+        self.inicializador = inicializador
+        self.args_inicializador = args_inicializador
+        self.num_workers = max(1, int(workers or 1))
+        self.limite_factura = limite_factura
+        self.limites_etapa = LIMITES_ETAPA if limites_etapa is None else limites_etapa
+        self.limite_memoria_mb = limite_memoria_mb
+        self.limite_virtual_mb = limite_virtual_mb
+        if limite_memoria_mb and not PSUTIL_DISPONIBLE:
+            print(f"⚠️ psutil no disponible: el límite de memoria por factura ({limite_memoria_mb} MB) "
+                  "no se aplica. Instalar con: pip install psutil")
+        self._contexto = multiprocessing.get_context()
+        self._workers: List[_Worker] = []
+        self.reinicios = 0
+
+    def __enter__(self) -> 'SupervisorFacturas':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.cerrar()
+
+    def _nuevo_worker(self) -> _Worker:
+        return _Worker(self._contexto, self.funcion, self.args, self.limite_virtual_mb,
+                       self.inicializador, self.args_inicializador)
+
+    def _reemplazar(self, worker: _Worker) -> None:
+        worker.matar()
+        self._workers[self._workers.index(worker)] = self._nuevo_worker()
+        self.reinicios += 1
+
+    def _comprobar_limites(self, worker: _Worker, ahora: float) -> Optional[str]:
+        """Devuelve el motivo para matar el worker o None si va en plazo."""
+        if self.limite_factura and ahora - worker.inicio > self.limite_factura:
+            return f'TIMEOUT: factura > {self.limite_factura:g}s (etapa {worker.etapa})'
+        limite_etapa = self.limites_etapa.get(worker.etapa.split(':', 1)[0])
+        if limite_etapa and ahora - worker.inicio_etapa > limite_etapa:
+            return f'TIMEOUT: etapa {worker.etapa} > {limite_etapa:g}s'
+        if self.limite_memoria_mb and PSUTIL_DISPONIBLE:
+            memoria = worker.memoria_mb()
+            if memoria > self.limite_memoria_mb:
+                return f'MEMORIA: {memoria:.0f} MB > {self.limite_memoria_mb} MB (etapa {worker.etapa})'
+        return None
+
+    def procesar(self, rutas: Sequence[Path]) -> Iterator[Tuple[int, Path, Factura]]:
+        """
+        Procesa las rutas y devuelve los resultados según van terminando.
+
+        Args:
+            rutas: Rutas de los PDFs
+
+        Yields:
+            (posición en rutas, ruta, factura)
+        """
+        pendientes = list(enumerate(rutas))
+        pendientes.reverse()
+        while len(self._workers) < min(self.num_workers, len(pendientes)):
+            self._workers.append(self._nuevo_worker())
+
+        en_curso = 0
+        while pendientes or en_curso:
+            for worker in self._workers:
+                if not worker.ocupado and pendientes:
+                    posicion, ruta = pendientes.pop()
+                    worker.enviar(posicion, ruta)
+                    en_curso += 1
+
+            ocupados = [w for w in self._workers if w.ocupado]
+            listos = wait([w.conn for w in ocupados], timeout=INTERVALO_SONDEO)
+
+            for worker in ocupados:
+                if worker.conn in listos:
+                    try:
+                        tipo, dato = worker.conn.recv()
+                    except (EOFError, OSError):
+                        codigo = worker.proceso.exitcode
+                        posicion, ruta = worker.liberar()
+                        en_curso -= 1
+                        self._reemplazar(worker)
+                        yield posicion, ruta, factura_fallida(
+                            ruta, f'EXCEPCION: worker terminado (código {codigo})'
+                        )
+                        continue
+                    if tipo == 'etapa':
+                        worker.cambiar_etapa(dato)
+                        continue
+                    posicion, ruta = worker.liberar()
+                    en_curso -= 1
+                    if tipo == 'ok':
+                        yield posicion, ruta, dato
+                    else:
+                        yield posicion, ruta, factura_fallida(ruta, dato)
+                    continue
+
+                ahora = time.monotonic()
+                motivo = self._comprobar_limites(worker, ahora)
+                if motivo:
+                    tiempos = worker.tiempos_hasta(ahora)
+                    posicion, ruta = worker.liberar()
+                    en_curso -= 1
+                    self._reemplazar(worker)
+                    proveedor = parsear_nombre_archivo(Path(ruta).name).get('proveedor') or 'ERROR'
+                    factura = factura_fallida(ruta, motivo, proveedor)
+                    factura.tiempos.update(tiempos)
+                    yield posicion, ruta, factura
+
+    def cerrar(self) -> None:
+        """Detiene todos los workers."""
+        for worker in self._workers:
+            worker.cerrar()
+        self._workers = []
@@ -6,12 +6,27 @@ Genera Excel, logs y reportes de las facturas procesadas.
 
 from salidas.excel import (
     generar_excel,
+    actualizar_excel,
     generar_excel_resumen,
     generar_excel_errores,
     generar_excel_multihoja
 )
 
+from salidas.almacen import (
+    guardar_en_almacen,
+    leer_lineas,
+    leer_facturas,
+    trimestres_almacenados
+)
+
+from salidas.jsonl import (
+    EscritorJSONL,
+    registro_factura,
+    VERSION_ESQUEMA_JSONL
+)
+
 from salidas.log import (
+    EstadisticasEjecucion,
     generar_log,
     generar_log_errores,
     generar_log_detallado,
@@ -21,10 +36,21 @@ from salidas.log import (
 __all__ = [
     # Excel
     'generar_excel',
+    'actualizar_excel',
     'generar_excel_resumen',
     'generar_excel_errores',
     'generar_excel_multihoja',
+    # Almacén
+    'guardar_en_almacen',
+    'leer_lineas',
+    'leer_facturas',
+    'trimestres_almacenados',
+    # JSONL
+    'EscritorJSONL',
+    'registro_factura',
+    'VERSION_ESQUEMA_JSONL',
     # Log
+    'EstadisticasEjecucion',
     'generar_log',
     'generar_log_errores',
     'generar_log_detallado',
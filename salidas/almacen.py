@@ -0,0 +1,351 @@
+"""
+Almacén de resultados para consultas entre trimestres.
+
+Cada ejecución genera outputs/Facturas_xTyy.xlsx; para responder algo
+que cruza trimestres había que abrir varios Excel con pandas. Este
+módulo guarda además las líneas y las cabeceras de factura en:
+
+- SQLite (siempre disponible): tablas 'lineas' y 'facturas' con
+  índices por (trimestre, proveedor). Volver a guardar un trimestre
+  sustituye sus filas, no las duplica.
+- Parquet (si pyarrow está instalado): dataset particionado en
+  carpetas trimestre=.../proveedor=... junto al archivo SQLite.
+
+El esquema se deriva de Factura.to_dict() y LineaFactura.to_dict(): los
+tipos salen de las anotaciones de la clase. Si to_dict() gana campos,
+las columnas nuevas se añaden a las tablas existentes (ALTER TABLE) y
+las filas antiguas quedan con NULL.
+
+Uso:
+    from salidas.almacen import guardar_en_almacen, leer_lineas
+
+    guardar_en_almacen(facturas, Path('datos/resultados.sqlite'), '4T25')
+    df = leer_lineas(Path('datos/resultados.sqlite'), proveedores=['CERES'])
+
+Creado: 19/10/2026
+"""
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import json
+import sqlite3
+import typing
+
+import pandas as pd
+
+from nucleo.factura import Factura, LineaFactura
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PYARROW_DISPONIBLE = True
+except ImportError:
+    PYARROW_DISPONIBLE = False
+
+
+VERSION_ESQUEMA = 1
+
+# Columnas de partición (clave de las consultas entre trimestres)
+COLUMNAS_PARTICION = ('trimestre', 'proveedor')
+
+# Columnas de la factura que se repiten en cada línea
+COLUMNAS_CLAVE_LINEA = ('trimestre', 'proveedor', 'archivo', 'numero', 'fecha', 'posicion')
+
+
+# =============================================================================
+# ESQUEMA
+# =============================================================================
+
+def _tipo_sql(anotacion: Any) -> str:
+    """Tipo SQLite para una anotación (Optional[float] -> REAL, ...)."""
+    argumentos = [a for a in typing.get_args(anotacion) if a is not type(None)]
+    if typing.get_origin(anotacion) is typing.Union and len(argumentos) == 1:
+        anotacion = argumentos[0]
+    if anotacion is float:
+        return 'REAL'
+    if anotacion in (int, bool):
+        return 'INTEGER'
+    return 'TEXT'
+
+
+def _columnas_de(clase: type, ejemplo: Any, excluir: Sequence[str] = ()) -> List[Tuple[str, str]]:
+    """
+    Columnas (nombre, tipo) según las claves de ejemplo.to_dict().
+
+    El tipo se toma de la anotación del campo o, si es una propiedad,
+    de la anotación de retorno de su getter.
+    """
+    anotaciones = typing.get_type_hints(clase)
+    columnas = []
+    for nombre in ejemplo.to_dict():
+        if nombre in excluir:
+            continue
+        anotacion = anotaciones.get(nombre)
+        if anotacion is None:
+            propiedad = getattr(clase, nombre, None)
+            if isinstance(propiedad, property):
+                anotacion = typing.get_type_hints(propiedad.fget).get('return')
+        columnas.append((nombre, _tipo_sql(anotacion)))
+    return columnas
+
+
+def esquema_facturas() -> List[Tuple[str, str]]:
+    """Columnas de la tabla 'facturas' (una fila por factura)."""
+    columnas = _columnas_de(Factura, Factura(archivo='', numero=''), excluir=('lineas',))
+    return [('trimestre', 'TEXT')] + columnas
+
+
+def esquema_lineas() -> List[Tuple[str, str]]:
+    """Columnas de la tabla 'lineas' (una fila por línea de factura)."""
+    cabecera = dict(esquema_facturas())
+    columnas = [(nombre, cabecera.get(nombre, 'INTEGER')) for nombre in COLUMNAS_CLAVE_LINEA]
+    return columnas + _columnas_de(LineaFactura, LineaFactura())
+
+
+_CLAVES_PRIMARIAS = {
+    'facturas': ('trimestre', 'archivo'),
+    'lineas': ('trimestre', 'archivo', 'posicion'),
+}
+
+
+def _esquemas() -> Dict[str, List[Tuple[str, str]]]:
+    return {'facturas': esquema_facturas(), 'lineas': esquema_lineas()}
+
+
+# =============================================================================
+# CONVERSIÓN A FILAS
+# =============================================================================
+
+def filas_factura(factura: 'Factura', trimestre: str) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    """
+    Convierte una factura en su fila de cabecera y sus filas de línea.
+
+    Args:
+        factura: Factura procesada
+        trimestre: Trimestre de la ejecución (ej: '4T25')
+
+    Returns:
+        (fila_factura, filas_lineas)
+    """
+    datos = factura.to_dict()
+    lineas = datos.pop('lineas')
+    datos['errores'] = json.dumps(datos['errores'], ensure_ascii=False)
+    cabecera = {'trimestre': trimestre, **datos}
+
+    filas = []
+    for posicion, linea in enumerate(lineas, 1):
+        fila = {
+            'trimestre': trimestre,
+            'proveedor': factura.proveedor,
+            'archivo': factura.archivo,
+            'numero': factura.numero,
+            'fecha': factura.fecha,
+            'posicion': posicion,
+        }
+        fila.update(linea)
+        filas.append(fila)
+    return cabecera, filas
+
+
+# =============================================================================
+# SQLITE
+# =============================================================================
+
+def _conectar(ruta: Path) -> sqlite3.Connection:
+    """Abre el almacén y crea o amplía las tablas según el esquema actual."""
+    ruta.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(str(ruta))
+    conn.execute('CREATE TABLE IF NOT EXISTS meta (clave TEXT PRIMARY KEY, valor TEXT)')
+
+    for tabla, columnas in _esquemas().items():
+        definicion = ', '.join(f'"{nombre}" {tipo}' for nombre, tipo in columnas)
+        clave = ', '.join(_CLAVES_PRIMARIAS[tabla])
+        conn.execute(f'CREATE TABLE IF NOT EXISTS {tabla} ({definicion}, PRIMARY KEY ({clave}))')
+
+        existentes = {fila[1] for fila in conn.execute(f'PRAGMA table_info({tabla})')}
+        for nombre, tipo in columnas:
+            if nombre not in existentes:
+                conn.execute(f'ALTER TABLE {tabla} ADD COLUMN "{nombre}" {tipo}')
+
+        particion = ', '.join(COLUMNAS_PARTICION)
+        conn.execute(f'CREATE INDEX IF NOT EXISTS idx_{tabla}_particion ON {tabla} ({particion})')
+        conn.execute(f'CREATE INDEX IF NOT EXISTS idx_{tabla}_proveedor ON {tabla} (proveedor)')
+
+    conn.execute(
+        'INSERT OR REPLACE INTO meta (clave, valor) VALUES (?, ?)',
+        ('version_esquema', str(VERSION_ESQUEMA))
+    )
+    return conn
+
+
+def _insertar(conn: sqlite3.Connection, tabla: str, filas: List[Dict[str, Any]]) -> None:
+    if not filas:
+        return
+    nombres = [nombre for nombre, _ in _esquemas()[tabla]]
+    columnas = ', '.join(f'"{n}"' for n in nombres)
+    marcas = ', '.join('?' for _ in nombres)
+    conn.executemany(
+        f'INSERT OR REPLACE INTO {tabla} ({columnas}) VALUES ({marcas})',
+        ([fila.get(n) for n in nombres] for fila in filas)
+    )
+
+
+def guardar_en_almacen(facturas: List['Factura'], ruta: Path, trimestre: str,
+                       parquet: bool = True,
+                       reemplazar_trimestre: bool = True) -> Tuple[int, int]:
+    """
+    Guarda las facturas de un trimestre en el almacén.
+
+    Las filas que ya hubiera de ese trimestre se sustituyen (volver a
+    procesar un trimestre no duplica datos). Con reemplazar_trimestre=False
+    solo se sustituyen las de los archivos recibidos (actualización
+    incremental) y el resto del trimestre se conserva.
+
+    Args:
+        facturas: Facturas procesadas
+        ruta: Archivo SQLite (ej: datos/resultados.sqlite)
+        trimestre: Trimestre de la ejecución (ej: '4T25')
+        parquet: Escribir también el dataset Parquet si pyarrow está disponible
+        reemplazar_trimestre: Borrar antes todo el trimestre (True) o solo
+            los archivos recibidos (False)
+
+    Returns:
+        (número de facturas, número de líneas) guardadas
+    """
+    ruta = Path(ruta)
+    filas_facturas, filas_lineas = [], []
+    for factura in facturas:
+        cabecera, lineas = filas_factura(factura, trimestre)
+        filas_facturas.append(cabecera)
+        filas_lineas.extend(lineas)
+
+    conn = _conectar(ruta)
+    try:
+        with conn:
+            for tabla in ('lineas', 'facturas'):
+                if reemplazar_trimestre:
+                    conn.execute(f'DELETE FROM {tabla} WHERE trimestre = ?', (trimestre,))
+                else:
+                    conn.executemany(
+                        f'DELETE FROM {tabla} WHERE trimestre = ? AND archivo = ?',
+                        ((trimestre, fila['archivo']) for fila in filas_facturas)
+                    )
+            _insertar(conn, 'facturas', filas_facturas)
+            _insertar(conn, 'lineas', filas_lineas)
+    finally:
+        conn.close()
+
+    if parquet and PYARROW_DISPONIBLE:
+        if not reemplazar_trimestre:
+            # La partición del trimestre se reescribe entera desde SQLite
+            filas_facturas = _leer(ruta, 'facturas', [trimestre], None).to_dict('records')
+            filas_lineas = _leer(ruta, 'lineas', [trimestre], None).to_dict('records')
+        _guardar_parquet(ruta_parquet(ruta), trimestre, filas_facturas, filas_lineas)
+
+    return len(filas_facturas), len(filas_lineas)
+
+
+# =============================================================================
+# PARQUET (OPCIONAL)
+# =============================================================================
+
+_TIPOS_ARROW = {'TEXT': 'string', 'REAL': 'float64', 'INTEGER': 'int64'}
+
+
+def ruta_parquet(ruta_sqlite: Path) -> Path:
+    """Carpeta del dataset Parquet asociado (junto al SQLite)."""
+    ruta_sqlite = Path(ruta_sqlite)
+    return ruta_sqlite.with_name(f'{ruta_sqlite.stem}_parquet')
+
+
+def _guardar_parquet(carpeta: Path, trimestre: str,
+                     filas_facturas: List[Dict[str, Any]],
+                     filas_lineas: List[Dict[str, Any]]) -> None:
+    """Escribe el trimestre en carpeta/<tabla>/trimestre=.../proveedor=.../"""
+    for tabla, filas in (('facturas', filas_facturas), ('lineas', filas_lineas)):
+        columnas = _esquemas()[tabla]
+        esquema = pa.schema([(n, getattr(pa, _TIPOS_ARROW[t])()) for n, t in columnas])
+        datos = {n: [fila.get(n) for fila in filas] for n, _ in columnas}
+        destino = carpeta / tabla
+        # Sustituir el trimestre completo, igual que en SQLite
+        particion = destino / f'trimestre={trimestre}'
+        if particion.exists():
+            for archivo in sorted(particion.rglob('*'), reverse=True):
+                archivo.unlink() if archivo.is_file() else archivo.rmdir()
+            particion.rmdir()
+        if not filas:
+            continue
+        pq.write_to_dataset(
+            pa.Table.from_pydict(datos, schema=esquema),
+            root_path=str(destino),
+            partition_cols=list(COLUMNAS_PARTICION),
+        )
+
+
+# =============================================================================
+# LECTURA
+# =============================================================================
+
+def _leer(ruta: Path, tabla: str, trimestres: Optional[Sequence[str]],
+          proveedores: Optional[Sequence[str]]) -> pd.DataFrame:
+    condiciones, parametros = [], []
+    for columna, valores in (('trimestre', trimestres), ('proveedor', proveedores)):
+        if valores:
+            condiciones.append(f'{columna} IN ({", ".join("?" for _ in valores)})')
+            parametros.extend(valores)
+    where = f' WHERE {" AND ".join(condiciones)}' if condiciones else ''
+    orden = ', '.join(_CLAVES_PRIMARIAS[tabla])
+    conn = sqlite3.connect(str(ruta))
+    try:
+        return pd.read_sql_query(
+            f'SELECT * FROM {tabla}{where} ORDER BY {orden}', conn, params=parametros
+        )
+    finally:
+        conn.close()
+
+
+def leer_lineas(ruta: Path, trimestres: Optional[Sequence[str]] = None,
+                proveedores: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    """
+    Lee líneas del almacén, filtrando por trimestre y/o proveedor.
+
+    Args:
+        ruta: Archivo SQLite
+        trimestres: Trimestres a incluir (None = todos)
+        proveedores: Proveedores a incluir (None = todos)
+
+    Returns:
+        DataFrame con las columnas de esquema_lineas()
+    """
+    return _leer(Path(ruta), 'lineas', trimestres, proveedores)
+
+
+def leer_facturas(ruta: Path, trimestres: Optional[Sequence[str]] = None,
+                  proveedores: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    """
+    Lee cabeceras de factura del almacén (errores vuelve como lista).
+
+    Args:
+        ruta: Archivo SQLite
+        trimestres: Trimestres a incluir (None = todos)
+        proveedores: Proveedores a incluir (None = todos)
+
+    Returns:
+        DataFrame con las columnas de esquema_facturas()
+    """
+    df = _leer(Path(ruta), 'facturas', trimestres, proveedores)
+    df['errores'] = [json.loads(e) if e else [] for e in df['errores']]
+    return df
+
+
+def trimestres_almacenados(ruta: Path) -> List[str]:
+    """Trimestres presentes en el almacén."""
+    ruta = Path(ruta)
+    if not ruta.exists():
+        return []
+    conn = sqlite3.connect(str(ruta))
+    try:
+        return [fila[0] for fila in conn.execute(
+            'SELECT DISTINCT trimestre FROM facturas ORDER BY trimestre'
+        )]
+    finally:
+        conn.close()
@@ -3,6 +3,25 @@ Módulo de generación de Excel.
 
 Genera archivos Excel con las facturas procesadas.
 
+CAMBIOS v5.11 (19/10/2026):
+- generar_excel() puede guardar también las facturas en el almacén de
+  resultados (salidas.almacen: SQLite y Parquet opcional) para consultas
+  entre trimestres sin reabrir los Excel.
+- actualizar_excel(): actualiza un Facturas_xTyy.xlsx existente sustituyendo
+  solo las filas de las facturas reprocesadas (por ARCHIVO / número de
+  gestoría) y añadiendo las nuevas; conserva columnas manuales y formato.
+- Sanitización, formato de fecha y número de gestoría por columnas
+  (formatear_fechas, extraer_numeros_gestoria, construir_df_facturas)
+  en lugar de fila a fila; mismo resultado.
+- buscar_cuenta_titulo() usa un índice (IndiceCuentas) construido al cargar
+  el diccionario: exactas por dict, parciales con autómata Aho-Corasick y
+  similitud con poda por longitud/trigramas. Resultados memorizados por
+  proveedor. Mismo resultado que la búsqueda lineal anterior.
+- normalizar_para_busqueda() se importa de nucleo.normalizacion (patrones
+  precompilados y resultados memorizados).
+- generar_excel(sugerencias=...) añade la hoja "Sugerencias" con las
+  categorías propuestas para las líneas pendientes (nucleo.sugerencias).
+
 CAMBIOS v5.9 (02/01/2026):
 - FIX: Sanitización de caracteres ilegales para Excel (IllegalCharacterError)
 - Función sanitizar_para_excel() elimina caracteres de control
@@ -15,11 +34,17 @@ CAMBIOS v5.8 (02/01/2026):
 """
 import pandas as pd
 from pathlib import Path
+from collections import Counter
 from typing import List, Dict, Tuple, Optional, TYPE_CHECKING
 from datetime import datetime
-from difflib import SequenceMatcher
 import re
 
+from salidas.almacen import guardar_en_almacen
+from nucleo.normalizacion import normalizar_para_busqueda
+from nucleo.indices import (
+    AutomataSubcadenas, IndiceContenedores, IndiceSimilitud, primera_relacionada
+)
+
 if TYPE_CHECKING:
     from nucleo.factura import Factura
 
@@ -28,6 +53,11 @@ if TYPE_CHECKING:
 # SANITIZACIÓN DE CARACTERES PARA EXCEL
 # ==============================================================================
 
+# Caracteres de control que Excel no acepta (todos menos tab, LF y CR)
+PATRON_ILEGALES_EXCEL = r'[\x00-\x08\x0b\x0c\x0e-\x1f]'
+_RE_ILEGALES_EXCEL = re.compile(PATRON_ILEGALES_EXCEL)
+
+
 def sanitizar_para_excel(valor):
     """
     Elimina caracteres ilegales para Excel (caracteres de control).
@@ -47,7 +77,7 @@ def sanitizar_para_excel(valor):
         return valor
     if isinstance(valor, str):
         # Elimina caracteres de control excepto tab, newline, carriage return
-        return re.sub(r'[\x00-\x08\x0b\x0c\x0e-\x1f]', '', valor)
+        return _RE_ILEGALES_EXCEL.sub('', valor)
     return valor
 
 
@@ -55,14 +85,29 @@ def sanitizar_dataframe(df: pd.DataFrame) -> pd.DataFrame:
     """
     Sanitiza todas las columnas de texto de un DataFrame.
     
+    Trabaja por columnas con el accesor .str: solo se reescriben las
+    celdas de texto que contienen algún carácter ilegal; los valores que
+    no son texto (números, None) no se tocan.
+    
     Args:
         df: DataFrame a sanitizar
         
     Returns:
         DataFrame con textos sanitizados
     """
-    for col in df.select_dtypes(include=['object']).columns:
-        df[col] = df[col].apply(sanitizar_para_excel)
+    for col in df.columns:
+        serie = df[col]
+        if not (pd.api.types.is_object_dtype(serie.dtype)
+                or pd.api.types.is_string_dtype(serie.dtype)):
+            continue
+        try:
+            ilegales = serie.str.contains(PATRON_ILEGALES_EXCEL, regex=True, na=False)
+        except AttributeError:
+            continue  # Columna sin textos
+        if ilegales.any():
+            df.loc[ilegales, col] = serie[ilegales].str.replace(
+                PATRON_ILEGALES_EXCEL, '', regex=True
+            )
     return df
 
 
@@ -77,6 +122,7 @@ DICCIONARIO_CUENTAS_DEFAULT = r"C:\_ARCHIVOS\TRABAJO\Facturas\ParsearFacturas-ma
 _CACHE_CUENTAS: Dict[str, str] = {}  # TITULO -> CUENTA
 _CACHE_ALIAS: Dict[str, str] = {}     # NOMBRE_EN_CONCEPTO -> TITULO_FACTURA
 _CACHE_CARGADO: bool = False
+_CACHE_INDICE: Optional['IndiceCuentas'] = None
 
 
 def cargar_diccionario_cuentas(ruta: Optional[Path] = None) -> Tuple[Dict[str, str], Dict[str, str]]:
@@ -91,7 +137,7 @@ def cargar_diccionario_cuentas(ruta: Optional[Path] = None) -> Tuple[Dict[str, s
         - dict_cuentas: {TITULO_NORMALIZADO: CUENTA}
         - dict_alias: {ALIAS_NORMALIZADO: TITULO}
     """
-    global _CACHE_CUENTAS, _CACHE_ALIAS, _CACHE_CARGADO
+    global _CACHE_CUENTAS, _CACHE_ALIAS, _CACHE_CARGADO, _CACHE_INDICE
     
     if _CACHE_CARGADO:
         return _CACHE_CUENTAS, _CACHE_ALIAS
@@ -123,34 +169,100 @@ def cargar_diccionario_cuentas(ruta: Optional[Path] = None) -> Tuple[Dict[str, s
             if nombre and titulo and titulo != 'CASO ESPECIAL':
                 dict_alias[nombre] = titulo
         
-        _CACHE_CUENTAS = dict_cuentas
-        _CACHE_ALIAS = dict_alias
-        _CACHE_CARGADO = True
-        
     except Exception as e:
         print(f"[AVISO] No se pudo cargar DiccionarioEmisorTitulo.xlsx: {e}")
     
+    # Se cachea también el fallo: no reintentar la lectura en cada factura
+    _CACHE_CUENTAS = dict_cuentas
+    _CACHE_ALIAS = dict_alias
+    _CACHE_INDICE = IndiceCuentas(dict_cuentas, dict_alias)
+    _CACHE_CARGADO = True
+    
     return dict_cuentas, dict_alias
 
 
-def normalizar_para_busqueda(texto) -> str:
+class IndiceCuentas:
     """
-    Normaliza un texto para búsqueda flexible.
+    Índice de búsqueda CUENTA/TITULO construido una vez por diccionario.
+    
+    Reproduce el orden de búsqueda de buscar_cuenta_titulo() (exacta en
+    alias, exacta en cuentas, parcial en alias, parcial en cuentas,
+    similitud) y respeta la prioridad por orden de inserción del Excel,
+    pero sin recorrer todas las cuentas en cada factura. Los resultados
+    se memorizan por proveedor.
     """
-    if texto is None or (isinstance(texto, float) and pd.isna(texto)):
-        return ''
-    texto = str(texto).upper().strip()
-    if texto == 'NAN':
-        return ''
-    # Quitar prefijos comunes de archivos
-    texto = re.sub(r'^\d+T\d*\s+\d+\s+', '', texto)  # Quitar "4T25 1001 "
-    texto = re.sub(r'^ATRASADA\s+', '', texto)
-    # Quitar sufijos de tipo de factura
-    texto = re.sub(r'\s+(TF|TJ|RC)\.?PDF$', '', texto, flags=re.IGNORECASE)
-    texto = re.sub(r'\s+(TF|TJ|RC)$', '', texto, flags=re.IGNORECASE)
-    # Normalizar espacios
-    texto = ' '.join(texto.split())
-    return texto
+    
+    UMBRAL_SIMILITUD = 0.6
+    
+    def __init__(self, dict_cuentas: Dict[str, str], dict_alias: Dict[str, str]):
+        self.cuentas = dict_cuentas
+        self.alias = dict_alias
+        
+        # Parcial en alias: solo alias cuyo TITULO tiene cuenta (los demás nunca resuelven)
+        self._alias_validos = [a for a, t in dict_alias.items() if t in dict_cuentas]
+        self._automata_alias = AutomataSubcadenas(self._alias_validos)
+        self._contenedores_alias = IndiceContenedores(self._alias_validos)
+        
+        # Parcial en cuentas
+        self._clientes = list(dict_cuentas)
+        self._automata_cuentas = AutomataSubcadenas(self._clientes)
+        self._contenedores_cuentas = IndiceContenedores(self._clientes)
+        
+        # Similitud: primero alias y luego cuentas (a igualdad gana el primero)
+        self._claves_similitud = list(dict_alias) + self._clientes
+        self._similitud = IndiceSimilitud(self._claves_similitud)
+        
+        self._memo: Dict[str, Tuple[str, str]] = {}
+    
+    def buscar(self, proveedor: str) -> Tuple[str, str]:
+        """Busca (CUENTA, TITULO) de un proveedor; ('PENDIENTE', proveedor) si no hay."""
+        resultado = self._memo.get(proveedor)
+        if resultado is None:
+            resultado = self._buscar(proveedor)
+            self._memo[proveedor] = resultado
+        return resultado
+    
+    def _buscar(self, proveedor: str) -> Tuple[str, str]:
+        dict_cuentas, dict_alias = self.cuentas, self.alias
+        proveedor_norm = normalizar_para_busqueda(proveedor)
+        proveedor_upper = proveedor.upper().strip()
+        
+        # 1. Búsqueda exacta en alias
+        for clave in (proveedor_upper, proveedor_norm):
+            titulo = dict_alias.get(clave)
+            if titulo is not None and titulo in dict_cuentas:
+                return (dict_cuentas[titulo], titulo)
+        
+        # 2. Búsqueda exacta en cuentas
+        for clave in (proveedor_upper, proveedor_norm):
+            if clave in dict_cuentas:
+                return (dict_cuentas[clave], clave)
+        
+        # 3. Búsqueda parcial en alias (contiene)
+        posicion = primera_relacionada(self._automata_alias, self._contenedores_alias, proveedor_upper)
+        if posicion is not None:
+            titulo = dict_alias[self._alias_validos[posicion]]
+            return (dict_cuentas[titulo], titulo)
+        
+        # 4. Búsqueda parcial en cuentas (contiene)
+        posicion = primera_relacionada(self._automata_cuentas, self._contenedores_cuentas, proveedor_upper)
+        if posicion is not None:
+            cliente = self._clientes[posicion]
+            return (dict_cuentas[cliente], cliente)
+        
+        # 5. Búsqueda por similitud (último recurso)
+        posicion = self._similitud.mejor(proveedor_norm, self.UMBRAL_SIMILITUD)
+        if posicion is not None:
+            if posicion < len(dict_alias):
+                titulo = dict_alias[self._claves_similitud[posicion]]
+                if titulo in dict_cuentas:
+                    return (dict_cuentas[titulo], titulo)
+            else:
+                cliente = self._claves_similitud[posicion]
+                return (dict_cuentas[cliente], cliente)
+        
+        # No encontrado
+        return ('PENDIENTE', proveedor)
 
 
 def buscar_cuenta_titulo(proveedor: str, ruta_diccionario: Optional[Path] = None) -> Tuple[str, str]:
@@ -169,72 +281,12 @@ def buscar_cuenta_titulo(proveedor: str, ruta_diccionario: Optional[Path] = None
     Returns:
         Tupla (CUENTA, TITULO) o ('PENDIENTE', proveedor_original) si no encuentra
     """
-    dict_cuentas, dict_alias = cargar_diccionario_cuentas(ruta_diccionario)
+    cargar_diccionario_cuentas(ruta_diccionario)
     
     if not proveedor or (isinstance(proveedor, float) and pd.isna(proveedor)):
         return ('PENDIENTE', '')
     
-    proveedor = str(proveedor)
-    proveedor_norm = normalizar_para_busqueda(proveedor)
-    proveedor_upper = proveedor.upper().strip()
-    
-    # 1. Búsqueda exacta en alias
-    if proveedor_upper in dict_alias:
-        titulo = dict_alias[proveedor_upper]
-        if titulo in dict_cuentas:
-            return (dict_cuentas[titulo], titulo)
-    
-    if proveedor_norm in dict_alias:
-        titulo = dict_alias[proveedor_norm]
-        if titulo in dict_cuentas:
-            return (dict_cuentas[titulo], titulo)
-    
-    # 2. Búsqueda exacta en cuentas
-    if proveedor_upper in dict_cuentas:
-        return (dict_cuentas[proveedor_upper], proveedor_upper)
-    
-    if proveedor_norm in dict_cuentas:
-        return (dict_cuentas[proveedor_norm], proveedor_norm)
-    
-    # 3. Búsqueda parcial en alias (contiene)
-    for alias, titulo in dict_alias.items():
-        if alias in proveedor_upper or proveedor_upper in alias:
-            if titulo in dict_cuentas:
-                return (dict_cuentas[titulo], titulo)
-    
-    # 4. Búsqueda parcial en cuentas (contiene)
-    for cliente, cuenta in dict_cuentas.items():
-        if cliente in proveedor_upper or proveedor_upper in cliente:
-            return (cuenta, cliente)
-    
-    # 5. Búsqueda por similitud (último recurso)
-    mejor_match = None
-    mejor_ratio = 0.0
-    
-    # Primero en alias
-    for alias, titulo in dict_alias.items():
-        ratio = SequenceMatcher(None, proveedor_norm, alias).ratio()
-        if ratio > mejor_ratio and ratio > 0.6:
-            mejor_ratio = ratio
-            mejor_match = ('alias', alias, titulo)
-    
-    # Luego en cuentas
-    for cliente, cuenta in dict_cuentas.items():
-        ratio = SequenceMatcher(None, proveedor_norm, cliente).ratio()
-        if ratio > mejor_ratio and ratio > 0.6:
-            mejor_ratio = ratio
-            mejor_match = ('cuenta', cliente, cuenta)
-    
-    if mejor_match:
-        if mejor_match[0] == 'alias':
-            titulo = mejor_match[2]
-            if titulo in dict_cuentas:
-                return (dict_cuentas[titulo], titulo)
-        else:
-            return (mejor_match[2], mejor_match[1])
-    
-    # No encontrado
-    return ('PENDIENTE', proveedor)
+    return _CACHE_INDICE.buscar(str(proveedor))
 
 
 def extraer_numero_gestoria(archivo: str, numero_factura) -> Tuple[str, bool]:
@@ -316,20 +368,257 @@ def formatear_fecha_factura(fecha) -> str:
     return fecha_str
 
 
+# ==============================================================================
+# FILAS DE LAS HOJAS "Lineas" Y "Facturas"
+# ==============================================================================
+
+COLUMNAS_LINEAS = [
+    '#', 'FECHA', 'REF', 'PROVEEDOR', 'ARTICULO', 'CATEGORIA', 'ID_CAT',
+    'CANTIDAD', 'PRECIO_UD', 'TIPO IVA', 'BASE (€)', 'CUOTA IVA',
+    'TOTAL FAC', 'CUADRE', 'ARCHIVO'
+]
+
+COLUMNAS_FACTURAS = ['#', 'CUENTA', 'TITULO', 'Fec.Fac.', 'REF', 'Total', 'OBSERVACIONES']
+
+
+def filas_lineas_factura(f: 'Factura') -> List[Dict]:
+    """
+    Filas de la hoja "Lineas" de una factura.
+    
+    Args:
+        f: Factura procesada
+        
+    Returns:
+        Lista de filas (una por línea, o una 'VER FACTURA' si no tiene líneas)
+    """
+    filas = []
+    if f.lineas:
+        for linea in f.lineas:
+            filas.append({
+                '#': f.numero,
+                'FECHA': f.fecha or '',
+                'REF': f.referencia or '',
+                'PROVEEDOR': f.proveedor,
+                'ARTICULO': linea.articulo,
+                'CATEGORIA': linea.categoria or 'PENDIENTE',
+                'ID_CAT': linea.id_categoria or '',
+                'CANTIDAD': linea.cantidad if linea.cantidad else '',
+                'PRECIO_UD': linea.precio_ud if linea.precio_ud else '',
+                'TIPO IVA': linea.iva,
+                'BASE (€)': linea.base,
+                'CUOTA IVA': linea.cuota_iva,
+                'TOTAL FAC': f.total or '',
+                'CUADRE': f.cuadre,
+                'ARCHIVO': f.archivo
+            })
+    else:
+        # Factura sin líneas extraídas
+        filas.append({
+            '#': f.numero,
+            'FECHA': f.fecha or '',
+            'REF': f.referencia or '',
+            'PROVEEDOR': f.proveedor,
+            'ARTICULO': 'VER FACTURA',
+            'CATEGORIA': 'PENDIENTE',
+            'ID_CAT': '',
+            'CANTIDAD': '',
+            'PRECIO_UD': '',
+            'TIPO IVA': '',
+            'BASE (€)': f.total or '',
+            'CUOTA IVA': '',
+            'TOTAL FAC': f.total or '',
+            'CUADRE': f.cuadre,
+            'ARCHIVO': f.archivo
+        })
+    return filas
+
+
+def fila_cabecera_factura(f: 'Factura', num_gestoria: str, es_temporal: bool,
+                          ruta_diccionario: Optional[Path] = None) -> Dict:
+    """
+    Fila de la hoja "Facturas" de una factura.
+    
+    Args:
+        f: Factura procesada
+        num_gestoria: Número de gestoría (o TMPxxx ya asignado)
+        es_temporal: True si el número es temporal
+        ruta_diccionario: Ruta al DiccionarioEmisorTitulo.xlsx
+        
+    Returns:
+        Fila con las COLUMNAS_FACTURAS
+    """
+    # Buscar CUENTA y TITULO
+    cuenta, titulo = buscar_cuenta_titulo(f.proveedor, ruta_diccionario)
+    
+    # Formatear fecha
+    fecha_formateada = formatear_fecha_factura(f.fecha)
+    
+    # Construir observaciones
+    observaciones = f.cuadre or ''
+    if es_temporal:
+        if observaciones:
+            observaciones += ', SIN_NUM_GESTORIA'
+        else:
+            observaciones = 'SIN_NUM_GESTORIA'
+    
+    return {
+        '#': num_gestoria,
+        'CUENTA': cuenta,
+        'TITULO': titulo,
+        'Fec.Fac.': fecha_formateada,
+        'REF': f.referencia or '',
+        'Total': f.total or '',
+        'OBSERVACIONES': observaciones
+    }
+
+
+# ==============================================================================
+# VERSIONES POR COLUMNAS (una operación por columna en vez de una por fila)
+# ==============================================================================
+
+def _como_texto(serie: pd.Series) -> pd.Series:
+    """str() de cada valor (None -> 'None', como en las funciones por fila)."""
+    return pd.Series(serie.to_numpy(dtype=object).astype(str), index=serie.index, dtype=object)
+
+
+def formatear_fechas(fechas: pd.Series) -> pd.Series:
+    """
+    Versión por columnas de formatear_fecha_factura().
+    
+    Args:
+        fechas: Serie con fechas en cualquier formato (None/'' -> '')
+        
+    Returns:
+        Serie de textos en formato DD-MM-YY (mismo resultado que aplicar
+        formatear_fecha_factura a cada valor)
+    """
+    vacias = ~fechas.astype(bool)
+    texto = _como_texto(fechas).str.strip()
+    resultado = texto.copy()
+    
+    # De menor a mayor prioridad: YYYY-MM-DD..., DD/MM/YY, DD/MM/YYYY
+    # (DD-MM-YY ya formateada se queda como está)
+    iso = texto.str.extract(r'^(\d{4})-(\d{2})-(\d{2})')
+    hay = iso[0].notna()
+    resultado[hay] = iso[2][hay] + '-' + iso[1][hay] + '-' + iso[0][hay].str[2:]
+    
+    corta = texto.str.extract(r'^(\d{2})/(\d{2})/(\d{2})$')
+    hay = corta[0].notna()
+    resultado[hay] = corta[0][hay] + '-' + corta[1][hay] + '-' + corta[2][hay]
+    
+    larga = texto.str.extract(r'^(\d{2})/(\d{2})/(\d{4})$')
+    hay = larga[0].notna()
+    resultado[hay] = larga[0][hay] + '-' + larga[1][hay] + '-' + larga[2][hay].str[2:]
+    
+    hay = texto.str.match(r'^\d{2}-\d{2}-\d{2}$')
+    resultado[hay] = texto[hay]
+    
+    resultado[vacias] = ''
+    return resultado
+
+
+def extraer_numeros_gestoria(archivos: pd.Series, numeros: pd.Series) -> Tuple[pd.Series, pd.Series]:
+    """
+    Versión por columnas de extraer_numero_gestoria().
+    
+    Args:
+        archivos: Nombres de archivo PDF
+        numeros: Números asignados por el sistema (f.numero)
+        
+    Returns:
+        (numeros_gestoria, es_temporal): '' y True donde no hay número
+    """
+    archivos = _como_texto(archivos)
+    numero = pd.Series('', index=archivos.index, dtype=object)
+    
+    # Número al inicio (3-4 dígitos) seguido de espacio
+    inicial = archivos.str.extract(r'^(\d{3,4})\s+')[0]
+    hay_inicial = inicial.notna()
+    numero[hay_inicial] = inicial[hay_inicial]
+    
+    # Número del sistema de 3-4 dígitos con el que empieza el archivo
+    num_str = _como_texto(numeros)
+    valido = numeros.astype(bool) & num_str.str.match(r'^\d{3,4}$')
+    longitud = num_str.str.len()
+    empieza = (
+        ((longitud == 3) & (archivos.str[:3] == num_str))
+        | ((longitud == 4) & (archivos.str[:4] == num_str))
+    )
+    hay_sistema = ~hay_inicial & valido & empieza & archivos.astype(bool)
+    numero[hay_sistema] = num_str[hay_sistema]
+    
+    es_temporal = ~(hay_inicial | hay_sistema)
+    return numero, es_temporal
+
+
+def construir_df_facturas(facturas: List['Factura'],
+                          ruta_diccionario: Optional[Path] = None) -> pd.DataFrame:
+    """
+    Construye la hoja "Facturas" (una fila por factura) por columnas.
+    
+    Los TMPxxx se numeran con una suma acumulada sobre las facturas sin
+    número de gestoría; CUENTA/TITULO se buscan una vez por proveedor.
+    
+    Args:
+        facturas: Lista de facturas procesadas
+        ruta_diccionario: Ruta al DiccionarioEmisorTitulo.xlsx
+        
+    Returns:
+        DataFrame con las COLUMNAS_FACTURAS (sin sanitizar)
+    """
+    if not facturas:
+        return pd.DataFrame()
+    
+    archivos = pd.Series([f.archivo for f in facturas], dtype=object)
+    numeros = pd.Series([f.numero for f in facturas], dtype=object)
+    num_gestoria, es_temporal = extraer_numeros_gestoria(archivos, numeros)
+    
+    sin_numero = es_temporal | (num_gestoria == '')
+    contador = sin_numero.cumsum()
+    num_gestoria[sin_numero] = 'TMP' + contador[sin_numero].astype(str).str.zfill(3)
+    
+    proveedores = [f.proveedor for f in facturas]
+    cuentas = {p: buscar_cuenta_titulo(p, ruta_diccionario) for p in dict.fromkeys(proveedores)}
+    
+    observaciones = pd.Series([f.cuadre or '' for f in facturas], dtype=object)
+    sufijo = observaciones.where(observaciones == '', observaciones + ', ') + 'SIN_NUM_GESTORIA'
+    observaciones[es_temporal] = sufijo[es_temporal]
+    
+    return pd.DataFrame({
+        '#': num_gestoria.tolist(),
+        'CUENTA': [cuentas[p][0] for p in proveedores],
+        'TITULO': [cuentas[p][1] for p in proveedores],
+        'Fec.Fac.': formatear_fechas(pd.Series([f.fecha for f in facturas], dtype=object)).tolist(),
+        'REF': [f.referencia or '' for f in facturas],
+        'Total': [f.total or '' for f in facturas],
+        'OBSERVACIONES': observaciones.tolist(),
+    })
+
+
 def generar_excel(facturas: List['Factura'], ruta: Path, nombre_hoja: str = 'Lineas',
-                  ruta_diccionario: Optional[Path] = None) -> int:
+                  ruta_diccionario: Optional[Path] = None,
+                  ruta_almacen: Optional[Path] = None,
+                  trimestre: Optional[str] = None,
+                  sugerencias: Optional[pd.DataFrame] = None) -> int:
     """
     Genera el Excel con las facturas procesadas.
     
     Crea dos hojas:
     - "Lineas": Detalle de todas las líneas de factura (antes "Facturas")
     - "Facturas": Cabeceras con una fila por factura
+    - "Sugerencias" (opcional): categorías propuestas para líneas pendientes
     
     Args:
         facturas: Lista de facturas procesadas
         ruta: Ruta donde guardar el archivo
         nombre_hoja: Nombre de la hoja de líneas (por compatibilidad)
         ruta_diccionario: Ruta al DiccionarioEmisorTitulo.xlsx
+        ruta_almacen: Si se indica, guarda también las facturas en el
+            almacén SQLite/Parquet (ver salidas.almacen)
+        trimestre: Trimestre para el almacén (por defecto, el del nombre
+            del Excel: Facturas_4T25.xlsx -> '4T25')
+        sugerencias: Tabla de nucleo.sugerencias.sugerencias_pendientes();
+            si tiene filas se escribe en la hoja "Sugerencias"
         
     Returns:
         Número de filas de líneas generadas
@@ -337,109 +626,271 @@ def generar_excel(facturas: List['Factura'], ruta: Path, nombre_hoja: str = 'Lin
     # Asegurar que el directorio existe
     ruta.parent.mkdir(parents=True, exist_ok=True)
     
-    # Contador para números temporales
-    contador_tmp = 1
-    
     # =========================================================================
     # HOJA 1: LINEAS (detalle de artículos)
     # =========================================================================
     filas_lineas = []
     
     for f in facturas:
-        if f.lineas:
-            for linea in f.lineas:
-                filas_lineas.append({
-                    '#': f.numero,
-                    'FECHA': f.fecha or '',
-                    'REF': f.referencia or '',
-                    'PROVEEDOR': f.proveedor,
-                    'ARTICULO': linea.articulo,
-                    'CATEGORIA': linea.categoria or 'PENDIENTE',
-                    'ID_CAT': linea.id_categoria or '',
-                    'CANTIDAD': linea.cantidad if linea.cantidad else '',
-                    'PRECIO_UD': linea.precio_ud if linea.precio_ud else '',
-                    'TIPO IVA': linea.iva,
-                    'BASE (€)': linea.base,
-                    'CUOTA IVA': linea.cuota_iva,
-                    'TOTAL FAC': f.total or '',
-                    'CUADRE': f.cuadre,
-                    'ARCHIVO': f.archivo
-                })
-        else:
-            # Factura sin líneas extraídas
-            filas_lineas.append({
-                '#': f.numero,
-                'FECHA': f.fecha or '',
-                'REF': f.referencia or '',
-                'PROVEEDOR': f.proveedor,
-                'ARTICULO': 'VER FACTURA',
-                'CATEGORIA': 'PENDIENTE',
-                'ID_CAT': '',
-                'CANTIDAD': '',
-                'PRECIO_UD': '',
-                'TIPO IVA': '',
-                'BASE (€)': f.total or '',
-                'CUOTA IVA': '',
-                'TOTAL FAC': f.total or '',
-                'CUADRE': f.cuadre,
-                'ARCHIVO': f.archivo
-            })
+        filas_lineas.extend(filas_lineas_factura(f))
     
     # =========================================================================
     # HOJA 2: FACTURAS (cabeceras, una fila por factura)
     # =========================================================================
-    filas_facturas = []
-    
-    for f in facturas:
-        # Extraer número de gestoría
-        num_gestoria, es_temporal = extraer_numero_gestoria(f.archivo, f.numero)
-        
-        if es_temporal or not num_gestoria:
-            num_gestoria = f"TMP{contador_tmp:03d}"
-            contador_tmp += 1
-        
-        # Buscar CUENTA y TITULO
-        cuenta, titulo = buscar_cuenta_titulo(f.proveedor, ruta_diccionario)
-        
-        # Formatear fecha
-        fecha_formateada = formatear_fecha_factura(f.fecha)
-        
-        # Construir observaciones
-        observaciones = f.cuadre or ''
-        if es_temporal:
-            if observaciones:
-                observaciones += ', SIN_NUM_GESTORIA'
-            else:
-                observaciones = 'SIN_NUM_GESTORIA'
-        
-        filas_facturas.append({
-            '#': num_gestoria,
-            'CUENTA': cuenta,
-            'TITULO': titulo,
-            'Fec.Fac.': fecha_formateada,
-            'REF': f.referencia or '',
-            'Total': f.total or '',
-            'OBSERVACIONES': observaciones
-        })
+    df_facturas = construir_df_facturas(facturas, ruta_diccionario)
     
     # =========================================================================
     # GUARDAR EXCEL CON AMBAS HOJAS
     # =========================================================================
     df_lineas = pd.DataFrame(filas_lineas)
-    df_facturas = pd.DataFrame(filas_facturas)
     
     # SANITIZAR antes de escribir (evita IllegalCharacterError)
     df_lineas = sanitizar_dataframe(df_lineas)
     df_facturas = sanitizar_dataframe(df_facturas)
+    if sugerencias is not None and not sugerencias.empty:
+        sugerencias = sanitizar_dataframe(sugerencias)
     
     with pd.ExcelWriter(ruta, engine='openpyxl') as writer:
         # Orden: Lineas primero, Facturas después (según preferencia B)
         df_lineas.to_excel(writer, index=False, sheet_name='Lineas')
         df_facturas.to_excel(writer, index=False, sheet_name='Facturas')
+        if sugerencias is not None and not sugerencias.empty:
+            sugerencias.to_excel(writer, index=False, sheet_name='Sugerencias')
+    
+    if ruta_almacen:
+        trimestre = trimestre or ruta.stem.replace('Facturas_', '')
+        guardar_en_almacen(facturas, ruta_almacen, trimestre)
     
     return len(filas_lineas)
 
 
+# ==============================================================================
+# ACTUALIZACIÓN INCREMENTAL DE UN EXCEL EXISTENTE
+# ==============================================================================
+
+def _leer_hoja(ws, columnas: List[str]) -> Tuple[List[str], List[list]]:
+    """
+    Lee cabecera y filas de una hoja; añade al final las columnas que falten.
+    
+    Returns:
+        (cabecera, filas) con cada fila del mismo largo que la cabecera
+    """
+    cabecera = [c.value for c in ws[1]] if ws.max_row >= 1 else []
+    while cabecera and cabecera[-1] is None:
+        cabecera.pop()
+    for columna in columnas:
+        if columna not in cabecera:
+            cabecera.append(columna)
+            ws.cell(row=1, column=len(cabecera), value=columna)
+    
+    ancho = len(cabecera)
+    filas = []
+    for valores in ws.iter_rows(min_row=2, max_col=ancho, values_only=True):
+        fila = list(valores) + [None] * (ancho - len(valores))
+        if any(v is not None for v in fila):
+            filas.append(fila)
+    return cabecera, filas
+
+
+def _fusionar_filas(cabecera: List[str], filas: List[list],
+                    nuevas: Dict[object, List[Dict]],
+                    clave_fila) -> Tuple[List[list], int]:
+    """
+    Sustituye las filas de cada clave reprocesada por sus filas nuevas.
+    
+    Las filas nuevas ocupan el sitio de las antiguas (las que no existían
+    van al final). Las columnas que no son del programa (ediciones
+    manuales) se conservan: la fila nueva k de una clave hereda las de
+    la fila antigua k de esa clave.
+    
+    Args:
+        cabecera: Columnas de la hoja
+        filas: Filas actuales (listas de valores)
+        nuevas: {clave: [fila_dict, ...]} en orden de proceso
+        clave_fila: Función fila_lista -> clave
+        
+    Returns:
+        (filas resultantes, número de claves reemplazadas)
+    """
+    posiciones = {nombre: i for i, nombre in enumerate(cabecera)}
+    antiguas: Dict[object, List[list]] = {}
+    for fila in filas:
+        clave = clave_fila(fila)
+        if clave in nuevas:
+            antiguas.setdefault(clave, []).append(fila)
+    
+    def construir(clave) -> List[list]:
+        previas = antiguas.get(clave, [])
+        resultado = []
+        for k, datos in enumerate(nuevas[clave]):
+            fila = list(previas[k]) if k < len(previas) else [None] * len(cabecera)
+            for nombre, valor in datos.items():
+                valor = sanitizar_para_excel(valor)
+                fila[posiciones[nombre]] = None if valor == '' else valor
+            resultado.append(fila)
+        return resultado
+    
+    resultado: List[list] = []
+    emitidas = set()
+    for fila in filas:
+        clave = clave_fila(fila)
+        if clave not in nuevas:
+            resultado.append(fila)
+        elif clave not in emitidas:
+            resultado.extend(construir(clave))
+            emitidas.add(clave)
+    for clave in nuevas:
+        if clave not in emitidas:
+            resultado.extend(construir(clave))
+    return resultado, len(antiguas)
+
+
+def _escribir_hoja(ws, filas_antiguas: List[list], filas_nuevas: List[list]) -> None:
+    """Escribe solo las celdas que cambian y borra las filas sobrantes."""
+    for i, fila in enumerate(filas_nuevas):
+        previa = filas_antiguas[i] if i < len(filas_antiguas) else None
+        for j, valor in enumerate(fila):
+            if previa is None or previa[j] != valor:
+                # ws.cell(..., value=None) no borra: hay que asignar .value
+                ws.cell(row=i + 2, column=j + 1).value = valor
+    sobrantes = len(filas_antiguas) - len(filas_nuevas)
+    if sobrantes > 0:
+        ws.delete_rows(len(filas_nuevas) + 2, sobrantes)
+
+
+def actualizar_excel(facturas: List['Factura'], ruta: Path,
+                     ruta_diccionario: Optional[Path] = None,
+                     ruta_almacen: Optional[Path] = None,
+                     trimestre: Optional[str] = None,
+                     sugerencias: Optional[pd.DataFrame] = None) -> Tuple[int, int]:
+    """
+    Actualiza un Excel trimestral existente con facturas reprocesadas.
+    
+    - Hoja "Lineas": se sustituyen las filas cuyo ARCHIVO se ha procesado.
+    - Hoja "Facturas": se sustituye la fila con el mismo número de
+      gestoría; las TMPxxx se identifican por TITULO + REF (cada fila
+      existente casa con una sola factura, en orden) y conservan su número.
+      Las facturas nuevas sin número siguen la numeración TMP, una por
+      factura. Si varias facturas comparten número de gestoría se
+      escriben todas (como en generar_excel) y se avisa por consola.
+    - Hoja "Sugerencias" (si se pasan): se sustituyen las filas de los
+      ARCHIVO procesados; las de las demás facturas se conservan.
+    - Las facturas que no existían se añaden al final.
+    - El resto de filas, las columnas añadidas a mano y el formato del
+      libro no se tocan.
+    
+    Si el Excel no existe se genera completo con generar_excel().
+    
+    Args:
+        facturas: Facturas procesadas en esta ejecución
+        ruta: Excel a actualizar
+        ruta_diccionario: Ruta al DiccionarioEmisorTitulo.xlsx
+        ruta_almacen: Si se indica, actualiza también el almacén
+        trimestre: Trimestre para el almacén
+        sugerencias: Tabla de nucleo.sugerencias.sugerencias_pendientes()
+            de las facturas procesadas (opcional)
+        
+    Returns:
+        (facturas reemplazadas, facturas nuevas)
+    """
+    ruta = Path(ruta)
+    if not ruta.exists():
+        generar_excel(facturas, ruta, ruta_diccionario=ruta_diccionario,
+                      ruta_almacen=ruta_almacen, trimestre=trimestre,
+                      sugerencias=sugerencias)
+        return 0, len(facturas)
+    
+    from openpyxl import load_workbook
+    libro = load_workbook(ruta)
+    
+    # Hoja "Lineas": clave ARCHIVO
+    ws_lineas = libro['Lineas'] if 'Lineas' in libro.sheetnames else libro.create_sheet('Lineas')
+    cabecera, filas = _leer_hoja(ws_lineas, COLUMNAS_LINEAS)
+    col_archivo = cabecera.index('ARCHIVO')
+    nuevas_lineas: Dict[object, List[Dict]] = {}
+    for f in facturas:
+        nuevas_lineas[f.archivo] = filas_lineas_factura(f)
+    resultado, _ = _fusionar_filas(cabecera, filas, nuevas_lineas,
+                                   lambda fila: fila[col_archivo])
+    _escribir_hoja(ws_lineas, filas, resultado)
+    
+    # Hoja "Facturas": clave número de gestoría (o TMP por TITULO + REF)
+    ws_facturas = libro['Facturas'] if 'Facturas' in libro.sheetnames else libro.create_sheet('Facturas')
+    cabecera, filas = _leer_hoja(ws_facturas, COLUMNAS_FACTURAS)
+    col_num = cabecera.index('#')
+    col_titulo = cabecera.index('TITULO')
+    col_ref = cabecera.index('REF')
+    
+    def clave_fila(fila: list):
+        return '' if fila[col_num] is None else str(fila[col_num])
+    
+    # TMP existentes por TITULO + REF, en orden de la hoja; cada factura
+    # reprocesada consume una y las que no casan reciben un TMP nuevo
+    # (dos facturas del mismo proveedor con la misma REF, o sin ella, son
+    # filas distintas)
+    tmp_existentes: Dict[Tuple[str, str], List[str]] = {}
+    contador_tmp = 1
+    for fila in filas:
+        numero = clave_fila(fila)
+        if numero.startswith('TMP'):
+            clave = (str(fila[col_titulo] or ''), str(fila[col_ref] or ''))
+            tmp_existentes.setdefault(clave, []).append(numero)
+            if numero[3:].isdigit():
+                contador_tmp = max(contador_tmp, int(numero[3:]) + 1)
+    
+    nuevas_facturas: Dict[object, List[Dict]] = {}
+    archivos_por_numero: Dict[str, List[str]] = {}
+    for f in facturas:
+        num_gestoria, es_temporal = extraer_numero_gestoria(f.archivo, f.numero)
+        if es_temporal or not num_gestoria:
+            _, titulo = buscar_cuenta_titulo(f.proveedor, ruta_diccionario)
+            libres = tmp_existentes.get((sanitizar_para_excel(titulo) or '',
+                                         sanitizar_para_excel(f.referencia) or ''))
+            if libres:
+                num_gestoria = libres.pop(0)
+            else:
+                num_gestoria = f"TMP{contador_tmp:03d}"
+                contador_tmp += 1
+        nuevas_facturas.setdefault(num_gestoria, []).append(
+            fila_cabecera_factura(f, num_gestoria, es_temporal, ruta_diccionario)
+        )
+        archivos_por_numero.setdefault(num_gestoria, []).append(f.archivo)
+    for num_gestoria, archivos in archivos_por_numero.items():
+        if len(archivos) > 1:
+            print(f"⚠️ Número de gestoría {num_gestoria} repetido en "
+                  f"{len(archivos)} facturas: {', '.join(archivos)}")
+    
+    # Cada fila antigua de un número casa con una factura nueva, en orden
+    filas_por_numero = Counter(clave_fila(fila) for fila in filas)
+    reemplazadas = sum(min(len(nuevas), filas_por_numero[numero])
+                       for numero, nuevas in nuevas_facturas.items())
+    resultado, _ = _fusionar_filas(cabecera, filas, nuevas_facturas, clave_fila)
+    _escribir_hoja(ws_facturas, filas, resultado)
+    
+    # Hoja "Sugerencias": clave ARCHIVO (una factura sin pendientes borra las suyas)
+    if sugerencias is not None:
+        if 'Sugerencias' in libro.sheetnames:
+            ws_sugerencias = libro['Sugerencias']
+        else:
+            ws_sugerencias = libro.create_sheet('Sugerencias')
+        cabecera, filas = _leer_hoja(ws_sugerencias, list(sugerencias.columns))
+        col_archivo = cabecera.index('ARCHIVO')
+        nuevas_sugerencias: Dict[object, List[Dict]] = {f.archivo: [] for f in facturas}
+        for fila in sugerencias.to_dict(orient='records'):
+            nuevas_sugerencias.setdefault(fila['ARCHIVO'], []).append(fila)
+        resultado, _ = _fusionar_filas(cabecera, filas, nuevas_sugerencias,
+                                       lambda fila: fila[col_archivo])
+        _escribir_hoja(ws_sugerencias, filas, resultado)
+    
+    libro.save(ruta)
+    
+    if ruta_almacen:
+        trimestre = trimestre or ruta.stem.replace('Facturas_', '')
+        guardar_en_almacen(facturas, ruta_almacen, trimestre, reemplazar_trimestre=False)
+    
+    return reemplazadas, len(facturas) - reemplazadas
+
+
 def generar_excel_resumen(facturas: List['Factura'], ruta: Path) -> int:
     """
     Genera un Excel resumen con totales por proveedor.
@@ -545,8 +996,6 @@ def generar_excel_multihoja(facturas: List['Factura'], ruta: Path) -> dict:
     """
     ruta.parent.mkdir(parents=True, exist_ok=True)
     
-    contador_tmp = 1
-    
     with pd.ExcelWriter(ruta, engine='openpyxl') as writer:
         # Hoja 1: Lineas (detalle)
         filas_lineas = []
@@ -586,31 +1035,7 @@ def generar_excel_multihoja(facturas: List['Factura'], ruta: Path) -> dict:
         df_lineas.to_excel(writer, index=False, sheet_name='Lineas')
         
         # Hoja 2: Facturas (cabeceras)
-        filas_facturas = []
-        for f in facturas:
-            num_gestoria, es_temporal = extraer_numero_gestoria(f.archivo, f.numero)
-            if es_temporal or not num_gestoria:
-                num_gestoria = f"TMP{contador_tmp:03d}"
-                contador_tmp += 1
-            
-            cuenta, titulo = buscar_cuenta_titulo(f.proveedor)
-            fecha_formateada = formatear_fecha_factura(f.fecha)
-            
-            observaciones = f.cuadre or ''
-            if es_temporal:
-                observaciones += ', SIN_NUM_GESTORIA' if observaciones else 'SIN_NUM_GESTORIA'
-            
-            filas_facturas.append({
-                '#': num_gestoria,
-                'CUENTA': cuenta,
-                'TITULO': titulo,
-                'Fec.Fac.': fecha_formateada,
-                'REF': f.referencia or '',
-                'Total': f.total or '',
-                'OBSERVACIONES': observaciones
-            })
-        
-        df_facturas = pd.DataFrame(filas_facturas)
+        df_facturas = construir_df_facturas(facturas)
         df_facturas = sanitizar_dataframe(df_facturas)  # SANITIZAR
         df_facturas.to_excel(writer, index=False, sheet_name='Facturas')
         
@@ -646,7 +1071,7 @@ def generar_excel_multihoja(facturas: List['Factura'], ruta: Path) -> dict:
     
     return {
         'Lineas': len(filas_lineas),
-        'Facturas': len(filas_facturas),
+        'Facturas': len(df_facturas),
         'Resumen': len(filas_resumen),
         'Errores': len(filas_errores)
     }
@@ -0,0 +1,124 @@
+"""
+Salida JSONL (una línea JSON por factura) para integraciones.
+
+Cada factura se escribe en cuanto termina y el archivo se vacía a disco
+línea a línea, de modo que otras herramientas pueden seguirlo (tail -f)
+durante lotes largos sin esperar al Excel final.
+
+Formato de cada línea:
+    {
+      "version_esquema": 1,
+      "posicion": 3,                    # orden del archivo en el lote
+      "archivo": "...", "numero": "...", "proveedor": "...",
+      "cif": "...", "iban": "...", "fecha": "...", "referencia": "...",
+      "total": 123.45, "total_calculado": 102.02, "cuadre": "OK",
+      "errores": [...], "num_lineas": 2,
+      "lineas": [{"codigo": ..., "articulo": ..., ...}],   # LineaFactura.to_dict()
+      "avisos": [...],                  # avisos del extractor (no errores)
+      "extractor": "CERES", "metodo_pdf": "pypdf", "ruta": "...",
+      "tiempos": {"pdf:pypdf": 0.05, "etapa:pdf": 0.06,
+                  "etapa:lineas": 0.01, "etapa:categorizacion": 0.02,
+                  ..., "salida": 0.001},
+      "procesado_at": "2026-10-19T10:00:00"
+    }
+
+tiempos (segundos): 'pdf:<metodo>' por cada método PDF probado,
+'etapa:<nombre>' por cada etapa de procesar_factura (extractor, pdf,
+cabecera, lineas, categorizacion, validacion) y 'salida' para construir
+este registro. El Excel se genera al final del lote y no tiene tiempo
+por factura.
+
+Los campos base salen de Factura.to_dict(); si se añaden campos nuevos
+se sube VERSION_ESQUEMA_JSONL solo cuando cambie el significado de uno
+existente (añadir claves no rompe a los consumidores).
+
+Uso:
+    with EscritorJSONL(Path('outputs/facturas.jsonl')) as salida:
+        for factura in ...:
+            salida.escribir(factura)
+
+Factura.from_dict() reconstruye la factura desde un registro (lo usa la
+fusión de shards).
+
+Creado: 19/10/2026
+"""
+from pathlib import Path
+from typing import Any, Dict, Optional, TYPE_CHECKING
+import json
+import time
+
+if TYPE_CHECKING:
+    from nucleo.factura import Factura
+
+
+VERSION_ESQUEMA_JSONL = 1
+
+
+def registro_factura(factura: 'Factura', posicion: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Construye el registro JSONL de una factura.
+
+    Args:
+        factura: Factura procesada
+        posicion: Posición del archivo en el lote (opcional)
+
+    Returns:
+        Diccionario serializable a JSON
+    """
+    registro: Dict[str, Any] = {'version_esquema': VERSION_ESQUEMA_JSONL}
+    if posicion is not None:
+        registro['posicion'] = posicion
+    registro.update(factura.to_dict())
+    registro['avisos'] = list(factura.avisos)
+    registro['extractor'] = factura.extractor
+    registro['metodo_pdf'] = factura.metodo_pdf
+    registro['ruta'] = str(factura.ruta) if factura.ruta else None
+    registro['tiempos'] = {clave: round(valor, 4) for clave, valor in factura.tiempos.items()}
+    registro['procesado_at'] = factura.procesado_at
+    return registro
+
+
+class EscritorJSONL:
+    """
+    Escribe facturas en JSONL, una por línea, vaciando a disco cada una.
+
+    Args:
+        ruta: Archivo de salida (se sobrescribe)
+    """
+
+    def __init__(self, ruta: Path):
+        self.ruta = Path(ruta)
+        self.escritas = 0
+        self._archivo = None
+
+    def __enter__(self) -> 'EscritorJSONL':
+        self.abrir()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.cerrar()
+
+    def abrir(self) -> None:
+        self.ruta.parent.mkdir(parents=True, exist_ok=True)
+        self._archivo = open(self.ruta, 'w', encoding='utf-8')
+
+    def escribir(self, factura: 'Factura', posicion: Optional[int] = None) -> None:
+        """
+        Escribe una factura y vacía el buffer.
+
+        Args:
+            factura: Factura procesada
+            posicion: Posición del archivo en el lote (opcional)
+        """
+        inicio = time.perf_counter()
+        registro = registro_factura(factura, posicion)
+        registro['tiempos']['salida'] = round(time.perf_counter() - inicio, 4)
+        linea = json.dumps(registro, ensure_ascii=False, default=str)
+        self._archivo.write(linea + '\n')
+        self._archivo.flush()
+        self.escritas += 1
+
+    def cerrar(self) -> None:
+        if self._archivo is not None:
+            self._archivo.close()
+            self._archivo = None
@@ -2,9 +2,16 @@
 Módulo de generación de logs.
 
 Genera logs detallados del procesamiento de facturas.
+
+CAMBIOS v5.11 (19/10/2026):
+- EstadisticasEjecucion: acumulador que se actualiza factura a factura
+  (registrar) en una sola pasada. generar_log, generar_log_errores,
+  generar_log_detallado e imprimir_resumen se generan a partir de él y
+  no necesitan conservar las facturas en memoria. Siguen aceptando
+  también la lista de facturas, con el mismo resultado que antes.
 """
 from pathlib import Path
-from typing import List, TYPE_CHECKING
+from typing import Dict, List, Set, Tuple, Union, TYPE_CHECKING
 from datetime import datetime
 from config.settings import VERSION
 
@@ -12,15 +19,180 @@ if TYPE_CHECKING:
     from nucleo.factura import Factura
 
 
-def generar_log(facturas: List['Factura'], ruta: Path) -> None:
+# ==============================================================================
+# ACUMULADOR DE ESTADÍSTICAS
+# ==============================================================================
+
+class EstadisticasEjecucion:
+    """
+    Estadísticas de una ejecución, actualizadas al terminar cada factura.
+    
+    Solo guarda lo que necesitan los logs (contadores, CIF/IBAN vistos,
+    artículos pendientes, resumen por proveedor y una ficha corta de las
+    facturas con errores), no las facturas.
+    
+    Uso:
+        stats = EstadisticasEjecucion()
+        for factura in ...:
+            stats.registrar(factura)
+        generar_log(stats, ruta)
+        imprimir_resumen(stats)
+    
+    Args:
+        detallado: Guardar también el bloque de texto de cada factura
+            para generar_log_detallado()
+    """
+    
+    def __init__(self, detallado: bool = False):
+        self.detallado = detallado
+        self.total = 0
+        self.con_cif = 0
+        self.con_iban = 0
+        self.con_lineas = 0
+        self.total_lineas = 0
+        self.importe_total = 0.0
+        self.cuadres: Dict[str, int] = {
+            'OK': 0, 'DESCUADRE': 0, 'SIN_TOTAL': 0, 'SIN_LINEAS': 0
+        }
+        # Primer proveedor visto para cada IBAN/CIF (en orden de llegada)
+        self.ibans: Dict[str, str] = {}
+        self.cifs: Dict[str, str] = {}
+        self.lineas_errores: List[str] = []
+        self.lineas_avisos: List[str] = []
+        self.lineas_descuadre: List[str] = []
+        self.pendientes: Set[Tuple[str, str]] = set()
+        self.proveedores: Dict[str, Dict[str, float]] = {}
+        self.fichas_error: List[Dict] = []
+        self.bloques_detalle: List[str] = []
+    
+    def registrar(self, fa: 'Factura') -> None:
+        """
+        Añade una factura terminada a las estadísticas.
+        
+        Args:
+            fa: Factura procesada
+        """
+        num_lineas = len(fa.lineas)
+        self.total += 1
+        self.con_cif += 1 if fa.cif else 0
+        self.con_iban += 1 if fa.iban else 0
+        self.con_lineas += 1 if fa.lineas else 0
+        self.total_lineas += num_lineas
+        self.importe_total += fa.total or 0
+        
+        es_descuadre = bool(fa.cuadre and fa.cuadre.startswith('DESCUADRE'))
+        if es_descuadre:
+            self.cuadres['DESCUADRE'] += 1
+        elif fa.cuadre in self.cuadres:
+            self.cuadres[fa.cuadre] += 1
+        
+        if fa.iban and fa.iban not in self.ibans:
+            self.ibans[fa.iban] = fa.proveedor
+        if fa.cif and fa.cif not in self.cifs:
+            self.cifs[fa.cif] = fa.proveedor
+        
+        if fa.errores:
+            self.lineas_errores.append(f"  {fa.archivo}: {', '.join(fa.errores)}\n")
+        for aviso in fa.avisos:
+            self.lineas_avisos.append(f"  {fa.archivo}: {aviso}\n")
+        if es_descuadre:
+            self.lineas_descuadre.append(
+                f"  {fa.archivo}: {fa.cuadre} (Total: {fa.total}, "
+                f"Calculado: {fa.total_calculado:.2f})\n"
+            )
+        
+        for linea in fa.lineas:
+            if not linea.categoria or linea.categoria == 'PENDIENTE':
+                self.pendientes.add((fa.proveedor, linea.articulo))
+        
+        prov = fa.proveedor or 'DESCONOCIDO'
+        stats = self.proveedores.setdefault(
+            prov, {'total': 0, 'ok': 0, 'lineas': 0, 'importe': 0.0}
+        )
+        stats['total'] += 1
+        stats['lineas'] += num_lineas
+        stats['importe'] += fa.total or 0
+        if fa.cuadre == 'OK':
+            stats['ok'] += 1
+        
+        if fa.tiene_errores or fa.cuadre != 'OK':
+            self.fichas_error.append({
+                'archivo': fa.archivo,
+                'proveedor': fa.proveedor,
+                'fecha': fa.fecha,
+                'total': fa.total,
+                'cuadre': fa.cuadre,
+                'errores': list(fa.errores),
+                'num_lineas': num_lineas,
+                'ruta': fa.ruta,
+            })
+        
+        if self.detallado:
+            self.bloques_detalle.append(_bloque_detalle(fa))
+    
+    @classmethod
+    def desde_facturas(cls, facturas: List['Factura'],
+                       detallado: bool = False) -> 'EstadisticasEjecucion':
+        """Construye las estadísticas a partir de una lista de facturas."""
+        stats = cls(detallado=detallado)
+        for fa in facturas:
+            stats.registrar(fa)
+        return stats
+
+
+FacturasOEstadisticas = Union[List['Factura'], EstadisticasEjecucion]
+
+
+def _como_estadisticas(datos: FacturasOEstadisticas,
+                       detallado: bool = False) -> EstadisticasEjecucion:
+    if isinstance(datos, EstadisticasEjecucion):
+        return datos
+    return EstadisticasEjecucion.desde_facturas(datos, detallado=detallado)
+
+
+def _bloque_detalle(fa: 'Factura') -> str:
+    """Bloque del log detallado de una factura (sin la cabecera FACTURA i/N)."""
+    partes = [
+        f"{fa.archivo}\n",
+        f"{'#'*80}\n",
+        f"  Número:    {fa.numero}\n",
+        f"  Proveedor: {fa.proveedor}\n",
+        f"  CIF:       {fa.cif}\n",
+        f"  IBAN:      {fa.iban}\n",
+        f"  Fecha:     {fa.fecha}\n",
+        f"  Referencia: {fa.referencia}\n",
+        f"  Total:     {fa.total}\n",
+        f"  Cuadre:    {fa.cuadre}\n",
+        f"  Método PDF: {fa.metodo_pdf}\n",
+        f"  Errores:   {fa.errores}\n",
+        f"  Avisos:    {fa.avisos}\n",
+        f"\n  LÍNEAS ({len(fa.lineas)}):\n",
+    ]
+    for j, linea in enumerate(fa.lineas, 1):
+        partes.append(f"    {j}. {linea.articulo}\n")
+        partes.append(f"       Código: {linea.codigo}, IVA: {linea.iva}%, "
+                      f"Base: {linea.base}€, Categoría: {linea.categoria}\n")
+    
+    if fa.texto_raw:
+        partes.append(f"\n  TEXTO RAW (primeros 500 chars):\n")
+        partes.append(f"    {fa.texto_raw[:500]}...\n")
+    return ''.join(partes)
+
+
+# ==============================================================================
+# LOGS
+# ==============================================================================
+
+def generar_log(facturas: FacturasOEstadisticas, ruta: Path) -> None:
     """
     Genera log detallado del procesamiento.
     
     Args:
-        facturas: Lista de facturas procesadas
+        facturas: Lista de facturas procesadas o EstadisticasEjecucion
         ruta: Ruta donde guardar el log
     """
     ruta.parent.mkdir(parents=True, exist_ok=True)
+    stats = _como_estadisticas(facturas)
     
     with open(ruta, 'w', encoding='utf-8') as f:
         # Cabecera
@@ -29,11 +201,10 @@ def generar_log(facturas: List['Factura'], ruta: Path) -> None:
         f.write(f"Fecha: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
         
         # Estadísticas generales
-        total = len(facturas)
-        con_cif = sum(1 for fa in facturas if fa.cif)
-        con_iban = sum(1 for fa in facturas if fa.iban)
-        con_lineas = sum(1 for fa in facturas if fa.lineas)
-        total_lineas = sum(len(fa.lineas) for fa in facturas)
+        total = stats.total
+        con_cif = stats.con_cif
+        con_iban = stats.con_iban
+        con_lineas = stats.con_lineas
         
         f.write(f"RESUMEN:\n")
         f.write(f"  Facturas procesadas: {total}\n")
@@ -47,141 +218,113 @@ def generar_log(facturas: List['Factura'], ruta: Path) -> None:
             f.write(f"  Con IBAN extraído:   {con_iban}\n")
             f.write(f"  Con líneas extraídas: {con_lineas}\n")
         
-        f.write(f"  Total líneas:        {total_lineas}\n")
+        f.write(f"  Total líneas:        {stats.total_lineas}\n")
         
         # Estadísticas de cuadre
-        cuadre_ok = sum(1 for fa in facturas if fa.cuadre == 'OK')
-        cuadre_descuadre = sum(1 for fa in facturas if fa.cuadre and fa.cuadre.startswith('DESCUADRE'))
-        cuadre_sin_total = sum(1 for fa in facturas if fa.cuadre == 'SIN_TOTAL')
-        cuadre_sin_lineas = sum(1 for fa in facturas if fa.cuadre == 'SIN_LINEAS')
+        cuadre_ok = stats.cuadres['OK']
         
         f.write(f"\n  VALIDACIÓN CUADRE:\n")
         f.write(f"    OK:          {cuadre_ok}")
         if total > 0:
             f.write(f" ({100*cuadre_ok/total:.1f}%)")
         f.write("\n")
-        f.write(f"    DESCUADRE:   {cuadre_descuadre}\n")
-        f.write(f"    SIN_TOTAL:   {cuadre_sin_total}\n")
-        f.write(f"    SIN_LINEAS:  {cuadre_sin_lineas}\n")
+        f.write(f"    DESCUADRE:   {stats.cuadres['DESCUADRE']}\n")
+        f.write(f"    SIN_TOTAL:   {stats.cuadres['SIN_TOTAL']}\n")
+        f.write(f"    SIN_LINEAS:  {stats.cuadres['SIN_LINEAS']}\n")
         
         # IBANs encontrados
         f.write(f"\n{'='*60}\n")
         f.write(f"IBANs ENCONTRADOS:\n")
-        ibans_vistos = set()
-        for fa in facturas:
-            if fa.iban and fa.iban not in ibans_vistos:
-                f.write(f"  {fa.proveedor}: {fa.iban}\n")
-                ibans_vistos.add(fa.iban)
+        for iban, proveedor in stats.ibans.items():
+            f.write(f"  {proveedor}: {iban}\n")
         
         # CIFs encontrados
         f.write(f"\n{'='*60}\n")
         f.write(f"CIFs ENCONTRADOS:\n")
-        cifs_vistos = set()
-        for fa in facturas:
-            if fa.cif and fa.cif not in cifs_vistos:
-                f.write(f"  {fa.proveedor}: {fa.cif}\n")
-                cifs_vistos.add(fa.cif)
+        for cif, proveedor in stats.cifs.items():
+            f.write(f"  {proveedor}: {cif}\n")
         
         # Facturas con errores
         f.write(f"\n{'='*60}\n")
         f.write(f"FACTURAS CON ERRORES:\n")
-        for fa in facturas:
-            if fa.errores:
-                f.write(f"  {fa.archivo}: {', '.join(fa.errores)}\n")
+        f.writelines(stats.lineas_errores)
         
         # Facturas con descuadre
         f.write(f"\n{'='*60}\n")
         f.write(f"FACTURAS CON DESCUADRE:\n")
-        for fa in facturas:
-            if fa.cuadre and fa.cuadre.startswith('DESCUADRE'):
-                f.write(f"  {fa.archivo}: {fa.cuadre} (Total: {fa.total}, Calculado: {fa.total_calculado:.2f})\n")
+        f.writelines(stats.lineas_descuadre)
+        
+        # Avisos de los extractores (no cuentan como errores)
+        f.write(f"\n{'='*60}\n")
+        f.write(f"AVISOS DE EXTRACTORES:\n")
+        f.writelines(stats.lineas_avisos)
         
         # Artículos pendientes de categorizar
         f.write(f"\n{'='*60}\n")
         f.write(f"ARTÍCULOS PENDIENTES DE CATEGORIZAR:\n")
-        pendientes = set()
-        for fa in facturas:
-            for linea in fa.lineas:
-                if not linea.categoria or linea.categoria == 'PENDIENTE':
-                    pendientes.add((fa.proveedor, linea.articulo))
-        for prov, art in sorted(pendientes):
+        for prov, art in sorted(stats.pendientes):
             f.write(f"  [{prov}] {art}\n")
         
         # Estadísticas por proveedor
         f.write(f"\n{'='*60}\n")
         f.write(f"ESTADÍSTICAS POR PROVEEDOR:\n")
-        proveedores = {}
-        for fa in facturas:
-            prov = fa.proveedor or 'DESCONOCIDO'
-            if prov not in proveedores:
-                proveedores[prov] = {'total': 0, 'ok': 0, 'lineas': 0, 'importe': 0.0}
-            proveedores[prov]['total'] += 1
-            proveedores[prov]['lineas'] += len(fa.lineas)
-            proveedores[prov]['importe'] += fa.total or 0
-            if fa.cuadre == 'OK':
-                proveedores[prov]['ok'] += 1
-        
-        for prov, stats in sorted(proveedores.items()):
-            pct = 100 * stats['ok'] / stats['total'] if stats['total'] > 0 else 0
-            f.write(f"  {prov}: {stats['ok']}/{stats['total']} OK ({pct:.0f}%), "
-                    f"{stats['lineas']} líneas, {stats['importe']:.2f}€\n")
-
-
-def generar_log_errores(facturas: List['Factura'], ruta: Path) -> int:
+        for prov, datos in sorted(stats.proveedores.items()):
+            pct = 100 * datos['ok'] / datos['total'] if datos['total'] > 0 else 0
+            f.write(f"  {prov}: {datos['ok']}/{datos['total']} OK ({pct:.0f}%), "
+                    f"{datos['lineas']} líneas, {datos['importe']:.2f}€\n")
+
+
+def generar_log_errores(facturas: FacturasOEstadisticas, ruta: Path) -> int:
     """
     Genera log solo con errores para revisión rápida.
     
     Args:
-        facturas: Lista de facturas procesadas
+        facturas: Lista de facturas procesadas o EstadisticasEjecucion
         ruta: Ruta donde guardar el log
         
     Returns:
         Número de facturas con errores
     """
     ruta.parent.mkdir(parents=True, exist_ok=True)
-    
-    errores = []
-    for fa in facturas:
-        if fa.tiene_errores or fa.cuadre != 'OK':
-            errores.append(fa)
+    stats = _como_estadisticas(facturas)
+    errores = stats.fichas_error
     
     with open(ruta, 'w', encoding='utf-8') as f:
         f.write(f"FACTURAS CON ERRORES - {datetime.now().strftime('%Y-%m-%d %H:%M')}\n")
         f.write(f"{'='*60}\n")
-        f.write(f"Total: {len(errores)} de {len(facturas)} facturas\n\n")
+        f.write(f"Total: {len(errores)} de {stats.total} facturas\n\n")
         
         for fa in errores:
             f.write(f"\n{'-'*40}\n")
-            f.write(f"Archivo: {fa.archivo}\n")
-            f.write(f"Proveedor: {fa.proveedor}\n")
-            f.write(f"Fecha: {fa.fecha}\n")
-            f.write(f"Total: {fa.total}\n")
-            f.write(f"Cuadre: {fa.cuadre}\n")
-            if fa.errores:
-                f.write(f"Errores: {', '.join(fa.errores)}\n")
-            f.write(f"Líneas extraídas: {len(fa.lineas)}\n")
-            if fa.ruta:
-                f.write(f"Ruta: {fa.ruta}\n")
+            f.write(f"Archivo: {fa['archivo']}\n")
+            f.write(f"Proveedor: {fa['proveedor']}\n")
+            f.write(f"Fecha: {fa['fecha']}\n")
+            f.write(f"Total: {fa['total']}\n")
+            f.write(f"Cuadre: {fa['cuadre']}\n")
+            if fa['errores']:
+                f.write(f"Errores: {', '.join(fa['errores'])}\n")
+            f.write(f"Líneas extraídas: {fa['num_lineas']}\n")
+            if fa['ruta']:
+                f.write(f"Ruta: {fa['ruta']}\n")
     
     return len(errores)
 
 
-def imprimir_resumen(facturas: List['Factura']) -> None:
+def imprimir_resumen(facturas: FacturasOEstadisticas) -> None:
     """
     Imprime resumen en consola.
     
     Args:
-        facturas: Lista de facturas procesadas
+        facturas: Lista de facturas procesadas o EstadisticasEjecucion
     """
-    total = len(facturas)
+    stats = _como_estadisticas(facturas)
+    total = stats.total
     if total == 0:
         print("No se procesaron facturas.")
         return
     
-    ok = sum(1 for f in facturas if f.cuadre == 'OK')
-    con_lineas = sum(1 for f in facturas if f.lineas)
-    total_lineas = sum(len(f.lineas) for f in facturas)
-    importe_total = sum(f.total or 0 for f in facturas)
+    ok = stats.cuadres['OK']
+    con_lineas = stats.con_lineas
     
     print(f"\n{'='*50}")
     print(f"RESUMEN PROCESAMIENTO")
@@ -189,47 +332,30 @@ def imprimir_resumen(facturas: List['Factura']) -> None:
     print(f"  Facturas:     {total}")
     print(f"  Cuadre OK:    {ok} ({100*ok/total:.1f}%)")
     print(f"  Con líneas:   {con_lineas} ({100*con_lineas/total:.1f}%)")
-    print(f"  Total líneas: {total_lineas}")
-    print(f"  Importe:      {importe_total:,.2f}€")
+    print(f"  Total líneas: {stats.total_lineas}")
+    print(f"  Importe:      {stats.importe_total:,.2f}€")
     print(f"{'='*50}\n")
 
 
-def generar_log_detallado(facturas: List['Factura'], ruta: Path) -> None:
+def generar_log_detallado(facturas: FacturasOEstadisticas, ruta: Path) -> None:
     """
     Genera log muy detallado con el contenido de cada factura.
     Útil para debugging.
     
     Args:
-        facturas: Lista de facturas procesadas
+        facturas: Lista de facturas procesadas o EstadisticasEjecucion
+            creada con detallado=True
         ruta: Ruta donde guardar el log
     """
     ruta.parent.mkdir(parents=True, exist_ok=True)
+    stats = _como_estadisticas(facturas, detallado=True)
+    bloques = stats.bloques_detalle
     
     with open(ruta, 'w', encoding='utf-8') as f:
         f.write(f"LOG DETALLADO - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
         f.write(f"{'='*80}\n\n")
         
-        for i, fa in enumerate(facturas, 1):
+        for i, bloque in enumerate(bloques, 1):
             f.write(f"\n{'#'*80}\n")
-            f.write(f"FACTURA {i}/{len(facturas)}: {fa.archivo}\n")
-            f.write(f"{'#'*80}\n")
-            f.write(f"  Número:    {fa.numero}\n")
-            f.write(f"  Proveedor: {fa.proveedor}\n")
-            f.write(f"  CIF:       {fa.cif}\n")
-            f.write(f"  IBAN:      {fa.iban}\n")
-            f.write(f"  Fecha:     {fa.fecha}\n")
-            f.write(f"  Referencia: {fa.referencia}\n")
-            f.write(f"  Total:     {fa.total}\n")
-            f.write(f"  Cuadre:    {fa.cuadre}\n")
-            f.write(f"  Método PDF: {fa.metodo_pdf}\n")
-            f.write(f"  Errores:   {fa.errores}\n")
-            
-            f.write(f"\n  LÍNEAS ({len(fa.lineas)}):\n")
-            for j, linea in enumerate(fa.lineas, 1):
-                f.write(f"    {j}. {linea.articulo}\n")
-                f.write(f"       Código: {linea.codigo}, IVA: {linea.iva}%, "
-                        f"Base: {linea.base}€, Categoría: {linea.categoria}\n")
-            
-            if fa.texto_raw:
-                f.write(f"\n  TEXTO RAW (primeros 500 chars):\n")
-                f.write(f"    {fa.texto_raw[:500]}...\n")
+            f.write(f"FACTURA {i}/{len(bloques)}: ")
+            f.write(bloque)
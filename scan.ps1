@@ -29,35 +29,57 @@ if (Test-Path $errorsPath) { Remove-Item $errorsPath }
 
 $ok = 0; $ko = 0
 
+# Un solo proceso de la CLI en modo servidor (--serve) para todos los ficheros:
+# el interprete y las librerias PDF se cargan una vez, no una por factura.
+$resolvedFiles = @()
+$requests = @()
 foreach ($f in $Files) {
   $resolved = Resolve-Path $f -ErrorAction SilentlyContinue
   if (-not $resolved) { Err ("No existe: {0}" -f $f); $ko++; continue }
+  $requests += (@{ id = $resolvedFiles.Count; pdf = "$resolved" } | ConvertTo-Json -Compress)
+  $resolvedFiles += "$resolved"
+}
 
-  Write-Host ("`n--- SCAN: {0} ---" -f $resolved) -ForegroundColor Green
-
-  $json = & python "src\facturas\cli.py" "$resolved" --pretty 2>&1
+$byId = @{}
+$code = 0
+if ($resolvedFiles.Count -gt 0) {
+  $env:PYTHONIOENCODING = "utf-8"
+  $OutputEncoding = [System.Text.Encoding]::UTF8
+  [Console]::OutputEncoding = [System.Text.Encoding]::UTF8
+  Push-Location $PSScriptRoot
+  $responses = $requests | & python -m src.facturas.cli --serve
   $code = $LASTEXITCODE
+  Pop-Location
+  foreach ($line in $responses) {
+    try { $r = $line | ConvertFrom-Json; $byId[[int]$r.id] = $r } catch { }
+  }
+}
 
-  $json | Write-Output
-
+for ($i = 0; $i -lt $resolvedFiles.Count; $i++) {
+  $resolved = $resolvedFiles[$i]
   $leaf = Split-Path -Leaf $resolved
-  $out  = Join-Path $OutDir ($leaf + ".scan.json")
-  $json | Out-File -FilePath $out -Encoding utf8
+  $r = $byId[$i]
 
-  $trim = $json.Trim()
-  $isJson = ($trim.StartsWith("{") -and $trim.EndsWith("}"))
+  Write-Host ("`n--- SCAN: {0} ---" -f $resolved) -ForegroundColor Green
 
-  if ($code -eq 0 -and $isJson) {
+  if ($r -and $r.ok) {
+    $json = $r.result | ConvertTo-Json -Depth 8
+    $json | Write-Output
+    $out  = Join-Path $OutDir ($leaf + ".scan.json")
+    $json | Out-File -FilePath $out -Encoding utf8
     $ok++
-    ($trim -replace "\r?\n"," ") | Out-File -Append -FilePath $jsonlPath -Encoding utf8
+    ($r.result | ConvertTo-Json -Depth 8 -Compress) | Out-File -Append -FilePath $jsonlPath -Encoding utf8
+    $fileCode = 0
   } else {
     $ko++
-    Warn ("Falla en: {0} (exit={1}, json={2})" -f $leaf, $code, $isJson)
-    $entry = @{ file=$leaf; exit=$code; output=$json } | ConvertTo-Json -Depth 4
+    $fileCode = 1
+    $msg = if ($r) { $r.error } else { "Sin respuesta del servidor (exit=$code)" }
+    Warn ("Falla en: {0} ({1})" -f $leaf, $msg)
+    $entry = @{ file=$leaf; exit=$fileCode; output=$msg } | ConvertTo-Json -Depth 4
     ($entry -replace "\r?\n"," ") | Out-File -Append -FilePath $errorsPath -Encoding utf8
   }
 
-  ("[{0}] {1} exit={2}" -f (Get-Date -Format 'yyyy-MM-dd HH:mm:ss'), $leaf, $code) | `
+  ("[{0}] {1} exit={2}" -f (Get-Date -Format 'yyyy-MM-dd HH:mm:ss'), $leaf, $fileCode) | `
     Out-File -Append -FilePath $logPath -Encoding utf8
 }
 
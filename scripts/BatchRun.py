@@ -1,61 +1,100 @@
-import os, json, argparse, csv, subprocess, sys
+import os, argparse, csv, sys
 from collections import defaultdict
+from pathlib import Path
 
-def run_cli(pdf, outdir):
-    cmd = [sys.executable, "-m", "src.facturas.cli", pdf, "--lines", "--no-reconcile", "--outdir", outdir]
-    subprocess.run(cmd, check=False, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+REPO_ROOT = Path(__file__).resolve().parents[1]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
 
-def find_metrics(outdir):
-    for f in os.listdir(outdir):
-        if f.startswith("metrics_") and f.endswith(".json"):
-            with open(os.path.join(outdir, f), "r", encoding="utf-8") as fh:
-                yield json.load(fh)
+from src.facturas.cli_pool import ScanPool, default_workers
 
-def aggregate(metrics_iter):
-    byprov = defaultdict(lambda: {"docs":0, "lineas":0, "ok":0, "parsed_sum":0.0, "flags_sum":0.0})
-    rows = []
-    for m in metrics_iter:
+def metrics_from_result(result):
+    # Métricas de una factura a partir del JSON de la CLI (--lines):
+    #   ParsedRatio: filas con BaseImponible / filas
+    #   FlagsRatio:  filas a revisar (sin BaseImponible o marcadas como portes) / filas
+    hdr = result.get("Header", result)
+    rows = result.get("Lineas", [])
+    n = len(rows)
+    parsed = sum(1 for r in rows if r.get("BaseImponible"))
+    flags = sum(1 for r in rows if not r.get("BaseImponible") or r.get("EsPortes"))
+    return {
+        "Archivo": hdr.get("Archivo", ""),
+        "Proveedor": hdr.get("Proveedor", ""),
+        "Lineas": n,
+        "ParsedRatio": round(parsed / n, 3) if n else 0.0,
+        "FlagsRatio": round(flags / n, 3) if n else 0.0,
+    }
+
+def run_cli_all(pdfs, outdir, workers):
+    # Equivale a `cli <pdf> --lines --no-reconcile --outdir <outdir>` por fichero,
+    # en workers calientes (uno por núcleo); devuelve las métricas según terminan
+    requests = [{"pdf": pdf, "lines": True, "no_reconcile": True, "outdir": outdir} for pdf in pdfs]
+    with ScanPool(workers=min(workers, len(requests)) or 1) as pool:
+        for _, response in pool.run(requests):
+            if response.get("ok"):
+                yield metrics_from_result(response["result"])
+
+class ProviderRanking:
+    """Ranking por proveedor acumulado según llegan las métricas."""
+
+    def __init__(self):
+        self.byprov = defaultdict(lambda: {"docs":0, "lineas":0, "ok":0, "parsed_sum":0.0, "flags_sum":0.0})
+        self.rows = []
+
+    def add(self, m):
         prov = m.get("Proveedor") or "DESCONOCIDO"
-        byprov[prov]["docs"] += 1
-        byprov[prov]["lineas"] += int(m.get("Lineas",0))
+        d = self.byprov[prov]
+        d["docs"] += 1
+        d["lineas"] += int(m.get("Lineas",0))
         ok = 1 if float(m.get("ParsedRatio",0)) >= 0.8 else 0
-        byprov[prov]["ok"] += ok
-        byprov[prov]["parsed_sum"] += float(m.get("ParsedRatio",0))
-        byprov[prov]["flags_sum"] += float(m.get("FlagsRatio",0))
-        rows.append(m)
-    agg = []
-    for prov, d in byprov.items():
-        docs = d["docs"]
-        agg.append({
-            "Proveedor": prov,
-            "Docs": docs,
-            "ParsedRatioMedio": round(d["parsed_sum"]/docs, 3),
-            "FlagsRatioMedio": round(d["flags_sum"]/docs, 3),
-            "OK>=0.8": d["ok"],
-            "LineasTotales": d["lineas"],
-        })
-    agg.sort(key=lambda r: (-r["Docs"], -r["ParsedRatioMedio"]))
-    return rows, agg
+        d["ok"] += ok
+        d["parsed_sum"] += float(m.get("ParsedRatio",0))
+        d["flags_sum"] += float(m.get("FlagsRatio",0))
+        self.rows.append(m)
+
+    def ranking(self):
+        agg = []
+        for prov, d in self.byprov.items():
+            docs = d["docs"]
+            agg.append({
+                "Proveedor": prov,
+                "Docs": docs,
+                "ParsedRatioMedio": round(d["parsed_sum"]/docs, 3),
+                "FlagsRatioMedio": round(d["flags_sum"]/docs, 3),
+                "OK>=0.8": d["ok"],
+                "LineasTotales": d["lineas"],
+            })
+        agg.sort(key=lambda r: (-r["Docs"], -r["ParsedRatioMedio"]))
+        return agg
+
+def aggregate(metrics_iter):
+    ranking = ProviderRanking()
+    for m in metrics_iter:
+        ranking.add(m)
+    return ranking.rows, ranking.ranking()
 
 def main():
     ap = argparse.ArgumentParser()
     ap.add_argument("--input", required=True, help="Carpeta con PDFs/JPGs")
     ap.add_argument("--outdir", required=True, help="Carpeta salida (metrics/Excel)")
     ap.add_argument("--csv", default="ranking_proveedores.csv")
+    ap.add_argument("--workers", type=int, default=default_workers(), help="Workers en paralelo")
     args = ap.parse_args()
 
     os.makedirs(args.outdir, exist_ok=True)
 
-    # 1) Ejecutar CLI por cada archivo
+    # 1) Ejecutar CLI por cada archivo y agregar métricas según llegan
+    pdfs = []
     for root, _, files in os.walk(args.input):
         for fn in files:
             if fn.lower().endswith((".pdf",".jpg",".jpeg",".png")):
-                run_cli(os.path.join(root, fn), args.outdir)
-
-    # 2) Agregar métricas
-    rows, agg = aggregate(find_metrics(args.outdir))
+                pdfs.append(os.path.join(root, fn))
+    ranking = ProviderRanking()
+    for m in run_cli_all(pdfs, args.outdir, args.workers):
+        ranking.add(m)
+    agg = ranking.ranking()
 
-    # 3) Guardar ranking
+    # 2) Guardar ranking (una sola vez)
     csv_path = os.path.join(args.outdir, args.csv)
     with open(csv_path, "w", newline="", encoding="utf-8") as fh:
         w = csv.DictWriter(fh, fieldnames=list(agg[0].keys()) if agg else ["Proveedor","Docs","ParsedRatioMedio","FlagsRatioMedio","OK>=0.8","LineasTotales"])
@@ -0,0 +1,629 @@
+# scripts/auditar_regex.py
+"""
+Auditoría de rendimiento de las expresiones regulares del proyecto.
+
+Recoge todas las regex de:
+  - patterns/*.yml (claves regex, regex_linea, *_regex, when, y los
+    programas compilados de lines/lineas: start_after, stop_before, regex_linea)
+  - extractores/*.py (literales pasados a re.compile/search/match/findall/
+    finditer/sub/split/fullmatch y diccionarios `patrones = {...}`)
+
+Para cada una:
+  1. Análisis estático del árbol de la regex en busca de construcciones
+     propensas a backtracking catastrófico:
+       ALTO   cuantificador anidado ambiguo, p. ej. (\\s*\\d+)+ o (a*)*
+       MEDIO  alternancia con ramas solapadas dentro de una repetición, p. ej. (?:[A-Z]+|\\w)+
+       MEDIO  cadena de 3+ cuantificadores solapados, p. ej. (.+)\\s+(.+)\\s+(.+)$
+       BAJO   dos cuantificadores solapados seguidos, p. ej. ^(.+?)\\s+(\\d+)...
+  2. Fuzzing en un proceso aparte con presupuesto de tiempo por caso contra
+     textos adversarios (rachas largas de espacios, dígitos, importes... con
+     un carácter que rompe el match al final, y cadenas derivadas de los
+     propios cuantificadores de la regex) y contra los textos reales de las
+     facturas de ejemplo. Si un caso agota el presupuesto, el worker se mata
+     y el patrón queda como TIMEOUT.
+
+El informe lista el peor caso por patrón (ordenado de más lento a más rápido)
+con el crecimiento estimado del tiempo al cuadruplicar la entrada.
+
+Uso:
+  python scripts/auditar_regex.py
+  python scripts/auditar_regex.py --muestras samples --presupuesto 0.5 --top 30
+  python scripts/auditar_regex.py --solo-estatico --strict
+  python scripts/auditar_regex.py --json auditoria_regex.json
+
+Exit codes:
+  0  → OK
+  2  → Hallazgos estáticos ALTO (si --strict, se retorna 1)
+  1  → Algún patrón agota el presupuesto o supera --umbral
+"""
+from __future__ import annotations
+
+import argparse
+import ast
+import json
+import math
+import multiprocessing as mp
+import re
+import sys
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+try:  # Python 3.11+
+    from re import _constants as sre_c
+    from re import _parser as sre_parse
+except ImportError:  # pragma: no cover
+    import sre_constants as sre_c  # type: ignore
+    import sre_parse  # type: ignore
+
+try:
+    from ruamel.yaml import YAML
+except Exception:
+    print("Falta dependencia: ruamel.yaml. Instala con: pip install ruamel.yaml", file=sys.stderr)
+    sys.exit(1)
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from src.facturas.patterns_loader import _fix_double_escapes, compile_overlay  # noqa: E402
+
+
+@dataclass
+class Patron:
+    origen: str       # fichero relativo al repo
+    ubicacion: str    # "línea 42", "date.regex", "lines.start_after"...
+    fuente: str
+    flags: int = 0
+    hallazgos: List[Tuple[str, str]] = field(default_factory=list)  # (nivel, mensaje)
+    peor_segundos: float = 0.0
+    peor_caso: str = ""
+    crecimiento: Optional[float] = None  # exponente k de t ~ n^k en el peor caso adversario
+    timeout: bool = False
+    error: str = ""
+
+
+# =============================================================================
+# RECOLECCIÓN
+# =============================================================================
+
+_FUNCIONES_RE = {"compile": 1, "search": 2, "match": 2, "fullmatch": 2, "findall": 2,
+                 "finditer": 2, "split": 3, "sub": 4, "subn": 4}  # posición del argumento flags
+_CLAVES_YAML = {"regex", "regex_linea", "when"}
+
+
+def _flags_ast(nodo: Optional[ast.AST]) -> int:
+    """Evalúa re.I | re.MULTILINE... de un nodo AST (0 si no es evaluable)."""
+    if nodo is None:
+        return 0
+    if isinstance(nodo, ast.BinOp) and isinstance(nodo.op, ast.BitOr):
+        return _flags_ast(nodo.left) | _flags_ast(nodo.right)
+    if isinstance(nodo, ast.Attribute) and isinstance(nodo.value, ast.Name) and nodo.value.id == "re":
+        return int(getattr(re, nodo.attr, 0))
+    return 0
+
+
+def _texto_ast(nodo: ast.AST) -> Optional[str]:
+    if isinstance(nodo, ast.Constant) and isinstance(nodo.value, str):
+        return nodo.value
+    return None
+
+
+def patrones_de_extractor(ruta: Path) -> Iterator[Patron]:
+    """Regex literales de un módulo de extractor (sin importarlo)."""
+    arbol = ast.parse(ruta.read_text(encoding="utf-8-sig"), filename=str(ruta))
+    origen = ruta.relative_to(REPO_ROOT).as_posix() if ruta.is_relative_to(REPO_ROOT) else str(ruta)
+    for nodo in ast.walk(arbol):
+        if isinstance(nodo, ast.Call) and isinstance(nodo.func, ast.Attribute) \
+                and isinstance(nodo.func.value, ast.Name) and nodo.func.value.id == "re" \
+                and nodo.func.attr in _FUNCIONES_RE and nodo.args:
+            fuente = _texto_ast(nodo.args[0])
+            if fuente is None:
+                continue
+            pos = _FUNCIONES_RE[nodo.func.attr]
+            flags = nodo.args[pos] if len(nodo.args) > pos else None
+            for kw in nodo.keywords:
+                if kw.arg == "flags":
+                    flags = kw.value
+            yield Patron(origen, f"línea {nodo.lineno}", fuente, _flags_ast(flags))
+        elif isinstance(nodo, ast.Assign) and isinstance(nodo.value, ast.Dict) \
+                and any(isinstance(t, ast.Name) and t.id == "patrones" for t in nodo.targets):
+            for clave, valor in zip(nodo.value.keys, nodo.value.values):
+                nombre = _texto_ast(clave) if clave is not None else None
+                flags = None
+                if isinstance(valor, ast.Tuple) and len(valor.elts) == 2:
+                    valor, flags = valor.elts
+                fuente = _texto_ast(valor)
+                if fuente is not None:
+                    yield Patron(origen, f"línea {valor.lineno} (patrones['{nombre}'])", fuente, _flags_ast(flags))
+
+
+def _recorrer_yaml(dato: Any, camino: str) -> Iterator[Tuple[str, str]]:
+    if isinstance(dato, dict):
+        for clave, valor in dato.items():
+            sub = f"{camino}.{clave}" if camino else str(clave)
+            if isinstance(clave, str) and (clave in _CLAVES_YAML or clave.endswith("_regex")):
+                valores = valor if isinstance(valor, list) else [valor]
+                for i, v in enumerate(valores):
+                    if isinstance(v, str) and v.strip():
+                        yield (f"{sub}[{i}]" if isinstance(valor, list) else sub), v
+            else:
+                yield from _recorrer_yaml(valor, sub)
+    elif isinstance(dato, list):
+        for i, valor in enumerate(dato):
+            yield from _recorrer_yaml(valor, f"{camino}[{i}]")
+
+
+def patrones_de_yaml(ruta: Path, yaml: YAML) -> Iterator[Patron]:
+    """Regex de un overlay: las del YAML tal cual y las del programa de líneas compilado."""
+    with ruta.open("r", encoding="utf-8") as fh:
+        data = yaml.load(fh)
+    if not isinstance(data, dict):
+        return
+    origen = ruta.relative_to(REPO_ROOT).as_posix() if ruta.is_relative_to(REPO_ROOT) else str(ruta)
+    vistos = set()
+    for camino, fuente in _recorrer_yaml(data, ""):
+        fuente = _fix_double_escapes(fuente)
+        vistos.add(fuente)
+        yield Patron(origen, camino, fuente)
+    programa = compile_overlay(data)
+    for nombre in ("start", "stop", "line"):
+        fuente = getattr(programa, f"{nombre}_src")
+        if fuente and fuente not in vistos:
+            yield Patron(origen, f"lines.{nombre} (compilado)", fuente)
+
+
+def recolectar(dir_patterns: Path, dir_extractores: Path) -> List[Patron]:
+    patrones: List[Patron] = []
+    yaml = YAML(typ="safe")
+    for ruta in sorted(dir_patterns.glob("*.yml")):
+        try:
+            patrones.extend(patrones_de_yaml(ruta, yaml))
+        except Exception as e:
+            print(f"[WARN] {ruta.name}: no se pudo leer ({e})", file=sys.stderr)
+    for ruta in sorted(dir_extractores.glob("*.py")):
+        try:
+            patrones.extend(patrones_de_extractor(ruta))
+        except SyntaxError as e:
+            print(f"[WARN] {ruta.name}: no se pudo analizar ({e})", file=sys.stderr)
+    return patrones
+
+
+# =============================================================================
+# ANÁLISIS ESTÁTICO
+# =============================================================================
+
+# Alfabeto representativo de las facturas: los conjuntos de caracteres se
+# calculan sobre él para decidir si dos cuantificadores pueden solaparse.
+ALFABETO = frozenset(
+    [chr(c) for c in range(32, 127)] + list("\t\n\r\xa0áéíóúÁÉÍÓÚñÑüÜºª€·")
+)
+
+_REPETICIONES = (sre_c.MAX_REPEAT, sre_c.MIN_REPEAT)
+_CATEGORIAS = {
+    sre_c.CATEGORY_DIGIT: str.isdigit,
+    sre_c.CATEGORY_NOT_DIGIT: lambda c: not c.isdigit(),
+    sre_c.CATEGORY_SPACE: str.isspace,
+    sre_c.CATEGORY_NOT_SPACE: lambda c: not c.isspace(),
+    sre_c.CATEGORY_WORD: lambda c: c.isalnum() or c == "_",
+    sre_c.CATEGORY_NOT_WORD: lambda c: not (c.isalnum() or c == "_"),
+}
+
+
+class _Analisis:
+    """Recorre el árbol de sre_parse de una regex y acumula hallazgos."""
+
+    def __init__(self, flags: int):
+        self.ignorecase = bool(flags & re.IGNORECASE)
+        self.dotall = bool(flags & re.DOTALL)
+        self.hallazgos: List[Tuple[str, str]] = []
+
+    # --- conjuntos de caracteres ---
+
+    def _caso(self, chars: set) -> frozenset:
+        if self.ignorecase:
+            chars = chars | {c.upper() for c in chars} | {c.lower() for c in chars}
+        return frozenset(chars & ALFABETO)
+
+    def _clase(self, items) -> frozenset:
+        negada = False
+        chars = set()
+        for op, av in items:
+            if op is sre_c.NEGATE:
+                negada = True
+            elif op is sre_c.LITERAL:
+                chars.add(chr(av))
+            elif op is sre_c.RANGE:
+                chars |= {c for c in ALFABETO if av[0] <= ord(c) <= av[1]}
+            elif op is sre_c.CATEGORY and av in _CATEGORIAS:
+                chars |= {c for c in ALFABETO if _CATEGORIAS[av](c)}
+        chars = set(self._caso(chars))
+        return frozenset(ALFABETO - chars) if negada else frozenset(chars)
+
+    def conjunto(self, items) -> frozenset:
+        """Caracteres que puede consumir una secuencia en cualquier posición."""
+        chars = set()
+        for op, av in items:
+            if op is sre_c.LITERAL:
+                chars |= self._caso({chr(av)})
+            elif op is sre_c.NOT_LITERAL:
+                chars |= ALFABETO - self._caso({chr(av)})
+            elif op is sre_c.ANY:
+                chars |= ALFABETO if self.dotall else ALFABETO - {"\n"}
+            elif op is sre_c.IN:
+                chars |= self._clase(av)
+            elif op in _REPETICIONES or op is sre_c.POSSESSIVE_REPEAT:
+                chars |= self.conjunto(av[2])
+            elif op is sre_c.SUBPATTERN or op is sre_c.ATOMIC_GROUP:
+                chars |= self.conjunto(av[-1] if op is sre_c.SUBPATTERN else av)
+            elif op is sre_c.BRANCH:
+                for rama in av[1]:
+                    chars |= self.conjunto(rama)
+        return frozenset(chars)
+
+    def primeros(self, items) -> frozenset:
+        """Caracteres con los que puede empezar una secuencia."""
+        chars = set()
+        for item in items:
+            op, av = item
+            if op is sre_c.BRANCH:
+                for rama in av[1]:
+                    chars |= self.primeros(rama)
+            elif op is sre_c.SUBPATTERN:
+                chars |= self.primeros(av[-1])
+            elif op in _REPETICIONES or op is sre_c.POSSESSIVE_REPEAT:
+                chars |= self.primeros(av[2])
+            else:
+                chars |= self.conjunto([item])
+            if not self.anulable(item):
+                break
+        return frozenset(chars)
+
+    def anulable(self, item) -> bool:
+        op, av = item
+        if op in (sre_c.AT, sre_c.ASSERT, sre_c.ASSERT_NOT):
+            return True
+        if op in _REPETICIONES or op is sre_c.POSSESSIVE_REPEAT:
+            return av[0] == 0 or all(self.anulable(i) for i in av[2])
+        if op is sre_c.SUBPATTERN:
+            return all(self.anulable(i) for i in av[-1])
+        if op is sre_c.BRANCH:
+            return any(all(self.anulable(i) for i in rama) for rama in av[1])
+        return False
+
+    # --- recorrido ---
+
+    def _plano(self, items) -> List[Tuple[Any, Any]]:
+        """Secuencia con los grupos expandidos en línea (las ramas y repeticiones quedan como nodo)."""
+        plano = []
+        for op, av in items:
+            if op is sre_c.SUBPATTERN:
+                plano.extend(self._plano(av[-1]))
+            else:
+                plano.append((op, av))
+        return plano
+
+    def _repeticiones_internas(self, items) -> Iterator[Tuple[Any, Any]]:
+        for op, av in items:
+            if op in _REPETICIONES:
+                if av[1] == sre_c.MAXREPEAT:
+                    yield op, av
+                yield from self._repeticiones_internas(av[2])
+            elif op is sre_c.SUBPATTERN:
+                yield from self._repeticiones_internas(av[-1])
+            elif op is sre_c.BRANCH:
+                for rama in av[1]:
+                    yield from self._repeticiones_internas(rama)
+
+    def _revisar_repeticion(self, av) -> None:
+        minimo, maximo, cuerpo = av
+        if maximo != sre_c.MAXREPEAT and maximo < 10:
+            return
+        plano = self._plano(cuerpo)
+        if all(self.anulable(i) for i in plano):
+            self.hallazgos.append(("ALTO", "repetición de un cuerpo que puede ser vacío, p. ej. (a*)*"))
+            return
+        internas = list(self._repeticiones_internas(cuerpo))
+        if internas:
+            solapables = frozenset().union(*(self.conjunto(r[2]) for _, r in internas))
+            delimitadores = [i for i in plano if i[0] not in _REPETICIONES and not self.anulable(i)
+                             and not (self.conjunto([i]) & solapables)]
+            if not delimitadores:
+                self.hallazgos.append(("ALTO", "cuantificador anidado ambiguo, p. ej. (\\s*\\d+)+"))
+        for op, sub in plano:
+            if op is sre_c.BRANCH:
+                ramas = [self.primeros(r) for r in sub[1]]
+                if any(ramas[i] & ramas[j] for i in range(len(ramas)) for j in range(i + 1, len(ramas))):
+                    self.hallazgos.append(("MEDIO", "alternancia con ramas solapadas dentro de una repetición"))
+
+    def _ancha(self, op, av) -> Optional[frozenset]:
+        # Repetición sin tope que consume algo más que espacios (los separadores \s+ no suman grado)
+        if op not in _REPETICIONES or av[1] != sre_c.MAXREPEAT:
+            return None
+        chars = self.conjunto(av[2])
+        return chars if any(not c.isspace() for c in chars) else None
+
+    def _revisar_cadena(self, items) -> None:
+        plano = self._plano(items)
+        grado = 1
+        for j, (op_b, av_b) in enumerate(plano):
+            chars_b = self._ancha(op_b, av_b)
+            if chars_b is None:
+                continue
+            previas = 0
+            for i in range(j):
+                chars_a = self._ancha(*plano[i])
+                if chars_a is None or not chars_a & chars_b:
+                    continue
+                entre = [x for x in plano[i + 1:j] if not self.anulable(x)]
+                if all(self.conjunto([x]) & chars_a for x in entre):
+                    previas += 1
+            grado = max(grado, previas + 1)
+        if grado >= 3:
+            self.hallazgos.append(("MEDIO", f"cadena de {grado} cuantificadores solapados (≈O(n^{grado}) si falla)"))
+        elif grado == 2:
+            self.hallazgos.append(("BAJO", "dos cuantificadores solapados seguidos (≈O(n²) si falla)"))
+
+    def recorrer(self, items, cadena: bool = True) -> None:
+        if cadena:
+            self._revisar_cadena(items)
+        for op, av in items:
+            if op in _REPETICIONES:
+                self._revisar_repeticion(av)
+                self.recorrer(av[2])
+            elif op is sre_c.SUBPATTERN:
+                self.recorrer(av[-1], cadena=False)  # ya incluido en la secuencia del padre
+            elif op is sre_c.BRANCH:
+                for rama in av[1]:
+                    self.recorrer(rama)
+            elif op in (sre_c.ASSERT, sre_c.ASSERT_NOT):
+                self.recorrer(av[1])
+
+
+def analizar(patron: Patron) -> None:
+    """Rellena patron.hallazgos (y patron.error si la regex no compila)."""
+    try:
+        flags = re.compile(patron.fuente, patron.flags).flags
+        arbol = sre_parse.parse(patron.fuente, patron.flags)
+    except re.error as e:
+        patron.error = f"regex inválida: {e}"
+        return
+    analisis = _Analisis(flags)
+    analisis.recorrer(list(arbol))
+    # Sin duplicados y en orden de gravedad
+    orden = {"ALTO": 0, "MEDIO": 1, "BAJO": 2}
+    patron.hallazgos = sorted(set(analisis.hallazgos), key=lambda h: (orden[h[0]], h[1]))
+
+
+# =============================================================================
+# FUZZING
+# =============================================================================
+
+def casos_adversarios(patron: Patron, longitud: int) -> List[Tuple[str, str]]:
+    """
+    Entradas largas que casi casan: rachas de lo que consumen los cuantificadores
+    más un carácter final que obliga al motor a deshacer.
+
+    Returns:
+        Lista de (nombre, texto)
+    """
+    n = longitud
+    casos = [
+        ("espacios", " " * n + "!"),
+        ("digitos", "1" * n + "!"),
+        ("importes", "1,23 " * (n // 5) + "x"),
+        ("palabras", "ACEITE " * (n // 7) + "!"),
+        ("tabla", "ACEITE OLIVA 12 3,45 41,40 " * (n // 27) + "\x00"),
+        ("puntos", "." * n + "\x00"),
+        ("saltos", "A\n" * (n // 2) + "!"),
+    ]
+    try:
+        flags = re.compile(patron.fuente, patron.flags).flags
+        arbol = sre_parse.parse(patron.fuente, patron.flags)
+    except re.error:
+        return casos
+    analisis = _Analisis(flags)
+    unidad = ""
+    for _, av in analisis._repeticiones_internas(list(arbol)):
+        chars = analisis.conjunto(av[2])
+        for preferido in (" ", "1", "a", "A", ",", "."):
+            if preferido in chars:
+                unidad += preferido
+                break
+        else:
+            if chars:
+                unidad += min(chars)
+    if unidad:
+        casos.append(("derivado", unidad * max(1, n // len(unidad)) + "\x00"))
+    return casos
+
+
+def _worker(conexion) -> None:
+    compilado: Optional[re.Pattern] = None
+    while True:
+        mensaje = conexion.recv()
+        if mensaje is None:
+            return
+        if mensaje[0] == "patron":
+            compilado = re.compile(mensaje[1], mensaje[2])
+            conexion.send(True)
+        else:
+            inicio = time.perf_counter()
+            for _ in compilado.finditer(mensaje[1]):
+                pass
+            conexion.send(time.perf_counter() - inicio)
+
+
+class Fuzzer:
+    """Worker aparte al que se le puede cortar un caso lento matándolo."""
+
+    def __init__(self, presupuesto: float):
+        self.presupuesto = presupuesto
+        self._proceso = None
+        self._conexion = None
+        self._patron: Optional[Tuple[str, int]] = None
+
+    def __enter__(self) -> "Fuzzer":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.cerrar()
+
+    def _arrancar(self) -> None:
+        self._conexion, hijo = mp.Pipe()
+        self._proceso = mp.Process(target=_worker, args=(hijo,), daemon=True)
+        self._proceso.start()
+        self._patron = None
+
+    def cerrar(self) -> None:
+        if self._proceso is not None:
+            try:
+                self._conexion.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+            self._proceso.join(timeout=1)
+            if self._proceso.is_alive():
+                self._proceso.kill()
+            self._proceso = None
+
+    def medir(self, fuente: str, flags: int, texto: str) -> Optional[float]:
+        """Segundos de finditer sobre el texto, o None si agota el presupuesto."""
+        if self._proceso is None:
+            self._arrancar()
+        if self._patron != (fuente, flags):
+            self._conexion.send(("patron", fuente, flags))
+            self._conexion.recv()
+            self._patron = (fuente, flags)
+        self._conexion.send(("texto", texto))
+        if self._conexion.poll(self.presupuesto):
+            return self._conexion.recv()
+        self._proceso.kill()
+        self._proceso.join()
+        self._proceso = None
+        return None
+
+
+def textos_reales(dir_muestras: Optional[Path]) -> List[Tuple[str, str]]:
+    """Texto de los PDF (y .txt) de la carpeta de muestras."""
+    if dir_muestras is None or not dir_muestras.exists():
+        return []
+    from nucleo.pdf import extraer_texto_pdf
+    textos = []
+    for ruta in sorted(dir_muestras.iterdir()):
+        try:
+            if ruta.suffix.lower() == ".pdf":
+                textos.append((ruta.name, extraer_texto_pdf(ruta, metodo="pypdf")))
+            elif ruta.suffix.lower() == ".txt":
+                textos.append((ruta.name, ruta.read_text(encoding="utf-8", errors="replace")))
+        except Exception as e:
+            print(f"[WARN] {ruta.name}: sin texto ({e})", file=sys.stderr)
+    return textos
+
+
+def fuzzear(patron: Patron, fuzzer: Fuzzer, reales: List[Tuple[str, str]], longitud: int) -> None:
+    """Mide el peor caso del patrón y el crecimiento en su peor entrada adversaria."""
+    adversarios = casos_adversarios(patron, longitud)
+    peor_adversario: Optional[Tuple[str, str, float]] = None
+    for nombre, texto in adversarios + reales:
+        segundos = fuzzer.medir(patron.fuente, patron.flags, texto)
+        if segundos is None:
+            patron.timeout = True
+            patron.peor_caso = nombre
+            patron.peor_segundos = fuzzer.presupuesto
+            return
+        if segundos > patron.peor_segundos:
+            patron.peor_segundos, patron.peor_caso = segundos, nombre
+        if (nombre, texto) in adversarios and (peor_adversario is None or segundos > peor_adversario[2]):
+            peor_adversario = (nombre, texto, segundos)
+    # Crecimiento: mismo caso con un cuarto de longitud (solo si el tiempo es medible)
+    if peor_adversario and peor_adversario[2] > 0.002:
+        nombre, _, segundos = peor_adversario
+        corto = dict(casos_adversarios(patron, longitud // 4))[nombre]
+        t_corto = fuzzer.medir(patron.fuente, patron.flags, corto)
+        if t_corto:
+            patron.crecimiento = round(math.log(segundos / t_corto, 4), 2)
+
+
+# =============================================================================
+# INFORME
+# =============================================================================
+
+def _nivel_maximo(patron: Patron) -> str:
+    return patron.hallazgos[0][0] if patron.hallazgos else ""
+
+
+def imprimir(patrones: List[Patron], top: int, fuzz: bool) -> None:
+    if fuzz:
+        ordenados = sorted(patrones, key=lambda p: (not p.timeout, -p.peor_segundos))
+    else:
+        orden = {"ALTO": 0, "MEDIO": 1, "BAJO": 2, "": 3}
+        ordenados = sorted(patrones, key=lambda p: orden[_nivel_maximo(p)])
+    for p in ordenados[:top]:
+        if fuzz:
+            tiempo = "TIMEOUT" if p.timeout else f"{p.peor_segundos * 1000:8.2f} ms"
+            escala = f"  n^{p.crecimiento}" if p.crecimiento is not None else ""
+            print(f"{tiempo:>11}  [{p.peor_caso}]{escala}  {p.origen}:{p.ubicacion}")
+        else:
+            print(f"{_nivel_maximo(p) or '-':>5}  {p.origen}:{p.ubicacion}")
+        print(f"{'':13}{p.fuente[:110]}")
+        for nivel, mensaje in p.hallazgos:
+            print(f"{'':13}[{nivel}] {mensaje}")
+    for p in patrones:
+        if p.error:
+            print(f"[ERROR] {p.origen}:{p.ubicacion}: {p.error}")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Busca regex propensas a backtracking catastrófico")
+    ap.add_argument("--patterns", default=str(REPO_ROOT / "patterns"), help="Carpeta con .yml")
+    ap.add_argument("--extractores", default=str(REPO_ROOT / "extractores"), help="Carpeta de extractores")
+    ap.add_argument("--muestras", default=str(REPO_ROOT / "samples"),
+                    help="Carpeta con PDF/.txt reales para el fuzzing ('' para no usarlos)")
+    ap.add_argument("--presupuesto", type=float, default=1.0, help="Segundos máximos por caso (defecto 1.0)")
+    ap.add_argument("--longitud", type=int, default=4000, help="Longitud de las entradas adversarias")
+    ap.add_argument("--umbral", type=float, default=0.1, help="Peor caso (s) a partir del cual se falla")
+    ap.add_argument("--top", type=int, default=20, help="Patrones a mostrar (defecto 20)")
+    ap.add_argument("--solo-estatico", action="store_true", help="Sin fuzzing, solo análisis estático")
+    ap.add_argument("--json", help="Guardar el informe completo en este JSON")
+    ap.add_argument("--strict", action="store_true", help="Tratar hallazgos ALTO como error (exit 1)")
+    args = ap.parse_args()
+
+    patrones = recolectar(Path(args.patterns), Path(args.extractores))
+    if not patrones:
+        print("No se encontraron regex")
+        return 2
+    for p in patrones:
+        analizar(p)
+
+    fuzz = not args.solo_estatico
+    if fuzz:
+        reales = textos_reales(Path(args.muestras) if args.muestras else None)
+        print(f"Fuzzing de {len(patrones)} regex con {len(reales)} textos reales "
+              f"(presupuesto {args.presupuesto}s por caso)...\n")
+        with Fuzzer(args.presupuesto) as fuzzer:
+            for p in patrones:
+                if not p.error:
+                    fuzzear(p, fuzzer, reales, args.longitud)
+
+    imprimir(patrones, args.top, fuzz)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as fh:
+            json.dump([asdict(p) for p in patrones], fh, ensure_ascii=False, indent=2)
+
+    altos = [p for p in patrones if _nivel_maximo(p) == "ALTO"]
+    lentos = [p for p in patrones if p.timeout or p.peor_segundos > args.umbral]
+    errores = [p for p in patrones if p.error]
+    print(f"\nRegex: {len(patrones)}  •  ALTO: {len(altos)}  •  "
+          f"MEDIO: {sum(1 for p in patrones if _nivel_maximo(p) == 'MEDIO')}  •  "
+          f"Lentas/timeout: {len(lentos)}  •  Inválidas: {len(errores)}")
+    if lentos or errores:
+        return 1
+    if altos:
+        return 1 if args.strict else 2
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,13 +3,15 @@
 Batch runner con selector de carpeta (opcional), robusto y sin romper la CLI batch.
 - Si usas --ask-dir (y no pasas --input), abre un diálogo (tkinter) para elegir carpeta.
 - Recuerda la última ruta en ~/.facturas_config.json.
-- Llama a la CLI no interactiva por cada fichero y captura su JSON.
+- Procesa los ficheros en un pool de workers Python calientes (--workers, uno por
+  núcleo) que llaman a la CLI como función, en vez de lanzar un intérprete por fichero.
 - Escribe errores con context manager, revisa returncode, y solo marca Excel si realmente existe.
 - Genera resumen CSV con columnas: Archivo, Proveedor, Fecha, NºFactura, Reconciliacion, Excel.
 
 Uso típico:
   python scripts/batch_runner.py --ask-dir --out out --excel
   python scripts/batch_runner.py --input "C:\\Users\\TU\\Dropbox\\Facturas\\1T25" --out out --excel --reconcile
+  python scripts/batch_runner.py --input facturas --out out --workers 2
 """
 from __future__ import annotations
 
@@ -17,11 +19,16 @@ import argparse
 import csv
 import json
 import re
-import subprocess
 import sys
 from pathlib import Path
 from typing import Optional, Dict, Any, List
 
+REPO_ROOT = Path(__file__).resolve().parents[1]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from src.facturas.cli_pool import ScanPool, default_workers
+
 CONFIG_PATH = Path.home() / ".facturas_config.json"
 EXTS = {".pdf", ".jpg", ".jpeg", ".png"}
 
@@ -78,43 +85,25 @@ def ask_directory(initial: Optional[Path]) -> Optional[Path]:
             return None
 
 
-def run_cli_one(pdf: Path, outdir: Path, excel: bool, reconcile: bool, total: Optional[str]) -> Dict[str, Any]:
-    """Lanza la CLI por un fichero y devuelve un dict normalizado para el resumen."""
-    cmd: List[str] = [sys.executable, "-m", "src.facturas.cli", str(pdf), "--lines"]
+def build_request(pdf: Path, outdir: Path, excel: bool, reconcile: bool, total: Optional[str]) -> Dict[str, Any]:
+    """Petición equivalente a `cli <pdf> --lines [...] --outdir <outdir>`."""
+    request: Dict[str, Any] = {"pdf": str(pdf), "lines": True, "outdir": str(outdir)}
     if reconcile:
-        cmd.append("--reconcile")
+        request["reconcile"] = True
     if total:
-        cmd += ["--total", total]
-    cmd += ["--outdir", str(outdir)]
-
-    xlsx_path: Optional[Path] = None
+        request["total"] = total
     if excel:
         safe_base = re.sub(r"[^\w\-]+", "_", pdf.stem)
-        xlsx_path = outdir / f"{safe_base}.xlsx"
-        cmd += ["--excel", str(xlsx_path)]
-
-    proc = subprocess.run(
-        cmd,
-        capture_output=True,
-        text=True,
-        encoding="utf-8",
-        errors="replace",
-    )
-
-    if proc.stderr or proc.returncode != 0:
-        with (outdir / "errors.log").open("a", encoding="utf-8") as fh:
-            fh.write(f"[{pdf.name}] returncode={proc.returncode}\n")
-            if proc.stderr:
-                fh.write(proc.stderr + "\n")
+        request["excel"] = str(outdir / f"{safe_base}.xlsx")
+    return request
 
-    # Parsear stdout -> JSON
-    try:
-        obj = json.loads(proc.stdout)
-    except Exception:
-        snippet = (proc.stdout or "")[:400].replace("\n", "\\n")
-        with (outdir / "errores_resumen.txt").open("a", encoding="utf-8") as fh:
-            fh.write(f"ERROR JSON: {pdf} :: stdout[:400]={snippet}\n")
-        obj = {}
+
+def summary_row(pdf: Path, outdir: Path, request: Dict[str, Any], response: Dict[str, Any]) -> Dict[str, Any]:
+    """Convierte la respuesta de un worker en la fila normalizada del resumen."""
+    if not response.get("ok"):
+        with (outdir / "errors.log").open("a", encoding="utf-8") as fh:
+            fh.write(f"[{pdf.name}] {response.get('error', '')}\n")
+    obj = response.get("result") if response.get("ok") else {}
 
     # Normalizar header/estado
     if isinstance(obj, dict) and "Header" in obj and isinstance(obj["Header"], dict):
@@ -126,10 +115,13 @@ def run_cli_one(pdf: Path, outdir: Path, excel: bool, reconcile: bool, total: Op
     else:
         hdr = {}
         estado = ""
+    if not response.get("ok"):
+        estado = "ERROR"
 
     # Solo afirmar Excel si realmente existe
     excel_str = ""
-    if excel and xlsx_path and xlsx_path.exists():
+    xlsx_path = request.get("excel")
+    if xlsx_path and Path(xlsx_path).exists():
         excel_str = str(xlsx_path)
 
     return {
@@ -150,6 +142,8 @@ def main() -> None:
     ap.add_argument("--excel", action="store_true", help="Generar Excel por factura")
     ap.add_argument("--reconcile", action="store_true", help="Intentar reconciliar si hay total")
     ap.add_argument("--total", help="Total con IVA para forzar reconciliación (opcional)")
+    ap.add_argument("--workers", type=int, default=default_workers(),
+                    help="Workers en paralelo (default: uno por núcleo)")
     args = ap.parse_args()
 
     cfg = load_config()
@@ -173,21 +167,16 @@ def main() -> None:
     files.sort()
     print(f"Procesando {len(files)} ficheros de {input_dir}…")
 
-    rows: List[Dict[str, Any]] = []
-    for i, pdf in enumerate(files, 1):
-        print(f"[{i}/{len(files)}] {pdf}")
-        try:
-            row = run_cli_one(pdf, outdir, args.excel, args.reconcile, args.total)
-        except Exception:
-            row = {
-                "Archivo": pdf.name,
-                "Proveedor": "",
-                "Fecha": "",
-                "NºFactura": "",
-                "Reconciliacion": "ERROR",
-                "Excel": "",
-            }
-        rows.append(row)
+    requests = [
+        dict(build_request(pdf, outdir, args.excel, args.reconcile, args.total), id=i)
+        for i, pdf in enumerate(files)
+    ]
+    rows: List[Optional[Dict[str, Any]]] = [None] * len(files)
+    with ScanPool(workers=min(args.workers, len(files)) or 1) as pool:
+        for n, (request, response) in enumerate(pool.run(requests), 1):
+            pdf = files[request["id"]]
+            print(f"[{n}/{len(files)}] {pdf}")
+            rows[request["id"]] = summary_row(pdf, outdir, request, response)
 
     csv_path = outdir / "resumen_batch.csv"
     with csv_path.open("w", newline="", encoding="utf-8") as fh:
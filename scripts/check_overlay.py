@@ -16,7 +16,8 @@ if str(REPO_ROOT) not in sys.path:
     sys.path.insert(0, str(REPO_ROOT))
 
 # Ahora ya podemos importar desde src.facturas.*
-from src.facturas.patterns_loader import get_overlay_for
+from src.facturas.patterns_loader import get_overlay_for, segment_lines
+from src.facturas.document import PdfDocument
 from src.facturas.detect_blocks import detect_blocks_minimal
 from src.facturas.parse_lines import parse_lines_text
 
@@ -45,14 +46,24 @@ def main():
         if not pdf.exists():
             raise SystemExit(f"No existe el PDF: {pdf}")
         proveedor = args.proveedor or ""
-        blocks = detect_blocks_minimal(str(pdf), provider=proveedor)
+        doc = PdfDocument(str(pdf))
+        ov = get_overlay_for(proveedor)
+        if ov:
+            print("\n== Overlay compilado (una pasada) ==")
+            for err in ov.program.errors:
+                print("regex inválida:", err)
+            filas = segment_lines(doc.lines(), ov.program)
+            for f in filas[:10]:
+                print(f)
+            print(f"({len(filas)} líneas de detalle)")
+        blocks = detect_blocks_minimal(str(pdf), provider=proveedor, doc=doc)
         print("\n== Detect Blocks ==")
         print("fecha_overlay:", blocks.get("fecha_overlay"))
         print("ref_overlay:", blocks.get("ref_overlay"))
         print("lines_text_len:", len(blocks.get("lines_text") or ""))
         print("full_text_len:", len(blocks.get("full_text") or ""))
 
-        rows = parse_lines_text(blocks.get("lines_text") or "", proveedor)
+        rows = parse_lines_text(blocks.get("lines_text") or [])
         print("\n== Muestra de líneas parseadas ==")
         for r in rows[:10]:
             print(r)
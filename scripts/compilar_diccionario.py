@@ -9,6 +9,7 @@ Uso:
 Pasos:
   1) Carga tolerante de REGLAS/CATEGORIAS/OVERLAYS.
   2) Normaliza y ordena reglas (Proveedor, Prioridad asc, TipoMatch EXACT→SUBSTR→REGEX, ArticuloPattern).
+     Sin columna TipoMatch (formato antiguo) todas las reglas son EXACT.
   3) Genera estructura JSON canónica + SHA256 del contenido.
   4) Guarda a disco y muestra resumen.
 
@@ -89,6 +90,25 @@ def _now_version() -> str:
     return base + ".01"
 
 
+def _col(df: pd.DataFrame, name: str, default: Any) -> pd.Series:
+    # Columna opcional (el formato antiguo no trae TipoMatch/Prioridad/Activa)
+    return df[name] if name in df.columns else pd.Series(default, index=df.index)
+
+
+def _iso_date(v: Any) -> str | None:
+    # ValidaDesde/ValidaHasta -> "YYYY-MM-DD" (mismos formatos que el validador)
+    if v is None or (not isinstance(v, str) and pd.isna(v)) or str(v).strip() == "":
+        return None
+    if isinstance(v, datetime):
+        return v.strftime("%Y-%m-%d")
+    for fmt in ("%Y-%m-%d", "%d/%m/%Y", "%d-%m-%Y", "%d-%m-%y"):
+        try:
+            return datetime.strptime(str(v).split(" ")[0], fmt).strftime("%Y-%m-%d")
+        except ValueError:
+            pass
+    return None
+
+
 def _canonical_json(obj: Any) -> str:
     return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), sort_keys=True)
 
@@ -117,10 +137,15 @@ def main():
     df["Proveedor"] = df["Proveedor"].fillna("").map(_norm_provider)
     df["ArticuloPattern"] = df["ArticuloPattern"].fillna("").astype(str).str.strip()
     df["Categoria"] = df["Categoria"].fillna("").astype(str).str.strip()
-    df["TipoMatch"] = df.get("TipoMatch", "SUBSTR").fillna("SUBSTR").astype(str).str.upper().str.strip()
+    # Formato antiguo (sin columna TipoMatch): cada fila es un artículo exacto,
+    # como en main.categorizar_linea; las parciales las resuelve luego el xlsx
+    # en su orden. Como SUBSTR en orden alfabético ganaban patrones cortos
+    # ('LIMON' antes que 'LIMONADA VIANATURE 750ML').
+    tipo_defecto = "SUBSTR" if "TipoMatch" in df.columns else "EXACT"
+    df["TipoMatch"] = _col(df, "TipoMatch", tipo_defecto).fillna("SUBSTR").astype(str).str.upper().str.strip()
     df["TipoMatch"] = df["TipoMatch"].where(df["TipoMatch"].isin(ALLOWED_MATCH), "SUBSTR")
-    df["Prioridad"] = pd.to_numeric(df.get("Prioridad", 10), errors="coerce").fillna(10).astype(int)
-    df["Activa"] = df.get("Activa", True)
+    df["Prioridad"] = pd.to_numeric(_col(df, "Prioridad", 10), errors="coerce").fillna(10).astype(int)
+    df["Activa"] = _col(df, "Activa", True)
     df["Activa"] = df["Activa"].map(lambda v: str(v).strip().lower() not in {"false", "0", "no", "nan", ""})
 
     # Filtrar filas mínimas y activas
@@ -130,6 +155,12 @@ def main():
     df["_match_order"] = df["TipoMatch"].map(MATCH_ORDER)
     df = df.sort_values(["Proveedor", "Prioridad", "_match_order", "ArticuloPattern"], kind="stable").drop(columns=["_match_order"])
 
+    # Fechas en ISO y NaN -> null para que el JSON sea estándar (lo carga nucleo/reglas.py)
+    for col in ("ValidaDesde", "ValidaHasta"):
+        if col in df.columns:
+            df[col] = df[col].map(_iso_date)
+    df = df.astype(object).where(pd.notna(df), None)
+
     # Preparar artefacto
     compiled: Dict[str, Any] = {
         "version": args.version or _now_version(),
@@ -141,9 +172,9 @@ def main():
     }
 
     if df_cat is not None:
-        compiled["categories"] = df_cat.to_dict(orient="records")
+        compiled["categories"] = df_cat.astype(object).where(pd.notna(df_cat), None).to_dict(orient="records")
     if df_ovl is not None:
-        compiled["overlays"] = df_ovl.to_dict(orient="records")
+        compiled["overlays"] = df_ovl.astype(object).where(pd.notna(df_ovl), None).to_dict(orient="records")
 
     canon = _canonical_json(compiled)
     sha = _hash_sha256(canon)
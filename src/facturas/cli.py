@@ -9,13 +9,18 @@ Ejecución típica:
     python -m src.facturas.cli "ruta\a\factura.pdf" --pretty
     python -m src.facturas.cli "ruta\a\factura.pdf" --lines --excel out\factura.xlsx --outdir out
     python -m src.facturas.cli "ruta\a\factura.pdf" --lines --reconcile --total 293,15
+    python -m src.facturas.cli "ruta\a\factura.pdf" --lines --timings
+    python -m src.facturas.cli --serve      (peticiones JSON por stdin; ver "modo servidor")
 """
 from __future__ import annotations
 
 import argparse
+import contextlib
 import json
 import os
 import re
+import sys
+import time
 import unicodedata
 from datetime import datetime
 from pathlib import Path
@@ -33,6 +38,11 @@ except Exception as _e1:  # pragma: no cover
         _PDF_IMPORT_ERROR = (_e1, _e2)
 
 # --- Módulos del proyecto (imports relativos) ---
+try:
+    from .document import PdfDocument  # type: ignore
+except Exception:  # pragma: no cover
+    PdfDocument = None  # type: ignore
+
 try:
     from .detect_blocks import detect_blocks_minimal  # type: ignore
 except Exception:  # pragma: no cover
@@ -99,7 +109,12 @@ PROVIDER_PRETTY = {
 }
 
 
-def _read_first_page_text(pdf_path: str) -> str:
+def _read_first_page_text(pdf_path: str, doc=None) -> str:
+    if doc is not None:
+        # Documento compartido: solo se extrae la primera página
+        if doc.num_pages == 0:
+            return ""
+        return re.sub(r"[ \t]+", " ", doc.page_text(0))
     if PdfReader is None:
         raise RuntimeError(
             "No se pudo importar el lector PDF (PyPDF2/pypdf).\n"
@@ -195,8 +210,8 @@ def _first_4_digits_from_filename(path: str) -> str:
     return m.group(1) if m else ""
 
 
-def scan_pdf(pdf_path: str) -> dict:
-    txt = _read_first_page_text(pdf_path)
+def scan_pdf(pdf_path: str, doc=None) -> dict:
+    txt = _read_first_page_text(pdf_path, doc)
     proveedor = _detect_provider_from_filename(pdf_path) or _detect_provider_from_text(txt) or ""
     fecha = _detect_date(txt) or ""
     ref = _detect_ref(txt) or ""
@@ -211,58 +226,81 @@ def scan_pdf(pdf_path: str) -> dict:
 
 # ===================== CLI =====================
 
-def main():
-    parser = argparse.ArgumentParser(description="Scan de cabecera y (opcional) líneas de factura.")
-    parser.add_argument("pdf", help="Ruta al PDF/JPG de la factura")
-    parser.add_argument("--lines", action="store_true", help="Incluir también líneas de producto")
-    parser.add_argument("--pretty", action="store_true", help="Imprime JSON legible")
-    parser.add_argument("--keep-portes", action="store_true", help="No elimina líneas de portes")
-    parser.add_argument("--excel", help="Ruta del Excel de salida")
-    parser.add_argument("--outdir", help="Carpeta de salida para Excel")
-
-    group = parser.add_mutually_exclusive_group()
-    group.add_argument("--reconcile", action="store_true", help="Intentar cuadrar si hay total detectado o se pasa con --total")
-    group.add_argument("--no-reconcile", action="store_true", help="No reconciliar aunque haya total")
-
-    parser.add_argument("--total", help="Total con IVA (coma o punto). Si falta, no se reconcilia")
-
-    args = parser.parse_args()
-
-    if not os.path.exists(args.pdf):
-        raise SystemExit(f"No existe el archivo: {args.pdf}")
-
-    header = scan_pdf(args.pdf)
+def run_scan(
+    pdf: str,
+    lines: bool = False,
+    keep_portes: bool = False,
+    excel: Optional[str] = None,
+    outdir: Optional[str] = None,
+    reconcile: bool = False,
+    no_reconcile: bool = False,
+    total: Optional[str] = None,
+    timings: bool = False,
+) -> Dict[str, Any]:
+    """
+    Procesa un fichero y devuelve el mismo dict que imprime la CLI.
+
+    El PDF se abre una sola vez (PdfDocument): la cabecera lee solo la
+    primera página y la detección de bloques reutiliza ese texto. Con
+    timings=True se añade "Timings" con el desglose en segundos por etapa.
+    """
+    if not os.path.exists(pdf):
+        raise SystemExit(f"No existe el archivo: {pdf}")
+
+    doc = PdfDocument(pdf) if PdfDocument is not None else None
+    etapas: Dict[str, float] = {}
+
+    def _pdf_s() -> float:
+        return doc.timings["open"] + doc.timings["extract_text"] if doc is not None else 0.0
+
+    inicio = time.perf_counter()
+    marca = [inicio, 0.0]
+
+    def _medir(etapa: str) -> None:
+        # Tiempo de la etapa sin la lectura del PDF, que se cuenta aparte
+        ahora, pdf_s = time.perf_counter(), _pdf_s()
+        etapas[etapa] = etapas.get(etapa, 0.0) + (ahora - marca[0]) - (pdf_s - marca[1])
+        marca[0], marca[1] = ahora, pdf_s
+
+    header = scan_pdf(pdf, doc)
+    _medir("header")
 
     result: Dict[str, Any]
 
-    if args.lines:
+    if lines:
         # 1) Bloques y líneas
         if detect_blocks_minimal is None:
             raise SystemExit("detect_blocks_minimal no disponible en este entorno")
-        blocks = detect_blocks_minimal(args.pdf, provider=header.get("Proveedor"))
+        if doc is not None:
+            blocks = detect_blocks_minimal(pdf, provider=header.get("Proveedor"), doc=doc)
+        else:
+            blocks = detect_blocks_minimal(pdf, provider=header.get("Proveedor"))
         lines_text = blocks["lines_text"]
+        _medir("detect_blocks")
         rows = parse_lines_text(lines_text) if parse_lines_text else []  # list[dict]
+        _medir("parse_lines")
 
         # 2) Marcar portes y filtrar si procede
         descripciones = [r.get("Descripcion", "") for r in rows]
         portes_idx = detectar_lineas_portes(descripciones)
         for i, r in enumerate(rows):
             r["EsPortes"] = i in portes_idx
-        if portes_idx and not args.keep_portes:
+        if portes_idx and not keep_portes:
             rows = [r for r in rows if not r.get("EsPortes")]
 
         # 3) Tipo de IVA por línea
         for r in rows:
             tipo = detect_iva_tipo(r.get("Descripcion", ""), header.get("Proveedor", ""), header.get("Fecha", ""))
             r["TipoIVA"] = tipo
+        _medir("portes_iva")
 
         # 4) Reconciliación NO interactiva
         estado = "NO_RECONCILE"
-        total_cli = (args.total or "").strip()
+        total_cli = (total or "").strip()
         total_detectado = detectar_total_con_iva(blocks.get("full_text") or lines_text or "") if detectar_total_con_iva else ""
         total_con_iva = total_cli or total_detectado
 
-        if args.reconcile and not args.no_reconcile:
+        if reconcile and not no_reconcile:
             if total_con_iva:
                 bases = [r.get("BaseImponible", "") for r in rows]
                 ivas = [r.get("TipoIVA", 0) or 0 for r in rows]
@@ -272,6 +310,8 @@ def main():
             else:
                 estado = "NO_RECONCILE_MISSING_TOTAL"
 
+        _medir("reconcile")
+
         # 5) Categoría por defecto si falta
         for r in rows:
             if "Categoria" not in r:
@@ -280,14 +320,14 @@ def main():
         result = {"Header": header, "Lineas": rows, "Reconciliacion": estado}
 
         # 6) Export a Excel
-        if args.excel or args.outdir:
-            if args.excel:
-                xlsx_path = args.excel
+        if excel or outdir:
+            if excel:
+                xlsx_path = excel
             else:
                 prov = (header.get("Proveedor") or "PROVEEDOR").upper().replace(" ", "_")
                 ref = header.get("NºFactura") or header.get("NumeroArchivo") or "SINREF"
                 base = f"factura_{prov}_{ref}.xlsx"
-                outdir = args.outdir or "."
+                outdir = outdir or "."
                 os.makedirs(outdir, exist_ok=True)
                 xlsx_path = os.path.join(outdir, base)
 
@@ -301,19 +341,140 @@ def main():
             }
 
             if exportar_a_excel and pd is not None:
-                exportar_a_excel(pd.DataFrame(rows), xlsx_path, metadata=metadata, include_es_portes=args.keep_portes)  # type: ignore
+                exportar_a_excel(pd.DataFrame(rows), xlsx_path, metadata=metadata, include_es_portes=keep_portes)  # type: ignore
             elif pd is not None:
                 pd.DataFrame(rows).to_excel(xlsx_path, index=False)
             else:
                 raise SystemExit("No hay exportador Excel disponible (falta pandas)")
 
+            _medir("export_excel")
+
         # añade ruta Excel si existe
-        if args.excel or args.outdir:
+        if excel or outdir:
             result["Excel"] = xlsx_path
 
     else:
         result = header  # solo cabecera
 
+    if timings:
+        desglose: Dict[str, Any] = {}
+        if doc is not None:
+            desglose["pdf_open"] = doc.timings["open"]
+            desglose["pdf_extract_text"] = doc.timings["extract_text"]
+        desglose.update(etapas)
+        desglose["total"] = time.perf_counter() - inicio
+        result = dict(result)
+        result["Timings"] = {k: round(v, 4) for k, v in desglose.items()}
+        if doc is not None:
+            result["Timings"]["pages_read"] = doc.pages_read
+            result["Timings"]["pages_total"] = doc.num_pages
+
+    return result
+
+
+# ===================== modo servidor =====================
+#
+# python -m src.facturas.cli --serve
+#
+# Lee peticiones JSON, una por línea, en stdin y responde una línea JSON por
+# petición en stdout, en el mismo orden. Así el intérprete, pandas y los
+# lectores PDF se cargan una sola vez por worker en vez de una por factura.
+#
+#   petición:  {"id": 7, "pdf": "ruta.pdf", "lines": true, "reconcile": true,
+#               "total": "293,15", "excel": "...", "outdir": "...", "keep_portes": false,
+#               "timings": false}
+#   respuesta: {"id": 7, "ok": true, "result": {...mismo JSON que la CLI...}}
+#              {"id": 7, "ok": false, "error": "..."}
+#
+# Una línea vacía o EOF termina el servidor.
+
+SERVE_OPTIONS = ("lines", "keep_portes", "excel", "outdir", "reconcile", "no_reconcile", "total", "timings")
+
+
+def handle_request(request: Dict[str, Any]) -> Dict[str, Any]:
+    """Atiende una petición del modo servidor; nunca lanza excepciones."""
+    response: Dict[str, Any] = {"id": request.get("id")}
+    try:
+        pdf = request.get("pdf")
+        if not pdf:
+            raise ValueError("Falta 'pdf' en la petición")
+        options = {k: request[k] for k in SERVE_OPTIONS if k in request}
+        # Cualquier print de los módulos va a stderr: stdout es solo del protocolo
+        with contextlib.redirect_stdout(sys.stderr):
+            result = run_scan(str(pdf), **options)
+        response.update(ok=True, result=result)
+    except (Exception, SystemExit) as e:
+        response["ok"] = False
+        response["error"] = f"{type(e).__name__}: {e}" if not isinstance(e, SystemExit) else str(e)
+    return response
+
+
+def serve(stdin=None, stdout=None) -> int:
+    """Bucle del modo servidor (NDJSON por stdin/stdout). Devuelve nº de peticiones."""
+    stdin = stdin or sys.stdin
+    stdout = stdout or sys.stdout
+    for stream in (stdin, stdout):
+        if hasattr(stream, "reconfigure"):
+            stream.reconfigure(encoding="utf-8")
+
+    served = 0
+    for raw in stdin:
+        raw = raw.strip()
+        if not raw:
+            break
+        try:
+            request = json.loads(raw)
+            if not isinstance(request, dict):
+                raise ValueError("La petición debe ser un objeto JSON")
+        except ValueError as e:
+            response = {"id": None, "ok": False, "error": f"JSON no válido: {e}"}
+        else:
+            response = handle_request(request)
+        stdout.write(json.dumps(response, ensure_ascii=False) + "\n")
+        stdout.flush()
+        served += 1
+    return served
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scan de cabecera y (opcional) líneas de factura.")
+    parser.add_argument("pdf", nargs="?", help="Ruta al PDF/JPG de la factura")
+    parser.add_argument("--serve", action="store_true",
+                        help="Modo servidor: peticiones JSON por línea en stdin, respuestas en stdout")
+    parser.add_argument("--lines", action="store_true", help="Incluir también líneas de producto")
+    parser.add_argument("--pretty", action="store_true", help="Imprime JSON legible")
+    parser.add_argument("--keep-portes", action="store_true", help="No elimina líneas de portes")
+    parser.add_argument("--excel", help="Ruta del Excel de salida")
+    parser.add_argument("--outdir", help="Carpeta de salida para Excel")
+
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("--reconcile", action="store_true", help="Intentar cuadrar si hay total detectado o se pasa con --total")
+    group.add_argument("--no-reconcile", action="store_true", help="No reconciliar aunque haya total")
+
+    parser.add_argument("--total", help="Total con IVA (coma o punto). Si falta, no se reconcilia")
+    parser.add_argument("--timings", action="store_true",
+                        help="Añade \"Timings\" al JSON: segundos por etapa y páginas leídas")
+
+    args = parser.parse_args()
+
+    if args.serve:
+        serve()
+        return
+    if not args.pdf:
+        parser.error("Falta la ruta del PDF (o usa --serve)")
+
+    result = run_scan(
+        args.pdf,
+        lines=args.lines,
+        keep_portes=args.keep_portes,
+        excel=args.excel,
+        outdir=args.outdir,
+        reconcile=args.reconcile,
+        no_reconcile=args.no_reconcile,
+        total=args.total,
+        timings=args.timings,
+    )
+
     if args.pretty:
         print(json.dumps(result, ensure_ascii=False, indent=2))
     else:
@@ -322,8 +483,3 @@ def main():
 
 if __name__ == "__main__":
     main()
-
-
-
-
-
@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+"""
+Pool de workers para los lanzadores batch.
+
+ScanPool: procesos Python (ProcessPoolExecutor) que importan la CLI una
+vez y llaman a `handle_request` directamente; el resultado vuelve como
+dict, sin JSON ni intérpretes nuevos por fichero. Es el que usan
+scripts/batch_runner.py y scripts/BatchRun.py. Por defecto un worker por
+núcleo. Quien necesite la CLI como proceso aparte puede hablar con
+`python -m src.facturas.cli --serve` (NDJSON por stdin/stdout).
+
+Uso:
+    with ScanPool(workers=4) as pool:
+        for request, response in pool.run(requests):
+            ...
+
+`requests` son dicts con las mismas claves que la petición del modo servidor
+(pdf, lines, reconcile, total, excel, outdir, keep_portes). Las respuestas
+llegan según terminan: {"ok": True, "result": {...}} o {"ok": False, "error": "..."}.
+Si un worker muere, el pool se recrea (ver ScanPool).
+"""
+from __future__ import annotations
+
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple
+
+
+def default_workers() -> int:
+    return os.cpu_count() or 1
+
+
+# ===================== pool en proceso =====================
+
+def _warm_worker() -> None:
+    # Importa la CLI (pandas, lector PDF, módulos del pipeline) al arrancar el worker
+    from . import cli  # noqa: F401
+
+
+def _scan(request: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    from .cli import handle_request
+    return request, handle_request(request)
+
+
+class ScanPool:
+    """
+    Workers Python calientes que procesan peticiones con `cli.handle_request`.
+
+    Si un worker muere (p. ej. por memoria), el pool se recrea y las
+    peticiones sin respuesta se reintentan una vez; las que vuelven a
+    romperlo se responden con error.
+    """
+
+    MAX_ATTEMPTS = 2
+
+    def __init__(self, workers: Optional[int] = None):
+        self.size = max(1, workers or default_workers())
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def __enter__(self) -> "ScanPool":
+        self._start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _start(self) -> None:
+        self._executor = ProcessPoolExecutor(max_workers=self.size, initializer=_warm_worker)
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+
+    def run(self, requests: Iterable[Dict[str, Any]]) -> Iterator[Tuple[Dict[str, Any], Dict[str, Any]]]:
+        """Procesa las peticiones en paralelo; devuelve (petición, respuesta) según terminan."""
+        pending = {i: dict(r, id=r.get("id", i)) for i, r in enumerate(requests)}
+        attempts = {i: 0 for i in pending}
+        while pending:
+            futures = {}
+            for i, request in pending.items():
+                attempts[i] += 1
+                futures[self._executor.submit(_scan, request)] = i
+            try:
+                for future in as_completed(futures):
+                    i = futures[future]
+                    try:
+                        request, response = future.result()
+                    except BrokenProcessPool:
+                        raise
+                    except Exception as e:
+                        request = pending[i]
+                        response = {"id": request["id"], "ok": False, "error": f"{type(e).__name__}: {e}"}
+                    del pending[i]
+                    yield request, response
+            except BrokenProcessPool:
+                self.close()
+                self._start()
+                for i in [i for i in pending if attempts[i] >= self.MAX_ATTEMPTS]:
+                    request = pending.pop(i)
+                    yield request, {"id": request["id"], "ok": False, "error": "Worker terminado"}
+
@@ -3,16 +3,7 @@ from __future__ import annotations
 import re
 from typing import Dict, List, Optional
 
-# Soporte pypdf / PyPDF2
-_PDF_IMPORT_ERROR = None
-try:
-    from PyPDF2 import PdfReader
-except Exception as _e1:
-    try:
-        from pypdf import PdfReader
-    except Exception as _e2:
-        PdfReader = None
-        _PDF_IMPORT_ERROR = (_e1, _e2)
+from .document import PdfDocument
 
 # nÂº europeo: 1.234,56 o 12,34
 EU_MONEY_RX = re.compile(r"\b\d{1,3}(?:\.\d{3})*,\d{2}\b")
@@ -28,21 +19,10 @@ FOOTER_HINTS = [
     "forma de pago", "observaciones", "vencimiento", "firma"
 ]
 
-def _extract_all_lines(pdf_path: str) -> List[str]:
-    if PdfReader is None:
-        raise RuntimeError(
-            "No se pudo importar PyPDF2/pypdf. Instala pypdf:  python -m pip install pypdf\n"
-            f"Detalle: {_PDF_IMPORT_ERROR!r}"
-        )
-    reader = PdfReader(pdf_path)
-    lines: List[str] = []
-    for page in reader.pages:
-        txt = page.extract_text() or ""
-        for raw in txt.splitlines():
-            s = " ".join(raw.split()).strip()
-            if s:
-                lines.append(s)
-    return lines
+def _extract_all_lines(pdf_path: str, doc: Optional[PdfDocument] = None) -> List[str]:
+    if doc is None:
+        doc = PdfDocument(pdf_path)
+    return doc.lines()
 
 
 def _looks_like_header(line: str) -> bool:
@@ -87,8 +67,10 @@ def _provider_specific_skip(line: str, provider: Optional[str]) -> bool:
     return False
 
 
-def detect_blocks_minimal(pdf_path: str, provider: Optional[str] = None) -> Dict[str, List[str]]:
-    raw_lines = _extract_all_lines(pdf_path)
+def detect_blocks_minimal(pdf_path: str, provider: Optional[str] = None,
+                          doc: Optional[PdfDocument] = None) -> Dict[str, List[str]]:
+    # doc: PdfDocument ya abierto por la CLI (reutiliza el texto ya extraído)
+    raw_lines = _extract_all_lines(pdf_path, doc)
 
     cleaned: List[str] = []
     for ln in raw_lines:
@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+"""
+Documento PDF con lectura única y perezosa del texto por página.
+
+La CLI abre el PDF una sola vez y comparte el mismo objeto entre la
+detección de cabecera (solo necesita la página 1), la detección de bloques
+(todas las páginas) y el resto del pipeline. Cada página se extrae como
+mucho una vez y solo cuando alguien la pide.
+
+Uso:
+    doc = PdfDocument("factura.pdf")
+    doc.page_text(0)      # extrae solo la primera página
+    doc.lines()           # todas las líneas normalizadas (extrae el resto)
+    doc.timings           # {"open": s, "extract_text": s}
+"""
+from __future__ import annotations
+
+import time
+from typing import Dict, List, Optional
+
+# Soporte pypdf / PyPDF2 (mismo orden que cli.py y detect_blocks.py)
+_PDF_IMPORT_ERROR = None
+try:
+    from PyPDF2 import PdfReader  # type: ignore
+except Exception as _e1:  # pragma: no cover
+    try:
+        from pypdf import PdfReader  # type: ignore
+    except Exception as _e2:  # pragma: no cover
+        PdfReader = None  # type: ignore
+        _PDF_IMPORT_ERROR = (_e1, _e2)
+
+
+class PdfDocument:
+    """PDF abierto una vez; texto por página extraído bajo demanda y cacheado."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._reader = None
+        self._pages: Dict[int, str] = {}
+        self._lines: Optional[List[str]] = None
+        self.timings: Dict[str, float] = {"open": 0.0, "extract_text": 0.0}
+
+    @property
+    def reader(self):
+        if self._reader is None:
+            if PdfReader is None:
+                raise RuntimeError(
+                    "No se pudo importar el lector PDF (PyPDF2/pypdf).\n"
+                    "Instala pypdf (recomendado):  python -m pip install pypdf\n"
+                    f"Detalle: {_PDF_IMPORT_ERROR!r}"
+                )
+            inicio = time.perf_counter()
+            self._reader = PdfReader(self.path)
+            self.timings["open"] += time.perf_counter() - inicio
+        return self._reader
+
+    @property
+    def num_pages(self) -> int:
+        return len(self.reader.pages)
+
+    @property
+    def pages_read(self) -> int:
+        return len(self._pages)
+
+    def page_text(self, index: int) -> str:
+        """Texto crudo de una página (extract_text), extraído una sola vez."""
+        if index not in self._pages:
+            page = self.reader.pages[index]
+            inicio = time.perf_counter()
+            self._pages[index] = page.extract_text() or ""
+            self.timings["extract_text"] += time.perf_counter() - inicio
+        return self._pages[index]
+
+    def lines(self) -> List[str]:
+        """Líneas no vacías de todas las páginas, con los espacios normalizados."""
+        if self._lines is None:
+            lines: List[str] = []
+            for index in range(self.num_pages):
+                for raw in self.page_text(index).splitlines():
+                    s = " ".join(raw.split()).strip()
+                    if s:
+                        lines.append(s)
+            self._lines = lines
+        return self._lines
@@ -26,9 +26,20 @@ class Pattern(BaseModel):
     portes: Optional[Dict[str, str]] = None
     precedence: Precedence = Precedence()
 
+# (ruta, mtime_ns, tamaño) -> Pattern validado; evita re-parsear YAML sin cambios
+_CACHE: Dict[tuple, Pattern] = {}
+
 def load_patterns(dirpath: Path) -> Dict[str, Pattern]:
     patterns: Dict[str, Pattern] = {}
     for path in dirpath.glob('*.yml'):
+        st = path.stat()
+        clave = (str(path), st.st_mtime_ns, st.st_size)
+        p = _CACHE.get(clave)
+        if p is not None:
+            patterns[p.proveedor.upper()] = p
+            for a in p.aliases or []:
+                patterns[a.upper()] = p
+            continue
         try:
             text = path.read_text(encoding='utf-8')
             data = yaml.load(text)
@@ -37,6 +48,7 @@ def load_patterns(dirpath: Path) -> Dict[str, Pattern]:
 
         try:
             p = Pattern(**data)
+            _CACHE[clave] = p
             key = p.proveedor.upper()
             patterns[key] = p
             if p.aliases:
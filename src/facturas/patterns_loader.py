@@ -0,0 +1,387 @@
+# -*- coding: utf-8 -*-
+"""
+Overlays de proveedor (patterns/*.yml) compilados a un programa ejecutable.
+
+Cada YAML se parsea una sola vez: el resultado (datos crudos + programa
+compilado) se guarda en patterns/.overlays.pkl y solo se vuelve a parsear
+el YAML cuyo mtime/tamaño haya cambiado.
+
+El programa de un overlay reúne lo que antes se interpretaba línea a línea:
+  - start_after / stop_before -> una sola regex (alternancia) por ancla;
+                                 una entrada inválida se descarta sola
+  - ignore_if_contains        -> una sola alternancia, sin distinguir mayúsculas
+  - regex_linea               -> regex precompilada
+  - normalize                 -> pasos fusionados (tabla translate + una sustitución)
+
+Semántica de las anclas (lines.* o lineas.*):
+  - Cada entrada puede ser texto literal ("TOTAL FACTURA") o regex; se trata
+    como regex si empieza por "(?" o "^" o contiene "\\". Los literales se
+    comparan sin mayúsculas ni acentos.
+  - La línea que casa con start_after no se incluye; la que casa con
+    stop_before cierra el bloque. Tras cerrar, se vuelve a buscar
+    start_after (facturas de varias páginas repiten la cabecera).
+  - Sin start_after el bloque empieza en la primera línea. Un start_after
+    cuyas entradas son todas inválidas no equivale a no tenerlo: no casa
+    nunca (el overlay no da filas) y el error queda en program.errors.
+  - Regex escritas con todas las barras dobladas ('\\\\s' entre comillas
+    simples en el YAML) se leen como escapes simples.
+
+Uso:
+    ov = get_overlay_for("CERES")
+    filas = segment_lines(doc_lines, ov.program)
+
+De momento solo lo usa scripts/check_overlay.py: la CLI (cli.py) y
+parse_lines todavía no aplican los overlays compilados.
+"""
+from __future__ import annotations
+
+import os
+import pickle
+import re
+import unicodedata
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Pattern, Tuple
+
+try:
+    from ruamel.yaml import YAML
+except ImportError:  # pragma: no cover
+    YAML = None  # type: ignore
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+PATTERNS_DIR = REPO_ROOT / "patterns"
+CACHE_NAME = ".overlays.pkl"
+CACHE_VERSION = 2  # Subir al cambiar compile_overlay (invalida las cachés existentes)
+
+
+# ===================== normalización =====================
+
+def _build_fold_table() -> Dict[int, str]:
+    # Quita acentos de Latin-1/Latin Extended-A y convierte NBSP en espacio
+    table: Dict[int, str] = {0x00A0: " ", 0x202F: " "}
+    for code in range(0x00C0, 0x0180):
+        base = "".join(c for c in unicodedata.normalize("NFD", chr(code)) if unicodedata.category(c) != "Mn")
+        if base and base != chr(code):
+            table[code] = base
+    return table
+
+
+_FOLD_TABLE = _build_fold_table()
+_NBSP_TABLE = {0x00A0: " ", 0x202F: " "}
+
+# Unidades y códigos que drop_units / drop_codes quitan de la descripción
+_UNITS_RX = r"\b\d+(?:[.,]\d+)?\s*(?:kg|kgs|gr|g|l|lt|ml|cl|uds?|u|x)\b\.?"
+_CODES_RX = r"^\s*\d{3,}\s+"
+
+
+def fold(text: str) -> str:
+    """Mayúsculas sin acentos ni NBSP (para comparar anclas literales)."""
+    return text.translate(_FOLD_TABLE).upper()
+
+
+def _fix_double_escapes(src: str) -> str:
+    # Varios YAML migrados escriben '\\s' entre comillas simples (= dos barras en
+    # la regex). Si TODAS las barras van dobladas, se entiende que eran escapes simples.
+    if "\\\\" in src and "\\" not in src.replace("\\\\", ""):
+        return src.replace("\\\\", "\\")
+    return src
+
+
+def _is_regex(entry: str) -> bool:
+    return entry.startswith("(?") or entry.startswith("^") or "\\" in entry
+
+
+def _scoped(entry: str) -> str:
+    # "(?i)^TOTAL" -> "(?i:^TOTAL)": los flags globales no pueden ir en mitad de una alternancia
+    m = re.match(r"^\(\?([aiLmsux]+)\)", entry)
+    if m:
+        return f"(?{m.group(1)}:{entry[m.end():]})"
+    return f"(?:{entry})"
+
+
+def _as_list(value: Any) -> List[str]:
+    if value is None:
+        return []
+    if isinstance(value, str):
+        return [value] if value.strip() else []
+    return [str(v) for v in value if str(v).strip()]
+
+
+# Regex que no casa con nada: sustituye a una regex configurada que no compila
+_NEVER_SRC = r"(?!)"
+
+
+def _anchor_source(entries: List[str], name: str, errors: List[str]) -> Optional[str]:
+    """
+    Alternancia única: literales plegados (se buscan sobre fold(línea)) y regex tal cual.
+
+    Cada entrada se compila por separado; las inválidas se anotan en errors
+    y se descartan. Si no queda ninguna, el ancla no casa nunca (None es
+    "sin ancla").
+    """
+    if not entries:
+        return None
+    parts = []
+    for entry in entries:
+        if _is_regex(entry):
+            part = _scoped(_fix_double_escapes(entry))
+            try:
+                re.compile(part)
+            except re.error as e:
+                errors.append(f"{name} {entry!r}: {e}")
+                continue
+            parts.append(part)
+        else:
+            parts.append(re.escape(fold(entry.strip())))
+    return "|".join(parts) if parts else _NEVER_SRC
+
+
+# ===================== programa compilado =====================
+
+@dataclass
+class OverlayProgram:
+    """Programa compilado de un overlay. Se guarda en la caché como fuentes (picklable)."""
+    start_src: Optional[str] = None
+    stop_src: Optional[str] = None
+    ignore_src: Optional[str] = None
+    line_src: Optional[str] = None
+    normalize: Tuple[str, ...] = ()
+    errors: List[str] = field(default_factory=list)
+
+    def __post_init__(self) -> None:
+        self._compiled: Optional[Dict[str, Optional[Pattern]]] = None
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = dict(self.__dict__)
+        state["_compiled"] = None
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+
+    @property
+    def compiled(self) -> Dict[str, Optional[Pattern]]:
+        # Los errores se anotan en compile_overlay; aquí una fuente inválida
+        # (p.ej. un programa creado a mano) no casa nunca, no se ignora
+        if self._compiled is None:
+            compiled: Dict[str, Optional[Pattern]] = {}
+            for name in ("start", "stop", "ignore", "line"):
+                src = getattr(self, f"{name}_src")
+                try:
+                    compiled[name] = re.compile(src) if src else None
+                except re.error:
+                    compiled[name] = re.compile(_NEVER_SRC)
+            drops = []
+            if "drop_codes" in self.normalize:
+                drops.append(_CODES_RX)
+            if "drop_units" in self.normalize:
+                drops.append(_UNITS_RX)
+            compiled["drop"] = re.compile("|".join(drops), re.IGNORECASE) if drops else None
+            self._compiled = compiled
+        return self._compiled
+
+    def normalize_text(self, text: str) -> str:
+        """Aplica los pasos de normalize en una pasada (translate + sub + split)."""
+        steps = self.normalize
+        if not steps:
+            return text
+        if "remove_accents" in steps:
+            text = text.translate(_FOLD_TABLE)
+        elif "strip_nbsp" in steps:
+            text = text.translate(_NBSP_TABLE)
+        drop = self.compiled["drop"]
+        if drop is not None:
+            text = drop.sub(" ", text)
+        if "collapse_ws" in steps or drop is not None:
+            text = " ".join(text.split())
+        if "casefold" in steps:
+            text = text.casefold()
+        return text
+
+
+_NORMALIZE_ORDER = ("strip_nbsp", "remove_accents", "drop_codes", "drop_units", "collapse_ws", "casefold")
+
+
+def compile_overlay(data: Dict[str, Any]) -> OverlayProgram:
+    """Compila la sección lines/lineas de un overlay."""
+    lines = data.get("lines") or data.get("lineas") or {}
+    if not isinstance(lines, dict):
+        lines = {}
+    ignore = _as_list(lines.get("ignore_if_contains"))
+    ignore.sort(key=len, reverse=True)
+    normalize = lines.get("normalize") or {}
+    regex_linea = lines.get("regex_linea")
+    errors: List[str] = []
+    line_src = _fix_double_escapes(regex_linea.strip()) if isinstance(regex_linea, str) and regex_linea.strip() else None
+    if line_src is not None:
+        try:
+            re.compile(line_src)
+        except re.error as e:
+            errors.append(f"regex_linea: {e}")
+            line_src = _NEVER_SRC
+    program = OverlayProgram(
+        start_src=_anchor_source(_as_list(lines.get("start_after")), "start_after", errors),
+        stop_src=_anchor_source(_as_list(lines.get("stop_before")), "stop_before", errors),
+        ignore_src="|".join(re.escape(fold(s)) for s in ignore) or None,
+        line_src=line_src,
+        normalize=tuple(s for s in _NORMALIZE_ORDER if isinstance(normalize, dict) and normalize.get(s)),
+        errors=errors,
+    )
+    return program
+
+
+# ===================== motor de segmentación =====================
+
+def segment_lines(lines: Iterable[str], program: OverlayProgram) -> List[Dict[str, str]]:
+    """
+    Aplica un overlay compilado a las líneas del documento en una sola pasada.
+
+    Returns:
+        Una fila por línea de detalle: grupos con nombre de regex_linea (o
+        {"descripcion": línea} si no hay regex_linea), más "raw" con la línea
+        original. Si hay normalize, se aplica a la descripción.
+    """
+    c = program.compiled
+    start, stop, ignore, line_rx = c["start"], c["stop"], c["ignore"], c["line"]
+    inside = start is None
+    rows: List[Dict[str, str]] = []
+    for raw in lines:
+        text = " ".join(raw.split())
+        if not text:
+            continue
+        folded = fold(text)
+        if not inside:
+            if start.search(folded) or start.search(text):
+                inside = True
+            continue
+        if stop is not None and (stop.search(folded) or stop.search(text)):
+            if start is None:
+                break
+            inside = False
+            continue
+        if ignore is not None and ignore.search(folded):
+            continue
+        if line_rx is not None:
+            m = line_rx.search(text)
+            if not m:
+                continue
+            row = {k: v for k, v in m.groupdict().items() if v is not None}
+            if not row:
+                row = {"descripcion": m.group(0)}
+        else:
+            row = {"descripcion": text}
+        for key in ("descripcion", "Descripcion"):
+            if key in row:
+                row[key] = program.normalize_text(row[key])
+        row["raw"] = raw
+        rows.append(row)
+    return rows
+
+
+# ===================== carga y caché =====================
+
+@dataclass
+class Overlay:
+    path: Path
+    data: Dict[str, Any]
+    program: OverlayProgram
+
+    @property
+    def provider(self) -> str:
+        return str(self.data.get("provider") or self.data.get("proveedor") or self.path.stem)
+
+    def names(self) -> List[str]:
+        names = [self.provider, self.path.stem.replace("_", " ")]
+        names += _as_list(self.data.get("aliases"))
+        match = self.data.get("match")
+        if isinstance(match, dict) and match.get("name"):
+            names.append(str(match["name"]))
+        return names
+
+
+def _key(name: str) -> str:
+    return " ".join(re.sub(r"[^A-Z0-9 ]+", " ", fold(name)).split())
+
+
+def _parse_yaml(path: Path) -> Dict[str, Any]:
+    if YAML is None:
+        raise RuntimeError("Falta dependencia: ruamel.yaml. Instala con: pip install ruamel.yaml")
+    data = YAML(typ="safe").load(path.read_text(encoding="utf-8"))
+    return data if isinstance(data, dict) else {}
+
+
+def _read_cache(path: Path) -> Dict[str, Any]:
+    try:
+        with path.open("rb") as fh:
+            cache = pickle.load(fh)
+        if cache.get("version") == CACHE_VERSION:
+            return cache["entries"]
+    except Exception:
+        pass
+    return {}
+
+
+def _write_cache(path: Path, entries: Dict[str, Any]) -> None:
+    tmp = path.with_name(path.name + f".{os.getpid()}.tmp")
+    try:
+        with tmp.open("wb") as fh:
+            pickle.dump({"version": CACHE_VERSION, "entries": entries}, fh, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+    except OSError:
+        try:
+            tmp.unlink()
+        except OSError:
+            pass
+
+
+_MEMO: Dict[str, Tuple[Tuple, Dict[str, Overlay]]] = {}
+
+
+def load_overlays(dirpath: Path = PATTERNS_DIR, use_cache: bool = True) -> Dict[str, Overlay]:
+    """
+    Carga y compila todos los overlays de una carpeta, indexados por nombre normalizado.
+
+    Solo se parsean los YAML cuyo (mtime, tamaño) no coincide con la caché
+    en disco; en el mismo proceso, si nada ha cambiado se devuelve el mismo
+    diccionario sin tocar la caché.
+    """
+    dirpath = Path(dirpath)
+    files = sorted(dirpath.glob("*.yml"))
+    stamps = tuple((p.name, p.stat().st_mtime_ns, p.stat().st_size) for p in files)
+    memo = _MEMO.get(str(dirpath))
+    if memo and memo[0] == stamps:
+        return memo[1]
+
+    cache_path = dirpath / CACHE_NAME
+    cached = _read_cache(cache_path) if use_cache else {}
+    entries: Dict[str, Any] = {}
+    changed = False
+    for (name, mtime, size), path in zip(stamps, files):
+        entry = cached.get(name)
+        if entry is None or entry["stamp"] != (mtime, size):
+            try:
+                data = _parse_yaml(path)
+            except Exception as e:
+                data = {"_error": f"Error YAML en {name}: {e}"}
+            entry = {"stamp": (mtime, size), "data": data, "program": compile_overlay(data)}
+            changed = True
+        entries[name] = entry
+    if use_cache and (changed or set(cached) != set(entries)):
+        _write_cache(cache_path, entries)
+
+    overlays: Dict[str, Overlay] = {}
+    for name, entry in entries.items():
+        if "_error" in entry["data"]:
+            continue
+        overlay = Overlay(path=dirpath / name, data=entry["data"], program=entry["program"])
+        for alias in overlay.names():
+            overlays.setdefault(_key(alias), overlay)
+    _MEMO[str(dirpath)] = (stamps, overlays)
+    return overlays
+
+
+def get_overlay_for(proveedor: str, dirpath: Path = PATTERNS_DIR) -> Optional[Overlay]:
+    """Overlay de un proveedor por nombre, alias o nombre de archivo (sin mayúsculas ni acentos)."""
+    if not proveedor:
+        return None
+    return load_overlays(dirpath).get(_key(proveedor))
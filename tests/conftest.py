@@ -0,0 +1,14 @@
+"""
+Configuración de pytest: la raíz del repo en sys.path para importar
+nucleo, salidas, extractores, config y scripts como hace main.py, y src/
+para el paquete facturas (como PYTHONPATH=src en CI).
+
+Creado: 19/10/2026
+"""
+from pathlib import Path
+import sys
+
+RAIZ = Path(__file__).resolve().parent.parent
+for ruta in (RAIZ / 'src', RAIZ):
+    if str(ruta) not in sys.path:
+        sys.path.insert(0, str(ruta))
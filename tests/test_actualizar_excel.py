@@ -0,0 +1,94 @@
+"""
+Tests de salidas.excel.actualizar_excel: sustitución por número de
+gestoría, números repetidos, TMP y hoja Sugerencias.
+
+Creado: 19/10/2026
+"""
+import pandas as pd
+
+from nucleo.factura import Factura, LineaFactura
+from salidas.excel import actualizar_excel, generar_excel
+
+
+def _factura(archivo, proveedor, base, referencia='R1', categoria='BEBIDAS'):
+    factura = Factura(archivo=archivo, numero=archivo.split('_')[0], proveedor=proveedor,
+                      fecha='01/10/2025', referencia=referencia, total=round(base * 1.21, 2))
+    factura.lineas = [LineaFactura(articulo='CERVEZA', base=base, iva=21, categoria=categoria)]
+    factura.cuadre = 'OK'
+    return factura
+
+
+def _hoja(ruta, hoja):
+    return pd.read_excel(ruta, sheet_name=hoja)
+
+
+def test_reprocesar_sustituye_y_conserva_columnas_manuales(tmp_path):
+    ruta = tmp_path / 'Facturas_4T25.xlsx'
+    generar_excel([_factura('1001_4T25_CERES.pdf', 'CERES', 10.0),
+                   _factura('1002_4T25_BM.pdf', 'BM', 20.0)], ruta)
+    df = _hoja(ruta, 'Facturas')
+    df['NOTA'] = ['revisada', '']
+    with pd.ExcelWriter(ruta, engine='openpyxl', mode='a', if_sheet_exists='replace') as w:
+        df.to_excel(w, index=False, sheet_name='Facturas')
+
+    assert actualizar_excel([_factura('1001_4T25_CERES.pdf', 'CERES', 30.0)], ruta) == (1, 0)
+
+    facturas = _hoja(ruta, 'Facturas')
+    assert list(facturas['#']) == [1001, 1002]
+    assert facturas.loc[0, 'Total'] == 36.3
+    assert facturas.loc[0, 'NOTA'] == 'revisada'
+    lineas = _hoja(ruta, 'Lineas')
+    assert lineas.loc[lineas['ARCHIVO'] == '1001_4T25_CERES.pdf', 'BASE (€)'].tolist() == [30.0]
+
+
+def test_numero_de_gestoria_repetido_no_se_pisa(tmp_path, capsys):
+    ruta = tmp_path / 'Facturas_4T25.xlsx'
+    generar_excel([_factura('1002_4T25_BM.pdf', 'BM', 20.0)], ruta)
+
+    repetidas = [_factura('1001_4T25_CERES.pdf', 'CERES', 10.0),
+                 _factura('1001_4T25_CERES_BIS.pdf', 'CERES', 15.0)]
+    assert actualizar_excel(repetidas, ruta) == (0, 2)
+    assert 'Número de gestoría 1001 repetido' in capsys.readouterr().out
+
+    facturas = _hoja(ruta, 'Facturas')
+    assert sorted(facturas['Total']) == [12.1, 18.15, 24.2]
+
+    # Al reprocesarlas de nuevo cada una casa con su fila
+    assert actualizar_excel(repetidas, ruta) == (2, 0)
+    assert len(_hoja(ruta, 'Facturas')) == 3
+
+
+def test_tmp_existente_conserva_su_numero(tmp_path):
+    ruta = tmp_path / 'Facturas_4T25.xlsx'
+    generar_excel([_factura('CERES.pdf', 'CERES', 10.0)], ruta)
+    assert list(_hoja(ruta, 'Facturas')['#']) == ['TMP001']
+
+    assert actualizar_excel([_factura('CERES.pdf', 'CERES', 12.0),
+                             _factura('OTRA_CERES.pdf', 'CERES', 5.0, referencia='R2')], ruta) == (1, 1)
+    assert list(_hoja(ruta, 'Facturas')['#']) == ['TMP001', 'TMP002']
+
+
+def test_sugerencias_se_actualizan_por_archivo(tmp_path):
+    ruta = tmp_path / 'Facturas_4T25.xlsx'
+    columnas = ['#', 'PROVEEDOR', 'ARTICULO', 'CATEGORIA', 'SUGERENCIA_1', 'ARCHIVO']
+    previas = pd.DataFrame([
+        ['1001', 'CERES', 'CERVEZA', 'PENDIENTE', 'BEBIDAS', '1001_4T25_CERES.pdf'],
+        ['1002', 'BM', 'AGUA', 'PENDIENTE', 'AGUAS', '1002_4T25_BM.pdf'],
+    ], columns=columnas)
+    generar_excel([_factura('1001_4T25_CERES.pdf', 'CERES', 10.0, categoria='PENDIENTE'),
+                   _factura('1002_4T25_BM.pdf', 'BM', 20.0, categoria='PENDIENTE')],
+                  ruta, sugerencias=previas)
+
+    # 1001 ya no tiene pendientes: sus sugerencias desaparecen; las de 1002 quedan
+    actualizar_excel([_factura('1001_4T25_CERES.pdf', 'CERES', 10.0)], ruta,
+                     sugerencias=pd.DataFrame(columns=columnas))
+    assert list(_hoja(ruta, 'Sugerencias')['ARCHIVO']) == ['1002_4T25_BM.pdf']
+
+    # Un libro sin la hoja la recibe al actualizar
+    ruta_sin = tmp_path / 'Facturas_3T25.xlsx'
+    generar_excel([_factura('1003_3T25_BM.pdf', 'BM', 20.0)], ruta_sin)
+    nuevas = pd.DataFrame([['1003', 'BM', 'AGUA', 'PENDIENTE', 'AGUAS', '1003_3T25_BM.pdf']],
+                          columns=columnas)
+    actualizar_excel([_factura('1003_3T25_BM.pdf', 'BM', 20.0, categoria='PENDIENTE')], ruta_sin,
+                     sugerencias=nuevas)
+    assert list(_hoja(ruta_sin, 'Sugerencias')['SUGERENCIA_1']) == ['AGUAS']
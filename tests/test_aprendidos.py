@@ -0,0 +1,64 @@
+"""
+Tests de las categorías aprendidas (nucleo.aprendidos) y su uso en
+main.categorizar_linea.
+
+Creado: 19/10/2026
+"""
+import pandas as pd
+
+import main
+from nucleo.aprendidos import AprendidosCategorias, importar_revisado
+from nucleo.factura import LineaFactura
+from nucleo.reglas import IndiceCategorias
+
+
+def _excel(ruta, filas, revisada=None):
+    df = pd.DataFrame(filas, columns=['ARCHIVO', 'PROVEEDOR', 'ARTICULO', 'CATEGORIA', 'ID_CAT'])
+    if revisada is not None:
+        df['CATEGORIA_REVISADA'] = revisada
+    df.to_excel(ruta, sheet_name='Lineas', index=False)
+    return ruta
+
+
+def test_solo_aprende_las_filas_corregidas(tmp_path):
+    original = _excel(tmp_path / 'original.xlsx', [
+        ('a.pdf', 'CERES', 'CERVEZA', 'BEBIDAS', 1),
+        ('a.pdf', 'CERES', 'AGUA', 'PENDIENTE', 0),
+    ])
+    revisado = _excel(tmp_path / 'revisado.xlsx', [
+        ('a.pdf', 'CERES', 'AGUA', 'AGUAS', 7),
+        ('a.pdf', 'CERES', 'CERVEZA', 'BEBIDAS', 1),
+    ])
+    aprendidos = AprendidosCategorias()
+    resumen = importar_revisado(revisado, aprendidos, original=original)
+    assert resumen['corregidas'] == 1 and resumen['aprendidas'] == 1
+    assert aprendidos.buscar('CERES', 'agua')['categoria'] == 'AGUAS'
+    assert aprendidos.buscar('CERES', 'CERVEZA') is None
+
+
+def test_el_proveedor_se_normaliza_al_importar_y_al_buscar(tmp_path):
+    revisado = _excel(tmp_path / 'revisado.xlsx', [
+        ('a.pdf', 'CERES', 'AGUA MINERAL', 'PENDIENTE', 0),
+    ], revisada=['AGUAS'])
+    aprendidos = AprendidosCategorias()
+    importar_revisado(revisado, aprendidos, normalizar_proveedor=main.normalizar_proveedor)
+    indice = IndiceCategorias({'CERES': {'AGUA': {'categoria': 'OTRA', 'id_categoria': '1'}}},
+                              aprendidos=aprendidos)
+
+    linea = LineaFactura(articulo='AGUA MINERAL')
+    main.categorizar_linea(linea, '4T25 CERES TF', indice)
+    assert (linea.categoria, linea.match_info) == ('AGUAS', 'APRENDIDO')
+
+
+def test_la_correccion_manda_sobre_la_categoria_del_extractor(tmp_path):
+    aprendidos = AprendidosCategorias()
+    aprendidos.aprender('CERES', 'AGUA MINERAL', 'AGUAS')
+    indice = IndiceCategorias({}, aprendidos=aprendidos)
+
+    corregida = LineaFactura(articulo='AGUA MINERAL', categoria='BEBIDAS')
+    main.categorizar_linea(corregida, 'CERES', indice)
+    assert (corregida.categoria, corregida.match_info) == ('AGUAS', 'APRENDIDO')
+
+    fija = LineaFactura(articulo='CERVEZA', categoria='BEBIDAS')
+    main.categorizar_linea(fija, 'CERES', indice)
+    assert (fija.categoria, fija.match_info) == ('BEBIDAS', 'EXTRACTOR')
@@ -0,0 +1,35 @@
+"""
+Tests de los avisos de extractor: viajan en Factura.avisos y salen en el
+log, sin tocar ERRORES ni el cuadre.
+
+Creado: 19/10/2026
+"""
+from nucleo.factura import Factura
+from salidas import EstadisticasEjecucion, generar_log, registro_factura
+
+
+def _factura():
+    factura = Factura(archivo='1001_LAVAPIES.pdf', numero='1001', proveedor='LAVAPIES')
+    factura.cuadre = 'OK'
+    factura.avisos.append('IVA 10% esperado 21% en CERVEZA')
+    return factura
+
+
+def test_los_avisos_no_son_errores(tmp_path):
+    factura = _factura()
+    stats = EstadisticasEjecucion()
+    stats.registrar(factura)
+
+    assert factura.errores == []
+    assert stats.lineas_errores == []
+    assert stats.fichas_error == []
+
+    ruta = tmp_path / 'log.txt'
+    generar_log(stats, ruta)
+    texto = ruta.read_text(encoding='utf-8')
+    assert 'AVISOS DE EXTRACTORES:\n  1001_LAVAPIES.pdf: IVA 10% esperado 21% en CERVEZA' in texto
+
+
+def test_los_avisos_vuelven_del_registro_jsonl():
+    registro = registro_factura(_factura(), posicion=0)
+    assert Factura.from_dict(registro).avisos == ['IVA 10% esperado 21% en CERVEZA']
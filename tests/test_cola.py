@@ -0,0 +1,67 @@
+"""
+Tests de la cola de trabajo (nucleo.cola): lease caducado, reclamación
+por otro worker e intentos agotados.
+
+Creado: 19/10/2026
+"""
+import pytest
+
+from nucleo import cola as modulo_cola
+from nucleo.cola import ColaTrabajo, EN_CURSO, FALLIDA, HECHA, PENDIENTE
+
+
+@pytest.fixture
+def reloj(monkeypatch):
+    """Reloj manual para nucleo.cola: reloj.ahora se avanza a mano."""
+    class Reloj:
+        ahora = 1_000_000.0
+    monkeypatch.setattr(modulo_cola.time, 'time', lambda: Reloj.ahora)
+    return Reloj
+
+
+@pytest.fixture
+def cola(tmp_path):
+    carpeta = tmp_path / '1 TRI'
+    carpeta.mkdir()
+    for nombre in ('a.pdf', 'b.pdf'):
+        (carpeta / nombre).write_bytes(b'%PDF')
+    cola = ColaTrabajo(tmp_path / 'cola.sqlite', lease_segundos=60, max_intentos=2)
+    assert cola.encolar([(carpeta, '1T25')]) == 2
+    return cola
+
+
+def test_lease_vigente_no_se_reclama_y_caducado_si(cola, reloj):
+    [(posicion, ruta)] = cola.reclamar('w1')
+    assert ruta.name == 'a.pdf'
+
+    # w2 no puede quitarle la tarea a w1 mientras el lease está vigente
+    reloj.ahora += 30
+    assert [r.name for _, r in cola.reclamar('w2', cantidad=2)] == ['b.pdf']
+
+    # w1 muere: al caducar el lease, w3 la reclama
+    reloj.ahora += 31
+    assert cola.reclamar('w3') == [(posicion, ruta)]
+
+    # El resultado tardío de w1 se descarta; el de w3 se guarda
+    assert not cola.completar(posicion, 'w1', {'archivo': 'a.pdf'})
+    assert cola.completar(posicion, 'w3', {'archivo': 'a.pdf'})
+    assert cola.resumen() == {PENDIENTE: 0, EN_CURSO: 1, HECHA: 1, FALLIDA: 0}
+
+
+def test_heartbeat_alarga_el_lease(cola, reloj):
+    [(posicion, _)] = cola.reclamar('w1')
+    reloj.ahora += 50
+    assert cola.renovar('w1') == 1
+    reloj.ahora += 50
+    # 100 s desde la reclamación, pero solo 50 desde la renovación
+    assert [r.name for _, r in cola.reclamar('w2', cantidad=2)] == ['b.pdf']
+
+
+def test_lease_caducado_en_todos_los_intentos_queda_fallida(cola, reloj):
+    [(posicion, _)] = cola.reclamar('w1')
+    reloj.ahora += 61
+    assert cola.reclamar('w2')[0][0] == posicion
+    reloj.ahora += 61
+    # Segundo intento también caducado (max_intentos=2): FALLIDA, no se reclama
+    assert posicion not in [p for p, _ in cola.reclamar('w3', cantidad=2)]
+    assert cola.resumen()[FALLIDA] == 1
@@ -0,0 +1,65 @@
+"""
+Tests de scripts/compilar_diccionario.py: formato antiguo (sin TipoMatch)
+y fechas de vigencia en ISO.
+
+Creado: 19/10/2026
+"""
+from datetime import datetime
+from pathlib import Path
+import json
+import subprocess
+import sys
+
+import pandas as pd
+
+SCRIPT = Path(__file__).resolve().parent.parent / 'scripts' / 'compilar_diccionario.py'
+
+
+def _compilar(tmp_path, df, hoja='REGLAS'):
+    excel = tmp_path / 'diccionario.xlsx'
+    df.to_excel(excel, sheet_name=hoja, index=False)
+    salida = tmp_path / 'compilado.json'
+    subprocess.run([sys.executable, str(SCRIPT), '--dict', str(excel), '--out', str(salida),
+                    '--version', 'test'], check=True, capture_output=True)
+    return json.loads(salida.read_text(encoding='utf-8'))['rules']
+
+
+def test_formato_antiguo_compila_como_exact(tmp_path):
+    df = pd.DataFrame({
+        'PROVEEDOR': ['CERES', 'CERES'],
+        'ARTICULO': ['LIMONADA VIANATURE 750ML', 'LIMON'],
+        'CATEGORIA': ['REFRESCOS', 'FRUTA'],
+    })
+    reglas = _compilar(tmp_path, df, hoja='Articulos')
+
+    assert {r['TipoMatch'] for r in reglas} == {'EXACT'}
+    assert {r['ArticuloPattern'] for r in reglas} == {'LIMONADA VIANATURE 750ML', 'LIMON'}
+
+
+def test_con_tipomatch_los_vacios_son_substr(tmp_path):
+    df = pd.DataFrame({
+        'Proveedor': ['CERES', 'CERES'],
+        'ArticuloPattern': ['CERVEZA', '^AGUA'],
+        'Categoria': ['BEBIDAS', 'AGUAS'],
+        'TipoMatch': [None, 'regex'],
+    })
+    reglas = _compilar(tmp_path, df)
+
+    assert {r['ArticuloPattern']: r['TipoMatch'] for r in reglas} == {
+        'CERVEZA': 'SUBSTR', '^AGUA': 'REGEX'}
+
+
+def test_fechas_de_vigencia_en_iso(tmp_path):
+    df = pd.DataFrame({
+        'Proveedor': ['CERES', 'CERES', 'CERES'],
+        'ArticuloPattern': ['A', 'B', 'C'],
+        'Categoria': ['X', 'X', 'X'],
+        'TipoMatch': ['EXACT', 'EXACT', 'EXACT'],
+        'ValidaDesde': [datetime(2025, 1, 1), '15/03/2025', None],
+        'ValidaHasta': ['2025-06-30', '31-12-25', None],
+    })
+    reglas = {r['ArticuloPattern']: r for r in _compilar(tmp_path, df)}
+
+    assert (reglas['A']['ValidaDesde'], reglas['A']['ValidaHasta']) == ('2025-01-01', '2025-06-30')
+    assert (reglas['B']['ValidaDesde'], reglas['B']['ValidaHasta']) == ('2025-03-15', '2025-12-31')
+    assert (reglas['C']['ValidaDesde'], reglas['C']['ValidaHasta']) == (None, None)
@@ -0,0 +1,91 @@
+"""
+Tests de equivalencia de nucleo.indices con los bucles lineales que
+sustituyen (mismo resultado y misma prioridad por posición).
+
+Creado: 19/10/2026
+"""
+from difflib import SequenceMatcher
+import pickle
+import random
+
+import pytest
+
+from nucleo.indices import (
+    AutomataSubcadenas, IndiceContenedores, IndiceSimilitud, TablaNombres,
+    primera_relacionada,
+)
+
+
+def _textos(semilla, cantidad, alfabeto='ABC ', maximo=8):
+    azar = random.Random(semilla)
+    return [''.join(azar.choice(alfabeto) for _ in range(azar.randint(0, maximo)))
+            for _ in range(cantidad)]
+
+
+@pytest.mark.parametrize('semilla', range(5))
+def test_subcadenas_y_contenedores_como_el_bucle(semilla):
+    claves = _textos(semilla, 40)
+    automata = AutomataSubcadenas(claves)
+    contenedores = IndiceContenedores(claves)
+
+    for texto in _textos(semilla + 100, 200, maximo=12):
+        assert automata.buscar(texto) == {i for i, c in enumerate(claves) if c in texto}
+        assert contenedores.buscar(texto) == {i for i, c in enumerate(claves) if texto in c}
+        esperada = next((i for i, c in enumerate(claves) if c in texto or texto in c), None)
+        assert primera_relacionada(automata, contenedores, texto) == esperada
+
+
+def _mejor_lineal(claves, consulta, umbral):
+    mejor, mejor_ratio = None, umbral
+    for posicion, clave in enumerate(claves):
+        ratio = SequenceMatcher(None, consulta, clave).ratio()
+        if ratio > mejor_ratio:
+            mejor, mejor_ratio = posicion, ratio
+    return mejor
+
+
+@pytest.mark.parametrize('semilla', range(5))
+@pytest.mark.parametrize('umbral', [0.0, 0.6, 0.85])
+def test_similitud_como_el_bucle(semilla, umbral):
+    claves = _textos(semilla, 60, alfabeto='ABCDE ', maximo=14)
+    indice = IndiceSimilitud(claves)
+
+    for consulta in _textos(semilla + 100, 80, alfabeto='ABCDE ', maximo=14):
+        assert indice.mejor(consulta, umbral) == _mejor_lineal(claves, consulta, umbral)
+
+
+def test_similitud_empate_gana_la_primera():
+    claves = ['CERVEZA B', 'CERVEZA A', 'CERVEZA A']
+    assert IndiceSimilitud(claves).mejor('CERVEZA A', 0.6) == 1
+    assert IndiceSimilitud(['AGUA X', 'AGUA Y']).mejor('AGUA Z', 0.6) == 0
+
+
+def _buscar_lineal(tabla, nombre, min_contenido):
+    if nombre in tabla:
+        return tabla[nombre]
+    for clave, valor in tabla.items():
+        if clave in nombre or (len(nombre) >= min_contenido and nombre in clave):
+            return valor
+    return None
+
+
+@pytest.mark.parametrize('semilla', range(5))
+@pytest.mark.parametrize('min_contenido', [0, 3])
+def test_tabla_nombres_como_el_bucle(semilla, min_contenido):
+    claves = _textos(semilla, 40)
+    tabla_dict = {clave: i for i, clave in enumerate(claves)}
+    tabla = TablaNombres(tabla_dict, min_contenido=min_contenido)
+
+    for nombre in _textos(semilla + 100, 200, maximo=12):
+        assert tabla.buscar(nombre) == _buscar_lineal(tabla_dict, nombre, min_contenido)
+        esperadas = tuple(c for c in tabla_dict
+                          if c in nombre or (len(nombre) >= min_contenido and nombre in c))
+        assert tabla.relacionadas(nombre) == esperadas
+
+
+def test_tabla_nombres_sobrevive_a_pickle():
+    tabla = TablaNombres({'DEBORA': 0.01, 'JAIME FERNANDEZ': 0.19})
+    assert tabla.buscar('4T25 JAIME FERNANDEZ') == 0.19
+    copia = pickle.loads(pickle.dumps(tabla))
+    assert copia.buscar('4T25 JAIME FERNANDEZ') == 0.19
+    assert copia.relacionadas('DEBORAH GARCIA') == ('DEBORA',)
@@ -0,0 +1,29 @@
+"""
+Tests de la salida JSONL (salidas.jsonl): tiempos por etapa del pipeline
+y por método PDF en cada registro.
+
+Creado: 19/10/2026
+"""
+import json
+from pathlib import Path
+
+import main
+from salidas import EscritorJSONL
+
+MUESTRA = Path(__file__).resolve().parent.parent / 'samples' / '2263 2T25 0613 CERES RC.pdf'
+
+
+def test_registro_con_tiempos_por_etapa(tmp_path):
+    etapas = []
+    factura = main.procesar_factura(MUESTRA, {}, notificar_etapa=etapas.append)
+
+    ruta = tmp_path / 'facturas.jsonl'
+    with EscritorJSONL(ruta) as salida:
+        salida.escribir(factura, posicion=0)
+    tiempos = json.loads(ruta.read_text(encoding='utf-8'))['tiempos']
+
+    for nombre in ('extractor', 'pdf', 'cabecera', 'lineas', 'categorizacion', 'validacion'):
+        assert nombre in etapas
+        assert tiempos[f'etapa:{nombre}'] >= 0
+    assert any(clave.startswith('pdf:') for clave in tiempos)
+    assert tiempos['salida'] >= 0
@@ -0,0 +1,52 @@
+"""
+Tests de la instrumentación de patrones (extractores.patrones): los
+contadores son por factura y los totales solo suman lo volcado.
+
+Creado: 19/10/2026
+"""
+import re
+
+import pytest
+
+from extractores import patrones
+
+
+@pytest.fixture
+def instrumentacion():
+    patrones.activar_instrumentacion(True)
+    patrones.ESTADISTICAS_PATRONES.clear()
+    patrones.TOTALES_PATRONES.clear()
+    yield
+    patrones.activar_instrumentacion(False)
+    patrones.ESTADISTICAS_PATRONES.clear()
+    patrones.TOTALES_PATRONES.clear()
+
+
+def _usar(veces):
+    patron = patrones.obtener_patron({'total': re.compile(r'\d+')}, 'PRUEBA', 'total')
+    for _ in range(veces):
+        patron.search('TOTAL 12')
+
+
+def test_cada_factura_cuenta_solo_sus_llamadas(instrumentacion):
+    patrones.reiniciar_estadisticas()
+    _usar(3)
+    primera = patrones.volcar_estadisticas()
+    patrones.acumular_estadisticas(primera)
+
+    patrones.reiniciar_estadisticas()
+    _usar(2)
+    segunda = patrones.volcar_estadisticas()
+    patrones.acumular_estadisticas(segunda)
+
+    assert primera['PRUEBA.total'][0] == 3
+    assert segunda['PRUEBA.total'][0] == 2
+    assert patrones.TOTALES_PATRONES['PRUEBA.total'][0] == 5
+
+
+def test_lo_que_deja_una_factura_cortada_no_pasa_a_la_siguiente(instrumentacion):
+    _usar(4)  # factura que termina en excepción sin volcar
+    patrones.reiniciar_estadisticas()
+    _usar(1)
+    assert patrones.volcar_estadisticas()['PRUEBA.total'][0] == 1
+    assert patrones.TOTALES_PATRONES == {}
@@ -0,0 +1,39 @@
+"""
+Tests de los overlays compilados (src/facturas/patterns_loader.py).
+
+Creado: 19/10/2026
+"""
+import pickle
+
+from facturas.patterns_loader import compile_overlay, segment_lines
+
+LINEAS = ['Cabecera', 'a', 'Concepto x', 'linea 1', 'linea 2', 'TOTAL 3', 'pie']
+
+
+def _descripciones(filas):
+    return [f['descripcion'] for f in filas]
+
+
+def test_anclas_literales_y_regex():
+    programa = compile_overlay({'lines': {'start_after': ['(?i)^concepto'], 'stop_before': ['total']}})
+    assert programa.errors == []
+    assert _descripciones(segment_lines(LINEAS, programa)) == ['linea 1', 'linea 2']
+
+
+def test_entrada_invalida_se_descarta_sola():
+    programa = compile_overlay({'lines': {'start_after': ['(?i)^DESCRIP(', 'CONCEPTO'],
+                                          'stop_before': ['TOTAL']}})
+    assert len(programa.errors) == 1 and 'DESCRIP(' in programa.errors[0]
+    assert _descripciones(segment_lines(LINEAS, programa)) == ['linea 1', 'linea 2']
+
+
+def test_ancla_sin_entradas_validas_no_abre_el_bloque():
+    programa = compile_overlay({'lines': {'start_after': ['(?i)^DESCRIP(']}})
+    assert segment_lines(LINEAS, programa) == []
+
+
+def test_errores_no_se_duplican_al_recargar_de_la_cache():
+    programa = compile_overlay({'lines': {'start_after': ['(?i)^DESCRIP(', 'CONCEPTO']}})
+    recargado = pickle.loads(pickle.dumps(programa))
+    recargado.compiled
+    assert recargado.errors == programa.errors
@@ -0,0 +1,92 @@
+"""
+Tests del motor de reglas (nucleo.reglas): VersionesPorFecha y MotorReglas.
+
+Creado: 19/10/2026
+"""
+from datetime import date, timedelta
+
+from nucleo.reglas import MotorReglas, Regla, VersionesPorFecha
+
+
+def _regla(patron, categoria, tipo='SUBSTR', prioridad=10, desde=None, hasta=None):
+    return Regla.from_dict({
+        'Proveedor': 'CERES', 'ArticuloPattern': patron, 'Categoria': categoria,
+        'TipoMatch': tipo, 'Prioridad': prioridad, 'ValidaDesde': desde, 'ValidaHasta': hasta,
+    })
+
+
+# =============================================================================
+# VersionesPorFecha
+# =============================================================================
+
+def test_versiones_elige_la_vigente_en_la_fecha():
+    versiones = VersionesPorFecha()
+    versiones.agregar('2024', date(2024, 1, 1), date(2024, 12, 31))
+    versiones.agregar('2025', date(2025, 1, 1))
+    assert versiones.en(date(2023, 6, 1)) is None
+    assert versiones.en(date(2024, 6, 1)) == '2024'
+    assert versiones.en(date(2025, 6, 1)) == '2025'
+
+
+def test_versiones_sin_fecha_nunca_devuelve_una_caducada():
+    versiones = VersionesPorFecha()
+    versiones.agregar('caducada', date(2000, 1, 1), date(2000, 12, 31))
+    assert versiones.en() is None
+    versiones.agregar('abierta', date.today() + timedelta(days=30))
+    assert versiones.en() == 'abierta'
+
+
+def test_versiones_mismo_inicio():
+    ultima, primera = VersionesPorFecha(), VersionesPorFecha(gana_primera=True)
+    for versiones in (ultima, primera):
+        versiones.agregar('A', date(2025, 1, 1))
+        versiones.agregar('B', date(2025, 1, 1))
+    assert ultima.en(date(2025, 2, 1)) == 'B'
+    assert primera.en(date(2025, 2, 1)) == 'A'
+
+
+def test_versiones_cerradas_solapadas():
+    versiones = VersionesPorFecha()
+    versiones.agregar('larga', date(2025, 1, 1), date(2025, 12, 31))
+    versiones.agregar('corta', date(2025, 3, 1), date(2025, 3, 31))
+    assert versiones.en(date(2025, 3, 15)) == 'corta'
+    assert versiones.en(date(2025, 6, 1)) == 'larga'
+
+
+# =============================================================================
+# MotorReglas
+# =============================================================================
+
+def test_motor_prioridad_y_tipo_de_match():
+    motor = MotorReglas([
+        _regla('CERVEZA', 'BEBIDAS', prioridad=5),
+        _regla('CERVEZA ALHAMBRA 1/3', 'CERVEZA', tipo='EXACT', prioridad=5),
+        _regla(r'ALHAMBRA\s+\d', 'OTRA', tipo='REGEX', prioridad=1),
+    ])
+    assert motor.buscar('CERES', 'Cerveza Alhambra 1/3').categoria == 'OTRA'
+    assert motor.buscar('CERES', 'CERVEZA ALHAMBRA 1/3 ESPECIAL').categoria == 'OTRA'
+    assert motor.buscar('CERES', 'CERVEZA MAHOU').categoria == 'BEBIDAS'
+    assert motor.buscar('Ceres', 'AGUA') is None
+    assert motor.buscar('OTRO', 'CERVEZA') is None
+
+
+def test_motor_patrones_repetidos_sin_fechas_respeta_el_orden():
+    # Regresión: dos filas 'BOX' sin fechas no son versiones; gana la de Prioridad 1
+    for tipo in ('SUBSTR', 'EXACT', 'REGEX'):
+        motor = MotorReglas([
+            _regla('BOX', 'ALTA', tipo=tipo, prioridad=1),
+            _regla('BOX', 'BAJA', tipo=tipo, prioridad=9),
+        ])
+        assert motor.buscar('CERES', 'BOX').categoria == 'ALTA', tipo
+
+
+def test_motor_versiones_por_fecha_de_la_factura():
+    motor = MotorReglas([
+        _regla('BOX', 'VIEJA', desde='2024-01-01', hasta='2024-12-31'),
+        _regla('BOX', 'NUEVA', desde='2025-01-01'),
+        _regla('BOX', 'REPETIDA', desde='2025-01-01'),
+    ])
+    assert motor.buscar('CERES', 'BOX', fecha=date(2024, 5, 1)).categoria == 'VIEJA'
+    assert motor.buscar('CERES', 'BOX', fecha=date(2025, 5, 1)).categoria == 'NUEVA'
+    assert motor.buscar('CERES', 'BOX', fecha=date(2023, 5, 1)) is None
+    assert motor.buscar('CERES', 'BOX').categoria == 'NUEVA'
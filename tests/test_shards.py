@@ -0,0 +1,59 @@
+"""
+Tests de los bloqueos de shard (nucleo.shards): un solo proceso reclama
+cada shard, y un .lock abandonado se puede retomar.
+
+Creado: 19/10/2026
+"""
+from concurrent.futures import ThreadPoolExecutor
+import os
+import socket
+import time
+
+from nucleo import shards
+
+
+def test_solo_un_reclamante_gana_el_shard(tmp_path):
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        ganadores = list(pool.map(lambda _: shards.reclamar_shard(tmp_path, 0), range(16)))
+    assert ganadores.count(True) == 1
+    assert shards.leer_bloqueo(tmp_path, 0).startswith(socket.gethostname())
+
+
+def test_shard_reclamado_o_terminado_no_se_reclama(tmp_path):
+    assert shards.reclamar_shard(tmp_path, 1)
+    assert not shards.reclamar_shard(tmp_path, 1)
+
+    shards.ruta_resultado(tmp_path, 2).write_text('', encoding='utf-8')
+    assert not shards.reclamar_shard(tmp_path, 2)
+
+
+def test_liberar_permite_reclamar_de_nuevo(tmp_path):
+    assert shards.reclamar_shard(tmp_path, 0)
+    shards.liberar_shard(tmp_path, 0)
+    assert shards.reclamar_shard(tmp_path, 0)
+
+
+def test_bloqueo_de_pid_muerto_se_retoma(tmp_path, monkeypatch):
+    ruta = shards.ruta_bloqueo(tmp_path, 0)
+    ruta.write_text(f'{socket.gethostname()} pid=424242 2026-10-19T10:00:00\n', encoding='utf-8')
+    monkeypatch.setattr(shards, '_proceso_vivo', lambda pid: False)
+
+    assert shards.bloqueo_abandonado(tmp_path, 0)
+    assert shards.reclamar_shard(tmp_path, 0)
+    assert f'pid={os.getpid()}' in shards.leer_bloqueo(tmp_path, 0)
+
+
+def test_bloqueo_de_otra_maquina_solo_caduca_sin_renovar(tmp_path):
+    ruta = shards.ruta_bloqueo(tmp_path, 0)
+    ruta.write_text('otra-maquina pid=1 2026-10-19T10:00:00\n', encoding='utf-8')
+    assert not shards.reclamar_shard(tmp_path, 0)
+
+    antiguo = time.time() - shards.SHARD_BLOQUEO_CADUCIDAD_SEGUNDOS - 10
+    os.utime(ruta, (antiguo, antiguo))
+    assert shards.bloqueo_abandonado(tmp_path, 0)
+
+    shards.renovar_bloqueo(tmp_path, 0)
+    assert not shards.bloqueo_abandonado(tmp_path, 0)
+
+    os.utime(ruta, (antiguo, antiguo))
+    assert shards.reclamar_shard(tmp_path, 0)